@@ -0,0 +1 @@
+"""生成流程的性能基准，运行方式见 README「性能基准」"""
@@ -0,0 +1,79 @@
+import json
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+# 合成数据的形态：
+# mixed  - 扁平宽表，BIGINT/DOUBLE/BOOLEAN/TEXT/时间戳字符串轮流出现
+# nested - 每 5 个字段中有一个嵌套对象、一个数组
+# dirty  - 类型漂移、null、缺失字段，约 1% 的消息无法解析
+SHAPES = ('mixed', 'nested', 'dirty')
+DIRTY_RATE = 0.01
+
+
+def _value(rng: random.Random, column: int, row: int) -> Any:
+    kind = column % 5
+    if kind == 0:
+        return row * 1000 + column
+    if kind == 1:
+        return round(rng.random() * 10000, 4)
+    if kind == 2:
+        return rng.random() < 0.5
+    if kind == 3:
+        return f"v{rng.randrange(1 << 30):x}"
+    return f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00:00"
+
+
+def generate_message(rng: random.Random, row: int, field_count: int, shape: str = 'mixed') -> Dict[str, Any]:
+    message = {}
+    for column in range(field_count):
+        name = f"f{column}"
+        if shape == 'nested' and column % 5 == 3:
+            message[name] = {'id': row, 'tags': [column, row % 7], 'attrs': {'k': f"v{column}"}}
+        elif shape == 'nested' and column % 5 == 4:
+            message[name] = [_value(rng, c, row) for c in range(3)]
+        elif shape == 'dirty':
+            roll = rng.random()
+            if roll < 0.05:
+                continue  # 缺失字段
+            if roll < 0.10:
+                message[name] = None
+            elif roll < 0.15:
+                message[name] = str(_value(rng, column, row))  # 数值以字符串形式出现
+            else:
+                message[name] = _value(rng, column, row)
+        else:
+            message[name] = _value(rng, column, row)
+    return message
+
+
+def generate_messages(count: int, field_count: int, shape: str = 'mixed', seed: int = 0) -> List[Dict[str, Any]]:
+    """生成 count 条消息，相同参数与 seed 结果相同"""
+    if shape not in SHAPES:
+        raise ValueError(f"未知的数据形态: {shape}，可选: {', '.join(SHAPES)}")
+    rng = random.Random(seed)
+    return [generate_message(rng, row, field_count, shape) for row in range(count)]
+
+
+def generate_payloads(count: int, field_count: int, shape: str = 'mixed', seed: int = 0) -> List[bytes]:
+    """生成 Kafka 消息体；dirty 形态中混入截断的 JSON 与非 UTF-8 字节"""
+    rng = random.Random(seed)
+    payloads = []
+    for row, message in enumerate(generate_messages(count, field_count, shape, seed)):
+        payload = json.dumps(message).encode('utf-8')
+        if shape == 'dirty' and rng.random() < DIRTY_RATE:
+            payload = payload[:len(payload) // 2] if row % 2 else b'\xff' + payload
+        payloads.append(payload)
+    return payloads
+
+
+def generate_records(count: int, field_count: int, shape: str = 'mixed',
+                     seed: int = 0) -> List[Tuple[Optional[str], bytes]]:
+    """生成 (key, 消息体) 列表"""
+    return [(str(row), payload) for row, payload in enumerate(generate_payloads(count, field_count, shape, seed))]
+
+
+def write_demo_file(path: str, count: int, field_count: int, shape: str = 'mixed', seed: int = 0) -> None:
+    """写出 load_from_file 使用的 key:<key>,value:<json> 格式文件"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for key, payload in generate_records(count, field_count, shape, seed):
+            f.write(f"key:{key},value:{payload.decode('utf-8', errors='replace')}\n")
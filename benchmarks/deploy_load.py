@@ -0,0 +1,194 @@
+import logging
+import math
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import click
+import yaml
+
+from kafka_flink_tool.models import AliyunFlinkJob, FlinkSQLRecord, KafkaTopicConfig
+from kafka_flink_tool.service import AliyunFlinkService
+from .datagen import write_demo_file
+from .fake_flink import PROFILES, FakeFlinkProfile, FakeFlinkServer, HttpFlinkClient
+
+
+class InMemoryDAO:
+    """部署流程用到的 HologresDAO 接口的内存实现，压测时不依赖数据库"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: Dict[int, FlinkSQLRecord] = {}
+        self._jobs: Dict[int, AliyunFlinkJob] = {}
+        self._tables = set()
+
+    def get_topic_config_by_name(self, topic_name: str) -> KafkaTopicConfig:
+        return KafkaTopicConfig(id=abs(hash(topic_name)) % 10 ** 9, topic_name=topic_name,
+                                kafka_brokers='localhost:9092', data_format='json', is_active=True)
+
+    def get_latest_topic_profile(self, topic_name: str):
+        return None
+
+    def table_exists(self, table_name: str) -> bool:
+        return table_name in self._tables
+
+    def create_table(self, ddl: str) -> None:
+        # 表在保存 SQL 记录时登记
+        pass
+
+    def save_flink_sql_record(self, record: FlinkSQLRecord) -> int:
+        with self._lock:
+            record_id = len(self._records) + 1
+            self._records[record_id] = record.model_copy(update={'id': record_id})
+            self._tables.add(record.sink_table_name)
+        return record_id
+
+    def get_flink_sql_record_by_hash(self, sql_hash: str) -> Optional[FlinkSQLRecord]:
+        with self._lock:
+            matches = [r for r in self._records.values() if r.sql_hash == sql_hash]
+        return matches[-1] if matches else None
+
+    def get_latest_aliyun_flink_job_by_record(self, sql_record_id: int) -> Optional[AliyunFlinkJob]:
+        with self._lock:
+            jobs = [j for j in self._jobs.values() if j.sql_record_id == sql_record_id]
+        return jobs[-1] if jobs else None
+
+    def create_aliyun_flink_job(self, job: AliyunFlinkJob) -> int:
+        with self._lock:
+            job_id = len(self._jobs) + 1
+            self._jobs[job_id] = job.model_copy(update={'id': job_id})
+        return job_id
+
+    def update_aliyun_flink_job_step(self, job_id: int, step: str, status: str, draft_id: Optional[str] = None,
+                                     deployment_id: Optional[str] = None,
+                                     flink_job_id: Optional[str] = None) -> None:
+        with self._lock:
+            job = self._jobs[job_id]
+            job.step, job.status = step, status
+            job.draft_id = draft_id or job.draft_id
+            job.deployment_id = deployment_id or job.deployment_id
+            job.job_id = flink_job_id or job.job_id
+
+    def update_aliyun_flink_job_status(self, job_id: int, status: str, error_message: Optional[str] = None) -> None:
+        with self._lock:
+            self._jobs[job_id].status = status
+            self._jobs[job_id].error_message = error_message
+
+    def close(self) -> None:
+        pass
+
+
+@dataclass
+class LoadTestResult:
+    flows: int
+    concurrency: int
+    latencies: List[float] = field(default_factory=list)  # 成功流程的端到端耗时（秒）
+    errors: List[str] = field(default_factory=list)
+    calls: Counter = field(default_factory=Counter)  # 服务端按接口统计的请求数
+    responses: Counter = field(default_factory=Counter)  # 服务端按 HTTP 状态码统计
+    elapsed: float = 0.0
+
+    @property
+    def calls_per_deploy(self) -> float:
+        return sum(self.calls.values()) / self.flows if self.flows else 0.0
+
+    def percentile(self, q: float) -> float:
+        """nearest-rank 百分位"""
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[max(math.ceil(len(ordered) * q) - 1, 0)]
+
+
+def _write_config(path: Path, endpoint: str) -> None:
+    config = {
+        'hologres': {'host': 'localhost', 'vpc_host': 'localhost', 'port': 80, 'database': 'loadtest',
+                     'user': 'loadtest', 'password': 'loadtest'},
+        'aliyun_flink': {'workspace_id': 'ws-loadtest', 'namespace': 'loadtest', 'access_key_id': 'fake',
+                         'access_key_secret': 'fake', 'endpoint': endpoint},
+    }
+    path.write_text(yaml.safe_dump(config), encoding='utf-8')
+
+
+def run_load_test(flows: int, concurrency: int, profile: FakeFlinkProfile, poll_interval: float = 1.0,
+                  field_count: int = 20, seed: Optional[int] = None) -> LoadTestResult:
+    """启动模拟服务，以 concurrency 个线程执行 flows 次 generate_and_deploy
+
+    每个流程使用独立的 Topic、服务实例与内存 DAO，只有 Flink API 请求走模拟服务。
+    poll_interval 覆盖客户端的草稿/部署/作业轮询间隔。
+    """
+    result = LoadTestResult(flows=flows, concurrency=concurrency)
+    with tempfile.TemporaryDirectory() as work_dir, FakeFlinkServer(profile, seed=seed) as server:
+        work_dir = Path(work_dir)
+        config_path = work_dir / 'config.yaml'
+        _write_config(config_path, server.url)
+        demo_file = work_dir / 'demo.txt'
+        write_demo_file(str(demo_file), 10, field_count)
+        lock = threading.Lock()
+
+        def deploy(index: int) -> None:
+            service = AliyunFlinkService(str(config_path))
+            service.dao = InMemoryDAO()
+            service.flink_client = HttpFlinkClient(service.flink_config)
+            service.flink_client.DRAFT_POLL_INTERVAL = poll_interval
+            service.flink_client.POLL_INTERVAL = poll_interval
+            started = time.perf_counter()
+            try:
+                service.generate_and_deploy(f"loadtest_{index}", demo_file=str(demo_file))
+            except Exception as e:
+                with lock:
+                    result.errors.append(str(e))
+                return
+            with lock:
+                result.latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(deploy, range(flows)))
+        result.elapsed = time.perf_counter() - started
+        result.calls = Counter(server.calls)
+        result.responses = Counter(server.responses)
+    return result
+
+
+def format_result(result: LoadTestResult) -> str:
+    lines = [
+        f"流程: {result.flows}，并发: {result.concurrency}，成功: {len(result.latencies)}，"
+        f"失败: {len(result.errors)}，总耗时: {result.elapsed:.1f} 秒",
+        "端到端耗时: " + ", ".join(
+            f"p{int(q * 100)}={result.percentile(q):.2f}s" for q in (0.5, 0.9, 0.99)
+        ) + f", max={max(result.latencies, default=0):.2f}s",
+        f"每次部署 API 调用: {result.calls_per_deploy:.1f}",
+    ]
+    for action, count in sorted(result.calls.items()):
+        lines.append(f"  {action:<28} {count:>6} ({count / result.flows:.1f}/部署)")
+    lines.append("HTTP 状态: " + ", ".join(f"{status}={count}" for status, count in sorted(result.responses.items())))
+    for error, count in Counter(result.errors).most_common(5):
+        lines.append(f"  [{count}] {error}")
+    return "\n".join(lines)
+
+
+@click.command()
+@click.option('--flows', default=20, help='部署流程总数')
+@click.option('--concurrency', default=5, help='并发执行的流程数')
+@click.option('--profile', 'profile_name', type=click.Choice(list(PROFILES)), default='realistic',
+              help='模拟服务的延迟、失败与限流配置')
+@click.option('--poll-interval', default=1.0, help='客户端轮询间隔（秒），覆盖默认的 2/5 秒')
+@click.option('--fields', 'field_count', default=20, help='生成 SQL 的字段数')
+@click.option('--seed', default=None, type=int, help='模拟服务随机种子')
+def main(flows: int, concurrency: int, profile_name: str, poll_interval: float, field_count: int,
+         seed: Optional[int]):
+    """对本地模拟的 Flink OpenAPI 并发执行 generate_and_deploy，输出耗时分位数与每次部署的 API 调用数"""
+    # 并发流程的日志交错输出没有参考价值，失败原因汇总在结果中
+    logging.getLogger('kafka_flink_tool').setLevel(logging.CRITICAL)
+    result = run_load_test(flows, concurrency, PROFILES[profile_name], poll_interval, field_count, seed)
+    click.echo(format_result(result))
+
+
+if __name__ == '__main__':
+    main()
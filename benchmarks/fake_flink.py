@@ -0,0 +1,273 @@
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter
+from dataclasses import dataclass, replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+import click
+
+from kafka_flink_tool.flink_client import AliyunFlinkClient
+
+
+@dataclass(frozen=True)
+class FakeFlinkProfile:
+    """模拟服务的延迟、失败、限流与状态流转耗时"""
+    latency_ms: float = 0  # 每个请求的基础延迟
+    jitter_ms: float = 0  # 在基础延迟上随机增加 0 ~ jitter_ms
+    error_rate: float = 0.0  # 请求返回 HTTP 500 的概率
+    rate_limit: float = 0  # 每秒允许的请求数（令牌桶），超出返回 HTTP 429；0 表示不限流
+    draft_seconds: float = 0  # 草稿从 RUNNING 到 SUCCESS 的耗时
+    deploy_seconds: float = 0  # 部署从 DEPLOYING 到 RUNNING 的耗时
+    start_seconds: float = 0  # 作业从 STARTING 到 RUNNING 的耗时
+    deploy_failure_rate: float = 0.0  # 部署最终为 FAILED 的概率
+    job_failure_rate: float = 0.0  # 作业启动最终为 FAILED 的概率
+
+
+PROFILES: Dict[str, FakeFlinkProfile] = {
+    'fast': FakeFlinkProfile(),
+    'realistic': FakeFlinkProfile(latency_ms=80, jitter_ms=120, draft_seconds=2, deploy_seconds=8,
+                                  start_seconds=10),
+    'flaky': FakeFlinkProfile(latency_ms=80, jitter_ms=400, error_rate=0.05, draft_seconds=2, deploy_seconds=8,
+                              start_seconds=10, deploy_failure_rate=0.02, job_failure_rate=0.02),
+    'throttled': FakeFlinkProfile(latency_ms=80, jitter_ms=120, rate_limit=20, draft_seconds=2, deploy_seconds=8,
+                                  start_seconds=10),
+}
+
+
+class FakeFlinkServer:
+    """本地模拟的 Flink OpenAPI 服务，实现 AliyunFlinkClient 使用的草稿/部署/启动/查询接口
+
+    请求为 POST {url}/{Action}，请求体与 SDK 调用的 body 相同，响应为 {'success', 'data', 'message'}。
+    草稿、部署、作业的状态按创建后经过的时间推进，不需要后台线程。
+    通过 HttpFlinkClient 访问。
+    """
+
+    def __init__(self, profile: FakeFlinkProfile = PROFILES['fast'], host: str = '127.0.0.1', port: int = 0,
+                 seed: Optional[int] = None):
+        self.profile = profile
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._drafts: Dict[str, float] = {}
+        # deployment_id -> [部署时间, 是否失败, 并行度]
+        self._deployments: Dict[str, list] = {}
+        # job_id -> [启动时间, 是否失败, 停止时间]
+        self._jobs: Dict[str, list] = {}
+        self.calls: Counter = Counter()
+        self.responses: Counter = Counter()  # HTTP 状态码计数
+        self._tokens = profile.rate_limit
+        self._refilled_at = time.monotonic()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'FakeFlinkServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fake-flink', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'FakeFlinkServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                action = self.path.strip('/')
+                length = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(length) or b'{}')
+                status, payload = server.handle(action, body)
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def handle(self, action: str, body: dict) -> Tuple[int, dict]:
+        """处理一次请求，返回 (HTTP 状态码, 响应体)"""
+        profile = self.profile
+        with self._lock:
+            self.calls[action] += 1
+            throttled = not self._take_token()
+            failed = self._random.random() < profile.error_rate
+            delay = (profile.latency_ms + self._random.random() * profile.jitter_ms) / 1000
+        if delay:
+            time.sleep(delay)
+
+        if throttled:
+            status, payload = 429, {'success': False, 'code': 'Throttling', 'message': '请求过于频繁'}
+        elif failed:
+            status, payload = 500, {'success': False, 'code': 'InternalError', 'message': '模拟的服务端错误'}
+        else:
+            handler = getattr(self, f"_action_{action}", None)
+            if handler is None:
+                status, payload = 404, {'success': False, 'message': f"未实现的接口: {action}"}
+            else:
+                with self._lock:
+                    status, payload = 200, handler(body)
+        with self._lock:
+            self.responses[status] += 1
+        return status, payload
+
+    def _take_token(self) -> bool:
+        if not self.profile.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.profile.rate_limit,
+                           self._tokens + (now - self._refilled_at) * self.profile.rate_limit)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    @staticmethod
+    def _ok(data: dict) -> dict:
+        return {'success': True, 'data': data}
+
+    @staticmethod
+    def _not_found(kind: str, resource_id: str) -> dict:
+        return {'success': False, 'message': f"{kind}不存在: {resource_id}"}
+
+    def _action_CreateDeploymentDraft(self, body: dict) -> dict:
+        draft_id = f"draft-{uuid.uuid4().hex[:12]}"
+        self._drafts[draft_id] = time.monotonic()
+        return self._ok({'id': draft_id})
+
+    def _action_GetDeploymentDraftResult(self, body: dict) -> dict:
+        created_at = self._drafts.get(body.get('id'))
+        if created_at is None:
+            return self._not_found('草稿', body.get('id'))
+        done = time.monotonic() - created_at >= self.profile.draft_seconds
+        return self._ok({'status': 'SUCCESS' if done else 'RUNNING'})
+
+    def _action_DeployDeploymentDraft(self, body: dict) -> dict:
+        if body.get('id') not in self._drafts:
+            return self._not_found('草稿', body.get('id'))
+        deployment_id = f"deployment-{uuid.uuid4().hex[:12]}"
+        failed = self._random.random() < self.profile.deploy_failure_rate
+        self._deployments[deployment_id] = [time.monotonic(), failed, 1]
+        return self._ok({'id': deployment_id})
+
+    def _action_GetDeployment(self, body: dict) -> dict:
+        deployment = self._deployments.get(body.get('id'))
+        if deployment is None:
+            return self._not_found('部署', body.get('id'))
+        deployed_at, failed, parallelism = deployment
+        if time.monotonic() - deployed_at < self.profile.deploy_seconds:
+            status = 'DEPLOYING'
+        else:
+            status = 'FAILED' if failed else 'RUNNING'
+        return self._ok({
+            'status': status,
+            'streaming_resource_setting': {'basic_resource_setting': {'parallelism': parallelism}}
+        })
+
+    def _action_UpdateDeployment(self, body: dict) -> dict:
+        deployment = self._deployments.get(body.get('id'))
+        if deployment is None:
+            return self._not_found('部署', body.get('id'))
+        resource = body.get('streaming_resource_setting', {}).get('basic_resource_setting', {})
+        deployment[2] = resource.get('parallelism', deployment[2])
+        return self._ok({})
+
+    def _action_StartJob(self, body: dict) -> dict:
+        if body.get('deployment_id') not in self._deployments:
+            return self._not_found('部署', body.get('deployment_id'))
+        job_id = f"job-{uuid.uuid4().hex[:12]}"
+        failed = self._random.random() < self.profile.job_failure_rate
+        self._jobs[job_id] = [time.monotonic(), failed, None]
+        return self._ok({'id': job_id})
+
+    def _action_GetJob(self, body: dict) -> dict:
+        job = self._jobs.get(body.get('id'))
+        if job is None:
+            return self._not_found('作业', body.get('id'))
+        started_at, failed, stopped_at = job
+        if stopped_at is not None:
+            status = 'STOPPED'
+        elif time.monotonic() - started_at < self.profile.start_seconds:
+            status = 'STARTING'
+        else:
+            status = 'FAILED' if failed else 'RUNNING'
+        return self._ok({'status': status})
+
+    def _action_StopJob(self, body: dict) -> dict:
+        job = self._jobs.get(body.get('id'))
+        if job is None:
+            return self._not_found('作业', body.get('id'))
+        job[2] = time.monotonic()
+        return self._ok({})
+
+
+class HttpFlinkClient(AliyunFlinkClient):
+    """以 JSON 直接 POST 到 {endpoint}/{Action} 的客户端，不做签名，只用于访问 FakeFlinkServer"""
+
+    def _request(self, action: str, params: dict) -> dict:
+        body = {
+            'workspace': self.config.workspace_id,
+            'namespace': self.config.namespace,
+            **params
+        }
+        request = urllib.request.Request(
+            f"{self.config.endpoint.rstrip('/')}/{action}",
+            data=json.dumps(body).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+            method='POST'
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"HTTP {e.code}: {e.read().decode('utf-8', errors='replace')}")
+
+
+@click.command()
+@click.option('--profile', 'profile_name', type=click.Choice(list(PROFILES)), default='realistic',
+              help='延迟、失败与限流配置')
+@click.option('--host', default='127.0.0.1')
+@click.option('--port', default=18080, type=int)
+@click.option('--rate-limit', default=None, type=float, help='覆盖配置中的每秒请求数上限')
+def main(profile_name: str, host: str, port: int, rate_limit: Optional[float]):
+    """启动本地模拟的 Flink OpenAPI 服务，以 HttpFlinkClient 访问"""
+    profile = PROFILES[profile_name]
+    if rate_limit is not None:
+        profile = replace(profile, rate_limit=rate_limit)
+    server = FakeFlinkServer(profile, host, port).start()
+    click.echo(f"模拟 Flink OpenAPI 服务已启动: {server.url}（{profile_name}），Ctrl+C 退出")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        click.echo(f"请求统计: {dict(server.calls)}")
+
+
+if __name__ == '__main__':
+    main()
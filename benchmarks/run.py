@@ -0,0 +1,197 @@
+import gc
+import json
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import click
+
+from kafka_flink_tool.config import HologresConfig
+from kafka_flink_tool.ddl_generator import DDLGenerator
+from kafka_flink_tool.kafka_client import KafkaClient
+from kafka_flink_tool.sql_generator import FlinkSQLGenerator
+from kafka_flink_tool.type_inference import TypeInferencer
+from .datagen import generate_messages, generate_payloads, write_demo_file
+
+BASELINE_DIR = Path(__file__).resolve().parent / 'baselines'
+MESSAGE_COUNTS = (10, 1_000, 100_000)
+FIELD_COUNTS = (10, 500, 5_000)
+# 消息数 × 字段数超过该值的组合默认跳过，100k × 5000 需要数十 GB 内存
+DEFAULT_MAX_CELLS = 5_000_000
+DEFAULT_THRESHOLD = 0.2
+# 绝对差值低于该秒数时视为计时噪声，不算回退
+NOISE_FLOOR_S = 0.0001
+HOLOGRES_CONFIG = HologresConfig(
+    host='localhost', vpc_host='localhost', database='bench', user='bench', password='bench'
+)
+
+
+@dataclass
+class Case:
+    """一个基准用例；uses_messages 为 False 时只按字段数展开"""
+    name: str
+    shape: str
+    setup: Callable[[int, int, Path], object]
+    run: Callable[[object], object]
+    uses_messages: bool = True
+
+
+def _schema(field_count: int):
+    return TypeInferencer().infer_schema(generate_messages(10, field_count))
+
+
+def _setup_file(count: int, field_count: int, work_dir: Path) -> Tuple[str, int]:
+    path = work_dir / f"demo_{count}_{field_count}.txt"
+    write_demo_file(str(path), count, field_count, shape='dirty')
+    return str(path), count
+
+
+def _deserialize_all(payloads: List[bytes]) -> int:
+    deserialize = KafkaClient('localhost:9092', 'bench')._safe_json_deserializer
+    return sum(1 for payload in payloads if deserialize(payload) is not None)
+
+
+CASES = [
+    Case('infer_schema', 'mixed', lambda m, f, _: generate_messages(m, f, 'mixed'),
+         lambda messages: TypeInferencer().infer_schema(messages)),
+    Case('infer_schema', 'nested', lambda m, f, _: generate_messages(m, f, 'nested'),
+         lambda messages: TypeInferencer().infer_schema(messages)),
+    Case('infer_schema', 'dirty', lambda m, f, _: generate_messages(m, f, 'dirty'),
+         lambda messages: TypeInferencer().infer_schema(messages)),
+    Case('load_from_file', 'dirty', _setup_file,
+         lambda args: KafkaClient.load_records_from_file(*args)),
+    Case('safe_json_deserializer', 'dirty', lambda m, f, _: generate_payloads(m, f, 'dirty'),
+         _deserialize_all),
+    Case('ddl_generator', 'mixed', lambda m, f, _: _schema(f),
+         lambda schema: DDLGenerator().generate_hologres_ddl('bench_sink', schema), uses_messages=False),
+    Case('flink_sql_generator', 'mixed', lambda m, f, _: _schema(f),
+         lambda schema: FlinkSQLGenerator().generate_full_sql(
+             'bench', 'bench_sink', schema, 'localhost:9092', HOLOGRES_CONFIG
+         ), uses_messages=False),
+]
+
+
+def case_key(case: Case, message_count: Optional[int], field_count: int) -> str:
+    dims = f"m={message_count}/f={field_count}" if message_count is not None else f"f={field_count}"
+    return f"{case.name}/{case.shape}/{dims}"
+
+
+def measure(func: Callable[[], object], min_time: float = 0.2, min_repeat: int = 3,
+            max_repeat: int = 50) -> Dict[str, float]:
+    """重复执行直到累计 min_time 秒且至少 min_repeat 次，执行期间关闭 GC（与 timeit 一致）"""
+    durations = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while len(durations) < max_repeat and (len(durations) < min_repeat or sum(durations) < min_time):
+            started = time.perf_counter()
+            func()
+            durations.append(time.perf_counter() - started)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return {
+        'min_s': min(durations),
+        'median_s': statistics.median(durations),
+        'repeat': len(durations)
+    }
+
+
+def run_suite(message_counts=MESSAGE_COUNTS, field_counts=FIELD_COUNTS, max_cells: int = DEFAULT_MAX_CELLS,
+              case_filter: Optional[str] = None, min_time: float = 0.2,
+              echo: Callable[[str], None] = lambda line: None) -> Dict[str, dict]:
+    """执行所有用例，返回 {用例键: 计时}"""
+    results = {}
+    # 脏数据会产生大量解析失败的警告，基准只测量解析本身
+    package_logger = logging.getLogger('kafka_flink_tool')
+    previous_level = package_logger.level
+    package_logger.setLevel(logging.ERROR)
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            for case in CASES:
+                if case_filter and case_filter not in f"{case.name}/{case.shape}":
+                    continue
+                for field_count in field_counts:
+                    for message_count in (message_counts if case.uses_messages else (None,)):
+                        key = case_key(case, message_count, field_count)
+                        if message_count is not None and message_count * field_count > max_cells:
+                            echo(f"{key:<50} 跳过（超过 --max-cells）")
+                            continue
+                        data = case.setup(message_count or 0, field_count, Path(work_dir))
+                        results[key] = measure(lambda: case.run(data), min_time=min_time)
+                        echo(f"{key:<50} {results[key]['min_s'] * 1000:>12.3f} ms")
+                        del data
+    finally:
+        package_logger.setLevel(previous_level)
+    return results
+
+
+def compare(baseline: Dict[str, dict], current: Dict[str, dict],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Tuple[str, float, float, float]]:
+    """按最小耗时比较，返回变慢超过 threshold 的用例 (键, 基线秒数, 当前秒数, 比值)"""
+    regressions = []
+    for key, result in current.items():
+        if key not in baseline:
+            continue
+        before, after = baseline[key]['min_s'], result['min_s']
+        ratio = after / before if before else float('inf')
+        if ratio > 1 + threshold and after - before > NOISE_FLOOR_S:
+            regressions.append((key, before, after, ratio))
+    return regressions
+
+
+def _environment() -> dict:
+    return {'python': platform.python_version(), 'platform': platform.platform(), 'machine': platform.machine()}
+
+
+@click.command()
+@click.option('--messages', 'message_counts', multiple=True, type=int,
+              help=f"消息数，可多次指定，默认 {', '.join(map(str, MESSAGE_COUNTS))}")
+@click.option('--fields', 'field_counts', multiple=True, type=int,
+              help=f"字段数，可多次指定，默认 {', '.join(map(str, FIELD_COUNTS))}")
+@click.option('--max-cells', default=DEFAULT_MAX_CELLS, help='跳过消息数 × 字段数超过该值的组合')
+@click.option('--case', 'case_filter', default=None, help='只运行名称包含该字符串的用例，如 infer_schema/dirty')
+@click.option('--min-time', default=0.2, help='每个用例至少累计执行的秒数')
+@click.option('--save', default=None, help='把结果保存为基线，如 main（写入 benchmarks/baselines/main.json）或文件路径')
+@click.option('--compare', 'compare_with', default=None, help='与基线比较，变慢超过阈值时退出码为 1')
+@click.option('--threshold', default=DEFAULT_THRESHOLD, help='变慢比例阈值，默认 0.2 即 20%')
+def main(message_counts, field_counts, max_cells, case_filter, min_time, save, compare_with, threshold):
+    """运行生成流程的性能基准"""
+    results = run_suite(
+        message_counts or MESSAGE_COUNTS, field_counts or FIELD_COUNTS, max_cells, case_filter, min_time,
+        echo=click.echo
+    )
+
+    if save:
+        path = _baseline_path(save)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({'environment': _environment(), 'results': results}, indent=2), encoding='utf-8')
+        click.echo(f"基线已保存: {path}")
+
+    if compare_with:
+        baseline = json.loads(_baseline_path(compare_with).read_text(encoding='utf-8'))
+        if baseline.get('environment') != _environment():
+            click.echo(f"[WARNING] 基线环境不同: {baseline.get('environment')}", err=True)
+        regressions = compare(baseline['results'], results, threshold)
+        for key, before, after, ratio in regressions:
+            click.echo(f"[REGRESSION] {key}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms（{ratio:.2f}x）", err=True)
+        if regressions:
+            sys.exit(1)
+        click.echo(f"与基线相比没有超过 {threshold:.0%} 的性能回退")
+
+
+def _baseline_path(name: str) -> Path:
+    path = Path(name)
+    if path.suffix == '.json' or path.parent != Path('.'):
+        return path
+    return BASELINE_DIR / f"{name}.json"
+
+
+if __name__ == '__main__':
+    main()
@@ -6,16 +6,22 @@ CREATE TABLE IF NOT EXISTS kafka_topic_config (
     data_format TEXT NOT NULL DEFAULT 'json',
     description TEXT,
     is_active BOOLEAN NOT NULL DEFAULT true,
+    field_projection JSONB,
+    format_options JSONB,
     created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
 CREATE INDEX idx_kafka_topic_config_topic_name ON kafka_topic_config(topic_name);
 CREATE INDEX idx_kafka_topic_config_is_active ON kafka_topic_config(is_active);
+CREATE INDEX idx_kafka_topic_config_updated_at ON kafka_topic_config(updated_at, id);
 
 COMMENT ON TABLE kafka_topic_config IS 'Kafka Topic 配置信息表';
 COMMENT ON COLUMN kafka_topic_config.topic_name IS 'Kafka Topic 名称';
 COMMENT ON COLUMN kafka_topic_config.kafka_brokers IS 'Kafka Broker 地址列表，格式：host1:port1,host2:port2';
+COMMENT ON COLUMN kafka_topic_config.field_projection IS '字段投影规则：include/exclude 字段列表及 include_patterns/exclude_patterns 正则';
+COMMENT ON COLUMN kafka_topic_config.data_format IS '消息格式：json / csv / avro / protobuf';
+COMMENT ON COLUMN kafka_topic_config.format_options IS '消息格式参数：csv 的 columns/delimiter，avro 的 mode/registry_url/schema，protobuf 的 message_class/python_class';
 
 -- 创建 Flink SQL 记录表
 CREATE SEQUENCE IF NOT EXISTS flink_sql_record_id_seq;
@@ -32,10 +38,192 @@ CREATE TABLE IF NOT EXISTS flink_sql_record (
     inferred_schema JSONB,
     sample_count INTEGER NOT NULL DEFAULT 10,
     status TEXT NOT NULL DEFAULT 'generated',
+    flink_settings JSONB,
+    version INTEGER NOT NULL DEFAULT 1,
+    sql_hash TEXT,
+    stage_timings JSONB,
     created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
     deployed_at TIMESTAMPTZ,
     deprecated_at TIMESTAMPTZ
 );
 
-CREATE INDEX idx_flink_sql_record_topic_name ON flink_sql_record(topic_name);
-CREATE INDEX idx_flink_sql_record_status ON flink_sql_record(status);
+-- history 命令按 id 倒序 keyset 分页，过滤列与 id 组成复合索引
+CREATE INDEX idx_flink_sql_record_topic_name_id ON flink_sql_record(topic_name, id);
+CREATE INDEX idx_flink_sql_record_status_id ON flink_sql_record(status, id);
+CREATE INDEX idx_flink_sql_record_sql_hash ON flink_sql_record(sql_hash);
+CREATE INDEX idx_flink_sql_record_topic_id_id ON flink_sql_record(topic_id, id);
+CREATE INDEX idx_flink_sql_record_sink_table_name_id ON flink_sql_record(sink_table_name, id);
+CREATE INDEX idx_flink_sql_record_created_at ON flink_sql_record(created_at);
+
+COMMENT ON COLUMN flink_sql_record.flink_settings IS '生成时使用的作业调优配置（SET 参数与 Sink 缓冲参数）';
+COMMENT ON COLUMN flink_sql_record.version IS '同一 Sink 表的 SQL 版本号，Schema 演进时递增';
+COMMENT ON COLUMN flink_sql_record.sql_hash IS '规范化后的 full_sql 与调优参数的 SHA-256，内容相同的 SQL 哈希相同';
+COMMENT ON COLUMN flink_sql_record.stage_timings IS '生成/部署时 --profile 记录的各阶段墙钟时间、CPU 时间与内存峰值';
+
+-- 创建阿里云 Flink 作业记录表
+CREATE TABLE IF NOT EXISTS aliyun_flink_jobs (
+    id BIGSERIAL PRIMARY KEY,
+    sql_record_id BIGINT NOT NULL,
+    draft_id TEXT,
+    deployment_id TEXT,
+    job_id TEXT,
+    step TEXT NOT NULL DEFAULT 'generated',
+    deployment_target TEXT NOT NULL DEFAULT 'per_job',
+    session_cluster TEXT,
+    status TEXT NOT NULL DEFAULT 'CREATED',
+    workspace_id TEXT,
+    namespace TEXT,
+    create_time TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    update_time TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    start_time TIMESTAMPTZ,
+    end_time TIMESTAMPTZ,
+    error_message TEXT,
+    flink_config JSONB
+);
+
+CREATE INDEX idx_aliyun_flink_jobs_sql_record_id_id ON aliyun_flink_jobs(sql_record_id, id);
+CREATE INDEX idx_aliyun_flink_jobs_status_id ON aliyun_flink_jobs(status, id);
+CREATE INDEX idx_aliyun_flink_jobs_create_time ON aliyun_flink_jobs(create_time);
+
+COMMENT ON TABLE aliyun_flink_jobs IS '阿里云 Flink 作业部署记录表';
+COMMENT ON COLUMN aliyun_flink_jobs.step IS '部署流程最后完成的步骤：generated/draft_created/deployed/started';
+COMMENT ON COLUMN aliyun_flink_jobs.draft_id IS '作业草稿 ID，创建草稿后立即保存，用于断点续部署';
+COMMENT ON COLUMN aliyun_flink_jobs.deployment_target IS '部署目标：per_job（独立集群）或 session（Session 集群）';
+COMMENT ON COLUMN aliyun_flink_jobs.session_cluster IS 'Session 集群名称，deployment_target 为 session 时有值';
+
+-- 创建自动扩缩容决策表
+CREATE TABLE IF NOT EXISTS autoscale_decision (
+    id BIGSERIAL PRIMARY KEY,
+    aliyun_job_id BIGINT NOT NULL,
+    topic_name TEXT NOT NULL,
+    action TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    current_parallelism INTEGER,
+    target_parallelism INTEGER,
+    partition_count INTEGER NOT NULL DEFAULT 0,
+    total_lag BIGINT NOT NULL DEFAULT 0,
+    input_rate DOUBLE PRECISION,
+    catch_up_rate DOUBLE PRECISION,
+    dry_run BOOLEAN NOT NULL DEFAULT false,
+    applied BOOLEAN NOT NULL DEFAULT false,
+    error_message TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_autoscale_decision_aliyun_job_id ON autoscale_decision(aliyun_job_id);
+
+COMMENT ON TABLE autoscale_decision IS '自动扩缩容决策记录表';
+COMMENT ON COLUMN autoscale_decision.action IS '决策：scale_up / scale_down / hold';
+COMMENT ON COLUMN autoscale_decision.applied IS '是否已成功执行（savepoint 停止、修改并行度、从 savepoint 启动）';
+
+-- 创建 Topic 画像表
+CREATE TABLE IF NOT EXISTS topic_profile (
+    id BIGSERIAL PRIMARY KEY,
+    topic_name TEXT NOT NULL,
+    partition_count INTEGER NOT NULL DEFAULT 0,
+    window_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    messages_per_second DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sample_count INTEGER NOT NULL DEFAULT 0,
+    avg_message_bytes DOUBLE PRECISION NOT NULL DEFAULT 0,
+    p99_message_bytes INTEGER NOT NULL DEFAULT 0,
+    compression_ratio DOUBLE PRECISION NOT NULL DEFAULT 1,
+    field_count INTEGER NOT NULL DEFAULT 0,
+    estimated_bytes_per_day BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_topic_profile_topic_name ON topic_profile(topic_name);
+
+COMMENT ON TABLE topic_profile IS 'Topic 写入速度与消息体画像表';
+COMMENT ON COLUMN topic_profile.messages_per_second IS '测速窗口内所有分区 end offset 增量 / 窗口秒数';
+COMMENT ON COLUMN topic_profile.compression_ratio IS '采样消息原始大小 / zlib 压缩后大小';
+COMMENT ON COLUMN topic_profile.estimated_bytes_per_day IS '写入速度 × 86400 × 平均消息大小 / 压缩比';
+
+-- 创建 watch 模式扫描水位表
+CREATE TABLE IF NOT EXISTS topic_watch_checkpoint (
+    name TEXT PRIMARY KEY,
+    last_updated_at TIMESTAMPTZ NOT NULL,
+    last_topic_id BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE topic_watch_checkpoint IS 'watch 模式扫描 kafka_topic_config 的水位，按 (updated_at, id) 递增';
+
+-- 创建 Topic 自动接入状态表
+CREATE TABLE IF NOT EXISTS topic_onboarding (
+    topic_id BIGINT PRIMARY KEY,
+    topic_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    sql_record_id BIGINT,
+    aliyun_job_id BIGINT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_topic_onboarding_status ON topic_onboarding(status);
+
+COMMENT ON TABLE topic_onboarding IS 'watch 模式下各 Topic 的自动接入状态';
+COMMENT ON COLUMN topic_onboarding.status IS 'generated / deployed / failed';
+COMMENT ON COLUMN topic_onboarding.attempts IS '已尝试次数，失败后按 watch.retry_interval 重试，达到 watch.max_attempts 后停止';
+
+-- 创建分布式生成任务队列表
+CREATE TABLE IF NOT EXISTS generation_task (
+    topic_name TEXT PRIMARY KEY,
+    job_profile TEXT,
+    deploy BOOLEAN NOT NULL DEFAULT false,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    lease_token TEXT,
+    lease_expires_at TIMESTAMPTZ,
+    last_error TEXT,
+    sql_record_id BIGINT,
+    aliyun_job_id BIGINT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    not_before TIMESTAMPTZ
+);
+
+CREATE INDEX idx_generation_task_status ON generation_task(status);
+
+COMMENT ON TABLE generation_task IS '生成任务队列，每个 Topic 只有一个任务，保证每张表只创建一次';
+COMMENT ON COLUMN generation_task.status IS 'pending / running / done / failed';
+COMMENT ON COLUMN generation_task.lease_token IS '每次领取生成新的令牌，续租与完成时按令牌条件更新，令牌不符说明租约已被其他 worker 接管';
+COMMENT ON COLUMN generation_task.lease_expires_at IS 'worker 定期续租；过期的 running 任务重新排队，达到 max_attempts 后标记为 failed';
+COMMENT ON COLUMN generation_task.not_before IS '失败后重新排队的任务在该时间之前不会被领取，等待时间随尝试次数翻倍';
+
+-- 每个 Topic 最新的 SQL 记录与最近一次部署
+-- LATERAL 子查询按 (topic_id, id) 与 (sql_record_id, id) 索引逐个 Topic 取最新一行，不扫描全表再分组
+CREATE OR REPLACE VIEW latest_topic_deployment AS
+SELECT
+    t.id AS topic_id,
+    t.topic_name,
+    t.is_active,
+    r.id AS sql_record_id,
+    r.sink_table_name,
+    r.version,
+    r.status AS record_status,
+    r.created_at AS record_created_at,
+    j.id AS aliyun_job_id,
+    j.job_id,
+    j.status AS job_status,
+    j.update_time AS job_update_time
+FROM kafka_topic_config t
+LEFT JOIN LATERAL (
+    SELECT id, sink_table_name, version, status, created_at
+    FROM flink_sql_record
+    WHERE topic_id = t.id
+    ORDER BY id DESC
+    LIMIT 1
+) r ON true
+LEFT JOIN LATERAL (
+    SELECT j.id, j.job_id, j.status, j.update_time
+    FROM flink_sql_record jr
+    JOIN aliyun_flink_jobs j ON j.sql_record_id = jr.id
+    WHERE jr.topic_id = t.id
+    ORDER BY j.id DESC
+    LIMIT 1
+) j ON true;
+
+COMMENT ON VIEW latest_topic_deployment IS '每个 Topic 最新的 SQL 记录与最近一次部署的作业，没有记录或部署时对应列为空';
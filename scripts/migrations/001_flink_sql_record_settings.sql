@@ -0,0 +1,4 @@
+-- 为已有的 flink_sql_record 表增加作业调优配置字段
+ALTER TABLE flink_sql_record ADD COLUMN IF NOT EXISTS flink_settings JSONB;
+
+COMMENT ON COLUMN flink_sql_record.flink_settings IS '生成时使用的作业调优配置（SET 参数与 Sink 缓冲参数）';
@@ -0,0 +1,4 @@
+-- 为已有的 kafka_topic_config 表增加字段投影规则
+ALTER TABLE kafka_topic_config ADD COLUMN IF NOT EXISTS field_projection JSONB;
+
+COMMENT ON COLUMN kafka_topic_config.field_projection IS '字段投影规则：include/exclude 字段列表及 include_patterns/exclude_patterns 正则';
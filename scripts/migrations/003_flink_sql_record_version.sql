@@ -0,0 +1,4 @@
+-- 为已有的 flink_sql_record 表增加版本号，支持 Schema 演进
+ALTER TABLE flink_sql_record ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+
+COMMENT ON COLUMN flink_sql_record.version IS '同一 Sink 表的 SQL 版本号，Schema 演进时递增';
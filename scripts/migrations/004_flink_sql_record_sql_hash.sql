@@ -0,0 +1,6 @@
+-- 为已有的 flink_sql_record 表增加 SQL 内容哈希，支持幂等部署
+ALTER TABLE flink_sql_record ADD COLUMN IF NOT EXISTS sql_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_flink_sql_record_sql_hash ON flink_sql_record(sql_hash);
+
+COMMENT ON COLUMN flink_sql_record.sql_hash IS '规范化后的 full_sql 与调优参数的 SHA-256，内容相同的 SQL 哈希相同';
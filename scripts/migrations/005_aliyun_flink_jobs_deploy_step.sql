@@ -0,0 +1,11 @@
+-- 为已有的 aliyun_flink_jobs 表增加部署步骤与草稿 ID，支持断点续部署
+ALTER TABLE aliyun_flink_jobs ADD COLUMN IF NOT EXISTS draft_id TEXT;
+ALTER TABLE aliyun_flink_jobs ADD COLUMN IF NOT EXISTS step TEXT NOT NULL DEFAULT 'generated';
+-- 部署记录在创建草稿前写入，此时还没有 deployment_id
+ALTER TABLE aliyun_flink_jobs ALTER COLUMN deployment_id DROP NOT NULL;
+
+-- 已有记录均为部署完成后写入
+UPDATE aliyun_flink_jobs SET step = 'started' WHERE job_id IS NOT NULL;
+
+COMMENT ON COLUMN aliyun_flink_jobs.step IS '部署流程最后完成的步骤：generated/draft_created/deployed/started';
+COMMENT ON COLUMN aliyun_flink_jobs.draft_id IS '作业草稿 ID，创建草稿后立即保存，用于断点续部署';
@@ -0,0 +1,6 @@
+-- 为已有的 aliyun_flink_jobs 表增加部署目标，支持部署到 Session 集群
+ALTER TABLE aliyun_flink_jobs ADD COLUMN IF NOT EXISTS deployment_target TEXT NOT NULL DEFAULT 'per_job';
+ALTER TABLE aliyun_flink_jobs ADD COLUMN IF NOT EXISTS session_cluster TEXT;
+
+COMMENT ON COLUMN aliyun_flink_jobs.deployment_target IS '部署目标：per_job（独立集群）或 session（Session 集群）';
+COMMENT ON COLUMN aliyun_flink_jobs.session_cluster IS 'Session 集群名称，deployment_target 为 session 时有值';
@@ -0,0 +1,24 @@
+-- 创建自动扩缩容决策表，记录每一轮的决策与执行结果
+CREATE TABLE IF NOT EXISTS autoscale_decision (
+    id BIGSERIAL PRIMARY KEY,
+    aliyun_job_id BIGINT NOT NULL,
+    topic_name TEXT NOT NULL,
+    action TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    current_parallelism INTEGER,
+    target_parallelism INTEGER,
+    partition_count INTEGER NOT NULL DEFAULT 0,
+    total_lag BIGINT NOT NULL DEFAULT 0,
+    input_rate DOUBLE PRECISION,
+    catch_up_rate DOUBLE PRECISION,
+    dry_run BOOLEAN NOT NULL DEFAULT false,
+    applied BOOLEAN NOT NULL DEFAULT false,
+    error_message TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_autoscale_decision_aliyun_job_id ON autoscale_decision(aliyun_job_id);
+
+COMMENT ON TABLE autoscale_decision IS '自动扩缩容决策记录表';
+COMMENT ON COLUMN autoscale_decision.action IS '决策：scale_up / scale_down / hold';
+COMMENT ON COLUMN autoscale_decision.applied IS '是否已成功执行（savepoint 停止、修改并行度、从 savepoint 启动）';
@@ -0,0 +1,22 @@
+-- 创建 Topic 画像表，记录写入速度与消息体特征，用于资源规划
+CREATE TABLE IF NOT EXISTS topic_profile (
+    id BIGSERIAL PRIMARY KEY,
+    topic_name TEXT NOT NULL,
+    partition_count INTEGER NOT NULL DEFAULT 0,
+    window_seconds DOUBLE PRECISION NOT NULL DEFAULT 0,
+    messages_per_second DOUBLE PRECISION NOT NULL DEFAULT 0,
+    sample_count INTEGER NOT NULL DEFAULT 0,
+    avg_message_bytes DOUBLE PRECISION NOT NULL DEFAULT 0,
+    p99_message_bytes INTEGER NOT NULL DEFAULT 0,
+    compression_ratio DOUBLE PRECISION NOT NULL DEFAULT 1,
+    field_count INTEGER NOT NULL DEFAULT 0,
+    estimated_bytes_per_day BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_topic_profile_topic_name ON topic_profile(topic_name);
+
+COMMENT ON TABLE topic_profile IS 'Topic 写入速度与消息体画像表';
+COMMENT ON COLUMN topic_profile.messages_per_second IS '测速窗口内所有分区 end offset 增量 / 窗口秒数';
+COMMENT ON COLUMN topic_profile.compression_ratio IS '采样消息原始大小 / zlib 压缩后大小';
+COMMENT ON COLUMN topic_profile.estimated_bytes_per_day IS '写入速度 × 86400 × 平均消息大小 / 压缩比';
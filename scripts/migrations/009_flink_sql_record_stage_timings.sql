@@ -0,0 +1,4 @@
+-- 为已有的 flink_sql_record 表增加各阶段耗时，开启 --profile 时写入
+ALTER TABLE flink_sql_record ADD COLUMN IF NOT EXISTS stage_timings JSONB;
+
+COMMENT ON COLUMN flink_sql_record.stage_timings IS '生成/部署时 --profile 记录的各阶段墙钟时间、CPU 时间与内存峰值';
@@ -0,0 +1,28 @@
+-- watch 模式：扫描水位与各 Topic 的接入状态
+CREATE TABLE IF NOT EXISTS topic_watch_checkpoint (
+    name TEXT PRIMARY KEY,
+    last_updated_at TIMESTAMPTZ NOT NULL,
+    last_topic_id BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE topic_watch_checkpoint IS 'watch 模式扫描 kafka_topic_config 的水位，按 (updated_at, id) 递增';
+
+CREATE TABLE IF NOT EXISTS topic_onboarding (
+    topic_id BIGINT PRIMARY KEY,
+    topic_name TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    sql_record_id BIGINT,
+    aliyun_job_id BIGINT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_topic_onboarding_status ON topic_onboarding(status);
+CREATE INDEX IF NOT EXISTS idx_kafka_topic_config_updated_at ON kafka_topic_config(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_flink_sql_record_topic_id ON flink_sql_record(topic_id);
+
+COMMENT ON TABLE topic_onboarding IS 'watch 模式下各 Topic 的自动接入状态';
+COMMENT ON COLUMN topic_onboarding.status IS 'generated / deployed / failed';
+COMMENT ON COLUMN topic_onboarding.attempts IS '已尝试次数，失败后按 watch.retry_interval 重试，达到 watch.max_attempts 后停止';
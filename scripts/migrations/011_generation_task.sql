@@ -0,0 +1,23 @@
+-- 分布式生成任务队列：每个 Topic 一行，多台机器上的 worker 通过条件更新抢占租约
+CREATE TABLE IF NOT EXISTS generation_task (
+    topic_name TEXT PRIMARY KEY,
+    job_profile TEXT,
+    deploy BOOLEAN NOT NULL DEFAULT false,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    lease_token TEXT,
+    lease_expires_at TIMESTAMPTZ,
+    last_error TEXT,
+    sql_record_id BIGINT,
+    aliyun_job_id BIGINT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_generation_task_status ON generation_task(status);
+
+COMMENT ON TABLE generation_task IS '生成任务队列，每个 Topic 只有一个任务，保证每张表只创建一次';
+COMMENT ON COLUMN generation_task.status IS 'pending / running / done / failed';
+COMMENT ON COLUMN generation_task.lease_token IS '每次领取生成新的令牌，续租与完成时按令牌条件更新，令牌不符说明租约已被其他 worker 接管';
+COMMENT ON COLUMN generation_task.lease_expires_at IS 'worker 定期续租；过期的 running 任务重新排队，达到 max_attempts 后标记为 failed';
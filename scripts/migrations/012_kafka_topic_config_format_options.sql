@@ -0,0 +1,5 @@
+-- 为已有的 kafka_topic_config 表增加消息格式参数
+ALTER TABLE kafka_topic_config ADD COLUMN IF NOT EXISTS format_options JSONB;
+
+COMMENT ON COLUMN kafka_topic_config.data_format IS '消息格式：json / csv / avro / protobuf';
+COMMENT ON COLUMN kafka_topic_config.format_options IS '消息格式参数：csv 的 columns/delimiter，avro 的 mode/registry_url/schema，protobuf 的 message_class/python_class';
@@ -0,0 +1,51 @@
+-- history / jobs 命令按 id 倒序 keyset 分页：过滤列在前、id 在后的复合索引同时满足过滤与排序
+CREATE INDEX IF NOT EXISTS idx_flink_sql_record_topic_name_id ON flink_sql_record(topic_name, id);
+CREATE INDEX IF NOT EXISTS idx_flink_sql_record_status_id ON flink_sql_record(status, id);
+CREATE INDEX IF NOT EXISTS idx_flink_sql_record_topic_id_id ON flink_sql_record(topic_id, id);
+CREATE INDEX IF NOT EXISTS idx_flink_sql_record_sink_table_name_id ON flink_sql_record(sink_table_name, id);
+CREATE INDEX IF NOT EXISTS idx_flink_sql_record_created_at ON flink_sql_record(created_at);
+CREATE INDEX IF NOT EXISTS idx_aliyun_flink_jobs_sql_record_id_id ON aliyun_flink_jobs(sql_record_id, id);
+CREATE INDEX IF NOT EXISTS idx_aliyun_flink_jobs_status_id ON aliyun_flink_jobs(status, id);
+CREATE INDEX IF NOT EXISTS idx_aliyun_flink_jobs_create_time ON aliyun_flink_jobs(create_time);
+
+-- 被复合索引的前缀覆盖的单列索引
+DROP INDEX IF EXISTS idx_flink_sql_record_topic_name;
+DROP INDEX IF EXISTS idx_flink_sql_record_status;
+DROP INDEX IF EXISTS idx_flink_sql_record_topic_id;
+DROP INDEX IF EXISTS idx_aliyun_flink_jobs_sql_record_id;
+DROP INDEX IF EXISTS idx_aliyun_flink_jobs_status;
+
+-- 每个 Topic 最新的 SQL 记录与最近一次部署
+-- LATERAL 子查询按 (topic_id, id) 与 (sql_record_id, id) 索引逐个 Topic 取最新一行，不扫描全表再分组
+CREATE OR REPLACE VIEW latest_topic_deployment AS
+SELECT
+    t.id AS topic_id,
+    t.topic_name,
+    t.is_active,
+    r.id AS sql_record_id,
+    r.sink_table_name,
+    r.version,
+    r.status AS record_status,
+    r.created_at AS record_created_at,
+    j.id AS aliyun_job_id,
+    j.job_id,
+    j.status AS job_status,
+    j.update_time AS job_update_time
+FROM kafka_topic_config t
+LEFT JOIN LATERAL (
+    SELECT id, sink_table_name, version, status, created_at
+    FROM flink_sql_record
+    WHERE topic_id = t.id
+    ORDER BY id DESC
+    LIMIT 1
+) r ON true
+LEFT JOIN LATERAL (
+    SELECT j.id, j.job_id, j.status, j.update_time
+    FROM flink_sql_record jr
+    JOIN aliyun_flink_jobs j ON j.sql_record_id = jr.id
+    WHERE jr.topic_id = t.id
+    ORDER BY j.id DESC
+    LIMIT 1
+) j ON true;
+
+COMMENT ON VIEW latest_topic_deployment IS '每个 Topic 最新的 SQL 记录与最近一次部署的作业，没有记录或部署时对应列为空';
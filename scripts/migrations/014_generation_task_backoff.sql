@@ -0,0 +1,4 @@
+-- 失败后重新排队的生成任务按尝试次数退避，退避时间内不会被领取
+ALTER TABLE generation_task ADD COLUMN IF NOT EXISTS not_before TIMESTAMPTZ;
+
+COMMENT ON COLUMN generation_task.not_before IS '失败后重新排队的任务在该时间之前不会被领取，等待时间随尝试次数翻倍';
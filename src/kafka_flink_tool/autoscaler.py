@@ -0,0 +1,114 @@
+import math
+from datetime import datetime
+from typing import Optional
+from .config import AutoscaleConfig
+from .models import ScalingDecision, TopicLag, TopicProfile
+
+
+class Autoscaler:
+    """按消费延迟与写入速度计算目标并行度
+
+    积压时作业处于饱和状态，单并行度吞吐按实测消费速度（写入速度 + 追赶速度）/ 当前并行度估算；
+    未积压时实测速度只是下限，取其与 rate_per_parallelism 中的较大值。
+    目标并行度需在 target_drain_seconds 内消化积压并跟上写入速度。
+    """
+
+    def __init__(self, config: AutoscaleConfig):
+        self.config = config
+
+    def decide(self, aliyun_job_id: int, lag: TopicLag, current_parallelism: Optional[int],
+               last_scaled_at: Optional[datetime] = None, now: Optional[datetime] = None,
+               budget_remaining: Optional[int] = None) -> ScalingDecision:
+        """计算扩缩容决策
+
+        Args:
+            lag: 带 input_rate 与 catch_up_rate 的延迟快照
+            current_parallelism: 当前并行度
+            last_scaled_at: 上次执行扩缩容的时间，用于冷却
+            budget_remaining: 资源预算中剩余可分配的并行度，为空表示不限制
+
+        Returns:
+            ScalingDecision: action 为 scale_up / scale_down / hold
+        """
+        decision = ScalingDecision(
+            aliyun_job_id=aliyun_job_id,
+            topic_name=lag.topic,
+            reason="",
+            current_parallelism=current_parallelism,
+            target_parallelism=current_parallelism,
+            partition_count=len(lag.partitions),
+            total_lag=lag.total_lag,
+            input_rate=lag.input_rate,
+            catch_up_rate=lag.catch_up_rate
+        )
+
+        if not current_parallelism:
+            return self._hold(decision, "无法获取当前并行度")
+        if lag.input_rate is None or lag.catch_up_rate is None:
+            return self._hold(decision, "缺少速率数据，需要两次快照")
+
+        target = self._target_parallelism(lag, current_parallelism)
+        if target is None:
+            return self._hold(decision, "消费速度为 0，无法估算单并行度吞吐")
+        decision.target_parallelism = target
+
+        if target == current_parallelism:
+            return self._hold(decision, "并行度已满足需求")
+
+        # 滞回：扩容要求积压足够大，缩容要求目标明显低于当前
+        if target > current_parallelism and lag.total_lag < self.config.scale_up_lag:
+            return self._hold(decision, f"延迟 {lag.total_lag} 低于扩容阈值 {self.config.scale_up_lag}")
+        if target < current_parallelism and target > math.floor(current_parallelism * self.config.scale_down_ratio):
+            return self._hold(decision, f"目标并行度 {target} 未低于缩容阈值")
+
+        now = now or datetime.now(last_scaled_at.tzinfo if last_scaled_at else None)
+        if last_scaled_at and (now - last_scaled_at).total_seconds() < self.config.cooldown_seconds:
+            return self._hold(decision, f"冷却中，上次扩缩容于 {last_scaled_at:%Y-%m-%d %H:%M:%S}")
+
+        if target > current_parallelism and budget_remaining is not None:
+            target = min(target, current_parallelism + budget_remaining)
+            if target <= current_parallelism:
+                decision.target_parallelism = current_parallelism
+                return self._hold(decision, "资源预算不足，无法扩容")
+            decision.target_parallelism = target
+
+        decision.action = 'scale_up' if target > current_parallelism else 'scale_down'
+        decision.reason = (
+            f"写入 {lag.input_rate}/s，追赶 {lag.catch_up_rate}/s，延迟 {lag.total_lag}，"
+            f"并行度 {current_parallelism} -> {target}"
+        )
+        return decision
+
+    def _target_parallelism(self, lag: TopicLag, current_parallelism: int) -> Optional[int]:
+        """按所需吞吐计算目标并行度，限制在 [min_parallelism, min(分区数, max_parallelism)]"""
+        processing_rate = lag.input_rate + lag.catch_up_rate
+        if processing_rate <= 0:
+            if lag.total_lag > 0:
+                return None
+            return self.config.min_parallelism
+
+        per_slot_rate = processing_rate / current_parallelism
+        if lag.total_lag < self.config.scale_up_lag and self.config.rate_per_parallelism:
+            per_slot_rate = max(per_slot_rate, self.config.rate_per_parallelism)
+        per_slot_rate *= self.config.target_utilization
+        required_rate = lag.input_rate + lag.total_lag / self.config.target_drain_seconds
+        target = math.ceil(required_rate / per_slot_rate)
+
+        # 并行度超过分区数的部分没有数据可读
+        upper = min(len(lag.partitions) or self.config.max_parallelism, self.config.max_parallelism)
+        return max(self.config.min_parallelism, min(target, upper))
+
+    def initial_parallelism(self, profile: TopicProfile) -> Optional[int]:
+        """按 Topic 画像的写入速度估算部署时的初始并行度，未配置 rate_per_parallelism 时返回 None"""
+        if not self.config.rate_per_parallelism:
+            return None
+        per_slot_rate = self.config.rate_per_parallelism * self.config.target_utilization
+        target = math.ceil(profile.messages_per_second / per_slot_rate)
+        upper = min(profile.partition_count or self.config.max_parallelism, self.config.max_parallelism)
+        return max(self.config.min_parallelism, min(target, upper))
+
+    @staticmethod
+    def _hold(decision: ScalingDecision, reason: str) -> ScalingDecision:
+        decision.action = 'hold'
+        decision.reason = reason
+        return decision
@@ -0,0 +1,199 @@
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from .cast_validator import CastError, CastValidator
+from .config import BackfillConfig, HologresConfig
+from .database import HologresDAO
+from .ddl_generator import DDLGenerator
+from .formats import get_message_format
+from .kafka_client import KafkaClient
+from .logger import get_logger
+from .models import FlinkSQLRecord, InferredSchema, KafkaTopicConfig, PartitionBackfill
+
+logger = get_logger(__name__)
+
+
+class BackfillRowBuilder:
+    """按 SQL 记录中 INSERT 的投影与 CAST 把消息转换为 Sink 表的行
+
+    转换语义与 CastValidator 相同：Source 反序列化失败时 Flink 作业会抛出异常，这里同样报错；
+    主键为空的消息按 INSERT 的 WHERE 条件过滤。
+    """
+
+    def __init__(self, record: FlinkSQLRecord):
+        validator = CastValidator.from_record(record)
+        schema = InferredSchema.model_validate(record.inferred_schema)
+        self.sink_table = record.sink_table_name
+        self.schema = schema
+        self.primary_key = validator.primary_key
+        self.projections = [
+            (field, validator.source_types.get(field, 'STRING'), cast_type, column)
+            for field, cast_type, column, _ in validator.projections
+        ]
+        self.partition = schema.partition
+        self.columns = ['etl_time', 'key_col'] + [column for _, _, _, column in self.projections]
+        self._partition_index = None
+        if self.partition:
+            if self.partition.source_field:
+                self._partition_index = self.columns.index(self.partition.source_field)
+            self.columns.append(self.partition.column)
+
+    @property
+    def upsert(self) -> bool:
+        """有主键时按主键覆盖写入，与 Sink 的 insertOrReplace 一致"""
+        return bool(self.primary_key)
+
+    def build(self, key: Optional[str], value: Optional[Dict[str, Any]], etl_time: datetime) -> Optional[tuple]:
+        """转换一条消息，无法解码或主键为空时返回 None
+
+        Raises:
+            CastError: 字段无法按 Source DDL 的类型反序列化
+        """
+        if value is None:
+            return None
+        if any((key if name == 'key_col' else value.get(name)) is None for name in self.primary_key):
+            return None
+
+        row = [etl_time, key]
+        for field, source_type, cast_type, column in self.projections:
+            raw = value.get(field)
+            if raw is None:
+                row.append(None)
+                continue
+            try:
+                result = CastValidator.deserialize(raw, source_type)
+                if cast_type:
+                    result = CastValidator.cast(result, cast_type)
+            except CastError as e:
+                raise CastError(f"列 {column} 转换失败（{e}）: {json.dumps(raw, ensure_ascii=False)}")
+            if isinstance(result, datetime):
+                # Source 字段为 TIMESTAMP(3)
+                result = result.replace(microsecond=result.microsecond // 1000 * 1000)
+            row.append(result)
+
+        if self.partition:
+            event_time = row[self._partition_index] if self._partition_index is not None else None
+            row.append((event_time or etl_time).strftime('%Y%m%d'))
+        return tuple(row)
+
+    def target_table(self, row: tuple) -> str:
+        """物理分区表写入对应的子表，其余写入 Sink 表"""
+        if self.partition and self.partition.mode == 'physical':
+            return f"{self.sink_table}_{row[-1]}"
+        return self.sink_table
+
+
+def copy_text(row: tuple) -> str:
+    """把一行编码为 COPY text 格式"""
+    return "\t".join(_copy_value(value) for value in row) + "\n"
+
+
+def _copy_value(value: Any) -> str:
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ', timespec='milliseconds')
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def split_partitions(partitions: List[int], groups: int) -> List[List[int]]:
+    """按轮询把分区分为不超过 groups 组，每组由一个进程读取"""
+    groups = max(min(groups, len(partitions)), 1)
+    return [group for group in (sorted(partitions)[i::groups] for i in range(groups)) if group]
+
+
+class PartitionLoader:
+    """把读取到的消息转换后缓冲为 COPY 数据，达到 buffer_bytes 时写入一次"""
+
+    def __init__(self, dao: HologresDAO, builder: BackfillRowBuilder, buffer_bytes: int):
+        self.dao = dao
+        self.builder = builder
+        self.buffer_bytes = buffer_bytes
+        self._buffers: Dict[str, io.StringIO] = {}
+        self._buffered = 0
+        self._child_tables = set()
+
+    def load(self, batches: Iterable[List[Tuple[int, int, Optional[str], Any]]],
+             ranges: Dict[int, Tuple[int, int]]) -> List[PartitionBackfill]:
+        """写入所有批次，返回每个分区的统计
+
+        Raises:
+            RuntimeError: 消息转换失败，附带分区与 offset
+        """
+        results = {
+            partition: PartitionBackfill(partition=partition, start_offset=start, end_offset=end)
+            for partition, (start, end) in ranges.items()
+        }
+        for batch in batches:
+            # 与 INSERT 中的 now() 相同，同一批消息共用处理时间
+            now = datetime.now()
+            etl_time = now.replace(microsecond=now.microsecond // 1000 * 1000)
+            for partition, offset, key, value in batch:
+                result = results[partition]
+                result.messages += 1
+                try:
+                    row = self.builder.build(key, value, etl_time)
+                except CastError as e:
+                    raise RuntimeError(f"分区 {partition} offset {offset}: {e}，Flink 作业同样无法处理")
+                if row is None:
+                    result.skipped += 1
+                    continue
+                self._append(row)
+                result.rows += 1
+            if self._buffered >= self.buffer_bytes:
+                self.flush()
+        self.flush()
+        return list(results.values())
+
+    def _append(self, row: tuple) -> None:
+        table = self.builder.target_table(row)
+        buffer = self._buffers.get(table)
+        if buffer is None:
+            buffer = self._buffers[table] = io.StringIO()
+        line = copy_text(row)
+        buffer.write(line)
+        self._buffered += len(line)
+
+    def flush(self) -> None:
+        for table, buffer in self._buffers.items():
+            if table != self.builder.sink_table:
+                self._ensure_child_table(table)
+            buffer.seek(0)
+            self.dao.copy_rows(table, self.builder.columns, buffer, upsert=self.builder.upsert)
+        self._buffers = {}
+        self._buffered = 0
+
+    def _ensure_child_table(self, table: str) -> None:
+        """物理分区子表不存在时创建，与 Sink 的 createparttable 一致"""
+        if table in self._child_tables:
+            return
+        value = table[len(self.builder.sink_table) + 1:]
+        day = date(int(value[:4]), int(value[4:6]), int(value[6:]))
+        self.dao.create_table("\n".join(
+            DDLGenerator().generate_partition_ddls(self.builder.sink_table, self.builder.schema, day, 1)
+        ))
+        self._child_tables.add(table)
+
+
+def backfill_partitions(hologres_config: HologresConfig, topic_config: KafkaTopicConfig,
+                        record: FlinkSQLRecord, ranges: Dict[int, Tuple[int, int]],
+                        config: BackfillConfig) -> List[PartitionBackfill]:
+    """回填一组分区，在独立进程中执行，使用自己的 Kafka consumer 与数据库连接"""
+    message_format = get_message_format(topic_config.data_format, topic_config.format_options,
+                                        topic_config.topic_name)
+    kafka_client = KafkaClient(topic_config.kafka_brokers, topic_config.topic_name, message_format)
+    dao = HologresDAO(hologres_config)
+    try:
+        loader = PartitionLoader(dao, BackfillRowBuilder(record), config.buffer_bytes)
+        batches = kafka_client.read_partitions(ranges, config.max_poll_records, config.idle_timeout)
+        results = loader.load(batches, ranges)
+    finally:
+        dao.close()
+    for result in results:
+        logger.info(f"分区 {result.partition} 回填完成: offset [{result.start_offset}, {result.end_offset})，"
+                    f"写入 {result.rows} 行，跳过 {result.skipped} 条")
+    return results
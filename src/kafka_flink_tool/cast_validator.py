@@ -0,0 +1,194 @@
+import json
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, Dict, List, Optional, Tuple
+from .models import CastReport, ColumnCastStats, FlinkSQLRecord
+
+
+class CastError(ValueError):
+    """Flink 运行时会抛出异常的转换"""
+
+
+class CastValidator:
+    """在本地按 Flink 语义执行生成的 Source 反序列化与 INSERT 投影/CAST，统计每列的失败与 NULL
+
+    两个阶段与线上一致：
+    1. JSON format 把字段反序列化为 Source DDL 声明的类型，失败时作业抛出异常
+    2. INSERT 中的 cast 表达式，decimal 溢出时结果为 NULL
+    """
+
+    # Source DDL 中的字段：`value_<name>` <type>
+    SOURCE_FIELD_PATTERN = re.compile(r'^\s*`value_([^`]+)` ([A-Z]+(?:\(\d+\))?)', re.MULTILINE)
+    # INSERT 中的投影：cast(`value_<name>` as <type>) as `<column>` 或 `value_<name>` as `<column>`
+    CAST_PATTERN = re.compile(r'^cast\(`value_([^`]+)` as (\w+(?:\(\d+,\s*\d+\))?)\) as `([^`]+)`$')
+    COLUMN_PATTERN = re.compile(r'^`value_([^`]+)` as `([^`]+)`$')
+    PRIMARY_KEY_PATTERN = re.compile(r'`(?:value_)?([^`]+)` IS NOT NULL')
+    DECIMAL_PATTERN = re.compile(r'^decimal\((\d+),\s*(\d+)\)$', re.IGNORECASE)
+
+    # Java Long.parseLong / Double.parseDouble 接受的格式
+    LONG_PATTERN = re.compile(r'^[+-]?\d+$')
+    DOUBLE_PATTERN = re.compile(r'^[+-]?(NaN|Infinity|(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?[fFdD]?)$')
+    # JSON format 默认 timestamp-format.standard = 'SQL'：yyyy-MM-dd HH:mm:ss[.fraction]
+    SQL_TIMESTAMP_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\.\d{1,9})?$')
+
+    LONG_MIN, LONG_MAX = -2 ** 63, 2 ** 63 - 1
+    MAX_ERROR_EXAMPLES = 3
+
+    def __init__(self, source_ddl: str, insert_sql: str):
+        self.source_types = dict(self.SOURCE_FIELD_PATTERN.findall(source_ddl))
+        self.projections = self._parse_projections(insert_sql)
+        where = insert_sql.split('\nWHERE ', 1)[1] if '\nWHERE ' in insert_sql else ''
+        self.primary_key = self.PRIMARY_KEY_PATTERN.findall(where)
+
+    @classmethod
+    def from_record(cls, record: FlinkSQLRecord) -> 'CastValidator':
+        return cls(record.source_ddl, record.insert_sql)
+
+    @classmethod
+    def _parse_projections(cls, insert_sql: str) -> List[Tuple[str, Optional[str], str, str]]:
+        """解析 SELECT 列表，返回 (源字段, cast 类型, 目标列, 表达式)，不含 etl_time 等非消息字段"""
+        select = insert_sql.split('\nSELECT ', 1)[1].split('\nFROM ', 1)[0]
+        projections = []
+        for expression in select.split('\n    ,'):
+            expression = expression.strip()
+            match = cls.CAST_PATTERN.match(expression)
+            if match:
+                projections.append((match.group(1), match.group(2), match.group(3), expression))
+                continue
+            match = cls.COLUMN_PATTERN.match(expression)
+            if match:
+                projections.append((match.group(1), None, match.group(2), expression))
+        return projections
+
+    def validate(self, records: List[Tuple[Optional[str], Dict[str, Any]]]) -> CastReport:
+        """对采样数据执行转换
+
+        Args:
+            records: (key, value) 列表
+
+        Returns:
+            CastReport: 每列的失败与 NULL 统计，主键为空被过滤的行不计入
+        """
+        stats = {
+            column: ColumnCastStats(column=column, source_type=self.source_types.get(field, 'STRING'),
+                                    expression=expression)
+            for field, _, column, expression in self.projections
+        }
+        filtered_rows = 0
+        for key, value in records:
+            if any((key if name == 'key_col' else value.get(name)) is None for name in self.primary_key):
+                filtered_rows += 1
+                continue
+            for field, cast_type, column, _ in self.projections:
+                column_stats = stats[column]
+                column_stats.total += 1
+                raw = value.get(field)
+                if raw is None:
+                    column_stats.missing += 1
+                    continue
+                try:
+                    result = self.deserialize(raw, column_stats.source_type)
+                    if cast_type:
+                        result = self.cast(result, cast_type)
+                except CastError as e:
+                    column_stats.failures += 1
+                    if len(column_stats.errors) < self.MAX_ERROR_EXAMPLES:
+                        column_stats.errors.append(f"{json.dumps(raw, ensure_ascii=False)}: {e}")
+                    continue
+                if result is None:
+                    column_stats.nulls += 1
+
+        return CastReport(
+            sample_count=len(records),
+            columns=list(stats.values()),
+            filtered_rows=filtered_rows
+        )
+
+    @classmethod
+    def deserialize(cls, value: Any, flink_type: str) -> Any:
+        """按 Flink JSON format（JsonToRowDataConverters）把 JSON 值转换为 Source 字段类型"""
+        if flink_type == 'BIGINT':
+            if isinstance(value, int) and not isinstance(value, bool):
+                if cls.LONG_MIN <= value <= cls.LONG_MAX:
+                    return value
+            elif isinstance(value, float):
+                # Jackson asLong 向零截断
+                if cls.LONG_MIN <= value <= cls.LONG_MAX:
+                    return int(value)
+            text = cls._as_text(value).strip()
+            if cls.LONG_PATTERN.match(text) and cls.LONG_MIN <= int(text) <= cls.LONG_MAX:
+                return int(text)
+            raise CastError("无法解析为 BIGINT")
+
+        if flink_type == 'DOUBLE':
+            if isinstance(value, float):
+                return value
+            text = cls._as_text(value).strip()
+            if not cls.DOUBLE_PATTERN.match(text):
+                raise CastError("无法解析为 DOUBLE")
+            return float(text.rstrip('fFdD').replace('Infinity', 'inf'))
+
+        if flink_type == 'BOOLEAN':
+            if isinstance(value, bool):
+                return value
+            # Boolean.parseBoolean：非 "true" 一律为 false，不会失败
+            return cls._as_text(value).strip().lower() == 'true'
+
+        if flink_type.startswith('TIMESTAMP'):
+            text = cls._as_text(value)
+            if not cls.SQL_TIMESTAMP_PATTERN.match(text):
+                raise CastError("时间格式不是 yyyy-MM-dd HH:mm:ss[.SSS]")
+            try:
+                return datetime.strptime(text[:26], '%Y-%m-%d %H:%M:%S.%f' if '.' in text else '%Y-%m-%d %H:%M:%S')
+            except ValueError:
+                raise CastError("时间值无效")
+
+        # STRING：非文本节点序列化为 JSON 字符串
+        if isinstance(value, str):
+            return value
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def cast(cls, value: Any, cast_type: str) -> Any:
+        """执行 INSERT 中的 cast 表达式"""
+        match = cls.DECIMAL_PATTERN.match(cast_type)
+        if match:
+            precision, scale = int(match.group(1)), int(match.group(2))
+            if value != value or value in (float('inf'), float('-inf')):
+                raise CastError(f"{value} 无法转换为 {cast_type}")
+            # Flink 按 BigDecimal.valueOf(double) 四舍五入，超出精度时结果为 NULL
+            try:
+                result = Decimal(repr(value)).quantize(Decimal(1).scaleb(-scale), rounding=ROUND_HALF_UP)
+            except InvalidOperation:
+                return None
+            if len(result.as_tuple().digits) > precision:
+                return None
+            return result
+        # bigint -> bigint、timestamp(3) -> timestamp 不改变值
+        return value
+
+    @staticmethod
+    def _as_text(value: Any) -> str:
+        """Jackson asText：容器节点为空字符串，布尔为 true/false"""
+        if isinstance(value, str):
+            return value
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if isinstance(value, (dict, list)):
+            return ''
+        return str(value)
+
+
+def format_cast_report(report: CastReport) -> str:
+    """格式化为文本表格"""
+    lines = [f"采样 {report.sample_count} 条，主键为空被过滤 {report.filtered_rows} 条"]
+    lines.append(f"{'COLUMN':<30} {'TYPE':<14} {'FAIL%':>7} {'NULL%':>7} {'MISSING%':>9}")
+    for column in report.columns:
+        lines.append(
+            f"{column.column:<30} {column.source_type:<14} {column.failure_rate:>7.1%} "
+            f"{column.null_rate:>7.1%} {column.missing_rate:>9.1%}"
+        )
+        for error in column.errors:
+            lines.append(f"  {error}")
+    return "\n".join(lines)
@@ -1,30 +1,112 @@
 import click
 import json
-from .service import GeneratorService, AliyunFlinkService
-from .config import ConfigManager
-from .database import HologresDAO
-from .kafka_client import KafkaClient
-from .logger import get_logger
+import logging
+from .logger import DEFAULT_LOG_FILE, bind_topic, setup_logging
+from .profiling import current_profiler, format_timings, start_profiling, stop_profiling
 
-logger = get_logger(__name__)
+# 各命令在函数内按需导入服务，避免每次启动都加载阿里云 SDK、kafka-python 和 psycopg2
+
+# 日志在 cli 分组中按命令行参数配置
+logger = logging.getLogger(__name__)
+
+
+def _partition_config(mode: str, source: str, ttl_days: int):
+    """根据命令行参数构造分区配置，未指定 --partition 时使用作业调优配置"""
+    if not mode:
+        return None
+    from .config import PartitionConfig
+    return PartitionConfig(mode=mode, source=source, ttl_days=ttl_days)
+
+
+def _echo_deploy_result(result: dict):
+    click.echo(f"Deployment ID: {result['deployment_id']}")
+    click.echo(f"Job ID: {result['job_id']}")
+    click.echo(f"状态: {result['status']}")
+    click.echo(f"阿里云作业记录 ID: {result['aliyun_job_id']}")
+
+
+def _save_stage_timings(dao, record_id: int):
+    """开启 --profile 时把目前为止的阶段耗时保存到 SQL 记录"""
+    profiler = current_profiler()
+    if not profiler or not record_id:
+        return
+    try:
+        dao.update_stage_timings(record_id, profiler.timings())
+    except Exception as e:
+        logger.warning(f"保存阶段耗时失败: {e}")
+
+
+def _report_profile(command: str, stats_file: str, json_file: str):
+    """命令结束后输出阶段耗时表，按需写出 pstats 与 JSON 文件"""
+    profiler = stop_profiling()
+    if not profiler:
+        return
+    timings = {'command': command, **profiler.timings()}
+    click.echo(format_timings(timings), err=True)
+    if stats_file:
+        profiler.dump_stats(stats_file)
+        click.echo(f"cProfile 结果已写入: {stats_file}", err=True)
+    if json_file:
+        profiler.dump_json(json_file)
+        click.echo(f"阶段耗时已写入: {json_file}", err=True)
 
 
 @click.group()
-def cli():
+@click.option('--log-file', default=DEFAULT_LOG_FILE, help='日志文件路径')
+@click.option('--log-format', type=click.Choice(['text', 'json']), default='text',
+              help='日志文件格式，json 为 JSON Lines，包含 run_id 与 topic')
+@click.option('--log-rotation', type=click.Choice(['size', 'time']), default='size',
+              help='日志轮转方式：size 按 50MB 轮转，time 每天零点轮转')
+@click.option('--profile', is_flag=True, help='记录各阶段与每次 API 调用的耗时、CPU 时间和内存峰值，结束时输出')
+@click.option('--profile-stats', default=None, help='同时启用 cProfile，并把 pstats 结果写入该文件')
+@click.option('--profile-json', default=None, help='把阶段耗时写入该 JSON 文件')
+@click.pass_context
+def cli(ctx: click.Context, log_file: str, log_format: str, log_rotation: str, profile: bool,
+        profile_stats: str, profile_json: str):
     """Kafka-Flink-Hologres 自动化工具"""
-    pass
+    setup_logging(log_file, log_format, log_rotation, force=True)
+    if profile or profile_stats or profile_json:
+        start_profiling(cprofile=bool(profile_stats))
+        ctx.call_on_close(lambda: _report_profile(ctx.invoked_subcommand, profile_stats, profile_json))
 
 
 @cli.command()
 @click.option('--topic-name', required=True, help='Kafka Topic 名称')
 @click.option('--sink-table', default=None, help='Hologres Sink 表名')
 @click.option('--demo-file', default=None, help='Demo 数据文件路径')
+@click.option('--job-profile', default=None, help='作业调优配置名称（config.yaml 中 flink_sql.profiles）')
+@click.option('--dedup-window', default=None, help='按 key 去重的窗口，如 30s；启用后每个窗口内同一 key 只写入最新一行')
+@click.option('--partition', type=click.Choice(['logical', 'physical']), default=None,
+              help='生成按天分区的 Sink 表（逻辑/物理分区）')
+@click.option('--partition-source', default='etl_time',
+              help='分区时间来源：etl_time、auto（推断事件时间字段）或字段名')
+@click.option('--ttl-days', type=int, default=None, help='分区表数据保留天数（time_to_live_in_seconds）')
+@click.option('--dry-run', is_flag=True, help='只在本地按 Flink 语义校验类型转换，不建表、不保存记录')
 @click.option('--config', default='config.yaml', help='配置文件路径')
-def generate(topic_name: str, sink_table: str, demo_file: str, config: str):
+def generate(topic_name: str, sink_table: str, demo_file: str, job_profile: str, dedup_window: str,
+             partition: str, partition_source: str, ttl_days: int, dry_run: bool, config: str):
     """生成 Flink SQL"""
+    bind_topic(topic_name)
     try:
+        from .service import GeneratorService
+        from .cast_validator import format_cast_report
+
         service = GeneratorService(config)
-        record_id = service.generate(topic_name, sink_table, demo_file)
+        plan = service.prepare(
+            topic_name, sink_table, demo_file, job_profile, dedup_window,
+            _partition_config(partition, partition_source, ttl_days)
+        )
+        if dry_run:
+            if not plan.cast_report:
+                click.echo("[WARNING] 该数据格式不执行类型转换校验（dry-run，未建表、未保存记录）")
+                return
+            click.echo(format_cast_report(plan.cast_report))
+            service.check_casts(plan)
+            click.echo("[SUCCESS] 类型转换校验通过（dry-run，未建表、未保存记录）")
+            return
+
+        record_id = service.create(plan)
+        _save_stage_timings(service.dao, record_id)
         click.echo(f"[SUCCESS] 生成成功！Record ID: {record_id}")
     except Exception as e:
         logger.error(f"生成失败: {e}")
@@ -36,18 +118,48 @@ def generate(topic_name: str, sink_table: str, demo_file: str, config: str):
 @click.option('--topic-name', required=True, help='Kafka Topic 名称')
 @click.option('--sink-table', default=None, help='Hologres Sink 表名')
 @click.option('--demo-file', default=None, help='Demo 数据文件路径')
+@click.option('--job-profile', default=None, help='作业调优配置名称（config.yaml 中 flink_sql.profiles）')
+@click.option('--dedup-window', default=None, help='按 key 去重的窗口，如 30s；启用后每个窗口内同一 key 只写入最新一行')
+@click.option('--partition', type=click.Choice(['logical', 'physical']), default=None,
+              help='生成按天分区的 Sink 表（逻辑/物理分区）')
+@click.option('--partition-source', default='etl_time',
+              help='分区时间来源：etl_time、auto（推断事件时间字段）或字段名')
+@click.option('--ttl-days', type=int, default=None, help='分区表数据保留天数（time_to_live_in_seconds）')
+@click.option('--session-cluster', default=None,
+              help='部署到指定的 Session 集群，覆盖 aliyun_flink.deployment_target')
+@click.option('--per-job', is_flag=True, help='部署到独立的 per-job 集群，覆盖 aliyun_flink.deployment_target')
+@click.option('--skip-cast-check', is_flag=True, help='跳过部署前的类型转换校验')
 @click.option('--config', default='config.yaml', help='配置文件路径')
-def deploy(topic_name: str, sink_table: str, demo_file: str, config: str):
+def deploy(topic_name: str, sink_table: str, demo_file: str, job_profile: str, dedup_window: str,
+           partition: str, partition_source: str, ttl_days: int, session_cluster: str, per_job: bool,
+           skip_cast_check: bool, config: str):
     """生成 SQL 并部署到阿里云 Flink"""
+    bind_topic(topic_name)
     try:
-        service = AliyunFlinkService(config)
-        result = service.generate_and_deploy(topic_name, sink_table, demo_file)
+        from .config import DeploymentTargetConfig
+        from .service import AliyunFlinkService
 
-        click.echo("[SUCCESS] 部署成功！")
-        click.echo(f"Deployment ID: {result['deployment_id']}")
-        click.echo(f"Job ID: {result['job_id']}")
-        click.echo(f"状态: {result['status']}")
-        click.echo(f"阿里云作业记录 ID: {result['aliyun_job_id']}")
+        if session_cluster and per_job:
+            raise ValueError("--session-cluster 与 --per-job 不能同时指定")
+        deployment_target = None
+        if session_cluster:
+            deployment_target = DeploymentTargetConfig(mode='session', session_cluster=session_cluster)
+        elif per_job:
+            deployment_target = DeploymentTargetConfig(mode='per_job')
+
+        service = AliyunFlinkService(config)
+        result = service.generate_and_deploy(
+            topic_name, sink_table, demo_file, job_profile, dedup_window,
+            _partition_config(partition, partition_source, ttl_days), deployment_target,
+            skip_cast_check
+        )
+        if result.get('skipped'):
+            # 未部署时保留记录上原有的耗时，不用本次空跑的耗时覆盖
+            click.echo("[SUCCESS] SQL 未变化且作业运行中，无需重新部署")
+        else:
+            _save_stage_timings(service.dao, result.get('sql_record_id'))
+            click.echo("[SUCCESS] 部署成功！")
+        _echo_deploy_result(result)
 
     except Exception as e:
         logger.error(f"部署失败: {e}")
@@ -55,12 +167,189 @@ def deploy(topic_name: str, sink_table: str, demo_file: str, config: str):
         raise click.Abort()
 
 
+@cli.command()
+@click.option('--aliyun-job-id', type=int, required=True, help='阿里云作业记录 ID（deploy 失败时输出）')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def resume(aliyun_job_id: int, config: str):
+    """从上次完成的步骤继续部署，不重复创建草稿和部署"""
+    try:
+        from .service import AliyunFlinkService
+
+        service = AliyunFlinkService(config)
+        result = service.resume(aliyun_job_id)
+
+        if result.get('skipped'):
+            click.echo("[SUCCESS] 作业已在运行，无需继续")
+        else:
+            click.echo("[SUCCESS] 部署成功！")
+        _echo_deploy_result(result)
+
+    except Exception as e:
+        logger.error(f"继续部署失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command()
+@click.option('--topic-name', required=True, help='Kafka Topic 名称')
+@click.option('--sink-table', default=None, help='Hologres Sink 表名')
+@click.option('--demo-file', default=None, help='Demo 数据文件路径')
+@click.option('--job-profile', default=None, help='作业调优配置名称，默认沿用上一版本')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def evolve(topic_name: str, sink_table: str, demo_file: str, job_profile: str, config: str):
+    """Schema 演进：新增字段 ALTER TABLE 并生成新版本 SQL"""
+    bind_topic(topic_name)
+    try:
+        from .service import GeneratorService
+
+        service = GeneratorService(config)
+        record_id, diff = service.evolve(topic_name, sink_table, demo_file, job_profile)
+
+        if not diff.has_changes:
+            click.echo(f"表结构无变化，当前 Record ID: {record_id}")
+            return
+        for field in diff.added:
+            click.echo(f"+ {field.name} {field.type}")
+        for change in diff.widened:
+            click.echo(f"~ {change.name} {change.old_type} -> {change.new_type}")
+        for change in diff.incompatible:
+            click.echo(f"! {change.name} {change.old_type} -> {change.new_type}（保留原类型）")
+        click.echo(f"[SUCCESS] 演进成功！Record ID: {record_id}，请从 savepoint 重启作业")
+    except Exception as e:
+        logger.error(f"演进失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command()
+@click.option('--record-id', type=int, multiple=True, help='SQL 记录 ID，可重复指定')
+@click.option('--all', 'all_records', is_flag=True, help='重新生成每个 Sink 表的最新记录')
+@click.option('--job-profile', default=None, help='作业调优配置名称，默认沿用各记录的配置')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def regenerate(record_id: tuple, all_records: bool, job_profile: str, config: str):
+    """基于已存储的 Schema 离线重新生成 Flink SQL，不采样 Kafka"""
+    try:
+        from .service import GeneratorService
+
+        if bool(record_id) == all_records:
+            raise ValueError("请指定 --record-id 或 --all 其中之一")
+        service = GeneratorService(config)
+        new_ids = service.regenerate(list(record_id) or None, job_profile)
+        click.echo(f"[SUCCESS] 重新生成 {len(new_ids)} 条记录，Record ID: {', '.join(map(str, new_ids))}")
+    except Exception as e:
+        logger.error(f"重新生成失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command()
+@click.option('--topic-name', required=True, help='Kafka Topic 名称')
+@click.option('--sink-table', default=None, help='Hologres Sink 表名，默认为 Topic 最新 SQL 记录的 Sink 表')
+@click.option('--since', type=click.DateTime(), default=None, help='只回填该时间之后写入的消息，默认从最早的 offset 开始')
+@click.option('--processes', type=int, default=None, help='读取进程数，覆盖 backfill.processes')
+@click.option('--deploy', 'deploy_job', is_flag=True, help='回填完成后部署从边界 offset 启动的新版本 SQL')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def backfill(topic_name: str, sink_table: str, since, processes: int, deploy_job: bool, config: str):
+    """以 COPY 批量回填历史数据，新版本 SQL 从回填的边界 offset 开始消费"""
+    bind_topic(topic_name)
+    try:
+        from .config import ConfigManager
+        from .service import BackfillService
+
+        backfill_config = ConfigManager(config).get_backfill_config()
+        if processes:
+            backfill_config = backfill_config.model_copy(update={'processes': processes})
+        result = BackfillService(config, backfill_config).run(topic_name, sink_table, since, deploy_job)
+
+        click.echo(f"[SUCCESS] 回填完成: {result.sink_table_name}，读取 {result.messages} 条，"
+                   f"写入 {result.rows} 行，耗时 {result.elapsed_seconds} 秒")
+        for partition in result.partitions:
+            click.echo(f"  partition {partition.partition:<4} offset [{partition.start_offset}, "
+                       f"{partition.end_offset}) rows={partition.rows} skipped={partition.skipped}")
+        click.echo(f"从边界 offset 启动的 SQL 记录 ID: {result.sql_record_id}")
+        if result.aliyun_job_id:
+            click.echo(f"阿里云作业记录 ID: {result.aliyun_job_id}")
+        else:
+            click.echo("[WARNING] 未指定 --deploy，该记录尚未部署", err=True)
+
+    except Exception as e:
+        logger.error(f"回填失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command('create-partitions')
+@click.option('--sink-table', required=True, help='Hologres Sink 表名（物理分区表）')
+@click.option('--days', default=3, help='从今天开始预创建的分区天数')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def create_partitions(sink_table: str, days: int, config: str):
+    """预创建物理分区表的未来子分区"""
+    try:
+        from .service import GeneratorService
+
+        service = GeneratorService(config)
+        count = service.create_partitions(sink_table, days)
+        if count:
+            click.echo(f"[SUCCESS] 已预创建 {count} 个子分区")
+        else:
+            click.echo("逻辑分区表由 Hologres 自动管理分区，无需预创建")
+    except Exception as e:
+        logger.error(f"预创建分区失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command('set-projection')
+@click.option('--topic-name', required=True, help='Kafka Topic 名称')
+@click.option('--include', multiple=True, help='保留的字段名，可重复指定')
+@click.option('--exclude', multiple=True, help='剔除的字段名，可重复指定')
+@click.option('--include-pattern', multiple=True, help='保留字段的正则（整体匹配），可重复指定')
+@click.option('--exclude-pattern', multiple=True, help='剔除字段的正则（整体匹配），可重复指定')
+@click.option('--clear', is_flag=True, help='清除字段投影规则')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def set_projection(topic_name: str, include: tuple, exclude: tuple, include_pattern: tuple,
+                   exclude_pattern: tuple, clear: bool, config: str):
+    """设置 Topic 的字段投影规则，生成时只声明投影后的字段"""
+    bind_topic(topic_name)
+    try:
+        from .config import ConfigManager
+        from .database import HologresDAO
+        from .models import FieldProjection
+
+        projection = None
+        if not clear:
+            projection = FieldProjection(
+                include=list(include),
+                exclude=list(exclude),
+                include_patterns=list(include_pattern),
+                exclude_patterns=list(exclude_pattern)
+            )
+        config_manager = ConfigManager(config)
+        dao = HologresDAO(config_manager.get_hologres_config())
+        updated = dao.update_topic_field_projection(topic_name, projection)
+        dao.close()
+        if not updated:
+            raise ValueError(f"Topic 配置不存在: {topic_name}")
+
+        if projection:
+            click.echo("[SUCCESS] 字段投影规则已更新:")
+            click.echo(projection.model_dump_json(indent=2))
+        else:
+            click.echo("[SUCCESS] 字段投影规则已清除")
+    except Exception as e:
+        logger.error(f"设置字段投影失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
 @cli.command()
 @click.option('--deployment-id', required=True, help='部署ID')
 @click.option('--config', default='config.yaml', help='配置文件路径')
 def start(deployment_id: str, config: str):
     """启动已部署的作业"""
     try:
+        from .service import AliyunFlinkService
+
         service = AliyunFlinkService(config)
         result = service.start_job(deployment_id)
 
@@ -75,12 +364,35 @@ def start(deployment_id: str, config: str):
 
 
 @cli.command()
-@click.option('--job-id', required=True, help='作业实例ID')
+@click.option('--job-id', default=None, help='作业实例ID')
+@click.option('--all', 'all_jobs', is_flag=True, help='按部署目标分组列出每个 Sink 表最近一次部署的作业')
+@click.option('--refresh', is_flag=True, help='配合 --all 使用，从阿里云 Flink 刷新运行中作业的状态')
 @click.option('--config', default='config.yaml', help='配置文件路径')
-def status(job_id: str, config: str):
+def status(job_id: str, all_jobs: bool, refresh: bool, config: str):
     """查询作业状态"""
     try:
+        from .service import AliyunFlinkService
+
+        if bool(job_id) == all_jobs:
+            raise ValueError("请指定 --job-id 或 --all 其中之一")
         service = AliyunFlinkService(config)
+
+        if all_jobs:
+            jobs = service.fleet_status(refresh)
+            if not jobs:
+                click.echo("没有部署记录")
+                return
+            groups = {}
+            for job in jobs:
+                target = f"session:{job.session_cluster}" if job.deployment_target == 'session' else 'per-job'
+                groups.setdefault(target, []).append(job)
+            for target, group in sorted(groups.items()):
+                click.echo(f"[{target}] {len(group)} 个作业")
+                for job in group:
+                    click.echo(f"  {job.id:<6} {job.topic_name:<30} {job.sink_table_name:<40} "
+                               f"{job.job_id or '-':<38} {job.status}")
+            return
+
         result = service.get_job_status(job_id)
 
         click.echo(f"作业 ID: {result['job_id']}")
@@ -92,6 +404,313 @@ def status(job_id: str, config: str):
         raise click.Abort()
 
 
+def _history_filter(topic_name: str, status: str, since, until):
+    from .models import HistoryFilter
+    return HistoryFilter(topic_name=topic_name, status=status, since=since, until=until)
+
+
+def _echo_rows(rows, output_format: str, header: str, line, limit: int, key) -> None:
+    """逐行输出迭代器中的结果；取满 limit 条时提示下一页的 --before-id"""
+    count, last = 0, None
+    for row in rows:
+        if output_format == 'json':
+            click.echo(row.model_dump_json())
+        else:
+            if count == 0:
+                click.echo(header)
+            click.echo(line(row))
+        count, last = count + 1, row
+    if count == 0:
+        click.echo("没有符合条件的记录", err=True)
+    elif limit and count == limit:
+        click.echo(f"下一页: --before-id {key(last)}", err=True)
+
+
+def _time(value) -> str:
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value else '-'
+
+
+@cli.command()
+@click.option('--topic-name', default=None, help='Kafka Topic 名称')
+@click.option('--status', default=None, help='记录状态，如 generated / evolved / backfilled；配合 --latest 时为作业状态')
+@click.option('--since', type=click.DateTime(), default=None, help='创建时间下限（包含）')
+@click.option('--until', type=click.DateTime(), default=None, help='创建时间上限（不包含）')
+@click.option('--before-id', type=int, default=None, help='从该 ID 之前继续（上一页输出的提示）')
+@click.option('--limit', default=50, help='最多输出的条数，0 表示全部')
+@click.option('--latest', is_flag=True, help='每个 Topic 只显示最新的 SQL 记录与最近一次部署')
+@click.option('--format', 'output_format', type=click.Choice(['table', 'json']), default='table',
+              help='输出格式，json 为每行一个对象')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def history(topic_name: str, status: str, since, until, before_id: int, limit: int, latest: bool,
+            output_format: str, config: str):
+    """按 Topic、状态与时间范围查询 SQL 生成记录，从新到旧逐页读取"""
+    try:
+        from .config import ConfigManager
+        from .database import HologresDAO
+
+        dao = HologresDAO(ConfigManager(config).get_hologres_config())
+        filters = _history_filter(topic_name, status, since, until)
+        try:
+            if latest:
+                _echo_rows(
+                    dao.iter_latest_topic_deployments(filters, before_id, limit or None), output_format,
+                    f"{'TOPIC_ID':<9} {'TOPIC':<30} {'RECORD':>7} {'VER':>4} {'RECORD_STATUS':<14} "
+                    f"{'JOB':>6} {'JOB_STATUS':<12} {'JOB_UPDATED':<19}",
+                    lambda d: f"{d.topic_id:<9} {d.topic_name:<30} {d.sql_record_id or '-':>7} "
+                              f"{d.version or '-':>4} {d.record_status or '-':<14} {d.aliyun_job_id or '-':>6} "
+                              f"{d.job_status or '-':<12} {_time(d.job_update_time):<19}",
+                    limit, lambda d: d.topic_id
+                )
+            else:
+                _echo_rows(
+                    dao.iter_flink_sql_records(filters, before_id, limit or None), output_format,
+                    f"{'ID':>7} {'TOPIC':<30} {'SINK_TABLE':<40} {'VER':>4} {'STATUS':<12} {'CREATED':<19}",
+                    lambda r: f"{r.id:>7} {r.topic_name:<30} {r.sink_table_name:<40} {r.version:>4} "
+                              f"{r.status:<12} {_time(r.created_at):<19}",
+                    limit, lambda r: r.id
+                )
+        finally:
+            dao.close()
+
+    except Exception as e:
+        logger.error(f"查询 SQL 记录失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command()
+@click.option('--topic-name', default=None, help='Kafka Topic 名称')
+@click.option('--status', default=None, help='作业状态，如 RUNNING / FAILED')
+@click.option('--since', type=click.DateTime(), default=None, help='部署时间下限（包含）')
+@click.option('--until', type=click.DateTime(), default=None, help='部署时间上限（不包含）')
+@click.option('--before-id', type=int, default=None, help='从该阿里云作业记录 ID 之前继续（上一页输出的提示）')
+@click.option('--limit', default=50, help='最多输出的条数，0 表示全部')
+@click.option('--format', 'output_format', type=click.Choice(['table', 'json']), default='table',
+              help='输出格式，json 为每行一个对象')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def jobs(topic_name: str, status: str, since, until, before_id: int, limit: int, output_format: str, config: str):
+    """按 Topic、状态与时间范围查询部署记录，从新到旧逐页读取"""
+    try:
+        from .config import ConfigManager
+        from .database import HologresDAO
+
+        dao = HologresDAO(ConfigManager(config).get_hologres_config())
+        try:
+            _echo_rows(
+                dao.iter_aliyun_flink_jobs(_history_filter(topic_name, status, since, until), before_id,
+                                           limit or None), output_format,
+                f"{'ID':>7} {'TOPIC':<30} {'RECORD':>7} {'STEP':<14} {'STATUS':<12} {'JOB_ID':<38} {'CREATED':<19}",
+                lambda j: f"{j.id:>7} {j.topic_name:<30} {j.sql_record_id:>7} {j.step:<14} {j.status:<12} "
+                          f"{j.job_id or '-':<38} {_time(j.create_time):<19}",
+                limit, lambda j: j.id
+            )
+        finally:
+            dao.close()
+
+    except Exception as e:
+        logger.error(f"查询部署记录失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command()
+@click.option('--topic-name', multiple=True, help='Kafka Topic 名称，可重复指定；默认检查所有运行中的作业')
+@click.option('--interval', type=float, default=0,
+              help='间隔秒数，大于 0 时取两次快照计算追赶速度')
+@click.option('--format', 'output_format', type=click.Choice(['table', 'json', 'prometheus']), default='table',
+              help='输出格式')
+@click.option('--partitions', is_flag=True, help='表格输出时显示每个分区的延迟')
+@click.option('--output', default=None, help='写入文件（如 node_exporter textfile 目录下的 .prom 文件）')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def lag(topic_name: tuple, interval: float, output_format: str, partitions: bool, output: str, config: str):
+    """查看生成作业（消费组 flink_<topic>）的消费延迟"""
+    try:
+        from .service import LagService
+        from .lag_monitor import format_lag_json, format_lag_prometheus, format_lag_table, write_text_file
+
+        service = LagService(config)
+        lags = service.collect(list(topic_name), interval)
+
+        if output_format == 'json':
+            content = format_lag_json(lags)
+        elif output_format == 'prometheus':
+            content = format_lag_prometheus(lags)
+        else:
+            content = format_lag_table(lags, partitions)
+
+        if output:
+            write_text_file(output, content)
+            click.echo(f"[SUCCESS] 已写入 {output}")
+        else:
+            click.echo(content)
+    except Exception as e:
+        logger.error(f"查询消费延迟失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command()
+@click.option('--once', is_flag=True, help='只执行一轮')
+@click.option('--dry-run', is_flag=True, help='只记录决策，不执行扩缩容')
+@click.option('--loop-interval', type=float, default=300, help='控制循环间隔（秒）')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def autoscale(once: bool, dry_run: bool, loop_interval: float, config: str):
+    """按消费延迟自动调整运行中作业的并行度"""
+    try:
+        from .service import AutoscaleService
+
+        service = AutoscaleService(config)
+        if not once:
+            click.echo(f"自动扩缩容已启动，每 {loop_interval:g} 秒执行一轮")
+            service.run(loop_interval, dry_run)
+            return
+
+        for decision in service.run_once(dry_run):
+            target = decision.target_parallelism or '-'
+            status = '（dry-run）' if dry_run else ('' if decision.applied or decision.action == 'hold'
+                                                     else f'（失败: {decision.error_message}）')
+            click.echo(f"{decision.topic_name:<40} {decision.action:<10} "
+                       f"{decision.current_parallelism or '-'} -> {target}  {decision.reason}{status}")
+    except Exception as e:
+        logger.error(f"自动扩缩容失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command()
+@click.option('--once', is_flag=True, help='只执行一轮')
+@click.option('--dry-run', is_flag=True, help='只列出待接入的 Topic，不生成、不推进水位')
+@click.option('--deploy/--no-deploy', default=None, help='生成后是否同时部署，默认使用 watch.deploy')
+@click.option('--concurrency', type=int, default=None, help='同时接入的 Topic 数，默认使用 watch.concurrency')
+@click.option('--poll-interval', type=float, default=None, help='两轮扫描的间隔（秒），默认使用 watch.poll_interval')
+@click.option('--name', default='default', help='水位名称，多个 watch 进程需使用不同名称')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def watch(once: bool, dry_run: bool, deploy: bool, concurrency: int, poll_interval: float, name: str,
+          config: str):
+    """持续发现 kafka_topic_config 中新增的 Topic，自动生成 SQL（可选部署）"""
+    try:
+        from .config import ConfigManager
+        from .service import WatchService
+
+        overrides = {'deploy': deploy, 'concurrency': concurrency, 'poll_interval': poll_interval}
+        watch_config = ConfigManager(config).get_watch_config().model_copy(
+            update={key: value for key, value in overrides.items() if value is not None}
+        )
+        service = WatchService(config, name, watch_config)
+        try:
+            if not once:
+                click.echo(f"watch 已启动，每 {watch_config.poll_interval:g} 秒扫描一次，"
+                           f"并发 {watch_config.concurrency}，{'生成并部署' if watch_config.deploy else '只生成'}")
+                service.run(dry_run)
+                return
+            results = service.run_once(dry_run)
+        finally:
+            service.close()
+
+        for result in results:
+            detail = result.last_error if result.status == 'failed' else f"Record ID: {result.sql_record_id or '-'}"
+            click.echo(f"{result.topic_name:<40} {result.status:<10} 第 {result.attempts} 次  {detail}")
+        click.echo(f"本轮处理 {len(results)} 个 Topic")
+    except Exception as e:
+        logger.error(f"watch 失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command()
+@click.option('--topic-name', 'topic_names', multiple=True, help='Kafka Topic 名称，可重复指定')
+@click.option('--all-new', is_flag=True, help='为所有启用且没有 SQL 记录的 Topic 创建任务')
+@click.option('--retry-failed', is_flag=True, help='失败的任务重新排队')
+@click.option('--deploy', is_flag=True, help='worker 生成后同时部署')
+@click.option('--job-profile', default=None, help='作业调优配置名称（config.yaml 中 flink_sql.profiles）')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def enqueue(topic_names: tuple, all_new: bool, retry_failed: bool, deploy: bool, job_profile: str, config: str):
+    """向分布式生成队列添加 Topic 任务，由 worker 命令处理"""
+    if not (topic_names or all_new or retry_failed):
+        click.echo("[ERROR] 请指定 --topic-name、--all-new 或 --retry-failed", err=True)
+        raise click.Abort()
+    try:
+        from .config import ConfigManager
+        from .database import HologresDAO
+
+        config_manager = ConfigManager(config)
+        if job_profile:
+            config_manager.get_flink_sql_profile(job_profile)
+        dao = HologresDAO(config_manager.get_hologres_config())
+        created = 0
+        if topic_names:
+            created += dao.enqueue_generation_tasks(list(topic_names), job_profile, deploy)
+        if all_new:
+            created += dao.enqueue_new_topic_generation_tasks(job_profile, deploy)
+        retried = dao.retry_failed_generation_tasks() if retry_failed else 0
+        counts = dao.count_generation_tasks()
+        dao.close()
+
+        click.echo(f"[SUCCESS] 新建 {created} 个任务，重新排队 {retried} 个失败任务（已有任务的 Topic 不重复创建）")
+        click.echo("队列: " + ", ".join(f"{status}={count}" for status, count in sorted(counts.items())))
+    except Exception as e:
+        logger.error(f"创建生成任务失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command()
+@click.option('--once', is_flag=True, help='处理到队列中没有可领取的任务后退出')
+@click.option('--concurrency', type=int, default=None, help='同时处理的任务数，默认使用 generation_queue.concurrency')
+@click.option('--worker-id', default=None, help='worker 标识，默认为 主机名-进程号')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def worker(once: bool, concurrency: int, worker_id: str, config: str):
+    """从分布式生成队列领取任务并生成 SQL，可在多台机器上同时运行"""
+    try:
+        from .config import ConfigManager
+        from .service import GenerationWorker
+
+        queue_config = ConfigManager(config).get_generation_queue_config()
+        if concurrency:
+            queue_config = queue_config.model_copy(update={'concurrency': concurrency})
+        service = GenerationWorker(config, worker_id, queue_config)
+        click.echo(f"worker {service.worker_id} 已启动，并发 {queue_config.concurrency}")
+        results = service.run(once)
+        click.echo("处理结果: " + (", ".join(f"{status}={count}" for status, count in sorted(results.items()))
+                                   or "没有可领取的任务"))
+    except Exception as e:
+        logger.error(f"worker 失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
+@cli.command('profile-topic')
+@click.option('--topic-name', required=True, help='Kafka Topic 名称')
+@click.option('--window', type=float, default=60, help='测速窗口（秒），按窗口前后 end offset 差值计算写入速度')
+@click.option('--sample-count', default=1000, help='采样消息数，从每个分区末尾读取')
+@click.option('--no-save', is_flag=True, help='只输出结果，不写入 topic_profile')
+@click.option('--config', default='config.yaml', help='配置文件路径')
+def profile_topic(topic_name: str, window: float, sample_count: int, no_save: bool, config: str):
+    """测量 Topic 写入速度与消息体大小，估算 Hologres 每日写入量"""
+    bind_topic(topic_name)
+    try:
+        from .service import ProfileService
+        from .topic_profiler import format_bytes
+
+        service = ProfileService(config)
+        profile = service.profile(topic_name, window, sample_count, save=not no_save)
+
+        click.echo(f"Topic: {profile.topic_name}（{profile.partition_count} 个分区）")
+        click.echo(f"写入速度: {profile.messages_per_second:.2f} 条/秒（窗口 {profile.window_seconds:g} 秒）")
+        click.echo(f"采样: {profile.sample_count} 条")
+        click.echo(f"消息大小: 平均 {format_bytes(profile.avg_message_bytes)}，"
+                   f"p99 {format_bytes(profile.p99_message_bytes)}")
+        click.echo(f"压缩比: {profile.compression_ratio:.2f}")
+        click.echo(f"字段数: {profile.field_count}")
+        click.echo(f"预计 Hologres 每日写入: {format_bytes(profile.estimated_bytes_per_day)}")
+        if profile.id:
+            click.echo(f"[SUCCESS] 画像已保存，Profile ID: {profile.id}")
+    except Exception as e:
+        logger.error(f"采集 Topic 画像失败: {e}")
+        click.echo(f"[ERROR] {e}", err=True)
+        raise click.Abort()
+
+
 @cli.command()
 @click.option('--topic-name', required=True, help='Kafka Topic 名称')
 @click.option('--count', default=10, help='拉取消息数量')
@@ -99,10 +718,16 @@ def status(job_id: str, config: str):
 @click.option('--config', default='config.yaml', help='配置文件路径')
 def fetch(topic_name: str, count: int, demo_file: str, config: str):
     """从 Kafka 拉取数据并打印"""
+    bind_topic(topic_name)
     try:
+        from .kafka_client import KafkaClient
+
         if demo_file:
             messages = KafkaClient.load_from_file(demo_file, count=count)
         else:
+            from .config import ConfigManager
+            from .database import HologresDAO
+
             config_manager = ConfigManager(config)
             dao = HologresDAO(config_manager.get_hologres_config())
 
@@ -110,14 +735,18 @@ def fetch(topic_name: str, count: int, demo_file: str, config: str):
             if not topic_config:
                 raise ValueError(f"Topic 配置不存在: {topic_name}")
 
-            kafka_client = KafkaClient(topic_config.kafka_brokers, topic_name)
+            from .formats import get_message_format
+
+            message_format = get_message_format(topic_config.data_format, topic_config.format_options, topic_name)
+            kafka_client = KafkaClient(topic_config.kafka_brokers, topic_name, message_format)
             messages = kafka_client.sample_messages(count=count)
             dao.close()
 
         click.echo(f"成功拉取 {len(messages)} 条消息:\n")
         for i, msg in enumerate(messages, 1):
             click.echo(f"--- 消息 {i} ---")
-            click.echo(json.dumps(msg, ensure_ascii=False, indent=2))
+            # Avro 等格式解码后可能包含时间等非 JSON 类型
+            click.echo(json.dumps(msg, ensure_ascii=False, indent=2, default=str))
 
     except Exception as e:
         logger.error(f"拉取失败: {e}")
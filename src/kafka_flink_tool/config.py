@@ -1,5 +1,6 @@
 import yaml
-from pydantic import BaseModel
+from typing import Any, Dict, Literal, Optional
+from pydantic import BaseModel, model_validator
 
 
 class HologresConfig(BaseModel):
@@ -11,6 +12,23 @@ class HologresConfig(BaseModel):
     password: str
 
 
+class DeploymentTargetConfig(BaseModel):
+    """作业部署目标：独立集群（per_job）或已预热的 Session 集群"""
+    mode: Literal["per_job", "session"] = "per_job"
+    session_cluster: Optional[str] = None
+
+    @model_validator(mode='after')
+    def _check_session_cluster(self):
+        if self.mode == 'session' and not self.session_cluster:
+            raise ValueError("部署到 Session 集群时必须指定 session_cluster")
+        if self.mode == 'per_job':
+            self.session_cluster = None
+        return self
+
+    def describe(self) -> str:
+        return f"session:{self.session_cluster}" if self.mode == 'session' else 'per-job'
+
+
 class AliyunFlinkConfig(BaseModel):
     """阿里云 Flink 配置"""
     workspace_id: str
@@ -19,6 +37,87 @@ class AliyunFlinkConfig(BaseModel):
     access_key_secret: str
     region: str = "cn-hangzhou"
     endpoint: str
+    deployment_target: DeploymentTargetConfig = DeploymentTargetConfig()
+
+
+class PartitionConfig(BaseModel):
+    """Sink 表分区配置"""
+    mode: Literal["logical", "physical"] = "logical"
+    source: str = "etl_time"  # etl_time / auto（推断事件时间字段）/ 字段名
+    ttl_days: Optional[int] = None
+    precreate_days: int = 3  # 物理分区表建表时预创建的未来分区天数
+
+
+class FlinkSQLProfile(BaseModel):
+    """Flink 作业调优配置（SET 参数、Sink 缓冲参数、去重窗口与分区）"""
+    settings: Dict[str, Any] = {}
+    sink_options: Dict[str, Any] = {}
+    dedup_window: Optional[str] = None
+    partition: Optional[PartitionConfig] = None
+
+
+class FlinkSQLConfig(BaseModel):
+    """Flink SQL 生成配置"""
+    default_profile: Optional[str] = None
+    profiles: Dict[str, FlinkSQLProfile] = {}
+
+
+class CastValidationConfig(BaseModel):
+    """部署前类型转换校验的阈值，超过时阻止部署"""
+    max_failure_rate: float = 0.0  # 任一行转换失败都会导致作业异常
+    max_null_rate: float = 0.0  # 有值但转换后为 NULL 的比例
+
+
+class AutoscaleConfig(BaseModel):
+    """按消费延迟自动扩缩容配置"""
+    min_parallelism: int = 1
+    max_parallelism: int = 32  # 单个作业的并行度上限，实际上限还受分区数限制
+    max_total_parallelism: Optional[int] = None  # 所有作业并行度之和的资源预算
+    target_drain_seconds: int = 600  # 期望在多长时间内消化积压
+    target_utilization: float = 0.8  # 单并行度按实测吞吐的比例规划，预留余量
+    # 单并行度可处理的消息数/秒；未积压时实测速度只是吞吐下限，需要该值才能估算缩容
+    rate_per_parallelism: Optional[float] = None
+    scale_up_lag: int = 10000  # 总延迟低于该值时不扩容
+    scale_down_ratio: float = 0.7  # 目标并行度不高于当前的该比例时才缩容
+    cooldown_seconds: int = 900  # 两次扩缩容之间的最小间隔
+    sample_interval: float = 30  # 计算速率的两次快照间隔（秒）
+
+
+class WatchConfig(BaseModel):
+    """watch 模式：自动发现并接入新 Topic"""
+    poll_interval: float = 60  # 两轮扫描的间隔（秒）
+    concurrency: int = 4  # 同时生成/部署的 Topic 数
+    batch_size: int = 100  # 每次从 kafka_topic_config 读取的变更行数
+    # 只扫描 updated_at 早于当前时间该秒数的行，避免未提交的事务在水位之后才可见而被跳过
+    settle_seconds: int = 60
+    deploy: bool = False  # 生成后同时部署到阿里云 Flink
+    job_profile: Optional[str] = None
+    max_attempts: int = 3  # 失败的 Topic 自动重试的总次数
+    retry_interval: int = 600  # 失败后至少间隔多少秒再重试
+
+
+class GenerationQueueConfig(BaseModel):
+    """分布式生成任务队列与 worker"""
+    concurrency: int = 2  # 每个 worker 进程同时处理的任务数
+    poll_interval: float = 10  # 队列为空时的等待间隔（秒）
+    lease_seconds: int = 300  # 租约时长，worker 失联超过该时间后任务重新排队
+    heartbeat_interval: float = 60  # 续租间隔，需明显小于 lease_seconds
+    max_attempts: int = 3  # 任务失败或 worker 失联后最多尝试的次数
+    claim_batch: int = 20  # 每次读取的候选任务数，worker 打乱顺序后逐个抢占，减少冲突
+    retry_backoff: float = 60  # 失败后第一次重试前的等待秒数，之后每次翻倍
+    max_retry_backoff: float = 1800  # 重试等待的上限（秒）
+
+    def retry_delay(self, attempts: int) -> float:
+        """第 attempts 次尝试失败后，重新领取前至少等待的秒数"""
+        return min(self.retry_backoff * 2 ** max(attempts - 1, 0), self.max_retry_backoff)
+
+
+class BackfillConfig(BaseModel):
+    """历史数据回填：按分区读取 Kafka，以 COPY 批量写入 Sink 表"""
+    processes: int = 4  # 读取进程数，分区按进程分组，每个进程一个 consumer
+    buffer_bytes: int = 16 * 1024 * 1024  # 每个进程缓冲的 COPY 数据量，达到后写入一次
+    max_poll_records: int = 5000  # 每次 poll 返回的最大消息数
+    idle_timeout: float = 300  # 超过该秒数没有读到消息时报错
 
 
 class ConfigManager:
@@ -26,15 +125,59 @@ class ConfigManager:
         self.config_path = config_path
         self._config = None
 
-    def get_hologres_config(self) -> HologresConfig:
+    def _load(self) -> dict:
         if not self._config:
             with open(self.config_path, 'r', encoding='utf-8') as f:
                 self._config = yaml.safe_load(f)
-        return HologresConfig(**self._config['hologres'])
+        return self._config
+
+    def get_hologres_config(self) -> HologresConfig:
+        return HologresConfig(**self._load()['hologres'])
 
     def get_aliyun_flink_config(self) -> AliyunFlinkConfig:
         """获取阿里云 Flink 配置"""
-        if not self._config:
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                self._config = yaml.safe_load(f)
-        return AliyunFlinkConfig(**self._config.get('aliyun_flink', {}))
+        return AliyunFlinkConfig(**self._load().get('aliyun_flink', {}))
+
+    def get_autoscale_config(self) -> AutoscaleConfig:
+        """获取自动扩缩容配置"""
+        return AutoscaleConfig(**(self._load().get('autoscale') or {}))
+
+    def get_watch_config(self) -> WatchConfig:
+        """获取 watch 模式配置"""
+        return WatchConfig(**(self._load().get('watch') or {}))
+
+    def get_generation_queue_config(self) -> GenerationQueueConfig:
+        """获取分布式生成任务队列配置"""
+        return GenerationQueueConfig(**(self._load().get('generation_queue') or {}))
+
+    def get_backfill_config(self) -> BackfillConfig:
+        """获取历史数据回填配置"""
+        return BackfillConfig(**(self._load().get('backfill') or {}))
+
+    def get_cast_validation_config(self) -> CastValidationConfig:
+        """获取类型转换校验配置"""
+        return CastValidationConfig(**(self._load().get('cast_validation') or {}))
+
+    def get_flink_sql_config(self) -> FlinkSQLConfig:
+        """获取 Flink SQL 生成配置"""
+        return FlinkSQLConfig(**(self._load().get('flink_sql') or {}))
+
+    def get_flink_sql_profile(self, name: Optional[str] = None) -> tuple[Optional[str], FlinkSQLProfile]:
+        """获取作业调优配置
+
+        Args:
+            name: 配置名称，未指定时使用 default_profile
+
+        Returns:
+            tuple: (实际使用的配置名称, 配置内容)，未配置时返回空配置
+
+        Raises:
+            ValueError: 指定的配置不存在
+        """
+        flink_sql_config = self.get_flink_sql_config()
+        name = name or flink_sql_config.default_profile
+        if not name:
+            return None, FlinkSQLProfile()
+        if name not in flink_sql_config.profiles:
+            raise ValueError(f"作业调优配置不存在: {name}")
+        return name, flink_sql_config.profiles[name]
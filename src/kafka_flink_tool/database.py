@@ -1,14 +1,57 @@
-import psycopg2
+import itertools
 import json
-from typing import Optional
+from datetime import datetime
+from typing import IO, Dict, Iterator, List, Optional, Tuple
 from .config import HologresConfig
-from .models import KafkaTopicConfig, FlinkSQLRecord, AliyunFlinkJob
+from .models import (
+    KafkaTopicConfig, FlinkSQLRecord, FlinkSQLRecordSummary, AliyunFlinkJob, FieldProjection, GenerationTask,
+    HistoryFilter, ScalingDecision, TopicChange, TopicLatestDeployment, TopicOnboarding, TopicProfile
+)
 
 
 class HologresDAO:
+    FLINK_SQL_RECORD_COLUMNS = (
+        "id, topic_id, topic_name, sink_table_name, source_ddl, sink_ddl, insert_sql, "
+        "full_sql, inferred_schema, sample_count, status, flink_settings, version, sql_hash, stage_timings"
+    )
+    FLINK_SQL_RECORD_INSERT_COLUMNS = (
+        "topic_id, topic_name, sink_table_name, source_ddl, sink_ddl, insert_sql, full_sql, "
+        "inferred_schema, sample_count, status, flink_settings, version, sql_hash"
+    )
+    FLINK_SQL_RECORD_INSERT_TEMPLATE = "(%s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s::jsonb, %s, %s)"
+    ALIYUN_FLINK_JOB_COLUMNS = (
+        "id, sql_record_id, deployment_id, job_id, status, workspace_id, namespace, "
+        "create_time, update_time, start_time, end_time, error_message, flink_config, draft_id, step, "
+        "deployment_target, session_cluster"
+    )
+    TOPIC_CONFIG_COLUMNS = (
+        "id, topic_name, kafka_brokers, data_format, description, is_active, field_projection, format_options"
+    )
+    TOPIC_ONBOARDING_COLUMNS = (
+        "topic_id, topic_name, status, attempts, last_error, sql_record_id, aliyun_job_id, updated_at"
+    )
+    GENERATION_TASK_COLUMNS = (
+        "topic_name, job_profile, deploy, status, attempts, worker_id, lease_token, lease_expires_at, "
+        "last_error, sql_record_id, aliyun_job_id, created_at, updated_at, not_before"
+    )
+    FLINK_SQL_RECORD_SUMMARY_COLUMNS = "id, topic_id, topic_name, sink_table_name, version, status, sql_hash, created_at"
+    TOPIC_LATEST_DEPLOYMENT_COLUMNS = (
+        "topic_id, topic_name, is_active, sql_record_id, sink_table_name, version, record_status, "
+        "record_created_at, aliyun_job_id, job_id, job_status, job_update_time"
+    )
+    TOPIC_PROFILE_COLUMNS = (
+        "id, topic_name, partition_count, window_seconds, messages_per_second, sample_count, "
+        "avg_message_bytes, p99_message_bytes, compression_ratio, field_count, estimated_bytes_per_day, created_at"
+    )
+
+    # keyset 分页每页的行数，页内服务端游标每次往返读取的行数
+    PAGE_SIZE = 500
+    CURSOR_ITERSIZE = 100
+
     def __init__(self, config: HologresConfig):
         self.config = config
         self._conn = None
+        self._cursor_ids = itertools.count(1)
 
     def _get_connection(self):
         """获取数据库连接，带健康检查"""
@@ -25,6 +68,8 @@ class HologresDAO:
 
     def _create_connection(self):
         """创建新的数据库连接"""
+        # psycopg2 只在首次连接时导入，不访问数据库的命令无需加载
+        import psycopg2
         return psycopg2.connect(
             host=self.config.host,
             port=self.config.port,
@@ -37,22 +82,386 @@ class HologresDAO:
         conn = self._get_connection()
         with conn.cursor() as cur:
             cur.execute(
-                "SELECT id, topic_name, kafka_brokers, data_format, description, is_active "
+                f"SELECT {self.TOPIC_CONFIG_COLUMNS} "
                 "FROM kafka_topic_config WHERE topic_name = %s AND is_active = true",
                 (topic_name,)
             )
             row = cur.fetchone()
             if row:
-                return KafkaTopicConfig(
-                    id=row[0],
-                    topic_name=row[1],
-                    kafka_brokers=row[2],
-                    data_format=row[3],
-                    description=row[4],
-                    is_active=row[5]
-                )
+                return self._row_to_topic_config(row)
         return None
 
+    def get_topic_configs_by_ids(self, topic_ids: List[int]) -> Dict[int, KafkaTopicConfig]:
+        """批量获取 Topic 配置（包含已停用的 Topic）"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"SELECT {self.TOPIC_CONFIG_COLUMNS} FROM kafka_topic_config WHERE id = ANY(%s)",
+                (list(topic_ids),)
+            )
+            return {row[0]: self._row_to_topic_config(row) for row in cur.fetchall()}
+
+    def get_topic_configs_by_names(self, topic_names: List[str]) -> Dict[str, KafkaTopicConfig]:
+        """批量获取启用中的 Topic 配置"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"SELECT {self.TOPIC_CONFIG_COLUMNS} "
+                "FROM kafka_topic_config WHERE topic_name = ANY(%s) AND is_active = true",
+                (list(topic_names),)
+            )
+            return {row[1]: self._row_to_topic_config(row) for row in cur.fetchall()}
+
+    @staticmethod
+    def _row_to_topic_config(row) -> KafkaTopicConfig:
+        return KafkaTopicConfig(
+            id=row[0],
+            topic_name=row[1],
+            kafka_brokers=row[2],
+            data_format=row[3],
+            description=row[4],
+            is_active=row[5],
+            field_projection=row[6],
+            format_options=row[7]
+        )
+
+    def list_topic_changes(self, after: Optional[Tuple[datetime, int]], limit: int,
+                           settle_seconds: int = 0) -> List[TopicChange]:
+        """按 (updated_at, id) 顺序读取水位之后的 Topic 配置变更（包含已停用的 Topic）
+
+        Args:
+            after: 上次处理到的 (updated_at, id)，为空时从头读取
+            settle_seconds: 只读取 updated_at 早于当前时间该秒数的行
+        """
+        columns = ", ".join(f"t.{c.strip()}" for c in self.TOPIC_CONFIG_COLUMNS.split(","))
+        conditions = ["t.updated_at <= CURRENT_TIMESTAMP - %s * INTERVAL '1 second'"]
+        params: list = [settle_seconds]
+        if after:
+            conditions.append("(t.updated_at > %s OR (t.updated_at = %s AND t.id > %s))")
+            params.extend([after[0], after[0], after[1]])
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT {columns}, t.updated_at,
+                       EXISTS (SELECT 1 FROM flink_sql_record r WHERE r.topic_id = t.id)
+                FROM kafka_topic_config t
+                WHERE {' AND '.join(conditions)}
+                ORDER BY t.updated_at, t.id
+                LIMIT %s
+                """,
+                (*params, limit)
+            )
+            return [
+                TopicChange(topic=self._row_to_topic_config(row), updated_at=row[-2], has_record=row[-1])
+                for row in cur.fetchall()
+            ]
+
+    def list_unonboarded_topics(self, limit: int) -> List[KafkaTopicConfig]:
+        """获取启用中、但既没有 SQL 记录也没有接入记录的 Topic
+
+        只修改 is_active 而没有更新 updated_at 的 Topic 不会出现在水位之后，由该查询补扫。
+        """
+        columns = ", ".join(f"t.{c.strip()}" for c in self.TOPIC_CONFIG_COLUMNS.split(","))
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT {columns} FROM kafka_topic_config t
+                WHERE t.is_active = true
+                  AND NOT EXISTS (SELECT 1 FROM flink_sql_record r WHERE r.topic_id = t.id)
+                  AND NOT EXISTS (SELECT 1 FROM topic_onboarding o WHERE o.topic_id = t.id)
+                ORDER BY t.id
+                LIMIT %s
+                """,
+                (limit,)
+            )
+            return [self._row_to_topic_config(row) for row in cur.fetchall()]
+
+    def get_watch_checkpoint(self, name: str) -> Optional[Tuple[datetime, int]]:
+        """获取 watch 已处理到的 (updated_at, id) 水位"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT last_updated_at, last_topic_id FROM topic_watch_checkpoint WHERE name = %s",
+                (name,)
+            )
+            row = cur.fetchone()
+        return (row[0], row[1]) if row else None
+
+    def save_watch_checkpoint(self, name: str, checkpoint: Tuple[datetime, int]) -> None:
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO topic_watch_checkpoint (name, last_updated_at, last_topic_id)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (name) DO UPDATE
+                SET last_updated_at = EXCLUDED.last_updated_at, last_topic_id = EXCLUDED.last_topic_id,
+                    updated_at = CURRENT_TIMESTAMP
+                """,
+                (name, checkpoint[0], checkpoint[1])
+            )
+        conn.commit()
+
+    def get_topic_onboardings(self, topic_ids: List[int]) -> Dict[int, TopicOnboarding]:
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"SELECT {self.TOPIC_ONBOARDING_COLUMNS} FROM topic_onboarding WHERE topic_id = ANY(%s)",
+                (list(topic_ids),)
+            )
+            return {row[0]: self._row_to_topic_onboarding(row) for row in cur.fetchall()}
+
+    def list_retryable_topic_onboardings(self, max_attempts: int, retry_interval: int) -> List[TopicOnboarding]:
+        """获取失败次数未达上限、且距上次失败超过 retry_interval 秒的 Topic"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT {self.TOPIC_ONBOARDING_COLUMNS} FROM topic_onboarding
+                WHERE status = 'failed' AND attempts < %s
+                  AND updated_at <= CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+                ORDER BY updated_at
+                """,
+                (max_attempts, retry_interval)
+            )
+            return [self._row_to_topic_onboarding(row) for row in cur.fetchall()]
+
+    def save_topic_onboarding(self, onboarding: TopicOnboarding) -> None:
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO topic_onboarding (
+                    topic_id, topic_name, status, attempts, last_error, sql_record_id, aliyun_job_id
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (topic_id) DO UPDATE
+                SET topic_name = EXCLUDED.topic_name, status = EXCLUDED.status, attempts = EXCLUDED.attempts,
+                    last_error = EXCLUDED.last_error, sql_record_id = EXCLUDED.sql_record_id,
+                    aliyun_job_id = EXCLUDED.aliyun_job_id, updated_at = CURRENT_TIMESTAMP
+                """,
+                (
+                    onboarding.topic_id, onboarding.topic_name, onboarding.status, onboarding.attempts,
+                    onboarding.last_error, onboarding.sql_record_id, onboarding.aliyun_job_id
+                )
+            )
+        conn.commit()
+
+    @staticmethod
+    def _row_to_topic_onboarding(row) -> TopicOnboarding:
+        return TopicOnboarding(
+            topic_id=row[0],
+            topic_name=row[1],
+            status=row[2],
+            attempts=row[3],
+            last_error=row[4],
+            sql_record_id=row[5],
+            aliyun_job_id=row[6],
+            updated_at=row[7]
+        )
+
+    def enqueue_generation_tasks(self, topic_names: List[str], job_profile: Optional[str] = None,
+                                 deploy: bool = False) -> int:
+        """为 Topic 创建生成任务，已有任务的 Topic 保持不变
+
+        Returns:
+            int: 新建的任务数
+        """
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO generation_task (topic_name, job_profile, deploy)
+                SELECT name, %s, %s FROM UNNEST(%s::text[]) AS name
+                ON CONFLICT (topic_name) DO NOTHING
+                """,
+                (job_profile, deploy, list(topic_names))
+            )
+            created = cur.rowcount
+        conn.commit()
+        return created
+
+    def enqueue_new_topic_generation_tasks(self, job_profile: Optional[str] = None, deploy: bool = False) -> int:
+        """为所有启用且没有 SQL 记录的 Topic 创建生成任务"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO generation_task (topic_name, job_profile, deploy)
+                SELECT t.topic_name, %s, %s FROM kafka_topic_config t
+                WHERE t.is_active = true
+                  AND NOT EXISTS (SELECT 1 FROM flink_sql_record r WHERE r.topic_id = t.id)
+                ON CONFLICT (topic_name) DO NOTHING
+                """,
+                (job_profile, deploy)
+            )
+            created = cur.rowcount
+        conn.commit()
+        return created
+
+    def retry_failed_generation_tasks(self) -> int:
+        """失败的任务重新排队，尝试次数清零"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE generation_task SET status = 'pending', attempts = 0, not_before = NULL, "
+                "updated_at = CURRENT_TIMESTAMP WHERE status = 'failed'"
+            )
+            updated = cur.rowcount
+        conn.commit()
+        return updated
+
+    def count_generation_tasks(self) -> Dict[str, int]:
+        """按状态统计任务数"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute("SELECT status, COUNT(*) FROM generation_task GROUP BY status")
+            return {row[0]: row[1] for row in cur.fetchall()}
+
+    def requeue_expired_generation_tasks(self, max_attempts: int) -> Tuple[int, int]:
+        """租约过期的 running 任务（worker 已失联）重新排队，达到 max_attempts 的标记为 failed
+
+        Returns:
+            Tuple[int, int]: (重新排队数, 标记失败数)
+        """
+        conn = self._get_connection()
+        counts = []
+        with conn.cursor() as cur:
+            for status, attempts_condition in (('failed', 'attempts >= %s'), ('pending', 'attempts < %s')):
+                cur.execute(
+                    f"""
+                    UPDATE generation_task
+                    SET status = %s, last_error = 'worker ' || COALESCE(worker_id, '') || ' 租约过期',
+                        lease_token = NULL, lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+                    WHERE status = 'running' AND lease_expires_at < CURRENT_TIMESTAMP AND {attempts_condition}
+                    """,
+                    (status, max_attempts)
+                )
+                counts.append(cur.rowcount)
+        conn.commit()
+        return counts[1], counts[0]
+
+    def list_claimable_generation_tasks(self, limit: int) -> List[GenerationTask]:
+        """读取待领取的任务，尝试次数少的优先；失败后仍在退避时间内的任务不返回"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT {self.GENERATION_TASK_COLUMNS}
+                FROM generation_task
+                WHERE status = 'pending' AND (not_before IS NULL OR not_before <= CURRENT_TIMESTAMP)
+                ORDER BY attempts, created_at LIMIT %s
+                """,
+                (limit,)
+            )
+            return [self._row_to_generation_task(row) for row in cur.fetchall()]
+
+    def claim_generation_task(self, task: GenerationTask, worker_id: str, lease_token: str,
+                              lease_seconds: int) -> bool:
+        """按读取时的状态与尝试次数条件更新领取任务，其他 worker 已领取时返回 False
+
+        Hologres 不支持 SELECT ... FOR UPDATE SKIP LOCKED，这里以尝试次数作为版本号做比较并交换：
+        每次领取都会增加 attempts，同一时刻只有一个 worker 的条件更新能命中。
+        """
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE generation_task
+                SET status = 'running', attempts = attempts + 1, worker_id = %s, lease_token = %s,
+                    lease_expires_at = CURRENT_TIMESTAMP + %s * INTERVAL '1 second',
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE topic_name = %s AND status = 'pending' AND attempts = %s
+                """,
+                (worker_id, lease_token, lease_seconds, task.topic_name, task.attempts)
+            )
+            claimed = cur.rowcount == 1
+        conn.commit()
+        return claimed
+
+    def renew_generation_task_lease(self, topic_name: str, lease_token: str, lease_seconds: int) -> bool:
+        """续租；令牌不符（租约已过期并被其他 worker 领取）时返回 False"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE generation_task
+                SET lease_expires_at = CURRENT_TIMESTAMP + %s * INTERVAL '1 second'
+                WHERE topic_name = %s AND status = 'running' AND lease_token = %s
+                """,
+                (lease_seconds, topic_name, lease_token)
+            )
+            renewed = cur.rowcount == 1
+        conn.commit()
+        return renewed
+
+    def finish_generation_task(self, topic_name: str, lease_token: str, status: str,
+                               last_error: Optional[str] = None, sql_record_id: Optional[int] = None,
+                               aliyun_job_id: Optional[int] = None, retry_delay: float = 0) -> bool:
+        """记录任务结果并释放租约；令牌不符时不更新并返回 False
+
+        Args:
+            retry_delay: 重新排队（status 为 pending）时，至少等待该秒数后才能再次领取
+        """
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE generation_task
+                SET status = %s, last_error = %s,
+                    sql_record_id = COALESCE(%s, sql_record_id),
+                    aliyun_job_id = COALESCE(%s, aliyun_job_id),
+                    not_before = CURRENT_TIMESTAMP + %s * INTERVAL '1 second',
+                    lease_token = NULL, lease_expires_at = NULL, updated_at = CURRENT_TIMESTAMP
+                WHERE topic_name = %s AND status = 'running' AND lease_token = %s
+                """,
+                (status, last_error, sql_record_id, aliyun_job_id, retry_delay if status == 'pending' else 0,
+                 topic_name, lease_token)
+            )
+            finished = cur.rowcount == 1
+        conn.commit()
+        return finished
+
+    @staticmethod
+    def _row_to_generation_task(row) -> GenerationTask:
+        return GenerationTask(
+            topic_name=row[0],
+            job_profile=row[1],
+            deploy=row[2],
+            status=row[3],
+            attempts=row[4],
+            worker_id=row[5],
+            lease_token=row[6],
+            lease_expires_at=row[7],
+            last_error=row[8],
+            sql_record_id=row[9],
+            aliyun_job_id=row[10],
+            created_at=row[11],
+            updated_at=row[12],
+            not_before=row[13]
+        )
+
+    def update_topic_field_projection(self, topic_name: str, projection: Optional[FieldProjection]) -> bool:
+        """更新 Topic 的字段投影规则，projection 为空时清除
+
+        Returns:
+            bool: Topic 是否存在
+        """
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE kafka_topic_config
+                SET field_projection = %s::jsonb, updated_at = CURRENT_TIMESTAMP
+                WHERE topic_name = %s
+                """,
+                (projection.model_dump_json() if projection else None, topic_name)
+            )
+            updated = cur.rowcount > 0
+        conn.commit()
+        return updated
+
     def table_exists(self, table_name: str) -> bool:
         conn = self._get_connection()
         with conn.cursor() as cur:
@@ -69,6 +478,47 @@ class HologresDAO:
             cur.execute(ddl)
         conn.commit()
 
+    def get_table_columns(self, table_name: str) -> dict:
+        """获取线上表的列名到 data_type 的映射"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT column_name, data_type FROM information_schema.columns "
+                "WHERE table_name = %s ORDER BY ordinal_position",
+                (table_name,)
+            )
+            return {row[0]: row[1] for row in cur.fetchall()}
+
+    def alter_table(self, ddls: list) -> None:
+        """在同一事务中执行多条 ALTER TABLE 语句"""
+        conn = self._get_connection()
+        try:
+            with conn.cursor() as cur:
+                for ddl in ddls:
+                    cur.execute(ddl)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    def copy_rows(self, table_name: str, columns: List[str], data: IO[str], upsert: bool = False) -> None:
+        """以 COPY FROM STDIN（text 格式）批量写入
+
+        Args:
+            data: 每行以制表符分隔、\\N 表示 NULL 的文本
+            upsert: 按主键覆盖已有行，与 Sink 的 insertOrReplace 一致；需要表有主键
+        """
+        options = "FORMAT text, STREAM_MODE TRUE" + (", ON_CONFLICT UPDATE" if upsert else "")
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        conn = self._get_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.copy_expert(f"COPY {table_name} ({column_list}) FROM STDIN WITH ({options})", data)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
     def save_flink_sql_record(self, record: FlinkSQLRecord) -> int:
         """保存 Flink SQL 记录
 
@@ -76,28 +526,181 @@ class HologresDAO:
         """
         conn = self._get_connection()
         with conn.cursor() as cur:
-            # 将 dict 转为 JSON 字符串
-            inferred_schema_json = json.dumps(record.inferred_schema) if record.inferred_schema else None
-
             cur.execute(
-                """
-                INSERT INTO flink_sql_record (
-                    topic_id, topic_name, sink_table_name,
-                    source_ddl, sink_ddl, insert_sql, full_sql,
-                    inferred_schema, sample_count, status
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s, %s)
+                f"""
+                INSERT INTO flink_sql_record ({self.FLINK_SQL_RECORD_INSERT_COLUMNS})
+                VALUES {self.FLINK_SQL_RECORD_INSERT_TEMPLATE}
                 RETURNING id
                 """,
-                (
-                    record.topic_id, record.topic_name, record.sink_table_name,
-                    record.source_ddl, record.sink_ddl, record.insert_sql, record.full_sql,
-                    inferred_schema_json, record.sample_count, record.status
-                )
+                self._flink_sql_record_params(record)
             )
             record_id = cur.fetchone()[0]
         conn.commit()
         return record_id
 
+    def save_flink_sql_records(self, records: List[FlinkSQLRecord]) -> List[int]:
+        """在同一事务中批量保存 Flink SQL 记录，任一失败则全部回滚
+
+        Returns:
+            List[int]: 与 records 顺序一致的记录 ID
+        """
+        if not records:
+            return []
+        from psycopg2.extras import execute_values
+
+        conn = self._get_connection()
+        try:
+            with conn.cursor() as cur:
+                rows = execute_values(
+                    cur,
+                    f"""
+                    INSERT INTO flink_sql_record ({self.FLINK_SQL_RECORD_INSERT_COLUMNS})
+                    VALUES %s
+                    RETURNING id
+                    """,
+                    [self._flink_sql_record_params(record) for record in records],
+                    template=self.FLINK_SQL_RECORD_INSERT_TEMPLATE,
+                    page_size=500,
+                    fetch=True
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _flink_sql_record_params(record: FlinkSQLRecord) -> tuple:
+        # 将 dict 转为 JSON 字符串
+        inferred_schema_json = json.dumps(record.inferred_schema) if record.inferred_schema else None
+        flink_settings_json = json.dumps(record.flink_settings) if record.flink_settings else None
+        return (
+            record.topic_id, record.topic_name, record.sink_table_name,
+            record.source_ddl, record.sink_ddl, record.insert_sql, record.full_sql,
+            inferred_schema_json, record.sample_count, record.status, flink_settings_json,
+            record.version, record.sql_hash
+        )
+
+    def list_flink_sql_records(self, record_ids: Optional[List[int]] = None) -> List[FlinkSQLRecord]:
+        """获取 Flink SQL 记录
+
+        Args:
+            record_ids: 记录 ID 列表，为空时返回每个 Sink 表的最新记录
+        """
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            if record_ids:
+                cur.execute(
+                    f"""
+                    SELECT {self.FLINK_SQL_RECORD_COLUMNS}
+                    FROM flink_sql_record WHERE id = ANY(%s)
+                    ORDER BY id
+                    """,
+                    (list(record_ids),)
+                )
+            else:
+                cur.execute(
+                    f"""
+                    SELECT {self.FLINK_SQL_RECORD_COLUMNS}
+                    FROM flink_sql_record
+                    WHERE id IN (SELECT MAX(id) FROM flink_sql_record GROUP BY sink_table_name)
+                    ORDER BY id
+                    """
+                )
+            return [self._row_to_flink_sql_record(row) for row in cur.fetchall()]
+
+    def get_max_versions(self, sink_table_names: List[str]) -> Dict[str, int]:
+        """获取各 Sink 表当前最大的 SQL 版本号"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT sink_table_name, MAX(version) FROM flink_sql_record "
+                "WHERE sink_table_name = ANY(%s) GROUP BY sink_table_name",
+                (list(sink_table_names),)
+            )
+            return {row[0]: row[1] for row in cur.fetchall()}
+
+    def get_latest_flink_sql_record(self, sink_table_name: str) -> Optional[FlinkSQLRecord]:
+        """获取 Sink 表最新的 Flink SQL 记录"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT {self.FLINK_SQL_RECORD_COLUMNS}
+                FROM flink_sql_record WHERE sink_table_name = %s
+                ORDER BY id DESC LIMIT 1
+                """,
+                (sink_table_name,)
+            )
+            row = cur.fetchone()
+            if row:
+                return self._row_to_flink_sql_record(row)
+        return None
+
+    def get_latest_flink_sql_record_by_topic(self, topic_id: int) -> Optional[FlinkSQLRecord]:
+        """获取 Topic 最新的 Flink SQL 记录"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT {self.FLINK_SQL_RECORD_COLUMNS}
+                FROM flink_sql_record WHERE topic_id = %s
+                ORDER BY id DESC LIMIT 1
+                """,
+                (topic_id,)
+            )
+            row = cur.fetchone()
+            if row:
+                return self._row_to_flink_sql_record(row)
+        return None
+
+    def get_flink_sql_record_by_hash(self, sql_hash: str) -> Optional[FlinkSQLRecord]:
+        """根据 SQL 内容哈希获取最新的 Flink SQL 记录"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT {self.FLINK_SQL_RECORD_COLUMNS}
+                FROM flink_sql_record WHERE sql_hash = %s
+                ORDER BY id DESC LIMIT 1
+                """,
+                (sql_hash,)
+            )
+            row = cur.fetchone()
+            if row:
+                return self._row_to_flink_sql_record(row)
+        return None
+
+    @staticmethod
+    def _row_to_flink_sql_record(row) -> FlinkSQLRecord:
+        return FlinkSQLRecord(
+            id=row[0],
+            topic_id=row[1],
+            topic_name=row[2],
+            sink_table_name=row[3],
+            source_ddl=row[4],
+            sink_ddl=row[5],
+            insert_sql=row[6],
+            full_sql=row[7],
+            inferred_schema=row[8],
+            sample_count=row[9],
+            status=row[10],
+            flink_settings=row[11],
+            version=row[12],
+            sql_hash=row[13],
+            stage_timings=row[14]
+        )
+
+    def update_stage_timings(self, record_id: int, timings: dict) -> None:
+        """保存生成/部署过程的各阶段耗时，用于趋势分析"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE flink_sql_record SET stage_timings = %s::jsonb WHERE id = %s",
+                (json.dumps(timings, ensure_ascii=False), record_id)
+            )
+        conn.commit()
+
     def create_aliyun_flink_job(self, job: AliyunFlinkJob) -> int:
         """创建阿里云 Flink 作业记录"""
         conn = self._get_connection()
@@ -108,14 +711,18 @@ class HologresDAO:
             cur.execute(
                 """
                 INSERT INTO aliyun_flink_jobs (
-                    sql_record_id, deployment_id, job_id, status,
+                    sql_record_id, draft_id, deployment_id, job_id, step, status,
+                    deployment_target, session_cluster,
                     workspace_id, namespace, create_time, update_time,
                     start_time, end_time, error_message, flink_config
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb)
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                          COALESCE(%s, CURRENT_TIMESTAMP), COALESCE(%s, CURRENT_TIMESTAMP),
+                          %s, %s, %s, %s::jsonb)
                 RETURNING id
                 """,
                 (
-                    job.sql_record_id, job.deployment_id, job.job_id, job.status,
+                    job.sql_record_id, job.draft_id, job.deployment_id, job.job_id, job.step, job.status,
+                    job.deployment_target, job.session_cluster,
                     job.workspace_id, job.namespace, job.create_time, job.update_time,
                     job.start_time, job.end_time, job.error_message, flink_config_json
                 )
@@ -129,33 +736,195 @@ class HologresDAO:
         conn = self._get_connection()
         with conn.cursor() as cur:
             cur.execute(
-                """
-                SELECT id, sql_record_id, deployment_id, job_id, status,
-                       workspace_id, namespace, create_time, update_time,
-                       start_time, end_time, error_message, flink_config
-                FROM aliyun_flink_jobs WHERE id = %s
-                """,
+                f"SELECT {self.ALIYUN_FLINK_JOB_COLUMNS} FROM aliyun_flink_jobs WHERE id = %s",
                 (job_id,)
             )
             row = cur.fetchone()
             if row:
-                return AliyunFlinkJob(
-                    id=row[0],
-                    sql_record_id=row[1],
-                    deployment_id=row[2],
-                    job_id=row[3],
-                    status=row[4],
-                    workspace_id=row[5],
-                    namespace=row[6],
-                    create_time=row[7],
-                    update_time=row[8],
-                    start_time=row[9],
-                    end_time=row[10],
-                    error_message=row[11],
-                    flink_config=row[12]
-                )
+                return self._row_to_aliyun_flink_job(row)
         return None
 
+    def get_latest_aliyun_flink_job_by_record(self, sql_record_id: int) -> Optional[AliyunFlinkJob]:
+        """获取 SQL 记录最近一次部署的阿里云 Flink 作业记录"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT {self.ALIYUN_FLINK_JOB_COLUMNS}
+                FROM aliyun_flink_jobs WHERE sql_record_id = %s
+                ORDER BY id DESC LIMIT 1
+                """,
+                (sql_record_id,)
+            )
+            row = cur.fetchone()
+            if row:
+                return self._row_to_aliyun_flink_job(row)
+        return None
+
+    def list_aliyun_flink_jobs(self) -> List[AliyunFlinkJob]:
+        """获取每个 Sink 表最近一次部署的作业记录，附带 Topic 与 Sink 表名"""
+        job_columns = ", ".join(f"j.{c.strip()}" for c in self.ALIYUN_FLINK_JOB_COLUMNS.split(","))
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT {job_columns}, r.topic_name, r.sink_table_name
+                FROM aliyun_flink_jobs j
+                JOIN flink_sql_record r ON r.id = j.sql_record_id
+                WHERE j.id IN (
+                    SELECT MAX(j2.id) FROM aliyun_flink_jobs j2
+                    JOIN flink_sql_record r2 ON r2.id = j2.sql_record_id
+                    GROUP BY r2.sink_table_name
+                )
+                ORDER BY j.id
+                """
+            )
+            jobs = []
+            for row in cur.fetchall():
+                job = self._row_to_aliyun_flink_job(row)
+                job.topic_name, job.sink_table_name = row[-2], row[-1]
+                jobs.append(job)
+            return jobs
+
+    def iter_flink_sql_records(self, filters: HistoryFilter, before_id: Optional[int] = None,
+                               limit: Optional[int] = None) -> Iterator[FlinkSQLRecordSummary]:
+        """按 id 倒序流式读取 SQL 记录摘要
+
+        Args:
+            before_id: 只返回 id 小于该值的记录，用于从上一页最后一条继续
+            limit: 最多返回的条数，为空时读取全部
+        """
+        conditions, params = self._history_conditions(filters, {
+            'topic_name': 'topic_name', 'status': 'status', 'time': 'created_at'
+        })
+        rows = self._iter_keyset(
+            f"SELECT {self.FLINK_SQL_RECORD_SUMMARY_COLUMNS} FROM flink_sql_record",
+            conditions, params, 'id', before_id, limit
+        )
+        for row in rows:
+            yield FlinkSQLRecordSummary(
+                id=row[0], topic_id=row[1], topic_name=row[2], sink_table_name=row[3],
+                version=row[4], status=row[5], sql_hash=row[6], created_at=row[7]
+            )
+
+    def iter_aliyun_flink_jobs(self, filters: HistoryFilter, before_id: Optional[int] = None,
+                               limit: Optional[int] = None) -> Iterator[AliyunFlinkJob]:
+        """按 id 倒序流式读取作业记录，附带 Topic 与 Sink 表名
+
+        Args:
+            before_id: 只返回 id 小于该值的作业记录，用于从上一页最后一条继续
+            limit: 最多返回的条数，为空时读取全部
+        """
+        job_columns = ", ".join(f"j.{c.strip()}" for c in self.ALIYUN_FLINK_JOB_COLUMNS.split(","))
+        conditions, params = self._history_conditions(filters, {
+            'topic_name': 'r.topic_name', 'status': 'j.status', 'time': 'j.create_time'
+        })
+        rows = self._iter_keyset(
+            f"SELECT {job_columns}, r.topic_name, r.sink_table_name "
+            "FROM aliyun_flink_jobs j JOIN flink_sql_record r ON r.id = j.sql_record_id",
+            conditions, params, 'j.id', before_id, limit
+        )
+        for row in rows:
+            job = self._row_to_aliyun_flink_job(row)
+            job.topic_name, job.sink_table_name = row[-2], row[-1]
+            yield job
+
+    def iter_latest_topic_deployments(self, filters: HistoryFilter, before_id: Optional[int] = None,
+                                      limit: Optional[int] = None) -> Iterator[TopicLatestDeployment]:
+        """按 Topic ID 倒序流式读取每个 Topic 最新的 SQL 记录与最近一次部署
+
+        status 按作业状态过滤；视图按 Topic 逐个取最新一行，不支持时间范围。
+
+        Args:
+            before_id: 只返回 Topic ID 小于该值的行
+        """
+        if filters.since or filters.until:
+            raise ValueError("最新部署视图不支持按时间范围过滤")
+        conditions, params = self._history_conditions(filters, {
+            'topic_name': 'topic_name', 'status': 'job_status', 'time': None
+        })
+        rows = self._iter_keyset(
+            f"SELECT {self.TOPIC_LATEST_DEPLOYMENT_COLUMNS} FROM latest_topic_deployment",
+            conditions, params, 'topic_id', before_id, limit
+        )
+        columns = [c.strip() for c in self.TOPIC_LATEST_DEPLOYMENT_COLUMNS.split(",")]
+        for row in rows:
+            yield TopicLatestDeployment(**dict(zip(columns, row)))
+
+    @staticmethod
+    def _history_conditions(filters: HistoryFilter, columns: Dict[str, Optional[str]]) -> Tuple[List[str], list]:
+        """把查询条件转换为 WHERE 子句与参数，columns 为条件到列名的映射"""
+        conditions, params = [], []
+        if filters.topic_name:
+            conditions.append(f"{columns['topic_name']} = %s")
+            params.append(filters.topic_name)
+        if filters.status:
+            conditions.append(f"{columns['status']} = %s")
+            params.append(filters.status)
+        if filters.since:
+            conditions.append(f"{columns['time']} >= %s")
+            params.append(filters.since)
+        if filters.until:
+            conditions.append(f"{columns['time']} < %s")
+            params.append(filters.until)
+        return conditions, params
+
+    def _iter_keyset(self, select_sql: str, conditions: List[str], params: list, id_column: str,
+                     before_id: Optional[int], limit: Optional[int]) -> Iterator[tuple]:
+        """按 id_column 倒序 keyset 分页读取，id 须为每行的第一列
+
+        每页以 id_column < 上一页最后的 id 为条件，沿索引定位，翻页开销与页码无关；
+        页内使用服务端游标（named cursor）每次读取 CURSOR_ITERSIZE 行，整页不驻留内存。
+        每页单独提交，游标与事务只在读取该页期间保持。
+        """
+        conn = self._get_connection()
+        fetched = 0
+        while limit is None or fetched < limit:
+            size = self.PAGE_SIZE if limit is None else min(self.PAGE_SIZE, limit - fetched)
+            page_conditions = list(conditions)
+            page_params = list(params)
+            if before_id is not None:
+                page_conditions.append(f"{id_column} < %s")
+                page_params.append(before_id)
+            where = f" WHERE {' AND '.join(page_conditions)}" if page_conditions else ""
+            rows = 0
+            try:
+                with conn.cursor(name=f"keyset_{next(self._cursor_ids)}") as cur:
+                    cur.itersize = self.CURSOR_ITERSIZE
+                    cur.execute(f"{select_sql}{where} ORDER BY {id_column} DESC LIMIT %s", page_params + [size])
+                    for row in cur:
+                        rows += 1
+                        before_id = row[0]
+                        yield row
+            finally:
+                # 只读事务，提交以关闭游标；调用方中途停止迭代时同样结束事务
+                conn.commit()
+            fetched += rows
+            if rows < size:
+                return
+
+    @staticmethod
+    def _row_to_aliyun_flink_job(row) -> AliyunFlinkJob:
+        return AliyunFlinkJob(
+            id=row[0],
+            sql_record_id=row[1],
+            deployment_id=row[2],
+            job_id=row[3],
+            status=row[4],
+            workspace_id=row[5],
+            namespace=row[6],
+            create_time=row[7],
+            update_time=row[8],
+            start_time=row[9],
+            end_time=row[10],
+            error_message=row[11],
+            flink_config=row[12],
+            draft_id=row[13],
+            step=row[14],
+            deployment_target=row[15],
+            session_cluster=row[16]
+        )
+
     def update_aliyun_flink_job_status(self, job_id: int, status: str,
                                        error_message: Optional[str] = None) -> None:
         """更新阿里云 Flink 作业状态"""
@@ -181,6 +950,125 @@ class HologresDAO:
                 )
         conn.commit()
 
+    def update_aliyun_flink_job_step(self, job_id: int, step: str, status: str,
+                                     draft_id: Optional[str] = None,
+                                     deployment_id: Optional[str] = None,
+                                     flink_job_id: Optional[str] = None) -> None:
+        """记录部署步骤完成，并保存该步骤产生的 ID（为空的 ID 保持不变）
+
+        作业启动后（step 为 started）同时记录 start_time，并清空上次失败的错误信息。
+        """
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE aliyun_flink_jobs
+                SET step = %s, status = %s,
+                    draft_id = COALESCE(%s, draft_id),
+                    deployment_id = COALESCE(%s, deployment_id),
+                    job_id = COALESCE(%s, job_id),
+                    start_time = CASE WHEN %s = 'started' THEN CURRENT_TIMESTAMP ELSE start_time END,
+                    error_message = NULL,
+                    update_time = CURRENT_TIMESTAMP
+                WHERE id = %s
+                """,
+                (step, status, draft_id, deployment_id, flink_job_id, step, job_id)
+            )
+        conn.commit()
+
+    def save_scaling_decision(self, decision: ScalingDecision) -> int:
+        """保存自动扩缩容决策"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO autoscale_decision (
+                    aliyun_job_id, topic_name, action, reason, current_parallelism,
+                    target_parallelism, partition_count, total_lag, input_rate,
+                    catch_up_rate, dry_run, applied, error_message
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+                """,
+                (
+                    decision.aliyun_job_id, decision.topic_name, decision.action, decision.reason,
+                    decision.current_parallelism, decision.target_parallelism, decision.partition_count,
+                    decision.total_lag, decision.input_rate, decision.catch_up_rate,
+                    decision.dry_run, decision.applied, decision.error_message
+                )
+            )
+            decision_id = cur.fetchone()[0]
+        conn.commit()
+        return decision_id
+
+    def get_last_scaled_at(self, aliyun_job_ids: List[int]) -> Dict[int, datetime]:
+        """获取各作业最近一次实际执行扩缩容的时间"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT aliyun_job_id, MAX(created_at) FROM autoscale_decision "
+                "WHERE aliyun_job_id = ANY(%s) AND applied = true GROUP BY aliyun_job_id",
+                (list(aliyun_job_ids),)
+            )
+            return {row[0]: row[1] for row in cur.fetchall()}
+
+    def save_topic_profile(self, profile: TopicProfile) -> int:
+        """保存 Topic 画像"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO topic_profile (
+                    topic_name, partition_count, window_seconds, messages_per_second, sample_count,
+                    avg_message_bytes, p99_message_bytes, compression_ratio, field_count,
+                    estimated_bytes_per_day
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id
+                """,
+                (
+                    profile.topic_name, profile.partition_count, profile.window_seconds,
+                    profile.messages_per_second, profile.sample_count, profile.avg_message_bytes,
+                    profile.p99_message_bytes, profile.compression_ratio, profile.field_count,
+                    profile.estimated_bytes_per_day
+                )
+            )
+            profile_id = cur.fetchone()[0]
+        conn.commit()
+        return profile_id
+
+    def get_latest_topic_profile(self, topic_name: str) -> Optional[TopicProfile]:
+        """获取 Topic 最近一次的画像"""
+        conn = self._get_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT {self.TOPIC_PROFILE_COLUMNS}
+                FROM topic_profile WHERE topic_name = %s
+                ORDER BY id DESC LIMIT 1
+                """,
+                (topic_name,)
+            )
+            row = cur.fetchone()
+            if row:
+                return self._row_to_topic_profile(row)
+        return None
+
+    @staticmethod
+    def _row_to_topic_profile(row) -> TopicProfile:
+        return TopicProfile(
+            id=row[0],
+            topic_name=row[1],
+            partition_count=row[2],
+            window_seconds=row[3],
+            messages_per_second=row[4],
+            sample_count=row[5],
+            avg_message_bytes=row[6],
+            p99_message_bytes=row[7],
+            compression_ratio=row[8],
+            field_count=row[9],
+            estimated_bytes_per_day=row[10],
+            created_at=row[11]
+        )
+
     def close(self):
         if self._conn and not self._conn.closed:
             self._conn.close()
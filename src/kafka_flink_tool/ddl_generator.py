@@ -1,4 +1,6 @@
-from .models import InferredSchema
+from datetime import date, timedelta
+from typing import List
+from .models import InferredSchema, SchemaDiff
 
 
 class DDLGenerator:
@@ -6,20 +8,45 @@ class DDLGenerator:
         """生成 Hologres 表 DDL
 
         修正点：字段名添加双引号，避免 SQL 关键字冲突
+        修正点2：有主键时声明 PRIMARY KEY，并将 distribution_key 与主键对齐
+        修正点3：配置分区时生成逻辑/物理分区父表，分区列加入主键
         """
         lines = [f"CREATE TABLE IF NOT EXISTS {table_name} ("]
+        primary_key = schema.primary_key
+        partition = schema.partition
 
         field_defs = [
             '    "etl_time" TIMESTAMPTZ',
-            '    "key_col" TEXT'
+            '    "key_col" TEXT NOT NULL' if 'key_col' in primary_key else '    "key_col" TEXT'
         ]
         for field in schema.fields:
-            nullable = "" if field.nullable else "NOT NULL"
+            nullable = "" if field.nullable and field.name not in primary_key else "NOT NULL"
             # 字段名添加双引号
-            field_defs.append(f'    "{field.name}" {field.type} {nullable}'.strip())
+            field_defs.append(f'    "{field.name}" {field.type} {nullable}'.rstrip())
+        if partition:
+            field_defs.append(f'    "{partition.column}" TEXT NOT NULL')
+
+        if primary_key:
+            # Hologres 要求分区列包含在主键中
+            pk_names = primary_key + [partition.column] if partition else primary_key
+            pk_columns = ", ".join(f'"{name}"' for name in pk_names)
+            field_defs.append(f"    PRIMARY KEY ({pk_columns})")
 
         lines.append(",\n".join(field_defs))
-        lines.append(");")
+
+        properties = []
+        if primary_key:
+            properties.append(f"distribution_key = '{','.join(primary_key)}'")
+        if partition and partition.ttl_seconds:
+            properties.append(f"time_to_live_in_seconds = '{partition.ttl_seconds}'")
+
+        closing = ")"
+        if partition:
+            keyword = "LOGICAL PARTITION BY LIST" if partition.mode == 'logical' else "PARTITION BY LIST"
+            closing += f'\n{keyword} ("{partition.column}")'
+        if properties:
+            closing += "\nWITH (\n" + ",\n".join(f"    {p}" for p in properties) + "\n)"
+        lines.append(closing + ";")
 
         ddl = "\n".join(lines)
 
@@ -33,5 +60,39 @@ class DDLGenerator:
             comments.append(
                 f'COMMENT ON COLUMN {table_name}."{field.name}" IS \'{field.name} 字段\';'
             )
+        if partition:
+            source = partition.source_field or 'etl_time'
+            comments.append(
+                f'COMMENT ON COLUMN {table_name}."{partition.column}" IS \'分区日期（{source}，yyyyMMdd）\';'
+            )
 
         return ddl + "\n" + "\n".join(comments)
+
+    def generate_alter_ddls(self, table_name: str, diff: SchemaDiff) -> List[str]:
+        """生成 Schema 演进的 ALTER TABLE 语句，只新增列和放宽类型"""
+        ddls = []
+        for field in diff.added:
+            ddls.append(f'ALTER TABLE {table_name} ADD COLUMN "{field.name}" {field.type};')
+            ddls.append(f'COMMENT ON COLUMN {table_name}."{field.name}" IS \'{field.name} 字段\';')
+        for change in diff.widened:
+            ddls.append(f'ALTER TABLE {table_name} ALTER COLUMN "{change.name}" TYPE {change.new_type};')
+        return ddls
+
+    def generate_partition_ddls(self, table_name: str, schema: InferredSchema,
+                                start: date, days: int) -> List[str]:
+        """生成物理分区子表 DDL，从 start 开始共 days 天
+
+        逻辑分区表由 Hologres 自动管理分区，返回空列表
+        """
+        partition = schema.partition
+        if not partition or partition.mode != 'physical':
+            return []
+
+        ddls = []
+        for offset in range(days):
+            value = (start + timedelta(days=offset)).strftime('%Y%m%d')
+            ddls.append(
+                f"CREATE TABLE IF NOT EXISTS {table_name}_{value} "
+                f"PARTITION OF {table_name} FOR VALUES IN ('{value}');"
+            )
+        return ddls
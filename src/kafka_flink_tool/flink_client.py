@@ -2,40 +2,58 @@ import time
 import logging
 from typing import Optional
 
-# 阿里云 SDK 导入 - 允许在文档生成或测试时跳过
-try:
-    from alibabacloud_ververica20220718.client import Client as FlinkClient
-    from alibabacloud_ververica20220718 import models as FinkModels
-except ImportError:
-    try:
-        from alibabacloud_flink_open20221130.client import Client as FlinkClient
-        from alibabacloud_flink_open20221130 import models as FinkModels
-    except ImportError:
-        # 保留类定义但标记为不可用
-        FlinkClient = None
-        FinkModels = None
-        logging.warning("阿里云 Flink SDK 未安装，部分功能将不可用")
+from .config import AliyunFlinkConfig, DeploymentTargetConfig
+from .profiling import stage
+
+logger = logging.getLogger(__name__)
 
-from alibabacloud_tea_openapi import models as OpenApiModels
-from alibabacloud_tea_util import models as UtilModels
-from alibabacloud_tea_util.client import Client as UtilClient
+# 阿里云 SDK 导入耗时较长，首次发起请求时才导入，见 _import_sdk
+FlinkClient = None
+FinkModels = None
+OpenApiModels = None
+UtilModels = None
+UtilClient = None
 
-from .config import AliyunFlinkConfig
 
-logger = logging.getLogger(__name__)
+def _import_sdk() -> None:
+    """导入阿里云 SDK - 允许在文档生成或测试时跳过"""
+    global FlinkClient, FinkModels, OpenApiModels, UtilModels, UtilClient
+    if OpenApiModels is not None:
+        return
+    try:
+        from alibabacloud_ververica20220718.client import Client as FlinkClient
+        from alibabacloud_ververica20220718 import models as FinkModels
+    except ImportError:
+        try:
+            from alibabacloud_flink_open20221130.client import Client as FlinkClient
+            from alibabacloud_flink_open20221130 import models as FinkModels
+        except ImportError:
+            # 保留类定义但标记为不可用
+            FlinkClient = None
+            FinkModels = None
+            logging.warning("阿里云 Flink SDK 未安装，部分功能将不可用")
+
+    from alibabacloud_tea_openapi import models as OpenApiModels
+    from alibabacloud_tea_util import models as UtilModels
+    from alibabacloud_tea_util.client import Client as UtilClient
 
 
 class AliyunFlinkClient:
     """阿里云 Flink API 客户端"""
 
+    # 异步操作的轮询间隔（秒）
+    DRAFT_POLL_INTERVAL = 2
+    POLL_INTERVAL = 5
+
     def __init__(self, config: AliyunFlinkConfig):
         self.config = config
+        # 客户端在首次请求时创建，只查询本地记录的命令不会初始化 SDK
         self._client = None
-        self._init_client()
 
     def _init_client(self):
         """初始化阿里云 Flink 客户端"""
         try:
+            _import_sdk()
             # 创建 OpenAPI 配置
             openapi_config = OpenApiModels.OpenApiConfig(
                 endpoint=self.config.endpoint,
@@ -50,8 +68,15 @@ class AliyunFlinkClient:
             raise
 
     def _make_request(self, action: str, params: dict) -> dict:
-        """发起 API 请求"""
+        """发起 API 请求，开启 --profile 时每次调用（含轮询）计入 api.<action> 阶段"""
+        with stage(f"api.{action}"):
+            return self._request(action, params)
+
+    def _request(self, action: str, params: dict) -> dict:
         try:
+            _import_sdk()
+            if self._client is None:
+                self._init_client()
             request = FinkModels.OpenAPIRequest(
                 action=f"Stream{action}",
                 version="2022-11-30"
@@ -70,7 +95,8 @@ class AliyunFlinkClient:
                 **params
             }
 
-            logger.info(f"发起 API 请求: {action}, 参数: {body}")
+            # 完整的请求/响应体只写入文件日志
+            logger.debug("发起 API 请求: %s, 参数: %s", action, body)
 
             # 发起请求
             runtime = UtilModels.RuntimeOptions(
@@ -87,7 +113,7 @@ class AliyunFlinkClient:
                 runtime=runtime
             )
 
-            logger.info(f"API 响应: {response.body}")
+            logger.debug("API 响应: %s", response.body)
 
             return response.body
 
@@ -95,11 +121,20 @@ class AliyunFlinkClient:
             logger.error(f"API 请求失败: {action}, 错误: {e}")
             raise
 
-    def create_deployment_draft(self, sql_content: str) -> str:
+    @staticmethod
+    def _deployment_target_body(target: DeploymentTargetConfig) -> dict:
+        """部署目标请求参数：PER_JOB 独立集群或指定名称的 SESSION 集群"""
+        if target.mode == 'session':
+            return {'mode': 'SESSION', 'name': target.session_cluster}
+        return {'mode': 'PER_JOB'}
+
+    def create_deployment_draft(self, sql_content: str,
+                                deployment_target: Optional[DeploymentTargetConfig] = None) -> str:
         """Step 1: 创建作业草稿
 
         Args:
             sql_content: Flink SQL 内容
+            deployment_target: 部署目标（可选），默认使用配置中的 deployment_target
 
         Returns:
             draft_id: 草稿ID
@@ -110,7 +145,10 @@ class AliyunFlinkClient:
         try:
             body = {
                 'sql_content': sql_content,
-                'kind': 'Deployment'
+                'kind': 'Deployment',
+                'deployment_target': self._deployment_target_body(
+                    deployment_target or self.config.deployment_target
+                )
             }
 
             response = self._make_request('CreateDeploymentDraft', body)
@@ -218,12 +256,14 @@ class AliyunFlinkClient:
             logger.error(f"获取部署状态异常: {e}")
             raise
 
-    def start_job_with_params(self, deployment_id: str, params: Optional[dict] = None) -> str:
+    def start_job_with_params(self, deployment_id: str, params: Optional[dict] = None,
+                              deployment_target: Optional[DeploymentTargetConfig] = None) -> str:
         """Step 5: 启动作业实例
 
         Args:
             deployment_id: 部署ID
             params: 启动参数（可选）
+            deployment_target: 部署目标（可选），默认使用配置中的 deployment_target
 
         Returns:
             job_id: 作业实例ID
@@ -233,7 +273,10 @@ class AliyunFlinkClient:
         """
         try:
             body = {
-                'deployment_id': deployment_id
+                'deployment_id': deployment_id,
+                'deployment_target': self._deployment_target_body(
+                    deployment_target or self.config.deployment_target
+                )
             }
 
             if params:
@@ -281,6 +324,82 @@ class AliyunFlinkClient:
             logger.error(f"获取作业状态异常: {e}")
             raise
 
+    # ==================== 扩缩容 ====================
+
+    def get_deployment_parallelism(self, deployment_id: str) -> Optional[int]:
+        """获取部署当前配置的并行度
+
+        Returns:
+            int: 并行度，未使用基础资源配置时返回 None
+
+        Raises:
+            RuntimeError: 查询失败
+        """
+        try:
+            response = self._make_request('GetDeployment', {'id': deployment_id})
+
+            if response.get('success'):
+                resource = response.get('data', {}).get('streaming_resource_setting', {})
+                return resource.get('basic_resource_setting', {}).get('parallelism')
+            else:
+                error_msg = response.get('message', '查询失败')
+                raise RuntimeError(f"获取部署并行度失败: {error_msg}")
+
+        except Exception as e:
+            logger.error(f"获取部署并行度异常: {e}")
+            raise
+
+    def update_deployment_parallelism(self, deployment_id: str, parallelism: int) -> None:
+        """修改部署的并行度，作业重启后生效
+
+        Raises:
+            RuntimeError: 修改失败
+        """
+        try:
+            body = {
+                'id': deployment_id,
+                'streaming_resource_setting': {
+                    'resource_setting_mode': 'BASIC',
+                    'basic_resource_setting': {'parallelism': parallelism}
+                }
+            }
+
+            response = self._make_request('UpdateDeployment', body)
+
+            if not response.get('success'):
+                error_msg = response.get('message', '修改失败')
+                raise RuntimeError(f"修改部署并行度失败: {error_msg}")
+
+        except Exception as e:
+            logger.error(f"修改部署并行度异常: {e}")
+            raise
+
+    def stop_job(self, job_id: str, with_savepoint: bool = True) -> None:
+        """停止作业实例
+
+        Args:
+            job_id: 作业实例ID
+            with_savepoint: 是否在停止前生成 savepoint
+
+        Raises:
+            RuntimeError: 停止失败
+        """
+        try:
+            body = {
+                'id': job_id,
+                'stop_strategy': 'STOP_WITH_SAVEPOINT' if with_savepoint else 'NONE'
+            }
+
+            response = self._make_request('StopJob', body)
+
+            if not response.get('success'):
+                error_msg = response.get('message', '停止失败')
+                raise RuntimeError(f"停止作业失败: {error_msg}")
+
+        except Exception as e:
+            logger.error(f"停止作业异常: {e}")
+            raise
+
     # ==================== 异步轮询机制 ====================
 
     def wait_for_deployment_draft(self, draft_id: str, timeout: int = 60) -> bool:
@@ -302,20 +421,20 @@ class AliyunFlinkClient:
         while time.time() - start_time < timeout:
             try:
                 result = self.get_deployment_draft_result(draft_id)
-                status = result.get('status')
-
-                if status == 'SUCCESS':
-                    logger.info(f"草稿创建成功: {draft_id}")
-                    return True
-                elif status == 'FAILED':
-                    error_msg = result.get('message', '草稿创建失败')
-                    raise RuntimeError(f"草稿创建失败: {error_msg}")
-
-                time.sleep(2)
-
             except Exception as e:
                 logger.warning(f"检查草稿状态异常: {e}")
-                time.sleep(2)
+                time.sleep(self.DRAFT_POLL_INTERVAL)
+                continue
+
+            status = result.get('status')
+            if status == 'SUCCESS':
+                logger.info(f"草稿创建成功: {draft_id}")
+                return True
+            elif status == 'FAILED':
+                error_msg = result.get('message', '草稿创建失败')
+                raise RuntimeError(f"草稿创建失败: {error_msg}")
+
+            time.sleep(self.DRAFT_POLL_INTERVAL)
 
         logger.warning(f"草稿创建超时: {draft_id}")
         return False
@@ -339,18 +458,18 @@ class AliyunFlinkClient:
         while time.time() - start_time < timeout:
             try:
                 status = self.get_deployment_status(deployment_id)
-
-                if status == 'RUNNING':
-                    logger.info(f"部署完成: {deployment_id}")
-                    return True
-                elif status == 'FAILED':
-                    raise RuntimeError(f"部署失败: {deployment_id}")
-
-                time.sleep(5)
-
             except Exception as e:
                 logger.warning(f"检查部署状态异常: {e}")
-                time.sleep(5)
+                time.sleep(self.POLL_INTERVAL)
+                continue
+
+            if status == 'RUNNING':
+                logger.info(f"部署完成: {deployment_id}")
+                return True
+            elif status == 'FAILED':
+                raise RuntimeError(f"部署失败: {deployment_id}")
+
+            time.sleep(self.POLL_INTERVAL)
 
         logger.warning(f"部署超时: {deployment_id}")
         return False
@@ -374,20 +493,55 @@ class AliyunFlinkClient:
         while time.time() - start_time < timeout:
             try:
                 status = self.get_job_status(job_id)
+            except Exception as e:
+                logger.warning(f"检查作业状态异常: {e}")
+                time.sleep(self.POLL_INTERVAL)
+                continue
+
+            if status == 'RUNNING':
+                logger.info(f"作业启动完成: {job_id}")
+                return True
+            elif status == 'FAILED':
+                raise RuntimeError(f"作业启动失败: {job_id}")
+
+            time.sleep(self.POLL_INTERVAL)
+
+        logger.warning(f"作业启动超时: {job_id}")
+        return False
+
+    def wait_for_job_stopped(self, job_id: str, timeout: int = 300) -> bool:
+        """等待作业停止（savepoint 完成）
+
+        Args:
+            job_id: 作业实例ID
+            timeout: 超时时间（秒）
 
-                if status == 'RUNNING':
-                    logger.info(f"作业启动完成: {job_id}")
-                    return True
-                elif status == 'FAILED':
-                    raise RuntimeError(f"作业启动失败: {job_id}")
+        Returns:
+            bool: True 成功，False 超时
 
-                time.sleep(5)
+        Raises:
+            RuntimeError: 作业停止失败
+        """
+        logger.info(f"等待作业停止: {job_id}")
+        start_time = time.time()
 
+        while time.time() - start_time < timeout:
+            try:
+                status = self.get_job_status(job_id)
             except Exception as e:
                 logger.warning(f"检查作业状态异常: {e}")
-                time.sleep(5)
+                time.sleep(self.POLL_INTERVAL)
+                continue
 
-        logger.warning(f"作业启动超时: {job_id}")
+            if status in ('STOPPED', 'FINISHED', 'CANCELLED'):
+                logger.info(f"作业已停止: {job_id}")
+                return True
+            elif status == 'FAILED':
+                raise RuntimeError(f"作业停止失败: {job_id}")
+
+            time.sleep(self.POLL_INTERVAL)
+
+        logger.warning(f"作业停止超时: {job_id}")
         return False
 
     def close(self):
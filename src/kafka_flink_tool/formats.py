@@ -0,0 +1,369 @@
+import base64
+import csv
+import importlib
+import io
+import json
+import struct
+import threading
+import urllib.request
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from decimal import Decimal
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+from .models import FieldSchema, InferredSchema
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+SUPPORTED_FORMATS = ('json', 'csv', 'avro', 'protobuf')
+
+
+class MessageFormat(ABC):
+    """Topic 消息格式：采样时的反序列化、writer schema 与 Source DDL 的 format 参数
+
+    子类按 kafka_topic_config.data_format 与 format_options 构建，见 get_message_format。
+    """
+
+    name = 'json'
+    # Flink 按 DDL 列顺序解析的格式（CSV、无 Registry 的 Avro），不能剔除或调整字段
+    positional = False
+    # 消息自带 schema（Avro、Protobuf），没有采样到数据时也可以生成
+    has_writer_schema = False
+    # 类型转换校验与回填按 Flink JSON format 的语义解析字段，其他格式由 Flink 按各自的规则解析
+    json_semantics = False
+
+    @abstractmethod
+    def deserialize(self, payload: bytes) -> Optional[Dict[str, Any]]:
+        """反序列化一条消息，失败时返回 None（跳过该消息）"""
+
+    def writer_schema(self) -> Optional[List[FieldSchema]]:
+        """生产者声明的字段与类型；没有 schema 时返回 None，由采样数据推断"""
+        return None
+
+    def flink_options(self) -> Dict[str, str]:
+        """Source DDL 中 value 部分的 format 参数"""
+        return {'value.format': self.name}
+
+    def check_schema(self, schema: InferredSchema) -> None:
+        """按位置解析的格式不允许字段投影"""
+        if self.positional and schema.projected_out:
+            raise ValueError(
+                f"{self.name} 格式按列顺序解析，不能剔除字段: {', '.join(schema.projected_out)}，请清除字段投影规则"
+            )
+
+
+class JsonFormat(MessageFormat):
+    name = 'json'
+    json_semantics = True
+
+    @staticmethod
+    def deserialize(payload: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(payload.decode('utf-8'))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            logger.warning(f"JSON 解析失败，跳过该消息: {e}")
+            return None
+
+
+class CsvFormat(MessageFormat):
+    """无表头的 CSV，列名由 format_options.columns 按顺序给出"""
+
+    name = 'csv'
+    positional = True
+
+    def __init__(self, columns: List[str], delimiter: str = ','):
+        if not columns:
+            raise ValueError("csv 格式需要在 format_options.columns 中按顺序列出列名")
+        if len(delimiter) != 1:
+            raise ValueError(f"csv 分隔符必须是单个字符: {delimiter!r}")
+        self.columns = list(columns)
+        self.delimiter = delimiter
+
+    def deserialize(self, payload: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            row = next(csv.reader([payload.decode('utf-8')], delimiter=self.delimiter))
+        except (UnicodeDecodeError, csv.Error, StopIteration) as e:
+            logger.warning(f"CSV 解析失败，跳过该消息: {e}")
+            return None
+        if len(row) != len(self.columns):
+            logger.warning(f"CSV 列数为 {len(row)}，与配置的 {len(self.columns)} 列不一致，跳过该消息")
+            return None
+        return {column: self._coerce(value) for column, value in zip(self.columns, row)}
+
+    @staticmethod
+    def _coerce(value: str) -> Any:
+        """文本转为最接近的 JSON 类型，供类型推断使用；空值视为 NULL"""
+        if value == '':
+            return None
+        if value in ('true', 'false'):
+            return value == 'true'
+        for parse in (int, float):
+            try:
+                return parse(value)
+            except ValueError:
+                continue
+        return value
+
+    def flink_options(self) -> Dict[str, str]:
+        return {
+            'value.format': 'csv',
+            'value.csv.field-delimiter': self.delimiter,
+            'value.csv.null-literal': '',
+        }
+
+
+def _to_plain(value: Any) -> Any:
+    """Avro/Protobuf 解码出的值转为 JSON 兼容的值，与 Flink 写入 Hologres 前的表示一致"""
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode('ascii')
+    if isinstance(value, dict):
+        return {k: _to_plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_plain(v) for v in value]
+    return value
+
+
+def _import_optional(module: str, extra: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise RuntimeError(f"{extra} 格式需要安装 {module.split('.')[0]}: pip install 'kafka-flink-tool[{extra}]'")
+
+
+class AvroFormat(MessageFormat):
+    """Avro 消息
+
+    - registry：Confluent 线格式（magic byte + 4 字节 schema ID），writer schema 从 Schema Registry 获取，
+      Flink 使用 avro-confluent 格式，按字段名解析，可以投影
+    - schema：无头部的 Avro 二进制，writer schema 保存在 format_options.schema 中。Flink avro 格式
+      按 DDL 推导 schema 并按位置解析，要求每个字段都是 ["null", T] 且 T 可由生成的列类型表示
+    """
+
+    name = 'avro'
+    has_writer_schema = True
+    MAGIC_BYTE = 0
+    # Avro 类型到 Hologres 类型；int 与 long 编码相同，float 升级为 double 只在按名解析时成立
+    TYPE_MAPPING = {
+        'boolean': 'BOOLEAN',
+        'int': 'BIGINT',
+        'long': 'BIGINT',
+        'float': 'DOUBLE PRECISION',
+        'double': 'DOUBLE PRECISION',
+        'string': 'TEXT',
+        'enum': 'TEXT',
+    }
+    # 无 Registry 时 Flink 从 DDL 推导 schema，只接受推导结果与 writer schema 编码一致的类型
+    POSITIONAL_TYPES = {'boolean', 'int', 'long', 'double', 'string', 'timestamp-millis'}
+    REGISTRY_TIMEOUT = 10
+
+    def __init__(self, topic_name: str, mode: str = 'registry', registry_url: Optional[str] = None,
+                 registry_user_info: Optional[str] = None, schema: Optional[Any] = None):
+        self.mode = mode
+        self.topic_name = topic_name
+        self.registry_url = registry_url.rstrip('/') if registry_url else None
+        self.registry_user_info = registry_user_info
+        # schema ID -> (writer schema, fastavro 解析结果)；schema 模式使用 ID -1
+        self._schemas: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._last_schema: Optional[dict] = None
+        if mode == 'registry':
+            if not self.registry_url:
+                raise ValueError("avro registry 模式需要配置 format_options.registry_url")
+        elif mode == 'schema':
+            if not schema:
+                raise ValueError("avro schema 模式需要在 format_options.schema 中提供 writer schema")
+            self._last_schema = json.loads(schema) if isinstance(schema, str) else schema
+        else:
+            raise ValueError(f"不支持的 avro 模式: {mode}，可选 registry / schema")
+        self.positional = mode == 'schema'
+
+    def deserialize(self, payload: bytes) -> Optional[Dict[str, Any]]:
+        fastavro = _import_optional('fastavro', 'avro')
+        try:
+            if self.mode == 'registry':
+                if len(payload) < 5 or payload[0] != self.MAGIC_BYTE:
+                    raise ValueError("缺少 Schema Registry 头部")
+                schema, parsed = self._writer(struct.unpack('>I', payload[1:5])[0])
+                body = payload[5:]
+            else:
+                (schema, parsed), body = self._writer(-1), payload
+            value = fastavro.schemaless_reader(io.BytesIO(body), parsed)
+        except Exception as e:
+            logger.warning(f"Avro 解析失败，跳过该消息: {e}")
+            return None
+        self._last_schema = schema
+        return _to_plain(value)
+
+    def _writer(self, schema_id: int) -> tuple:
+        """按 schema ID 获取并缓存 writer schema，同一 ID 只请求一次 Registry"""
+        with self._lock:
+            cached = self._schemas.get(schema_id)
+        if cached is None:
+            fastavro = _import_optional('fastavro', 'avro')
+            schema = self._last_schema if schema_id < 0 else \
+                json.loads(self._registry_get(f"/schemas/ids/{schema_id}")['schema'])
+            cached = (schema, fastavro.parse_schema(schema))
+            with self._lock:
+                self._schemas[schema_id] = cached
+        return cached
+
+    def _registry_get(self, path: str) -> dict:
+        request = urllib.request.Request(f"{self.registry_url}{path}",
+                                         headers={'Accept': 'application/vnd.schemaregistry.v1+json'})
+        if self.registry_user_info:
+            token = base64.b64encode(self.registry_user_info.encode('utf-8')).decode('ascii')
+            request.add_header('Authorization', f"Basic {token}")
+        with urllib.request.urlopen(request, timeout=self.REGISTRY_TIMEOUT) as response:
+            return json.loads(response.read())
+
+    def writer_schema(self) -> Optional[List[FieldSchema]]:
+        """采样消息使用的 writer schema；未采样到消息时取 Registry 中 <topic>-value 的最新版本"""
+        schema = self._last_schema
+        if schema is None:
+            logger.info(f"从 Schema Registry 获取 {self.topic_name}-value 的最新 schema")
+            schema = json.loads(self._registry_get(f"/subjects/{self.topic_name}-value/versions/latest")['schema'])
+        if schema.get('type') != 'record':
+            raise ValueError(f"Avro writer schema 不是 record 类型: {schema.get('type')}")
+
+        fields, skipped = [], []
+        for field in schema['fields']:
+            nullable, avro_type = self._unwrap(field['type'])
+            column_type = 'TIMESTAMPTZ' if avro_type in ('timestamp-millis', 'timestamp-micros') \
+                else self.TYPE_MAPPING.get(avro_type)
+            if self.positional and (not nullable or avro_type not in self.POSITIONAL_TYPES):
+                raise ValueError(
+                    f"字段 {field['name']} 的类型 {field['type']} 无法由 Flink avro 格式按 DDL 推导，"
+                    f"无 Registry 时每个字段都需要是 [\"null\", T]，T 为 {'/'.join(sorted(self.POSITIONAL_TYPES))}；"
+                    f"或改用 registry 模式"
+                )
+            if column_type is None:
+                skipped.append(field['name'])
+                continue
+            fields.append(FieldSchema(name=field['name'], type=column_type, nullable=nullable))
+        if skipped:
+            logger.warning(f"Avro 字段类型暂不支持，未加入 Source: {', '.join(skipped)}")
+        return fields
+
+    @staticmethod
+    def _unwrap(avro_type: Any):
+        """返回 (是否可为 NULL, 类型名)，逻辑类型优先"""
+        nullable = False
+        if isinstance(avro_type, list):
+            branches = [t for t in avro_type if t != 'null']
+            nullable = len(branches) < len(avro_type)
+            avro_type = branches[0] if len(branches) == 1 else 'union'
+        if isinstance(avro_type, dict):
+            avro_type = avro_type.get('logicalType') or avro_type.get('type')
+        return nullable, avro_type
+
+    def flink_options(self) -> Dict[str, str]:
+        if self.mode == 'schema':
+            return {'value.format': 'avro'}
+        options = {'value.format': 'avro-confluent', 'value.avro-confluent.url': self.registry_url}
+        if self.registry_user_info:
+            options['value.avro-confluent.basic-auth.credentials-source'] = 'USER_INFO'
+            options['value.avro-confluent.basic-auth.user-info'] = self.registry_user_info
+        return options
+
+
+class ProtobufFormat(MessageFormat):
+    """Protobuf 消息，writer schema 取自生成的消息类
+
+    message_class 为 Flink 作业 classpath 中的 Java 类名，python_class 为采样使用的 Python 类（模块.类名）。
+    Flink protobuf 格式要求列类型与字段类型一致，只使用能由生成的列类型表示的标量字段。
+    """
+
+    name = 'protobuf'
+    has_writer_schema = True
+    # FieldDescriptor.TYPE_* 到 Hologres 类型：int64 / double / bool / string / enum
+    TYPE_MAPPING = {3: 'BIGINT', 16: 'BIGINT', 18: 'BIGINT', 1: 'DOUBLE PRECISION', 8: 'BOOLEAN',
+                    9: 'TEXT', 14: 'TEXT'}
+    LABEL_REPEATED = 3
+    TYPE_MESSAGE = 11
+    TYPE_ENUM = 14
+
+    def __init__(self, message_class: str, python_class: str):
+        if not message_class or not python_class:
+            raise ValueError("protobuf 格式需要配置 format_options.message_class（Java）与 python_class（Python）")
+        self.message_class = message_class
+        self.python_class = python_class
+
+    @cached_property
+    def _message_type(self):
+        # 只生成 Flink 参数（如 regenerate）时不需要导入
+        module_name, _, class_name = self.python_class.rpartition('.')
+        try:
+            return getattr(importlib.import_module(module_name), class_name)
+        except (ImportError, AttributeError, ValueError) as e:
+            raise ValueError(f"无法导入 Protobuf 消息类 {self.python_class}: {e}")
+
+    def deserialize(self, payload: bytes) -> Optional[Dict[str, Any]]:
+        message_type = self._message_type
+        try:
+            return self._to_dict(message_type.FromString(payload))
+        except Exception as e:
+            logger.warning(f"Protobuf 解析失败，跳过该消息: {e}")
+            return None
+
+    def _to_dict(self, message) -> Dict[str, Any]:
+        """只包含已赋值的字段；不使用 MessageToDict，它会把 int64 转为字符串"""
+        result = {}
+        for field, value in message.ListFields():
+            values = list(value) if field.label == self.LABEL_REPEATED else [value]
+            if field.type == self.TYPE_ENUM:
+                values = [field.enum_type.values_by_number[v].name if v in field.enum_type.values_by_number else v
+                          for v in values]
+            elif field.type == self.TYPE_MESSAGE:
+                values = [self._to_dict(v) for v in values]
+            values = [_to_plain(v) for v in values]
+            result[field.name] = values if field.label == self.LABEL_REPEATED else values[0]
+        return result
+
+    def writer_schema(self) -> Optional[List[FieldSchema]]:
+        fields, skipped = [], []
+        for field in self._message_type.DESCRIPTOR.fields:
+            column_type = None if field.label == self.LABEL_REPEATED else self.TYPE_MAPPING.get(field.type)
+            if column_type is None:
+                skipped.append(field.name)
+                continue
+            fields.append(FieldSchema(name=field.name, type=column_type))
+        if skipped:
+            logger.warning(f"Protobuf 字段类型暂不支持，未加入 Source: {', '.join(skipped)}")
+        return fields
+
+    def flink_options(self) -> Dict[str, str]:
+        return {
+            'value.format': 'protobuf',
+            'value.protobuf.message-class-name': self.message_class,
+            'value.protobuf.ignore-parse-errors': 'false',
+        }
+
+
+def get_message_format(data_format: str, options: Optional[dict] = None,
+                       topic_name: str = '') -> MessageFormat:
+    """按 kafka_topic_config.data_format 与 format_options 构建消息格式
+
+    Raises:
+        ValueError: 不支持的格式或缺少必需的 format_options
+    """
+    options = options or {}
+    data_format = (data_format or 'json').lower()
+    if data_format == 'json':
+        return JsonFormat()
+    if data_format == 'csv':
+        return CsvFormat(options.get('columns') or [], options.get('delimiter', ','))
+    if data_format == 'avro':
+        return AvroFormat(
+            topic_name, options.get('mode', 'registry'), options.get('registry_url'),
+            options.get('registry_user_info'), options.get('schema')
+        )
+    if data_format == 'protobuf':
+        return ProtobufFormat(options.get('message_class'), options.get('python_class'))
+    raise ValueError(f"不支持的数据格式: {data_format}，可选 {', '.join(SUPPORTED_FORMATS)}")
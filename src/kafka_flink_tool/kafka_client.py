@@ -1,34 +1,49 @@
 import json
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from typing import Iterator, List, Dict, Any, Optional, Tuple
 from pathlib import Path
-from kafka import KafkaConsumer
+from .formats import JsonFormat, MessageFormat
 
 logger = logging.getLogger(__name__)
 
 
 class KafkaClient:
-    def __init__(self, brokers: str, topic_name: str):
+    def __init__(self, brokers: str, topic_name: str, message_format: Optional[MessageFormat] = None):
+        """
+        Args:
+            message_format: 消息格式，默认 JSON
+        """
         self.brokers = brokers.split(',')
         self.topic_name = topic_name
+        self.message_format = message_format or JsonFormat()
 
     def _safe_json_deserializer(self, m: bytes) -> Optional[Dict[str, Any]]:
         """安全的 JSON 反序列化器，处理解析失败的情况"""
-        try:
-            return json.loads(m.decode('utf-8'))
-        except (json.JSONDecodeError, UnicodeDecodeError) as e:
-            logger.warning(f"JSON 解析失败，跳过该消息: {e}")
+        return JsonFormat.deserialize(m)
+
+    @staticmethod
+    def _key_deserializer(k: Optional[bytes]) -> Optional[str]:
+        if k is None:
             return None
+        return k.decode('utf-8', errors='replace')
 
     def sample_messages(self, count: int = 10) -> List[Dict[str, Any]]:
-        """采样消息
+        """采样消息"""
+        return [value for _, value in self.sample_records(count)]
+
+    def sample_records(self, count: int = 10) -> List[Tuple[Optional[str], Dict[str, Any]]]:
+        """采样消息，同时返回 Kafka key
 
         修正点：
         1. 使用 earliest 而非 latest，避免无新消息时无限等待
         2. 添加 consumer_timeout_ms 超时设置
         3. 添加 group_id，指定为 topic_name + _stg 后缀
-        4. 处理 JSON 解析失败的情况
+        4. 处理解析失败的情况，按 message_format 反序列化
         """
+        # 从文件加载 demo 数据时无需导入 kafka-python
+        from kafka import KafkaConsumer
+
         consumer = KafkaConsumer(
             self.topic_name,
             bootstrap_servers=self.brokers,
@@ -36,7 +51,8 @@ class KafkaClient:
             auto_offset_reset='earliest',  # 从最早的消息开始
             enable_auto_commit=False,
             consumer_timeout_ms=30000,  # 30 秒超时
-            value_deserializer=self._safe_json_deserializer
+            key_deserializer=self._key_deserializer,
+            value_deserializer=self.message_format.deserialize
         )
 
         messages = []
@@ -44,7 +60,7 @@ class KafkaClient:
             for message in consumer:
                 # 过滤掉解析失败的消息（None）
                 if message.value is not None:
-                    messages.append(message.value)
+                    messages.append((message.key, message.value))
                     if len(messages) >= count:
                         break
         except StopIteration:
@@ -58,9 +74,122 @@ class KafkaClient:
 
         return messages
 
+    def partition_ranges(self, since_ms: Optional[int] = None) -> Dict[int, Tuple[int, int]]:
+        """获取每个分区的回填范围 [起始 offset, 边界 offset)
+
+        边界为当前的 end offset，之后写入的消息由以边界启动的 Flink 作业消费。
+
+        Args:
+            since_ms: 起始时间戳（毫秒），为空时从最早的 offset 开始
+        """
+        from kafka import KafkaConsumer, TopicPartition
+
+        consumer = KafkaConsumer(bootstrap_servers=self.brokers, enable_auto_commit=False)
+        try:
+            partitions = consumer.partitions_for_topic(self.topic_name)
+            if not partitions:
+                raise ValueError(f"Topic 不存在或没有分区: {self.topic_name}")
+            tps = [TopicPartition(self.topic_name, p) for p in sorted(partitions)]
+            end_offsets = consumer.end_offsets(tps)
+            if since_ms is None:
+                start_offsets = consumer.beginning_offsets(tps)
+            else:
+                # 起始时间之后没有消息的分区不需要回填
+                start_offsets = {
+                    tp: found.offset if found else end_offsets[tp]
+                    for tp, found in consumer.offsets_for_times({tp: since_ms for tp in tps}).items()
+                }
+        finally:
+            consumer.close()
+        return {tp.partition: (start_offsets[tp], end_offsets[tp]) for tp in tps}
+
+    def read_partitions(self, ranges: Dict[int, Tuple[int, int]], max_poll_records: int = 5000,
+                        idle_timeout: float = 300) -> Iterator[List[Tuple[int, int, Optional[str], Any]]]:
+        """读取指定分区在 [起始 offset, 边界 offset) 内的消息
+
+        使用 assign 直接指定分区，不加入消费组，也不提交 offset。
+
+        Args:
+            idle_timeout: 超过该秒数既没有读到消息、position 也没有推进时报错
+
+        Yields:
+            每次 poll 的消息列表 (partition, offset, key, value)，value 按 message_format 反序列化，失败时为 None
+
+        Raises:
+            RuntimeError: 起始 offset 已被保留策略删除，或读取超时
+        """
+        from kafka import KafkaConsumer, TopicPartition
+        from kafka.errors import OffsetOutOfRangeError
+
+        remaining = {
+            TopicPartition(self.topic_name, partition): end
+            for partition, (start, end) in ranges.items() if start < end
+        }
+        if not remaining:
+            return
+        consumer = KafkaConsumer(
+            bootstrap_servers=self.brokers,
+            group_id=None,
+            enable_auto_commit=False,
+            # 起始 offset 不存在时报错，不能跳到最早或最新位置，否则会漏掉数据
+            auto_offset_reset='none',
+            max_poll_records=max_poll_records,
+            key_deserializer=self._key_deserializer,
+            value_deserializer=lambda m: None if m is None else self.message_format.deserialize(m)
+        )
+        try:
+            consumer.assign(list(remaining))
+            for tp in remaining:
+                consumer.seek(tp, ranges[tp.partition][0])
+            positions = {tp: ranges[tp.partition][0] for tp in remaining}
+            progressed_at = time.monotonic()
+            while remaining:
+                batch = []
+                try:
+                    records = consumer.poll(timeout_ms=1000)
+                except OffsetOutOfRangeError as e:
+                    raise RuntimeError(f"起始 offset 已被保留策略删除，请重新执行回填: {e}")
+                for tp, messages in records.items():
+                    end = remaining.get(tp)
+                    if end is None:
+                        continue
+                    batch.extend(
+                        (tp.partition, message.offset, message.key, message.value)
+                        for message in messages if message.offset < end
+                    )
+                # 按 position 判断是否读完，事务标记与压缩删除的 offset 不会返回消息
+                finished = []
+                for tp in list(remaining):
+                    position = consumer.position(tp)
+                    if position != positions[tp]:
+                        positions[tp] = position
+                        progressed_at = time.monotonic()
+                    if position >= remaining[tp]:
+                        finished.append(tp)
+                        del remaining[tp]
+                if finished:
+                    consumer.pause(*finished)
+                if batch:
+                    yield batch
+                    # 写入耗时不计入空闲时间
+                    progressed_at = time.monotonic()
+                elif remaining and time.monotonic() - progressed_at > idle_timeout:
+                    pending = ", ".join(f"{tp.partition}@{positions[tp]}" for tp in remaining)
+                    raise RuntimeError(f"{idle_timeout:g} 秒内没有读到新消息，未读完的分区: {pending}")
+        finally:
+            consumer.close()
+
     @staticmethod
     def load_from_file(file_path: str, count: int = 10) -> List[Dict[str, Any]]:
         """从文件加载 demo 数据"""
+        return [value for _, value in KafkaClient.load_records_from_file(file_path, count)]
+
+    @staticmethod
+    def load_records_from_file(file_path: str, count: int = 10) -> List[Tuple[Optional[str], Dict[str, Any]]]:
+        """从文件加载 demo 数据，同时返回 key
+
+        文件每行格式：key:<key>,value:<json>
+        """
         path = Path(file_path)
         if not path.exists():
             raise FileNotFoundError(f"文件不存在: {file_path}")
@@ -74,9 +203,10 @@ class KafkaClient:
                 if line.startswith('key:'):
                     value_start = line.find('value:')
                     if value_start != -1:
+                        key = line[4:value_start].rstrip(',').strip() or None
                         json_str = line[value_start + 6:]
                         try:
-                            messages.append(json.loads(json_str))
+                            messages.append((key, json.loads(json_str)))
                             if len(messages) >= count:
                                 break
                         except json.JSONDecodeError as e:
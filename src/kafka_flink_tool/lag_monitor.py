@@ -0,0 +1,162 @@
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Dict, List
+from .models import PartitionLag, TopicLag
+
+if TYPE_CHECKING:
+    from kafka import TopicPartition
+
+logger = logging.getLogger(__name__)
+
+
+class LagMonitor:
+    """批量计算消费组在 Topic 上的消费延迟
+
+    同一 Kafka 集群的所有分区在一次 ListOffsets 请求中获取 end offset，
+    再按消费组获取已提交的 offset。
+    """
+
+    def __init__(self, brokers: str):
+        self.brokers = brokers.split(',')
+
+    def snapshot(self, topic_groups: Dict[str, str]) -> List[TopicLag]:
+        """获取一次消费延迟快照
+
+        Args:
+            topic_groups: Topic 名称到消费组的映射
+
+        Returns:
+            List[TopicLag]: 每个 Topic 的分区延迟与总延迟
+        """
+        from kafka import KafkaAdminClient, KafkaConsumer, TopicPartition
+
+        consumer = KafkaConsumer(bootstrap_servers=self.brokers, enable_auto_commit=False)
+        admin = KafkaAdminClient(bootstrap_servers=self.brokers)
+        try:
+            partitions = []
+            for topic in topic_groups:
+                topic_partitions = consumer.partitions_for_topic(topic)
+                if not topic_partitions:
+                    logger.warning(f"Topic 不存在或没有分区: {topic}")
+                    continue
+                partitions.extend(TopicPartition(topic, p) for p in sorted(topic_partitions))
+            end_offsets = consumer.end_offsets(partitions) if partitions else {}
+
+            groups = sorted(set(topic_groups.values()))
+            committed = {}
+            for group in groups:
+                group_partitions = [tp for tp in partitions if topic_groups[tp.topic] == group]
+                if not group_partitions:
+                    continue
+                committed[group] = {
+                    tp: meta.offset
+                    for tp, meta in admin.list_consumer_group_offsets(group, partitions=group_partitions).items()
+                }
+        finally:
+            admin.close()
+            consumer.close()
+
+        return [
+            self.compute_lag(topic, group, end_offsets, committed.get(group, {}))
+            for topic, group in topic_groups.items()
+        ]
+
+    @staticmethod
+    def compute_lag(topic: str, group: str, end_offsets: Dict['TopicPartition', int],
+                    committed: Dict['TopicPartition', int]) -> TopicLag:
+        """根据 end offset 与已提交 offset 计算延迟，未提交的分区不计入总延迟"""
+        partitions = []
+        for tp in sorted((tp for tp in end_offsets if tp.topic == topic), key=lambda tp: tp.partition):
+            end_offset = end_offsets[tp]
+            committed_offset = committed.get(tp)
+            if committed_offset is None or committed_offset < 0:
+                committed_offset, lag = None, None
+            else:
+                lag = max(end_offset - committed_offset, 0)
+            partitions.append(PartitionLag(
+                partition=tp.partition,
+                end_offset=end_offset,
+                committed_offset=committed_offset,
+                lag=lag
+            ))
+        return TopicLag(
+            topic=topic,
+            group=group,
+            partitions=partitions,
+            total_lag=sum(p.lag for p in partitions if p.lag is not None)
+        )
+
+    @staticmethod
+    def apply_rates(previous: List[TopicLag], current: List[TopicLag], seconds: float) -> None:
+        """根据两次快照计算追赶速度（每秒减少的延迟条数）与写入速度，写入 current"""
+        if seconds <= 0:
+            return
+        previous_lags = {(lag.topic, lag.group): lag for lag in previous}
+        for lag in current:
+            previous_lag = previous_lags.get((lag.topic, lag.group))
+            if previous_lag is None:
+                continue
+            lag.catch_up_rate = round((previous_lag.total_lag - lag.total_lag) / seconds, 2)
+            previous_end = sum(p.end_offset for p in previous_lag.partitions)
+            current_end = sum(p.end_offset for p in lag.partitions)
+            lag.input_rate = round(max(current_end - previous_end, 0) / seconds, 2)
+
+
+def format_lag_table(lags: List[TopicLag], per_partition: bool = False) -> str:
+    """格式化为文本表格"""
+    lines = [f"{'TOPIC':<40} {'GROUP':<45} {'LAG':>12} {'CATCH-UP/s':>12}"]
+    for lag in lags:
+        rate = '-' if lag.catch_up_rate is None else f"{lag.catch_up_rate:.2f}"
+        lines.append(f"{lag.topic:<40} {lag.group:<45} {lag.total_lag:>12} {rate:>12}")
+        if per_partition:
+            for p in lag.partitions:
+                committed = '-' if p.committed_offset is None else p.committed_offset
+                partition_lag = '-' if p.lag is None else p.lag
+                lines.append(f"  partition {p.partition:<4} end={p.end_offset} "
+                             f"committed={committed} lag={partition_lag}")
+    return "\n".join(lines)
+
+
+def format_lag_json(lags: List[TopicLag]) -> str:
+    return json.dumps([lag.model_dump() for lag in lags], ensure_ascii=False, indent=2)
+
+
+def format_lag_prometheus(lags: List[TopicLag]) -> str:
+    """格式化为 Prometheus 文本格式，可供 node_exporter textfile collector 采集"""
+    lines = [
+        "# HELP kafka_flink_consumer_lag Consumer lag of a partition in messages.",
+        "# TYPE kafka_flink_consumer_lag gauge",
+    ]
+    for lag in lags:
+        for p in lag.partitions:
+            if p.lag is not None:
+                lines.append(
+                    f'kafka_flink_consumer_lag{{topic="{lag.topic}",group="{lag.group}",'
+                    f'partition="{p.partition}"}} {p.lag}'
+                )
+    lines += [
+        "# HELP kafka_flink_consumer_lag_total Consumer lag of a topic in messages.",
+        "# TYPE kafka_flink_consumer_lag_total gauge",
+    ]
+    for lag in lags:
+        lines.append(f'kafka_flink_consumer_lag_total{{topic="{lag.topic}",group="{lag.group}"}} {lag.total_lag}')
+    rated = [lag for lag in lags if lag.catch_up_rate is not None]
+    if rated:
+        lines += [
+            "# HELP kafka_flink_consumer_catch_up_rate Lag reduced per second, negative when falling behind.",
+            "# TYPE kafka_flink_consumer_catch_up_rate gauge",
+        ]
+        for lag in rated:
+            lines.append(
+                f'kafka_flink_consumer_catch_up_rate{{topic="{lag.topic}",group="{lag.group}"}} {lag.catch_up_rate}'
+            )
+    return "\n".join(lines) + "\n"
+
+
+def write_text_file(path: str, content: str) -> None:
+    """先写临时文件再重命名，避免采集到写了一半的文件"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
@@ -1,28 +1,213 @@
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
+import queue
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
+PACKAGE = 'kafka_flink_tool'
+DEFAULT_LOG_FILE = 'logs/app.log'
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
 
-def get_logger(name: str) -> logging.Logger:
-    logger = logging.getLogger(name)
+# 本次运行的 ID，以及当前处理的 Topic，写入每条结构化日志
+RUN_ID = uuid.uuid4().hex[:12]
+_topic = contextvars.ContextVar('log_topic', default=None)
+
+_lock = threading.Lock()
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.handlers.QueueHandler] = None
+_rate_limit: Optional['RateLimitFilter'] = None
+
+
+class ContextFilter(logging.Filter):
+    """在产生日志的线程中附加 run_id 与 topic"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.run_id = RUN_ID
+        record.topic = _topic.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """按日志模板限流：每个 interval 内同一位置、同一级别、同一模板的日志最多输出 burst 次，其余只计数
+
+    同一行输出的不同消息（如按分区、按 Topic 的 f-string）互不影响。
+    下一次输出时在消息后附加被省略的次数，之后没有输出的由 flush 在关闭日志时补上；ERROR 及以上不限流。
+    """
+
+    # 窗口数超过该值时清理已过期且没有省略计数的窗口，避免不同消息无限累积
+    MAX_KEYS = 10000
+
+    def __init__(self, burst: int = 5, interval: float = 60):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        # (logger, 文件, 行号, 级别, 模板) -> [窗口开始时间, 窗口内次数, 被省略次数]
+        self._windows: Dict[Tuple[str, str, int, int, str], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, record.pathname, record.lineno, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window else 0
+                if window is None and len(self._windows) >= self.MAX_KEYS:
+                    self._expire(now)
+                self._windows[key] = [now, 1, 0]
+            else:
+                window[1] += 1
+                if window[1] > self.burst:
+                    window[2] += 1
+                    return False
+                return True
+        if suppressed:
+            record.msg = f"{record.getMessage()}（前 {self.interval:g} 秒内省略 {suppressed} 条相同的日志）"
+            record.args = None
+        return True
+
+    def _expire(self, now: float) -> None:
+        self._windows = {
+            key: window for key, window in self._windows.items()
+            if now - window[0] < self.interval or window[2]
+        }
+
+    def flush(self) -> List[logging.LogRecord]:
+        """取出仍有省略计数的窗口，每个生成一条汇总日志"""
+        with self._lock:
+            pending = [(key, window[2]) for key, window in self._windows.items() if window[2]]
+            self._windows = {}
+        records = []
+        for (name, pathname, lineno, level, msg), suppressed in pending:
+            records.append(logging.LogRecord(
+                name, level, pathname, lineno,
+                f"{msg}（最近 {self.interval:g} 秒内省略 {suppressed} 条相同的日志）", None, None
+            ))
+        return records
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON Lines 格式，每行一条日志"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'run_id': getattr(record, 'run_id', RUN_ID),
+            'topic': getattr(record, 'topic', None),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
 
-    if not logger.handlers:
-        logger.setLevel(logging.DEBUG)
 
-        # 控制台处理器
+def setup_logging(log_file: str = DEFAULT_LOG_FILE, log_format: str = 'text', rotation: str = 'size',
+                  max_bytes: int = 50 * 1024 * 1024, backup_count: int = 7,
+                  rate_limit: Optional[RateLimitFilter] = None, force: bool = False) -> None:
+    """配置根日志：调用方只把日志放入队列，由后台线程写控制台与文件
+
+    Args:
+        log_file: 日志文件路径
+        log_format: text 或 json（JSON Lines，包含 run_id 与 topic）
+        rotation: size 按大小轮转（max_bytes），time 每天零点轮转
+        backup_count: 保留的历史文件数
+        rate_limit: 限流过滤器，默认每个调用位置每 60 秒最多 5 条
+        force: 已配置时重新配置
+    """
+    global _listener, _queue_handler, _rate_limit
+    with _lock:
+        if _listener and not force:
+            return
+        _shutdown()
+
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
-        console_formatter = logging.Formatter('%(levelname)s - %(message)s')
-        console_handler.setFormatter(console_formatter)
+        console_handler.setFormatter(logging.Formatter('%(levelname)s - %(message)s'))
 
-        # 文件处理器
-        log_dir = Path('logs')
-        log_dir.mkdir(exist_ok=True)
-        file_handler = logging.FileHandler(log_dir / 'app.log', encoding='utf-8')
+        path = Path(log_file)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if rotation == 'time':
+            file_handler = logging.handlers.TimedRotatingFileHandler(
+                path, when='midnight', backupCount=backup_count, encoding='utf-8'
+            )
+        else:
+            file_handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+            )
         file_handler.setLevel(logging.DEBUG)
-        file_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(file_formatter)
+        file_handler.setFormatter(JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT))
+
+        log_queue = queue.SimpleQueue()
+        _queue_handler = logging.handlers.QueueHandler(log_queue)
+        _queue_handler.addFilter(ContextFilter())
+        _rate_limit = rate_limit or RateLimitFilter()
+        _queue_handler.addFilter(_rate_limit)
+        _listener = logging.handlers.QueueListener(
+            log_queue, console_handler, file_handler, respect_handler_level=True
+        )
+        _listener.start()
+
+        # 第三方库只记录 WARNING 及以上，本包记录 DEBUG
+        root = logging.getLogger()
+        root.setLevel(logging.WARNING)
+        root.addHandler(_queue_handler)
+        logging.getLogger(PACKAGE).setLevel(logging.DEBUG)
+
+
+def shutdown_logging() -> None:
+    """停止后台线程，写完队列中剩余的日志"""
+    with _lock:
+        _shutdown()
+
+
+def _shutdown() -> None:
+    global _listener, _queue_handler, _rate_limit
+    # 先摘除入队的 handler，补上被限流省略的计数，再等待后台线程写完队列
+    if _queue_handler:
+        logging.getLogger().removeHandler(_queue_handler)
+        if _rate_limit:
+            for record in _rate_limit.flush():
+                _queue_handler.enqueue(record)
+        _queue_handler = None
+    _rate_limit = None
+    if _listener:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
 
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
 
-    return logger
+atexit.register(shutdown_logging)
+
+
+def bind_topic(topic: Optional[str]) -> None:
+    """之后的日志附加 Topic 名称，CLI 每个进程只执行一条命令"""
+    _topic.set(topic)
+
+
+@contextmanager
+def log_context(topic: Optional[str]):
+    """在上下文内的日志中附加 Topic 名称"""
+    token = _topic.set(topic)
+    try:
+        yield
+    finally:
+        _topic.reset(token)
+
+
+def get_logger(name: str) -> logging.Logger:
+    # 未显式调用 setup_logging 时使用默认配置
+    setup_logging()
+    return logging.getLogger(name)
@@ -1,14 +1,36 @@
+import re
+from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
+
+
+class FieldProjection(BaseModel):
+    """字段投影规则：先按 include 规则保留字段（未配置时保留全部），再按 exclude 规则剔除"""
+    include: List[str] = []
+    exclude: List[str] = []
+    include_patterns: List[str] = []  # 正则，整体匹配字段名
+    exclude_patterns: List[str] = []
+
+    @field_validator('include_patterns', 'exclude_patterns')
+    @classmethod
+    def _check_patterns(cls, patterns: List[str]) -> List[str]:
+        for pattern in patterns:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"字段投影正则错误: {pattern} ({e})")
+        return patterns
 
 
 class KafkaTopicConfig(BaseModel):
     id: int
     topic_name: str
     kafka_brokers: str
-    data_format: str
+    data_format: str  # json / csv / avro / protobuf
     description: Optional[str] = None
     is_active: bool
+    field_projection: Optional[FieldProjection] = None
+    format_options: Optional[dict] = None  # 消息格式参数，见 formats.get_message_format
 
 
 class FieldSchema(BaseModel):
@@ -17,9 +39,40 @@ class FieldSchema(BaseModel):
     nullable: bool = True
 
 
+class PartitionSpec(BaseModel):
+    """Sink 表分区定义"""
+    mode: str = "logical"  # logical: 逻辑分区表, physical: 物理分区表
+    column: str = "ds"  # 分区列，格式 yyyyMMdd
+    source_field: Optional[str] = None  # 计算分区的时间字段，为空时使用 etl_time
+    ttl_seconds: Optional[int] = None
+
+
 class InferredSchema(BaseModel):
     fields: List[FieldSchema]
     sample_data_count: int
+    primary_key: List[str] = []  # 主键列名，key_col 表示 Kafka key；为空时按 append-only 写入
+    partition: Optional[PartitionSpec] = None
+    projection: Optional[FieldProjection] = None  # 生成时应用的字段投影规则
+    projected_out: List[str] = []  # 被投影规则剔除的采样字段
+
+
+class ColumnChange(BaseModel):
+    """列类型变更"""
+    name: str
+    old_type: str
+    new_type: str
+
+
+class SchemaDiff(BaseModel):
+    """新采样 Schema 与已存储 Schema / 线上表结构的差异"""
+    added: List[FieldSchema] = []  # 需要 ADD COLUMN 的字段
+    widened: List[ColumnChange] = []  # 安全的类型放宽
+    incompatible: List[ColumnChange] = []  # 无法安全变更的类型，保留原类型
+    merged: InferredSchema  # 合并后的 Schema，用于生成新版本 SQL
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.widened)
 
 
 class FlinkSQLRecord(BaseModel):
@@ -34,20 +87,235 @@ class FlinkSQLRecord(BaseModel):
     inferred_schema: Optional[dict] = None
     sample_count: int = 10
     status: str = "generated"
+    flink_settings: Optional[dict] = None
+    version: int = 1
+    sql_hash: Optional[str] = None
+    stage_timings: Optional[dict] = None  # 生成/部署时 --profile 记录的各阶段耗时
+
+
+class ColumnCastStats(BaseModel):
+    """单列的类型转换校验结果"""
+    column: str
+    source_type: str  # Source DDL 中的 Flink 类型
+    expression: str  # INSERT 中的投影表达式
+    total: int = 0
+    failures: int = 0  # Flink 会抛出异常的行数
+    nulls: int = 0  # 消息中有值但转换后为 NULL 的行数
+    missing: int = 0  # 消息中缺失或为 null 的行数
+    errors: List[str] = []  # 失败示例
+
+    @property
+    def failure_rate(self) -> float:
+        return self.failures / self.total if self.total else 0.0
+
+    @property
+    def null_rate(self) -> float:
+        return self.nulls / self.total if self.total else 0.0
+
+    @property
+    def missing_rate(self) -> float:
+        return self.missing / self.total if self.total else 0.0
+
+
+class CastReport(BaseModel):
+    """部署前按 Flink 语义在本地执行 CAST 的校验报告"""
+    sample_count: int
+    columns: List[ColumnCastStats] = []
+    filtered_rows: int = 0  # 主键为空被 WHERE 过滤的行数
+
+    def violations(self, max_failure_rate: float, max_null_rate: float) -> List[str]:
+        """返回超过阈值的列说明"""
+        result = []
+        for column in self.columns:
+            if column.failure_rate > max_failure_rate:
+                result.append(f"{column.column} 转换失败率 {column.failure_rate:.1%}")
+            if column.null_rate > max_null_rate:
+                result.append(f"{column.column} 转换为 NULL 比例 {column.null_rate:.1%}")
+        return result
+
+
+class GenerationPlan(BaseModel):
+    """生成计划：建表前在内存中构建好的 SQL 记录、Schema 与建表 DDL"""
+    record: FlinkSQLRecord
+    table_schema: InferredSchema
+    hologres_ddl: str
+    precreate_days: int = 0
+    cast_report: Optional[CastReport] = None
 
 
 class AliyunFlinkJob(BaseModel):
     """阿里云 Flink 作业记录模型"""
     id: Optional[int] = None
     sql_record_id: int
-    deployment_id: str
+    draft_id: Optional[str] = None
+    deployment_id: Optional[str] = None
     job_id: Optional[str] = None
+    step: str = "generated"  # 最后完成的部署步骤
+    deployment_target: str = "per_job"  # per_job / session
+    session_cluster: Optional[str] = None
     status: str = "CREATED"
     workspace_id: Optional[str] = None
     namespace: Optional[str] = None
-    create_time: Optional[str] = None
-    update_time: Optional[str] = None
-    start_time: Optional[str] = None
-    end_time: Optional[str] = None
+    create_time: Optional[datetime] = None
+    update_time: Optional[datetime] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
     error_message: Optional[str] = None
     flink_config: Optional[dict] = None
+    # 关联 flink_sql_record 查询得到，不落库
+    topic_name: Optional[str] = None
+    sink_table_name: Optional[str] = None
+
+
+class PartitionLag(BaseModel):
+    """单个分区的消费延迟"""
+    partition: int
+    end_offset: int
+    committed_offset: Optional[int] = None  # 消费组尚未提交时为空
+    lag: Optional[int] = None
+
+
+class TopicLag(BaseModel):
+    """Topic 在某个消费组上的消费延迟"""
+    topic: str
+    group: str
+    partitions: List[PartitionLag] = []
+    total_lag: int = 0
+    catch_up_rate: Optional[float] = None  # 每秒减少的延迟条数，负数表示延迟在增长
+    input_rate: Optional[float] = None  # 每秒写入的消息条数
+
+
+class ScalingDecision(BaseModel):
+    """自动扩缩容决策记录"""
+    id: Optional[int] = None
+    aliyun_job_id: int
+    topic_name: str
+    action: str = "hold"  # scale_up / scale_down / hold
+    reason: str
+    current_parallelism: Optional[int] = None
+    target_parallelism: Optional[int] = None
+    partition_count: int = 0
+    total_lag: int = 0
+    input_rate: Optional[float] = None
+    catch_up_rate: Optional[float] = None
+    dry_run: bool = False
+    applied: bool = False
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class TopicOnboarding(BaseModel):
+    """watch 模式下单个 Topic 的接入状态"""
+    topic_id: int
+    topic_name: str
+    status: str = "pending"  # generated / deployed / failed
+    attempts: int = 0
+    last_error: Optional[str] = None
+    sql_record_id: Optional[int] = None
+    aliyun_job_id: Optional[int] = None
+    updated_at: Optional[datetime] = None
+
+
+class GenerationTask(BaseModel):
+    """分布式生成队列中的任务，每个 Topic 一个"""
+    topic_name: str
+    job_profile: Optional[str] = None
+    deploy: bool = False
+    status: str = "pending"  # pending / running / done / failed
+    attempts: int = 0
+    worker_id: Optional[str] = None
+    lease_token: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    sql_record_id: Optional[int] = None
+    aliyun_job_id: Optional[int] = None
+    not_before: Optional[datetime] = None  # 失败后重新排队的任务在该时间之前不会被领取
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class TopicChange(BaseModel):
+    """kafka_topic_config 中水位之后的一行变更"""
+    topic: KafkaTopicConfig
+    updated_at: datetime
+    has_record: bool  # 是否已有 flink_sql_record
+
+
+class TopicProfile(BaseModel):
+    """Topic 写入速度与消息体画像，用于资源规划"""
+    id: Optional[int] = None
+    topic_name: str
+    partition_count: int = 0
+    window_seconds: float = 0
+    messages_per_second: float = 0
+    sample_count: int = 0
+    avg_message_bytes: float = 0
+    p99_message_bytes: int = 0
+    compression_ratio: float = 1.0  # 原始大小 / 压缩后大小
+    field_count: int = 0
+    estimated_bytes_per_day: int = 0  # 按压缩比估算的 Hologres 每日写入字节数
+    created_at: Optional[datetime] = None
+
+
+class PartitionBackfill(BaseModel):
+    """单个分区的回填范围与结果，范围为 [start_offset, end_offset)"""
+    partition: int
+    start_offset: int
+    end_offset: int
+    messages: int = 0  # 读取的消息数
+    rows: int = 0  # 写入 Sink 表的行数
+    skipped: int = 0  # 无法解码或主键为空被过滤的消息数
+
+
+class BackfillResult(BaseModel):
+    """一次历史数据回填的结果"""
+    topic_name: str
+    sink_table_name: str
+    partitions: List[PartitionBackfill] = []
+    sql_record_id: Optional[int] = None  # 以边界 offset 启动的新版本 SQL 记录
+    aliyun_job_id: Optional[int] = None
+    elapsed_seconds: float = 0
+
+    @property
+    def rows(self) -> int:
+        return sum(p.rows for p in self.partitions)
+
+    @property
+    def messages(self) -> int:
+        return sum(p.messages for p in self.partitions)
+
+
+class HistoryFilter(BaseModel):
+    """history / jobs 命令的查询条件，未指定的条件不过滤"""
+    topic_name: Optional[str] = None
+    status: Optional[str] = None
+    since: Optional[datetime] = None  # 创建时间下限（包含）
+    until: Optional[datetime] = None  # 创建时间上限（不包含）
+
+
+class FlinkSQLRecordSummary(BaseModel):
+    """SQL 记录摘要，列表查询不读取 DDL 与 SQL 正文"""
+    id: int
+    topic_id: int
+    topic_name: str
+    sink_table_name: str
+    version: int
+    status: str
+    sql_hash: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+
+class TopicLatestDeployment(BaseModel):
+    """每个 Topic 最新的 SQL 记录与最近一次部署（latest_topic_deployment 视图）"""
+    topic_id: int
+    topic_name: str
+    is_active: bool
+    sql_record_id: Optional[int] = None
+    sink_table_name: Optional[str] = None
+    version: Optional[int] = None
+    record_status: Optional[str] = None
+    record_created_at: Optional[datetime] = None
+    aliyun_job_id: Optional[int] = None
+    job_id: Optional[str] = None
+    job_status: Optional[str] = None
+    job_update_time: Optional[datetime] = None
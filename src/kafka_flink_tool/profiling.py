@@ -0,0 +1,130 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional
+
+
+class StageProfiler:
+    """记录各阶段的墙钟时间、CPU 时间与内存峰值
+
+    同名阶段（如每次 API 轮询）累加耗时与次数，内存峰值取最大值。
+    阶段可以嵌套，外层阶段的耗时包含内层；只在 CLI 主线程中使用。
+    内存峰值由 tracemalloc 统计，是阶段内相对开始时的最大新增分配。
+    """
+
+    def __init__(self, cprofile: bool = False):
+        self._stats: Dict[str, dict] = {}  # 按首次进入顺序
+        # 每层阶段：[开始时已分配内存, 阶段内观察到的峰值]
+        self._frames: List[list] = []
+        self._started = time.perf_counter()
+        self._started_cpu = time.process_time()
+        self._cprofile = None
+        if cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self._cprofile:
+            self._cprofile.enable()
+
+    def stop(self) -> None:
+        if self._cprofile:
+            self._cprofile.disable()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str):
+        stats = self._stats.setdefault(
+            name, {'name': name, 'calls': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0, 'peak_kb': 0.0}
+        )
+        tracing = tracemalloc.is_tracing()
+        current, outer_peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        if tracing:
+            if self._frames:
+                self._frames[-1][1] = max(self._frames[-1][1], outer_peak)
+            tracemalloc.reset_peak()
+        self._frames.append([current, current])
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            start_memory, peak = self._frames.pop()
+            if tracing and tracemalloc.is_tracing():
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                # 内层的峰值同样计入外层
+                if self._frames:
+                    self._frames[-1][1] = max(self._frames[-1][1], peak)
+            stats['calls'] += 1
+            stats['wall_ms'] += wall * 1000
+            stats['cpu_ms'] += cpu * 1000
+            stats['peak_kb'] = max(stats['peak_kb'], max(peak - start_memory, 0) / 1024)
+
+    def timings(self) -> dict:
+        """按首次进入顺序返回各阶段统计，数值保留一位小数"""
+        stages = [
+            {key: round(value, 1) if isinstance(value, float) else value for key, value in stats.items()}
+            for stats in self._stats.values()
+        ]
+        return {
+            'total_wall_ms': round((time.perf_counter() - self._started) * 1000, 1),
+            'total_cpu_ms': round((time.process_time() - self._started_cpu) * 1000, 1),
+            'stages': stages
+        }
+
+    def dump_stats(self, path: str) -> None:
+        """写出 cProfile 结果，可用 python -m pstats 或 snakeviz 查看"""
+        if not self._cprofile:
+            raise ValueError("未启用 cProfile")
+        self._cprofile.dump_stats(path)
+
+    def dump_json(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.timings(), f, ensure_ascii=False, indent=2)
+
+
+_profiler: Optional[StageProfiler] = None
+
+
+def start_profiling(cprofile: bool = False) -> StageProfiler:
+    """开始记录阶段耗时，之后 stage() 生效"""
+    global _profiler
+    _profiler = StageProfiler(cprofile)
+    _profiler.start()
+    return _profiler
+
+
+def stop_profiling() -> Optional[StageProfiler]:
+    """停止记录并返回本次的统计"""
+    global _profiler
+    profiler, _profiler = _profiler, None
+    if profiler:
+        profiler.stop()
+    return profiler
+
+
+def current_profiler() -> Optional[StageProfiler]:
+    return _profiler
+
+
+def stage(name: str):
+    """记录一个阶段；未开启 --profile 时不做任何事"""
+    if _profiler is None:
+        return nullcontext()
+    return _profiler.stage(name)
+
+
+def format_timings(timings: dict) -> str:
+    """格式化为文本表格"""
+    lines = [f"{'STAGE':<40} {'CALLS':>6} {'WALL(ms)':>10} {'CPU(ms)':>10} {'PEAK(KB)':>10}"]
+    for stats in timings['stages']:
+        lines.append(
+            f"{stats['name']:<40} {stats['calls']:>6} {stats['wall_ms']:>10.1f} "
+            f"{stats['cpu_ms']:>10.1f} {stats['peak_kb']:>10.1f}"
+        )
+    lines.append(f"{'total':<40} {'':>6} {timings['total_wall_ms']:>10.1f} {timings['total_cpu_ms']:>10.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,55 @@
+import re
+from typing import Optional
+from .models import FieldProjection, InferredSchema
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class FieldProjector:
+    """按 Topic 的字段投影规则裁剪推断出的 Schema
+
+    Source 只声明投影后的字段，Flink JSON 反序列化时不再解析其余字段。
+    """
+
+    def __init__(self, projection: Optional[FieldProjection] = None):
+        self.projection = projection
+        if projection:
+            self._include_patterns = [re.compile(p) for p in projection.include_patterns]
+            self._exclude_patterns = [re.compile(p) for p in projection.exclude_patterns]
+
+    def apply(self, schema: InferredSchema) -> InferredSchema:
+        """返回投影后的 Schema，并记录应用的规则和被剔除的字段"""
+        if not self.projection:
+            return schema
+
+        missing = [name for name in self.projection.include if name not in {f.name for f in schema.fields}]
+        if missing:
+            logger.warning(f"投影规则中的字段未出现在采样数据中: {', '.join(missing)}")
+
+        kept, projected_out = [], []
+        for field in schema.fields:
+            if self._is_kept(field.name):
+                kept.append(field)
+            else:
+                projected_out.append(field.name)
+        if not kept:
+            logger.warning("投影后没有保留任何 value 字段，Sink 表只包含 etl_time 和 key_col")
+
+        return schema.model_copy(update={
+            'fields': kept,
+            'projection': self.projection,
+            'projected_out': projected_out
+        })
+
+    def _is_kept(self, name: str) -> bool:
+        projection = self.projection
+        if projection.include or projection.include_patterns:
+            included = name in projection.include or any(
+                p.fullmatch(name) for p in self._include_patterns
+            )
+            if not included:
+                return False
+        if name in projection.exclude:
+            return False
+        return not any(p.fullmatch(name) for p in self._exclude_patterns)
@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional
+from .models import ColumnChange, FieldSchema, InferredSchema, SchemaDiff
+
+
+class SchemaEvolver:
+    """对比新采样的 Schema 与已存储的 Schema 及线上表结构，计算只增不减的变更
+
+    - 新字段：ADD COLUMN
+    - 类型放宽（如 BIGINT -> DOUBLE PRECISION、任意类型 -> TEXT）：ALTER COLUMN TYPE
+    - 其余类型变化：保留原类型，由 INSERT 中的 cast 兼容
+    - 采样中消失的字段：保留，不删除列
+    """
+
+    # 允许的类型放宽：原类型 -> 可放宽到的类型
+    WIDENINGS = {
+        'BIGINT': {'DOUBLE PRECISION', 'TEXT'},
+        'DOUBLE PRECISION': {'TEXT'},
+        'BOOLEAN': {'TEXT'},
+        'TIMESTAMPTZ': {'TEXT'},
+    }
+
+    # information_schema.columns.data_type 到推断类型的映射
+    LIVE_TYPE_MAPPING = {
+        'bigint': 'BIGINT',
+        'integer': 'BIGINT',
+        'double precision': 'DOUBLE PRECISION',
+        'numeric': 'DOUBLE PRECISION',
+        'text': 'TEXT',
+        'character varying': 'TEXT',
+        'boolean': 'BOOLEAN',
+        'timestamp with time zone': 'TIMESTAMPTZ',
+    }
+
+    def diff(self, stored: InferredSchema, sampled: InferredSchema,
+             live_columns: Optional[Dict[str, str]] = None) -> SchemaDiff:
+        """计算 Schema 差异
+
+        Args:
+            stored: flink_sql_record 中保存的 Schema
+            sampled: 本次采样推断的 Schema（已应用字段投影）
+            live_columns: 线上表的列名到 data_type 的映射，为空时只与已存储 Schema 对比
+
+        Returns:
+            SchemaDiff: 差异及合并后的 Schema，主键、分区和投影沿用已存储的定义
+        """
+        live_types = {
+            name: self.LIVE_TYPE_MAPPING.get(data_type.lower(), data_type.upper())
+            for name, data_type in (live_columns or {}).items()
+        }
+        sampled_types = {field.name: field.type for field in sampled.fields}
+
+        merged_fields: List[FieldSchema] = []
+        added: List[FieldSchema] = []
+        widened: List[ColumnChange] = []
+        incompatible: List[ColumnChange] = []
+
+        for field in stored.fields:
+            current_type = live_types.get(field.name, field.type)
+            new_type = sampled_types.get(field.name, current_type)
+            if new_type == current_type:
+                merged_fields.append(field.model_copy(update={'type': current_type}))
+            elif new_type in self.WIDENINGS.get(current_type, set()):
+                widened.append(ColumnChange(name=field.name, old_type=current_type, new_type=new_type))
+                merged_fields.append(field.model_copy(update={'type': new_type}))
+            else:
+                incompatible.append(ColumnChange(name=field.name, old_type=current_type, new_type=new_type))
+                merged_fields.append(field.model_copy(update={'type': current_type}))
+            if live_columns is not None and field.name not in live_types:
+                # 线上表缺少该列（例如被手工删除），重新补齐
+                added.append(merged_fields[-1])
+
+        stored_names = {field.name for field in stored.fields}
+        for field in sampled.fields:
+            if field.name in stored_names:
+                continue
+            if field.name in live_types:
+                # 线上表已有该列（例如手工添加），沿用线上类型
+                merged_fields.append(field.model_copy(update={'type': live_types[field.name]}))
+            else:
+                added.append(field)
+                merged_fields.append(field)
+
+        merged = stored.model_copy(update={
+            'fields': merged_fields,
+            'sample_data_count': sampled.sample_data_count
+        })
+        return SchemaDiff(added=added, widened=widened, incompatible=incompatible, merged=merged)
@@ -1,128 +1,509 @@
 import json
-from typing import Optional
-from .config import ConfigManager, AliyunFlinkConfig
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+from .config import (
+    ConfigManager, AliyunFlinkConfig, BackfillConfig, DeploymentTargetConfig, GenerationQueueConfig, PartitionConfig,
+    WatchConfig
+)
 from .database import HologresDAO
 from .kafka_client import KafkaClient
+from .formats import MessageFormat, get_message_format
 from .type_inference import TypeInferencer
 from .ddl_generator import DDLGenerator
 from .sql_generator import FlinkSQLGenerator
-from .models import FlinkSQLRecord, AliyunFlinkJob
+from .projection import FieldProjector
+from .schema_evolution import SchemaEvolver
+from .lag_monitor import LagMonitor
+from .cast_validator import CastValidator
+from .autoscaler import Autoscaler
+from .topic_profiler import TopicProfiler
+from .backfill import backfill_partitions, split_partitions
+from .models import (
+    BackfillResult, FlinkSQLRecord, AliyunFlinkJob, GenerationPlan, GenerationTask, InferredSchema, KafkaTopicConfig,
+    PartitionBackfill, PartitionSpec, SchemaDiff, ScalingDecision, TopicLag, TopicOnboarding, TopicProfile
+)
 from .flink_client import AliyunFlinkClient
-from .logger import get_logger
+from .logger import get_logger, log_context
+from .profiling import stage
 
 logger = get_logger(__name__)
 
 
 class GeneratorService:
-    def __init__(self, config_path: str = "config.yaml"):
-        self.config_manager = ConfigManager(config_path)
+    SAMPLE_COUNT = 10
+
+    def __init__(self, config_path: str = "config.yaml", config_manager: Optional[ConfigManager] = None,
+                 dao: Optional[HologresDAO] = None):
+        """
+        Args:
+            config_manager: 已加载的配置，传入时忽略 config_path
+            dao: 共享的数据库访问对象，传入时复用其连接
+        """
+        self.config_manager = config_manager or ConfigManager(config_path)
         self.hologres_config = self.config_manager.get_hologres_config()
-        self.dao = HologresDAO(self.hologres_config)
+        self._owns_dao = dao is None
+        self.dao = dao or HologresDAO(self.hologres_config)
+
+    def generate(self, topic_name: str, sink_table: Optional[str] = None, demo_file: Optional[str] = None,
+                 job_profile: Optional[str] = None, dedup_window: Optional[str] = None,
+                 partition: Optional[PartitionConfig] = None) -> int:
+        plan = self.prepare(topic_name, sink_table, demo_file, job_profile, dedup_window, partition)
+        return self.create(plan)
+
+    def prepare(self, topic_name: str, sink_table: Optional[str] = None, demo_file: Optional[str] = None,
+                job_profile: Optional[str] = None, dedup_window: Optional[str] = None,
+                partition: Optional[PartitionConfig] = None) -> GenerationPlan:
+        """采样推断并在内存中生成 DDL 与 Flink SQL，不建表、不保存记录"""
+        # 0. 加载作业调优配置，提前校验参数，避免采样后才失败
+        profile_name, profile = self.config_manager.get_flink_sql_profile(job_profile)
+        sql_gen = FlinkSQLGenerator(
+            profile.settings, profile.sink_options,
+            dedup_window=dedup_window or profile.dedup_window
+        )
+        partition = partition or profile.partition
 
-    def generate(self, topic_name: str, sink_table: Optional[str] = None, demo_file: Optional[str] = None) -> int:
         # 1. 获取 Topic 配置
-        logger.info(f"查询 Topic 配置: {topic_name}")
-        topic_config = self.dao.get_topic_config_by_name(topic_name)
-        if not topic_config:
-            raise ValueError(f"Topic 配置不存在: {topic_name}")
+        with stage('generate.topic_config'):
+            topic_config = self._get_topic_config(topic_name)
 
         # 2. 采样数据
-        if demo_file:
-            logger.info(f"从文件加载数据: {demo_file}")
-            messages = KafkaClient.load_from_file(demo_file, count=10)
-            logger.info(f"加载完成，共 {len(messages)} 条数据")
-        else:
-            logger.info(f"连接 Kafka: {topic_config.kafka_brokers}")
-            kafka_client = KafkaClient(topic_config.kafka_brokers, topic_name)
-            logger.info(f"采样 Topic: {topic_name} (最多 10 条)")
-            messages = kafka_client.sample_messages(count=10)
-            logger.info(f"采样完成，共 {len(messages)} 条数据")
+        message_format = self._message_format(topic_config)
+        with stage('generate.sample'):
+            records = self._sample(topic_config, demo_file, message_format)
 
-        # 检查是否有数据（至少 1 条）
-        if not messages:
-            raise ValueError("没有获取到任何数据，无法进行类型推断")
-
-        # 3. 推断类型
-        logger.info("推断数据类型...")
-        inferencer = TypeInferencer()
-        schema = inferencer.infer_schema(messages)
-        logger.info(f"推断完成，共 {len(schema.fields)} 个字段")
+        # 3. 推断类型（有 writer schema 时以其为准）
+        with stage('generate.infer'):
+            schema = self._infer_schema(topic_config, records, message_format)
+        if partition:
+            schema.partition = self._resolve_partition(partition, schema)
+            logger.info(f"分区表: {schema.partition.mode}，分区时间来源: "
+                        f"{schema.partition.source_field or 'etl_time'}")
+        if not schema.primary_key and sql_gen.dedup_window:
+            # 去重输出更新流，Hologres 表与 Sink 都需要按去重键声明主键
+            schema = sql_gen.sink_schema(schema)
+            logger.info(f"启用去重，使用去重键作为主键: {', '.join(schema.primary_key)}")
 
         # 4. 确定 sink 表名
-        if not sink_table:
-            # 将 topic 名称中的连字符和点替换为下划线，生成合法表名
-            safe_topic_name = topic_name.replace('-', '_').replace('.', '_')
-            sink_table = f"stg_kafka_{safe_topic_name}_rt"
+        sink_table = sink_table or self._default_sink_table(topic_name)
 
         # 5. 生成 DDL
         logger.info("生成 DDL...")
-        ddl_gen = DDLGenerator()
-        hologres_ddl = ddl_gen.generate_hologres_ddl(sink_table, schema)
+        with stage('generate.ddl'):
+            hologres_ddl = DDLGenerator().generate_hologres_ddl(sink_table, schema)
 
         # 6. 生成 Flink SQL
-        logger.info("生成 Flink SQL...")
-        sql_gen = FlinkSQLGenerator()
-        source_ddl, sink_ddl, insert_sql, full_sql = sql_gen.generate_full_sql(
-            topic_name, sink_table, schema,
-            topic_config.kafka_brokers, self.hologres_config
+        with stage('generate.flink_sql'):
+            record = self._build_record(sql_gen, profile_name, topic_config, sink_table, schema)
+
+        # 7. 按 Flink 语义对采样数据执行生成的 CAST，只模拟了 JSON format 的反序列化
+        cast_report = None
+        if message_format.json_semantics:
+            with stage('generate.cast_validation'):
+                cast_report = CastValidator.from_record(record).validate(records)
+            for column in cast_report.columns:
+                if column.failures or column.nulls:
+                    logger.warning(f"列 {column.column} 转换失败 {column.failures} 行，"
+                                   f"转换为 NULL {column.nulls} 行")
+        else:
+            logger.info(f"{message_format.name} 格式不执行类型转换校验")
+
+        return GenerationPlan(
+            record=record,
+            table_schema=schema,
+            hologres_ddl=hologres_ddl,
+            precreate_days=partition.precreate_days if partition else 0,
+            cast_report=cast_report
         )
 
-        # 7. 检查表是否存在
+    def check_casts(self, plan: GenerationPlan) -> None:
+        """类型转换失败率或 NULL 比例超过 cast_validation 阈值时抛出 ValueError"""
+        if not plan.cast_report:
+            return
+        config = self.config_manager.get_cast_validation_config()
+        violations = plan.cast_report.violations(config.max_failure_rate, config.max_null_rate)
+        if violations:
+            raise ValueError(
+                f"类型转换校验未通过: {'；'.join(violations)}，可使用 generate --dry-run 查看详情"
+            )
+
+    def create(self, plan: GenerationPlan) -> int:
+        """按生成计划建表并保存 SQL 记录，保存后回填 plan.record.id"""
+        sink_table = plan.record.sink_table_name
+
+        # 8. 检查表是否存在
         logger.info(f"检查 Sink 表: {sink_table}")
-        if self.dao.table_exists(sink_table):
+        with stage('generate.table_exists'):
+            exists = self.dao.table_exists(sink_table)
+        if exists:
             logger.warning(f"表已存在: {sink_table}")
-            raise ValueError(f"表已存在: {sink_table}，请使用不同的表名")
+            raise ValueError(f"表已存在: {sink_table}，请使用不同的表名，或使用 evolve 命令演进表结构")
 
-        # 8. 创建表
+        # 9. 创建表
         logger.info("创建表...")
-        self.dao.create_table(hologres_ddl)
-        logger.info("创建表成功")
+        with stage('generate.create_table'):
+            self.dao.create_table(plan.hologres_ddl)
+            logger.info("创建表成功")
+            if plan.precreate_days:
+                self._create_partitions(sink_table, plan.table_schema, plan.precreate_days)
 
-        # 9. 保存 SQL 记录
+        # 10. 保存 SQL 记录
         logger.info("保存 SQL 记录...")
-        record = FlinkSQLRecord(
+        with stage('generate.save_record'):
+            record_id = self.dao.save_flink_sql_record(plan.record)
+        plan.record.id = record_id
+        logger.info(f"保存成功，Record ID: {record_id}")
+
+        return record_id
+
+    def evolve(self, topic_name: str, sink_table: Optional[str] = None, demo_file: Optional[str] = None,
+               job_profile: Optional[str] = None) -> Tuple[int, SchemaDiff]:
+        """Schema 演进：重新采样推断，对比已存储的 Schema 与线上表结构，
+        只新增列和放宽类型，并保存新版本的 SQL 记录
+
+        已有列和数据保持不变，作业可从 savepoint 重启切换到新版本。
+
+        Args:
+            job_profile: 作业调优配置名称，默认沿用上一版本的配置
+
+        Returns:
+            tuple: (record_id, diff)，没有变化时返回当前版本的 record_id
+        """
+        topic_config = self._get_topic_config(topic_name)
+        sink_table = sink_table or self._default_sink_table(topic_name)
+
+        # 1. 读取上一版本及线上表结构
+        previous = self.dao.get_latest_flink_sql_record(sink_table)
+        if not previous or not previous.inferred_schema:
+            raise ValueError(f"未找到 Sink 表的生成记录: {sink_table}，请先使用 generate 命令")
+        if not self.dao.table_exists(sink_table):
+            raise ValueError(f"表不存在: {sink_table}，请先使用 generate 命令")
+        stored_schema = InferredSchema.model_validate(previous.inferred_schema)
+        live_columns = self.dao.get_table_columns(sink_table)
+
+        # 2. 沿用上一版本的作业调优配置
+        profile_name, sql_gen = self._generator_for(previous.flink_settings, job_profile)
+
+        # 3. 重新采样推断并计算差异
+        message_format = self._message_format(topic_config)
+        records = self._sample(topic_config, demo_file, message_format)
+        sampled_schema = self._infer_schema(topic_config, records, message_format)
+        diff = SchemaEvolver().diff(stored_schema, sampled_schema, live_columns)
+        for change in diff.incompatible:
+            logger.warning(f"字段 {change.name} 类型由 {change.old_type} 变为 {change.new_type}，"
+                           f"无法安全变更，保留原类型")
+        if not diff.has_changes:
+            logger.info(f"表结构无变化: {sink_table}")
+            return previous.id, diff
+
+        # 4. 执行 ALTER TABLE
+        alter_ddls = DDLGenerator().generate_alter_ddls(sink_table, diff)
+        logger.info(f"演进表结构: 新增 {len(diff.added)} 列，放宽 {len(diff.widened)} 列")
+        self.dao.alter_table(alter_ddls)
+
+        # 5. 保存新版本 SQL 记录
+        record = self._build_record(
+            sql_gen, profile_name, topic_config, sink_table, diff.merged,
+            status="evolved", version=previous.version + 1
+        )
+        record_id = self.dao.save_flink_sql_record(record)
+        logger.info(f"保存成功，Record ID: {record_id}，版本: {record.version}")
+        return record_id, diff
+
+    def regenerate(self, record_ids: Optional[List[int]] = None,
+                   job_profile: Optional[str] = None) -> List[int]:
+        """离线重新生成：基于已存储的 Schema 重建 Flink SQL，不采样 Kafka，不变更表结构
+
+        所有新版本记录在同一事务中批量写入。
+
+        Args:
+            record_ids: 记录 ID 列表，为空时重新生成每个 Sink 表的最新记录
+            job_profile: 作业调优配置名称，默认沿用各记录的配置
+
+        Returns:
+            List[int]: 新版本的记录 ID
+        """
+        previous_records = self.dao.list_flink_sql_records(record_ids)
+        if record_ids:
+            missing = sorted(set(record_ids) - {r.id for r in previous_records})
+            if missing:
+                raise ValueError(f"SQL 记录不存在: {', '.join(map(str, missing))}")
+        previous_records = [r for r in previous_records if r.inferred_schema]
+        if not previous_records:
+            raise ValueError("没有可重新生成的 SQL 记录")
+
+        topic_ids = {r.topic_id for r in previous_records}
+        topic_configs = self.dao.get_topic_configs_by_ids(list(topic_ids))
+        versions = self.dao.get_max_versions(list({r.sink_table_name for r in previous_records}))
+
+        # 同一配置的生成器只构建一次
+        generators = {}
+        new_records = []
+        for previous in previous_records:
+            topic_config = topic_configs.get(previous.topic_id)
+            if not topic_config:
+                raise ValueError(f"Topic 配置不存在: {previous.topic_name}")
+            previous_settings = previous.flink_settings or {}
+            cache_key = (job_profile or previous_settings.get('profile'), previous_settings.get('dedup_window'))
+            if cache_key not in generators:
+                generators[cache_key] = self._generator_for(previous_settings, job_profile)
+            profile_name, sql_gen = generators[cache_key]
+
+            schema = InferredSchema.model_validate(previous.inferred_schema)
+            versions[previous.sink_table_name] = versions.get(previous.sink_table_name, previous.version) + 1
+            new_records.append(self._build_record(
+                sql_gen, profile_name, topic_config, previous.sink_table_name, schema,
+                status="regenerated", version=versions[previous.sink_table_name]
+            ))
+
+        logger.info(f"保存 {len(new_records)} 条重新生成的 SQL 记录...")
+        new_ids = self.dao.save_flink_sql_records(new_records)
+        logger.info(f"保存成功，Record ID: {', '.join(map(str, new_ids))}")
+        return new_ids
+
+    def start_from_offsets(self, previous: FlinkSQLRecord, startup_offsets: Dict[int, int]) -> FlinkSQLRecord:
+        """基于记录中存储的 Schema 与调优配置，保存从指定 offset 启动的新版本 SQL 记录，不变更表结构
+
+        Args:
+            previous: Sink 表当前的 SQL 记录
+            startup_offsets: 分区到起始 offset 的映射，生成 specific-offsets 启动的 Source
+
+        Returns:
+            FlinkSQLRecord: 已保存的新版本记录
+        """
+        topic_config = self.dao.get_topic_configs_by_ids([previous.topic_id]).get(previous.topic_id)
+        if not topic_config:
+            raise ValueError(f"Topic 配置不存在: {previous.topic_name}")
+        profile_name, sql_gen = self._generator_for(previous.flink_settings, startup_offsets=startup_offsets)
+        version = self.dao.get_max_versions([previous.sink_table_name]).get(
+            previous.sink_table_name, previous.version
+        ) + 1
+        record = self._build_record(
+            sql_gen, profile_name, topic_config, previous.sink_table_name,
+            InferredSchema.model_validate(previous.inferred_schema), status="backfilled", version=version
+        )
+        record.id = self.dao.save_flink_sql_record(record)
+        logger.info(f"保存成功，Record ID: {record.id}，版本: {record.version}")
+        return record
+
+    def _generator_for(self, previous_settings: Optional[dict], job_profile: Optional[str] = None,
+                       startup_offsets: Optional[Dict[int, int]] = None) -> Tuple[str, FlinkSQLGenerator]:
+        """按上一版本保存的调优配置构建生成器，job_profile 优先
+
+        起始 offset 只用于 start_from_offsets 保存的回填记录，evolve、regenerate 不从上一版本沿用，
+        否则之后不带 savepoint 的部署会回到早已过期的回填边界。
+        """
+        previous_settings = previous_settings or {}
+        profile_name, profile = self.config_manager.get_flink_sql_profile(
+            job_profile or previous_settings.get('profile')
+        )
+        sql_gen = FlinkSQLGenerator(
+            profile.settings, profile.sink_options,
+            dedup_window=previous_settings.get('dedup_window') or profile.dedup_window,
+            startup_offsets=startup_offsets
+        )
+        return profile_name, sql_gen
+
+    def _get_topic_config(self, topic_name: str) -> KafkaTopicConfig:
+        logger.info(f"查询 Topic 配置: {topic_name}")
+        topic_config = self.dao.get_topic_config_by_name(topic_name)
+        if not topic_config:
+            raise ValueError(f"Topic 配置不存在: {topic_name}")
+        return topic_config
+
+    @staticmethod
+    def _message_format(topic_config: KafkaTopicConfig) -> MessageFormat:
+        return get_message_format(topic_config.data_format, topic_config.format_options, topic_config.topic_name)
+
+    def _sample(self, topic_config: KafkaTopicConfig, demo_file: Optional[str] = None,
+                message_format: Optional[MessageFormat] = None) -> List[Tuple[Optional[str], dict]]:
+        """采样数据，返回 (key, value) 列表；demo 文件中的 value 始终是 JSON"""
+        if demo_file:
+            logger.info(f"从文件加载数据: {demo_file}")
+            records = KafkaClient.load_records_from_file(demo_file, count=self.SAMPLE_COUNT)
+            logger.info(f"加载完成，共 {len(records)} 条数据")
+        else:
+            logger.info(f"连接 Kafka: {topic_config.kafka_brokers}")
+            kafka_client = KafkaClient(topic_config.kafka_brokers, topic_config.topic_name, message_format)
+            logger.info(f"采样 Topic: {topic_config.topic_name} (最多 {self.SAMPLE_COUNT} 条)")
+            records = kafka_client.sample_records(count=self.SAMPLE_COUNT)
+            logger.info(f"采样完成，共 {len(records)} 条数据")
+
+        # 检查是否有数据（至少 1 条），有 writer schema 的格式可以只按 schema 生成
+        if not records:
+            if message_format and message_format.has_writer_schema:
+                logger.warning("没有采样到数据，只按 writer schema 生成，无法推断 value 字段主键")
+                return []
+            raise ValueError("没有获取到任何数据，无法进行类型推断")
+        return records
+
+    def _infer_schema(self, topic_config: KafkaTopicConfig, records: List[Tuple[Optional[str], dict]],
+                      message_format: Optional[MessageFormat] = None) -> InferredSchema:
+        """推断类型（格式提供 writer schema 时直接使用），应用字段投影并推断主键"""
+        keys = [key for key, _ in records]
+        messages = [value for _, value in records]
+
+        inferencer = TypeInferencer()
+        writer_fields = message_format.writer_schema() if message_format else None
+        if writer_fields:
+            schema = InferredSchema(fields=writer_fields, sample_data_count=len(messages))
+            logger.info(f"使用 {message_format.name} writer schema，共 {len(schema.fields)} 个字段")
+        else:
+            logger.info("推断数据类型...")
+            schema = inferencer.infer_schema(messages)
+            logger.info(f"推断完成，共 {len(schema.fields)} 个字段")
+        if topic_config.field_projection:
+            schema = FieldProjector(topic_config.field_projection).apply(schema)
+            logger.info(f"应用字段投影，保留 {len(schema.fields)} 个字段，"
+                        f"剔除 {len(schema.projected_out)} 个字段")
+        if message_format:
+            message_format.check_schema(schema)
+        schema.primary_key = inferencer.infer_primary_key(messages, schema, keys)
+        if schema.primary_key:
+            logger.info(f"推断主键: {', '.join(schema.primary_key)}")
+        else:
+            logger.warning("未找到安全的主键，Sink 将以 insertOrIgnore 方式追加写入")
+        return schema
+
+    @staticmethod
+    def _default_sink_table(topic_name: str) -> str:
+        # 将 topic 名称中的连字符和点替换为下划线，生成合法表名
+        safe_topic_name = topic_name.replace('-', '_').replace('.', '_')
+        return f"stg_kafka_{safe_topic_name}_rt"
+
+    def _build_record(self, sql_gen: FlinkSQLGenerator, profile_name: Optional[str],
+                      topic_config: KafkaTopicConfig, sink_table: str, schema: InferredSchema,
+                      status: str = "generated", version: int = 1) -> FlinkSQLRecord:
+        """生成 Flink SQL 并组装 SQL 记录"""
+        logger.info(f"生成 Flink SQL: {sink_table}")
+        source_ddl, sink_ddl, insert_sql, full_sql = sql_gen.generate_full_sql(
+            topic_config.topic_name, sink_table, schema,
+            topic_config.kafka_brokers, self.hologres_config,
+            value_format=self._message_format(topic_config).flink_options()
+        )
+        effective_settings = sql_gen.get_effective_settings()
+        return FlinkSQLRecord(
             topic_id=topic_config.id,
-            topic_name=topic_name,
+            topic_name=topic_config.topic_name,
             sink_table_name=sink_table,
             source_ddl=source_ddl,
             sink_ddl=sink_ddl,
             insert_sql=insert_sql,
             full_sql=full_sql,
             inferred_schema=json.loads(schema.model_dump_json()),
-            sample_count=len(messages),
-            status="generated"
+            sample_count=schema.sample_data_count,
+            status=status,
+            flink_settings={'profile': profile_name, **effective_settings},
+            version=version,
+            sql_hash=sql_gen.compute_sql_hash(full_sql, effective_settings)
         )
-        record_id = self.dao.save_flink_sql_record(record)
-        logger.info(f"保存成功，Record ID: {record_id}")
 
-        return record_id
+    def create_partitions(self, sink_table: str, days: int = 3) -> int:
+        """为物理分区表预创建从今天开始的子分区
+
+        Returns:
+            int: 执行的子分区 DDL 数量（已存在的分区会被跳过）
+        """
+        record = self.dao.get_latest_flink_sql_record(sink_table)
+        if not record or not record.inferred_schema:
+            raise ValueError(f"未找到 Sink 表的生成记录: {sink_table}")
+        schema = InferredSchema.model_validate(record.inferred_schema)
+        if not schema.partition:
+            raise ValueError(f"Sink 表不是分区表: {sink_table}")
+        return self._create_partitions(sink_table, schema, days)
+
+    def _create_partitions(self, sink_table: str, schema: InferredSchema, days: int) -> int:
+        ddls = DDLGenerator().generate_partition_ddls(sink_table, schema, date.today(), days)
+        if ddls:
+            logger.info(f"预创建 {len(ddls)} 个子分区: {sink_table}")
+            self.dao.create_table("\n".join(ddls))
+        return len(ddls)
+
+    @staticmethod
+    def _resolve_partition(partition: PartitionConfig, schema: InferredSchema) -> PartitionSpec:
+        """根据分区配置确定分区时间字段"""
+        if partition.source == 'etl_time':
+            source_field = None
+        elif partition.source == 'auto':
+            source_field = TypeInferencer().infer_event_time_field(schema)
+            if not source_field:
+                logger.warning("未找到事件时间字段，分区使用 etl_time")
+        else:
+            timestamp_fields = {f.name for f in schema.fields if f.type == 'TIMESTAMPTZ'}
+            if partition.source not in timestamp_fields:
+                raise ValueError(f"分区时间字段不存在或不是时间类型: {partition.source}")
+            source_field = partition.source
+
+        return PartitionSpec(
+            mode=partition.mode,
+            source_field=source_field,
+            ttl_seconds=partition.ttl_days * 86400 if partition.ttl_days else None
+        )
 
     def __del__(self):
-        if hasattr(self, 'dao'):
+        # 共享的连接由创建方负责关闭
+        if hasattr(self, 'dao') and self._owns_dao:
             self.dao.close()
 
 
 class AliyunFlinkService:
     """阿里云 Flink 业务服务"""
 
+    # 作业已结束的状态，resume 时需要重新启动而不是继续等待
+    ENDED_JOB_STATUSES = ('FAILED', 'CANCELLED', 'FINISHED', 'STOPPED')
+
     def __init__(self, config_path: str = "config.yaml"):
         self.config_manager = ConfigManager(config_path)
         self.hologres_config = self.config_manager.get_hologres_config()
         self.flink_config = self.config_manager.get_aliyun_flink_config()
-        self.dao = HologresDAO(self.hologres_config)
-        self.flink_client = AliyunFlinkClient(self.flink_config)
+
+    # 数据库访问与 Flink 客户端在首次使用时创建，status 等命令只初始化用到的部分
+    @cached_property
+    def dao(self) -> HologresDAO:
+        return HologresDAO(self.hologres_config)
+
+    @cached_property
+    def flink_client(self) -> AliyunFlinkClient:
+        return AliyunFlinkClient(self.flink_config)
+
+    @cached_property
+    def generator(self) -> GeneratorService:
+        # 生成与部署共用同一份配置和数据库连接
+        return GeneratorService(config_manager=self.config_manager, dao=self.dao)
+
+    @cached_property
+    def autoscaler(self) -> Autoscaler:
+        return Autoscaler(self.config_manager.get_autoscale_config())
 
     def generate_and_deploy(self, topic_name: str, sink_table: Optional[str] = None,
-                           demo_file: Optional[str] = None) -> dict:
+                           demo_file: Optional[str] = None, job_profile: Optional[str] = None,
+                           dedup_window: Optional[str] = None,
+                           partition: Optional[PartitionConfig] = None,
+                           deployment_target: Optional[DeploymentTargetConfig] = None,
+                           skip_cast_check: bool = False) -> dict:
         """端到端：生成 SQL 并部署到阿里云 Flink
 
         Args:
             topic_name: Kafka Topic 名称
             sink_table: Hologres 表名（可选）
             demo_file: 演示数据文件（可选）
+            job_profile: 作业调优配置名称（可选）
+            dedup_window: 去重窗口（可选），覆盖作业调优配置中的 dedup_window
+            partition: 分区配置（可选），覆盖作业调优配置中的 partition
+            deployment_target: 部署目标（可选），覆盖 aliyun_flink.deployment_target
+            skip_cast_check: 跳过类型转换校验
 
         Returns:
-            dict: 包含 deployment_id 和 job_id 的字典
+            dict: 包含 deployment_id 和 job_id 的字典；SQL 未变化且作业运行中时 skipped 为 True
 
         Raises:
             RuntimeError: 部署流程失败
@@ -132,68 +513,220 @@ class AliyunFlinkService:
         try:
             # Step 1: 生成 Flink SQL
             logger.info("Step 1: 生成 Flink SQL")
-            generator = GeneratorService()
-            record_id = generator.generate(topic_name, sink_table, demo_file)
-            record = self.dao.save_flink_sql_record.__wrapped__(generator.dao, record_id) if hasattr(generator.dao, '_get_connection') else None
-
-            # 从数据库获取完整记录
-            with self.dao._get_connection() as conn:
-                import psycopg2
-                with conn.cursor() as cur:
-                    cur.execute(
-                        "SELECT * FROM flink_sql_record WHERE id = %s",
-                        (record_id,)
-                    )
-                    row = cur.fetchone()
-                    if row:
-                        sql_content = row[6]  # full_sql 字段
-                    else:
-                        raise RuntimeError("无法获取 SQL 记录")
-
-            # Step 2: 创建作业草稿
-            logger.info("Step 2: 创建作业草稿")
-            draft_id = self.flink_client.create_deployment_draft(sql_content)
-            if not self.flink_client.wait_for_deployment_draft(draft_id):
-                raise RuntimeError("草稿创建超时")
-
-            # Step 3: 部署作业
-            logger.info("Step 3: 部署作业")
-            deployment_id = self.flink_client.deploy_deployment_draft(draft_id)
-            if not self.flink_client.wait_for_deployment(deployment_id):
-                raise RuntimeError("部署超时")
-
-            # Step 4: 启动作业
-            logger.info("Step 4: 启动作业")
-            job_id = self.flink_client.start_job_with_params(deployment_id)
-            if not self.flink_client.wait_for_job(job_id):
-                raise RuntimeError("作业启动超时")
-
-            # Step 5: 创建阿里云Flink作业记录
-            logger.info("Step 5: 创建阿里云Flink作业记录")
-            aliyun_job = AliyunFlinkJob(
-                sql_record_id=record_id,
-                deployment_id=deployment_id,
-                job_id=job_id,
-                status='RUNNING',
-                workspace_id=self.flink_config.workspace_id,
-                namespace=self.flink_config.namespace
+            plan = self.generator.prepare(
+                topic_name, sink_table, demo_file, job_profile, dedup_window, partition
             )
-            aliyun_job_id = self.dao.create_aliyun_flink_job(aliyun_job)
+            if not skip_cast_check:
+                self.generator.check_casts(plan)
 
-            logger.info(f"部署完成！Deployment ID: {deployment_id}, Job ID: {job_id}")
+            # SQL 内容未变化时复用已有记录；作业仍在同一部署目标上运行则无需重新部署
+            record = self.dao.get_flink_sql_record_by_hash(plan.record.sql_hash)
+            if record:
+                target = deployment_target or self.flink_config.deployment_target
+                running_job = self._get_running_job(record.id)
+                if running_job and self._job_target(running_job) == target:
+                    logger.info(f"SQL 未变化且作业运行中，跳过部署: Record ID {record.id}, "
+                                f"Job ID {running_job.job_id}")
+                    return self._deploy_result(running_job, skipped=True)
+                if running_job:
+                    logger.info(f"SQL 未变化，部署目标由 {self._job_target(running_job).describe()} 改为 "
+                                f"{target.describe()}，重新部署: Record ID {record.id}")
+                else:
+                    logger.info(f"SQL 未变化，复用已有记录重新部署: Record ID {record.id}")
+            else:
+                self.generator.create(plan)
+                record = plan.record
 
-            return {
-                'success': True,
-                'deployment_id': deployment_id,
-                'job_id': job_id,
-                'aliyun_job_id': aliyun_job_id,
-                'status': 'RUNNING'
-            }
+            aliyun_job = self._create_aliyun_job(record, deployment_target)
 
         except Exception as e:
             logger.error(f"部署失败: {e}")
             raise RuntimeError(f"部署流程失败: {e}")
 
+        return self._run_deploy_steps(aliyun_job, record.full_sql)
+
+    def deploy_record(self, record: FlinkSQLRecord,
+                      deployment_target: Optional[DeploymentTargetConfig] = None) -> dict:
+        """部署已保存的 SQL 记录，不重新采样生成
+
+        Raises:
+            RuntimeError: 部署流程失败
+        """
+        try:
+            aliyun_job = self._create_aliyun_job(record, deployment_target)
+        except Exception as e:
+            logger.error(f"部署失败: {e}")
+            raise RuntimeError(f"部署流程失败: {e}")
+        return self._run_deploy_steps(aliyun_job, record.full_sql)
+
+    def _create_aliyun_job(self, record: FlinkSQLRecord,
+                           deployment_target: Optional[DeploymentTargetConfig] = None) -> AliyunFlinkJob:
+        """Step 2: 创建部署记录，后续每个步骤完成后立即保存产生的 ID"""
+        target = deployment_target or self.flink_config.deployment_target
+        logger.info(f"部署目标: {target.describe()}")
+        aliyun_job = AliyunFlinkJob(
+            sql_record_id=record.id,
+            deployment_target=target.mode,
+            session_cluster=target.session_cluster,
+            workspace_id=self.flink_config.workspace_id,
+            namespace=self.flink_config.namespace,
+            flink_config=self._sizing(record.topic_name)
+        )
+        aliyun_job.id = self.dao.create_aliyun_flink_job(aliyun_job)
+        return aliyun_job
+
+    def resume(self, aliyun_job_id: int) -> dict:
+        """从部署记录最后完成的步骤继续部署
+
+        已完成步骤产生的草稿、部署不会重复创建；等待类步骤会重新执行。
+        已启动的作业在线上已结束（如 FAILED）时，回到 deployed 步骤重新启动。
+
+        Args:
+            aliyun_job_id: 阿里云作业记录 ID
+
+        Returns:
+            dict: 与 generate_and_deploy 相同
+        """
+        job = self.dao.get_aliyun_flink_job(aliyun_job_id)
+        if not job:
+            raise ValueError(f"部署记录不存在: {aliyun_job_id}")
+        if job.status == 'RUNNING':
+            logger.info(f"作业已在运行，无需继续: {job.job_id}")
+            return self._deploy_result(job, skipped=True)
+
+        records = self.dao.list_flink_sql_records([job.sql_record_id])
+        if not records:
+            raise ValueError(f"SQL 记录不存在: {job.sql_record_id}")
+        if job.step == 'started' and job.job_id:
+            status = self.flink_client.get_job_status(job.job_id)
+            if status in self.ENDED_JOB_STATUSES:
+                logger.info(f"作业已结束 ({status})，重新启动: {job.job_id}")
+                job.step = 'deployed'
+        logger.info(f"从步骤 {job.step} 继续部署，部署记录 ID: {job.id}")
+        return self._run_deploy_steps(job, records[0].full_sql)
+
+    def _sizing(self, topic_name: str) -> Optional[dict]:
+        """按 Topic 最近一次的画像确定初始并行度，保存在部署记录的 flink_config 中"""
+        profile = self.dao.get_latest_topic_profile(topic_name)
+        if not profile:
+            logger.info(f"Topic 没有画像，使用默认并行度（可先执行 profile-topic）: {topic_name}")
+            return None
+        parallelism = self.autoscaler.initial_parallelism(profile)
+        if not parallelism:
+            return None
+        logger.info(f"Topic 画像写入 {profile.messages_per_second}/s，初始并行度: {parallelism}")
+        return {'parallelism': parallelism, 'topic_profile_id': profile.id}
+
+    def _run_deploy_steps(self, job: AliyunFlinkJob, sql_content: str) -> dict:
+        """从 job.step 开始执行剩余的部署步骤，失败时记录错误并提示 resume"""
+        # 续部署时沿用记录中的部署目标
+        target = self._job_target(job)
+        try:
+            # Step 3: 创建作业草稿
+            if job.step == 'generated':
+                logger.info("Step 3: 创建作业草稿")
+                with stage('deploy.create_draft'):
+                    draft_id = self.flink_client.create_deployment_draft(sql_content, target)
+                self._complete_step(job, 'draft_created', 'CREATED', draft_id=draft_id)
+
+            # Step 4: 部署作业
+            if job.step == 'draft_created':
+                with stage('deploy.wait_draft'):
+                    if not self.flink_client.wait_for_deployment_draft(job.draft_id):
+                        raise RuntimeError("草稿创建超时")
+                logger.info("Step 4: 部署作业")
+                with stage('deploy.deploy_draft'):
+                    deployment_id = self.flink_client.deploy_deployment_draft(job.draft_id)
+                self._complete_step(job, 'deployed', 'DEPLOYING', deployment_id=deployment_id)
+
+            # Step 5: 启动作业
+            if job.step == 'deployed':
+                with stage('deploy.wait_deployment'):
+                    if not self.flink_client.wait_for_deployment(job.deployment_id):
+                        raise RuntimeError("部署超时")
+                parallelism = (job.flink_config or {}).get('parallelism')
+                if parallelism:
+                    logger.info(f"按 Topic 画像设置并行度: {parallelism}")
+                    self.flink_client.update_deployment_parallelism(job.deployment_id, parallelism)
+                logger.info("Step 5: 启动作业")
+                with stage('deploy.start_job'):
+                    job_id = self.flink_client.start_job_with_params(job.deployment_id, deployment_target=target)
+                self._complete_step(job, 'started', 'STARTING', flink_job_id=job_id)
+
+            with stage('deploy.wait_job'):
+                if not self.flink_client.wait_for_job(job.job_id):
+                    raise RuntimeError("作业启动超时")
+            self.dao.update_aliyun_flink_job_status(job.id, 'RUNNING')
+            job.status = 'RUNNING'
+
+        except Exception as e:
+            logger.error(f"部署失败: {e}")
+            self.dao.update_aliyun_flink_job_status(job.id, 'FAILED', str(e))
+            raise RuntimeError(
+                f"部署流程失败: {e}，可使用 resume --aliyun-job-id {job.id} 从 {job.step} 步骤继续"
+            )
+
+        logger.info(f"部署完成！Deployment ID: {job.deployment_id}, Job ID: {job.job_id}")
+        return self._deploy_result(job)
+
+    def _complete_step(self, job: AliyunFlinkJob, step: str, status: str, draft_id: Optional[str] = None,
+                       deployment_id: Optional[str] = None, flink_job_id: Optional[str] = None) -> None:
+        """持久化步骤产生的 ID 后再推进 job.step，中断时不会丢失已创建的资源"""
+        if not (draft_id or deployment_id or flink_job_id):
+            raise RuntimeError(f"步骤 {step} 未返回 ID")
+        self.dao.update_aliyun_flink_job_step(
+            job.id, step, status, draft_id=draft_id, deployment_id=deployment_id, flink_job_id=flink_job_id
+        )
+        job.draft_id = draft_id or job.draft_id
+        job.deployment_id = deployment_id or job.deployment_id
+        job.job_id = flink_job_id or job.job_id
+        job.step = step
+        job.status = status
+
+    @staticmethod
+    def _deploy_result(job: AliyunFlinkJob, skipped: bool = False) -> dict:
+        return {
+            'success': True,
+            'skipped': skipped,
+            'deployment_id': job.deployment_id,
+            'job_id': job.job_id,
+            'aliyun_job_id': job.id,
+            'sql_record_id': job.sql_record_id,
+            'status': job.status
+        }
+
+    @staticmethod
+    def _job_target(job: AliyunFlinkJob) -> DeploymentTargetConfig:
+        return DeploymentTargetConfig(mode=job.deployment_target, session_cluster=job.session_cluster)
+
+    def _get_running_job(self, sql_record_id: int) -> Optional[AliyunFlinkJob]:
+        """返回 SQL 记录对应且线上仍在运行的作业，记录状态过期时同步更新"""
+        job = self.dao.get_latest_aliyun_flink_job_by_record(sql_record_id)
+        if not job or job.status != 'RUNNING' or not job.job_id:
+            return None
+        status = self.flink_client.get_job_status(job.job_id)
+        if status != 'RUNNING':
+            logger.info(f"作业已不在运行: {job.job_id} ({status})")
+            self.dao.update_aliyun_flink_job_status(job.id, status)
+            return None
+        return job
+
+    def fleet_status(self, refresh: bool = False) -> List[AliyunFlinkJob]:
+        """获取每个 Sink 表最近一次部署的作业
+
+        Args:
+            refresh: 是否从阿里云 Flink 刷新运行中作业的状态并回写记录
+        """
+        jobs = self.dao.list_aliyun_flink_jobs()
+        if refresh:
+            for job in jobs:
+                if job.job_id and job.status in ('STARTING', 'RUNNING'):
+                    status = self.flink_client.get_job_status(job.job_id)
+                    if status != job.status:
+                        self.dao.update_aliyun_flink_job_status(job.id, status)
+                        job.status = status
+        return jobs
+
     def start_job(self, deployment_id: str) -> dict:
         """启动已部署的作业
 
@@ -246,8 +779,657 @@ class AliyunFlinkService:
             logger.error(f"查询作业状态失败: {e}")
             raise
 
+    def close(self) -> None:
+        # 只关闭已创建的连接，hasattr 会触发延迟创建
+        if 'dao' in self.__dict__:
+            self.dao.close()
+        if 'flink_client' in self.__dict__:
+            self.flink_client.close()
+
+    def __del__(self):
+        self.close()
+
+
+class _ThreadServices:
+    """每个工作线程复用一个 AliyunFlinkService，数据库连接与 Flink 客户端在多轮之间保持"""
+
+    def __init__(self, config_path: str):
+        self.config_path = config_path
+        self._local = threading.local()
+        self._services: List[AliyunFlinkService] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> AliyunFlinkService:
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self._local.service = AliyunFlinkService(self.config_path)
+            with self._lock:
+                self._services.append(service)
+        return service
+
+    def close(self) -> None:
+        """关闭所有线程的服务，须在工作线程结束后调用"""
+        with self._lock:
+            services, self._services = self._services, []
+        for service in services:
+            service.close()
+        self._local = threading.local()
+
+
+class LagService:
+    """生成作业的消费延迟监控服务"""
+
+    # 视为仍在消费的作业状态
+    ACTIVE_JOB_STATUSES = ('STARTING', 'RUNNING')
+
+    def __init__(self, config_path: str = "config.yaml"):
+        self.config_manager = ConfigManager(config_path)
+        self.dao = HologresDAO(self.config_manager.get_hologres_config())
+
+    def collect(self, topic_names: Optional[List[str]] = None, interval: float = 0) -> List[TopicLag]:
+        """获取消费延迟，interval 大于 0 时间隔两次快照计算追赶速度
+
+        Args:
+            topic_names: Topic 列表，为空时检查 aliyun_flink_jobs 中所有运行中的作业
+
+        Returns:
+            List[TopicLag]: 每个 Topic 在 flink_<topic> 消费组上的延迟
+        """
+        if not topic_names:
+            topic_names = sorted({
+                job.topic_name for job in self.dao.list_aliyun_flink_jobs()
+                if job.status in self.ACTIVE_JOB_STATUSES
+            })
+            if not topic_names:
+                logger.info("没有运行中的作业")
+                return []
+
+        topic_configs = self.dao.get_topic_configs_by_names(topic_names)
+        missing = sorted(set(topic_names) - set(topic_configs))
+        if missing:
+            raise ValueError(f"Topic 配置不存在: {', '.join(missing)}")
+
+        # 同一 Kafka 集群的 Topic 合并查询
+        clusters = {}
+        for topic_name in topic_names:
+            brokers = topic_configs[topic_name].kafka_brokers
+            clusters.setdefault(brokers, {})[topic_name] = FlinkSQLGenerator.consumer_group(topic_name)
+        logger.info(f"检查 {len(topic_names)} 个 Topic 的消费延迟，共 {len(clusters)} 个 Kafka 集群")
+
+        first_taken = time.monotonic()
+        lags = self._snapshot(clusters)
+        if interval > 0:
+            time.sleep(interval)
+            second_taken = time.monotonic()
+            current = self._snapshot(clusters)
+            LagMonitor.apply_rates(lags, current, second_taken - first_taken)
+            lags = current
+        return lags
+
+    @staticmethod
+    def _snapshot(clusters: dict) -> List[TopicLag]:
+        lags = []
+        for brokers, topic_groups in clusters.items():
+            lags.extend(LagMonitor(brokers).snapshot(topic_groups))
+        return lags
+
     def __del__(self):
         if hasattr(self, 'dao'):
             self.dao.close()
+
+
+class AutoscaleService(LagService):
+    """按消费延迟自动调整运行中作业的并行度"""
+
+    def __init__(self, config_path: str = "config.yaml"):
+        super().__init__(config_path)
+        self.autoscale_config = self.config_manager.get_autoscale_config()
+        self.flink_client = AliyunFlinkClient(self.config_manager.get_aliyun_flink_config())
+        self.autoscaler = Autoscaler(self.autoscale_config)
+
+    def run(self, loop_interval: float, dry_run: bool = False) -> None:
+        """持续运行控制循环"""
+        while True:
+            try:
+                self.run_once(dry_run)
+            except Exception as e:
+                logger.error(f"自动扩缩容本轮失败: {e}")
+            time.sleep(loop_interval)
+
+    def run_once(self, dry_run: bool = False) -> List[ScalingDecision]:
+        """执行一轮：采集延迟与速率，计算决策并执行，所有决策写入 autoscale_decision
+
+        Args:
+            dry_run: 只记录决策，不执行扩缩容
+        """
+        jobs = [
+            job for job in self.dao.list_aliyun_flink_jobs()
+            if job.status == 'RUNNING' and job.deployment_id and job.job_id
+        ]
+        if not jobs:
+            logger.info("没有运行中的作业")
+            return []
+
+        lags = {
+            lag.topic: lag
+            for lag in self.collect(sorted({job.topic_name for job in jobs}), self.autoscale_config.sample_interval)
+        }
+        parallelisms = {job.id: self.flink_client.get_deployment_parallelism(job.deployment_id) for job in jobs}
+        last_scaled = self.dao.get_last_scaled_at([job.id for job in jobs])
+        budget_remaining = None
+        if self.autoscale_config.max_total_parallelism:
+            budget_remaining = self.autoscale_config.max_total_parallelism - sum(
+                p for p in parallelisms.values() if p
+            )
+
+        decisions = []
+        for job in jobs:
+            lag = lags.get(job.topic_name)
+            if not lag:
+                continue
+            with log_context(job.topic_name):
+                decision = self.autoscaler.decide(
+                    job.id, lag, parallelisms[job.id], last_scaled.get(job.id),
+                    budget_remaining=budget_remaining
+                )
+                decision.dry_run = dry_run
+                if decision.action != 'hold':
+                    logger.info(f"{job.topic_name}: {decision.action}，{decision.reason}")
+                    if not dry_run:
+                        self._apply(job, decision)
+                    if budget_remaining is not None and (dry_run or decision.applied):
+                        budget_remaining -= decision.target_parallelism - decision.current_parallelism
+                decision.id = self.dao.save_scaling_decision(decision)
+            decisions.append(decision)
+        return decisions
+
+    def _apply(self, job: AliyunFlinkJob, decision: ScalingDecision) -> None:
+        """savepoint 停止作业，修改并行度后从最新 savepoint 启动"""
+        stopped = False
+        try:
+            self.flink_client.stop_job(job.job_id, with_savepoint=True)
+            if not self.flink_client.wait_for_job_stopped(job.job_id):
+                raise RuntimeError("停止作业超时")
+            stopped = True
+            self.flink_client.update_deployment_parallelism(job.deployment_id, decision.target_parallelism)
+
+            target = DeploymentTargetConfig(mode=job.deployment_target, session_cluster=job.session_cluster)
+            job_id = self.flink_client.start_job_with_params(
+                job.deployment_id, params={'restore_strategy': {'kind': 'LATEST_SAVEPOINT'}},
+                deployment_target=target
+            )
+            self.dao.update_aliyun_flink_job_step(job.id, 'started', 'STARTING', flink_job_id=job_id)
+            if not self.flink_client.wait_for_job(job_id):
+                raise RuntimeError("作业启动超时")
+            self.dao.update_aliyun_flink_job_status(job.id, 'RUNNING')
+            decision.applied = True
+        except Exception as e:
+            logger.error(f"扩缩容失败: {job.topic_name}，{e}")
+            decision.error_message = str(e)
+            # 停止前失败时作业仍在运行，不修改作业状态
+            if stopped:
+                self.dao.update_aliyun_flink_job_status(job.id, 'FAILED', f"扩缩容失败: {e}")
+
+    def __del__(self):
+        super().__del__()
         if hasattr(self, 'flink_client'):
             self.flink_client.close()
+
+
+class ProfileService:
+    """Topic 写入速度与消息体画像服务"""
+
+    def __init__(self, config_path: str = "config.yaml"):
+        self.config_manager = ConfigManager(config_path)
+        self.dao = HologresDAO(self.config_manager.get_hologres_config())
+
+    def profile(self, topic_name: str, window: float = 60, sample_count: int = 1000,
+                save: bool = True) -> TopicProfile:
+        """采集 Topic 画像并写入 topic_profile，部署时据此确定初始并行度
+
+        Args:
+            window: 测速窗口（秒）
+            sample_count: 采样消息数
+            save: 是否保存画像
+        """
+        topic_config = self.dao.get_topic_config_by_name(topic_name)
+        if not topic_config:
+            raise ValueError(f"Topic 配置不存在: {topic_name}")
+
+        logger.info(f"采集 Topic 画像: {topic_name}，测速窗口 {window:g} 秒")
+        message_format = get_message_format(topic_config.data_format, topic_config.format_options, topic_name)
+        profile = TopicProfiler(topic_config.kafka_brokers).profile(topic_name, window, sample_count, message_format)
+        if save:
+            profile.id = self.dao.save_topic_profile(profile)
+            logger.info(f"画像已保存，Profile ID: {profile.id}")
+        return profile
+
+    def __del__(self):
+        if hasattr(self, 'dao'):
+            self.dao.close()
+
+
+class WatchService:
+    """watch 模式：按 (updated_at, id) 水位增量扫描 kafka_topic_config，自动接入没有 SQL 记录的启用 Topic
+
+    每批变更处理完后才推进水位。重启后从上次水位重新扫描：已生成的 Topic 有 SQL 记录会被跳过，
+    未处理完的 Topic 会重新处理。失败的 Topic 记录在 topic_onboarding 中，按 retry_interval 重试。
+    """
+
+    def __init__(self, config_path: str = "config.yaml", name: str = "default",
+                 watch_config: Optional[WatchConfig] = None):
+        """
+        Args:
+            name: 水位名称，多个 watch 进程使用不同名称互不影响
+            watch_config: 覆盖配置文件中的 watch 配置
+        """
+        self.config_path = config_path
+        self.name = name
+        self.config_manager = ConfigManager(config_path)
+        self.watch_config = watch_config or self.config_manager.get_watch_config()
+        self.dao = HologresDAO(self.config_manager.get_hologres_config())
+        self._services = _ThreadServices(config_path)
+        self._executor = ThreadPoolExecutor(max_workers=self.watch_config.concurrency, thread_name_prefix='watch')
+
+    def run(self, dry_run: bool = False) -> None:
+        """持续运行，每轮间隔 poll_interval 秒"""
+        while True:
+            try:
+                self.run_once(dry_run)
+            except Exception as e:
+                logger.error(f"watch 本轮失败: {e}")
+            time.sleep(self.watch_config.poll_interval)
+
+    def run_once(self, dry_run: bool = False) -> List[TopicOnboarding]:
+        """执行一轮：先重试到期的失败 Topic，再处理水位之后的新变更，最后补扫水位之外未接入的启用 Topic
+
+        Args:
+            dry_run: 只列出待接入的 Topic，不生成、不推进水位
+        """
+        config = self.watch_config
+        results = []
+
+        # 1. 重试到期的失败 Topic
+        retries = self.dao.list_retryable_topic_onboardings(config.max_attempts, config.retry_interval)
+        if retries:
+            topics = self.dao.get_topic_configs_by_ids([o.topic_id for o in retries])
+            results.extend(self._process([topics[o.topic_id] for o in retries
+                                          if o.topic_id in topics and topics[o.topic_id].is_active], dry_run))
+
+        # 2. 按水位读取新变更，每批处理完后保存水位
+        checkpoint = self.dao.get_watch_checkpoint(self.name)
+        while True:
+            changes = self.dao.list_topic_changes(checkpoint, config.batch_size, config.settle_seconds)
+            if not changes:
+                break
+            # 本轮刚重试过的 Topic 不重复处理
+            done = {result.topic_id for result in results}
+            pending = [
+                change.topic for change in changes
+                if change.topic.is_active and not change.has_record and change.topic.id not in done
+            ]
+            if pending:
+                logger.info(f"发现 {len(pending)} 个待接入的 Topic: {', '.join(t.topic_name for t in pending)}")
+            results.extend(self._process(pending, dry_run))
+            checkpoint = (changes[-1].updated_at, changes[-1].topic.id)
+            if not dry_run:
+                self.dao.save_watch_checkpoint(self.name, checkpoint)
+            if len(changes) < config.batch_size:
+                break
+
+        # 3. 补扫水位之外启用但从未接入的 Topic（如只修改 is_active 而 updated_at 未变）
+        done = {result.topic_id for result in results}
+        missed = [topic for topic in self.dao.list_unonboarded_topics(config.batch_size) if topic.id not in done]
+        if missed:
+            logger.info(f"发现 {len(missed)} 个水位之外待接入的 Topic: {', '.join(t.topic_name for t in missed)}")
+        results.extend(self._process(missed, dry_run))
+        return results
+
+    def _process(self, topics: List[KafkaTopicConfig], dry_run: bool) -> List[TopicOnboarding]:
+        """以 concurrency 个线程接入一批 Topic，全部完成后返回"""
+        if not topics:
+            return []
+        previous = self.dao.get_topic_onboardings([topic.id for topic in topics])
+        if dry_run:
+            return [
+                TopicOnboarding(topic_id=topic.id, topic_name=topic.topic_name,
+                                attempts=previous[topic.id].attempts if topic.id in previous else 0)
+                for topic in topics
+            ]
+        futures = [self._executor.submit(self._onboard, topic, previous.get(topic.id)) for topic in topics]
+        return [future.result() for future in futures]
+
+    def _onboard(self, topic: KafkaTopicConfig, previous: Optional[TopicOnboarding]) -> TopicOnboarding:
+        """生成（并部署）单个 Topic，结果写入 topic_onboarding
+
+        重试时如果上次已保存 SQL 记录，不再重新生成，只从部署记录继续部署。
+        """
+        worker = self._services.get()
+        onboarding = TopicOnboarding(
+            topic_id=topic.id, topic_name=topic.topic_name,
+            attempts=(previous.attempts if previous else 0) + 1
+        )
+        with log_context(topic.topic_name):
+            try:
+                record = worker.dao.get_latest_flink_sql_record_by_topic(topic.id)
+                if self.watch_config.deploy:
+                    if record is None:
+                        result = worker.generate_and_deploy(topic.topic_name, job_profile=self.watch_config.job_profile)
+                    else:
+                        job = worker.dao.get_latest_aliyun_flink_job_by_record(record.id)
+                        result = worker.resume(job.id) if job else worker.deploy_record(record)
+                    onboarding.status = 'deployed'
+                    onboarding.sql_record_id = result['sql_record_id']
+                    onboarding.aliyun_job_id = result['aliyun_job_id']
+                else:
+                    onboarding.sql_record_id = record.id if record else worker.generator.generate(
+                        topic.topic_name, job_profile=self.watch_config.job_profile
+                    )
+                    onboarding.status = 'generated'
+                logger.info(f"Topic 接入完成: {topic.topic_name}，状态 {onboarding.status}")
+            except Exception as e:
+                logger.error(f"Topic 接入失败: {topic.topic_name}，第 {onboarding.attempts} 次: {e}")
+                onboarding.status = 'failed'
+                onboarding.last_error = str(e)
+            worker.dao.save_topic_onboarding(onboarding)
+        return onboarding
+
+    def close(self) -> None:
+        """等待进行中的 Topic 处理完，关闭工作线程的服务与数据库连接"""
+        self._executor.shutdown(wait=True)
+        self._services.close()
+        self.dao.close()
+
+    def __del__(self):
+        if hasattr(self, '_executor'):
+            self._executor.shutdown(wait=False)
+        if hasattr(self, 'dao'):
+            self.dao.close()
+
+
+class GenerationWorker:
+    """分布式生成 worker：从 generation_task 队列领取 Topic 任务，生成 SQL（可选部署）
+
+    多台机器上的 worker 通过条件更新抢占任务，领取后由心跳线程定期续租。worker 失联时租约过期，
+    任务由其他 worker 重新排队。每个 Topic 只有一个任务，建表前再次确认仍持有租约，
+    因此同一张表只会被一个 worker 创建。
+    """
+
+    def __init__(self, config_path: str = "config.yaml", worker_id: Optional[str] = None,
+                 queue_config: Optional[GenerationQueueConfig] = None):
+        """
+        Args:
+            worker_id: worker 标识，默认为 主机名-进程号
+            queue_config: 覆盖配置文件中的 generation_queue 配置
+        """
+        self.config_path = config_path
+        self.config_manager = ConfigManager(config_path)
+        self.queue_config = queue_config or self.config_manager.get_generation_queue_config()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        # 只由心跳线程使用，工作线程各自持有连接
+        self.dao = HologresDAO(self.config_manager.get_hologres_config())
+        self._services = _ThreadServices(config_path)
+        self._leases: Dict[str, GenerationTask] = {}  # lease_token -> 进行中的任务
+        self._lost_leases = set()
+        self._leases_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def run(self, once: bool = False) -> Counter:
+        """以 concurrency 个线程处理队列，直到中断；once 为 True 时处理到队列中没有可领取的任务为止
+
+        Returns:
+            Counter: 按结果统计的任务数（done / pending / failed / lost）
+        """
+        heartbeat_stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(heartbeat_stop,),
+                                     name='generation-heartbeat', daemon=True)
+        heartbeat.start()
+        executor = ThreadPoolExecutor(max_workers=self.queue_config.concurrency, thread_name_prefix='generation')
+        results = Counter()
+        try:
+            futures = [executor.submit(self._work, once) for _ in range(self.queue_config.concurrency)]
+            for future in futures:
+                results.update(future.result())
+        finally:
+            # 中断时不再领取新任务，等待进行中的任务完成，期间继续续租
+            self._stop.set()
+            executor.shutdown(wait=True)
+            heartbeat_stop.set()
+            heartbeat.join()
+            self._services.close()
+        return results
+
+    def _work(self, once: bool) -> Counter:
+        results = Counter()
+        while not self._stop.is_set():
+            task = self._claim()
+            if task is None:
+                if once:
+                    break
+                self._stop.wait(self.queue_config.poll_interval)
+                continue
+            results[self._run_task(task)] += 1
+        return results
+
+    def _claim(self) -> Optional[GenerationTask]:
+        """先让失联 worker 的任务重新排队，再逐个尝试领取候选任务"""
+        worker = self._services.get()
+        config = self.queue_config
+        requeued, failed = worker.dao.requeue_expired_generation_tasks(config.max_attempts)
+        if requeued or failed:
+            logger.warning(f"租约过期的任务: {requeued} 个重新排队，{failed} 个达到最大尝试次数")
+
+        candidates = worker.dao.list_claimable_generation_tasks(config.claim_batch)
+        # 多个 worker 读到相同的候选，打乱顺序减少抢占冲突
+        random.shuffle(candidates)
+        for task in candidates:
+            lease_token = uuid.uuid4().hex
+            if not worker.dao.claim_generation_task(task, self.worker_id, lease_token, config.lease_seconds):
+                continue
+            task = task.model_copy(update={
+                'status': 'running', 'attempts': task.attempts + 1,
+                'worker_id': self.worker_id, 'lease_token': lease_token
+            })
+            with self._leases_lock:
+                self._leases[lease_token] = task
+            logger.info(f"领取生成任务: {task.topic_name}，第 {task.attempts} 次")
+            return task
+        return None
+
+    def _heartbeat(self, stop: threading.Event) -> None:
+        """定期为进行中的任务续租"""
+        while not stop.wait(self.queue_config.heartbeat_interval):
+            with self._leases_lock:
+                tasks = list(self._leases.values())
+            for task in tasks:
+                try:
+                    self._renew(self.dao, task)
+                except Exception as e:
+                    logger.warning(f"续租失败: {task.topic_name}: {e}")
+
+    def _renew(self, dao: HologresDAO, task: GenerationTask) -> bool:
+        if dao.renew_generation_task_lease(task.topic_name, task.lease_token, self.queue_config.lease_seconds):
+            return True
+        logger.error(f"租约已被其他 worker 接管: {task.topic_name}")
+        with self._leases_lock:
+            self._lost_leases.add(task.lease_token)
+        return False
+
+    def _ensure_lease(self, dao: HologresDAO, task: GenerationTask) -> None:
+        with self._leases_lock:
+            lost = task.lease_token in self._lost_leases
+        if lost or not self._renew(dao, task):
+            raise RuntimeError(f"租约已失效，放弃处理: {task.topic_name}")
+
+    def _run_task(self, task: GenerationTask) -> str:
+        """处理一个任务并记录结果；失败且未达到 max_attempts 时重新排队"""
+        worker = self._services.get()
+        sql_record_id = aliyun_job_id = error = None
+        retry_delay = 0
+        with log_context(task.topic_name):
+            try:
+                sql_record_id, aliyun_job_id = self._execute(worker, task)
+                status = 'done'
+                logger.info(f"生成任务完成: {task.topic_name}，Record ID: {sql_record_id}")
+            except Exception as e:
+                status = 'failed' if task.attempts >= self.queue_config.max_attempts else 'pending'
+                error = str(e)
+                logger.error(f"生成任务失败: {task.topic_name}，第 {task.attempts} 次: {e}")
+                if status == 'pending':
+                    # 按尝试次数退避，Kafka 或 Flink 短暂不可用时不会在几秒内用完 max_attempts
+                    retry_delay = self.queue_config.retry_delay(task.attempts)
+                    logger.info(f"{retry_delay:g} 秒后重试: {task.topic_name}")
+            finally:
+                with self._leases_lock:
+                    self._leases.pop(task.lease_token, None)
+                    lost = task.lease_token in self._lost_leases
+                    self._lost_leases.discard(task.lease_token)
+
+            # 条件更新按令牌匹配，租约被接管后本次结果不会覆盖新 worker 的状态
+            if lost or not worker.dao.finish_generation_task(
+                task.topic_name, task.lease_token, status, error, sql_record_id, aliyun_job_id, retry_delay
+            ):
+                logger.warning(f"租约已被其他 worker 接管，不记录本次结果: {task.topic_name}")
+                return 'lost'
+        return status
+
+    def _execute(self, worker: AliyunFlinkService, task: GenerationTask) -> Tuple[int, Optional[int]]:
+        """生成（并部署）任务对应的 Topic，返回 (SQL 记录 ID, 部署记录 ID)
+
+        上次尝试已保存 SQL 记录时不再重新生成，只从部署记录继续部署。
+        """
+        topic = worker.dao.get_topic_config_by_name(task.topic_name)
+        if not topic:
+            raise ValueError(f"Topic 配置不存在或未启用: {task.topic_name}")
+
+        record = worker.dao.get_latest_flink_sql_record_by_topic(topic.id)
+        if record is None:
+            plan = worker.generator.prepare(task.topic_name, job_profile=task.job_profile)
+            if task.deploy:
+                worker.generator.check_casts(plan)
+            # 采样推断耗时较长，期间租约可能已过期并被接管，建表前再次确认
+            self._ensure_lease(worker.dao, task)
+            worker.generator.create(plan)
+            record = plan.record
+        else:
+            logger.info(f"Topic 已有 SQL 记录，跳过生成: Record ID {record.id}")
+
+        if not task.deploy:
+            return record.id, None
+        job = worker.dao.get_latest_aliyun_flink_job_by_record(record.id)
+        result = worker.resume(job.id) if job else worker.deploy_record(record)
+        return result['sql_record_id'], result['aliyun_job_id']
+
+    def __del__(self):
+        if hasattr(self, 'dao'):
+            self.dao.close()
+
+
+class BackfillService:
+    """历史数据回填：不经过 Flink 的 JDBC Sink，按分区组在多个进程中读取 Kafka，以 COPY 批量写入 Sink 表
+
+    回填范围的边界是开始时每个分区的 end offset。回填完成后保存从边界 offset 启动（specific-offsets）的
+    新版本 SQL 记录，部署后作业从边界继续消费，与回填的数据既不遗漏也不重叠。
+    """
+
+    # 作业仍在消费时回填会与作业重复写入
+    ACTIVE_JOB_STATUSES = ('STARTING', 'RUNNING')
+
+    def __init__(self, config_path: str = "config.yaml", backfill_config: Optional[BackfillConfig] = None):
+        """
+        Args:
+            backfill_config: 覆盖配置文件中的 backfill 配置
+        """
+        self.service = AliyunFlinkService(config_path)
+        self.backfill_config = backfill_config or self.service.config_manager.get_backfill_config()
+
+    def run(self, topic_name: str, sink_table: Optional[str] = None, since: Optional[datetime] = None,
+            deploy: bool = False, deployment_target: Optional[DeploymentTargetConfig] = None) -> BackfillResult:
+        """回填 Topic 的历史数据并保存以边界 offset 启动的新版本 SQL 记录
+
+        Args:
+            topic_name: Kafka Topic 名称
+            sink_table: Hologres 表名，默认为 Topic 最新 SQL 记录的 Sink 表
+            since: 只回填该时间之后写入的消息，默认从最早的 offset 开始
+            deploy: 回填完成后部署新版本记录
+            deployment_target: 部署目标（可选），覆盖 aliyun_flink.deployment_target
+
+        Raises:
+            ValueError: 非 JSON 格式的 Topic、没有生成记录、表不存在或 Sink 表已有运行中的作业
+            RuntimeError: 回填进程失败
+        """
+        dao = self.service.dao
+        topic_config = self.service.generator._get_topic_config(topic_name)
+        message_format = self.service.generator._message_format(topic_config)
+        if not message_format.json_semantics:
+            raise ValueError(f"回填按 JSON format 的语义转换消息，暂不支持 {message_format.name} 格式的 Topic")
+        if sink_table:
+            previous = dao.get_latest_flink_sql_record(sink_table)
+        else:
+            previous = dao.get_latest_flink_sql_record_by_topic(topic_config.id)
+        if not previous or not previous.inferred_schema or previous.topic_id != topic_config.id:
+            raise ValueError(f"未找到 Topic 的生成记录: {topic_name}，请先使用 generate 命令建表")
+        sink_table = previous.sink_table_name
+        if not dao.table_exists(sink_table):
+            raise ValueError(f"表不存在: {sink_table}，请先使用 generate 命令")
+        active = [job for job in dao.list_aliyun_flink_jobs()
+                  if job.sink_table_name == sink_table and job.status in self.ACTIVE_JOB_STATUSES]
+        if active:
+            raise ValueError(f"Sink 表已有运行中的作业: {active[0].job_id}，回填会与作业重复写入，请先停止作业")
+
+        # 1. 确定每个分区的回填范围，边界为当前的 end offset
+        kafka_client = KafkaClient(topic_config.kafka_brokers, topic_name, message_format)
+        ranges = kafka_client.partition_ranges(int(since.timestamp() * 1000) if since else None)
+        logger.info(f"回填 {topic_name} -> {sink_table}: {len(ranges)} 个分区，"
+                     f"共 {sum(end - start for start, end in ranges.values())} 条消息")
+
+        # 2. 按分区组并行回填
+        started = time.monotonic()
+        partitions = self._backfill(topic_config, previous, ranges)
+        result = BackfillResult(
+            topic_name=topic_name,
+            sink_table_name=sink_table,
+            partitions=partitions,
+            elapsed_seconds=round(time.monotonic() - started, 1)
+        )
+        logger.info(f"回填完成: 读取 {result.messages} 条，写入 {result.rows} 行，耗时 {result.elapsed_seconds} 秒")
+
+        # 3. 新版本 SQL 从边界 offset 启动
+        record = self.service.generator.start_from_offsets(
+            previous, {partition: end for partition, (_, end) in ranges.items()}
+        )
+        result.sql_record_id = record.id
+        if deploy:
+            result.aliyun_job_id = self.service.deploy_record(record, deployment_target)['aliyun_job_id']
+        return result
+
+    def _backfill(self, topic_config: KafkaTopicConfig, record: FlinkSQLRecord,
+                  ranges: Dict[int, Tuple[int, int]]) -> List[PartitionBackfill]:
+        """每个分区组一个进程，各自使用独立的 consumer 与数据库连接"""
+        config = self.backfill_config
+        hologres_config = self.service.hologres_config
+        pending = [partition for partition, (start, end) in ranges.items() if start < end]
+        groups = split_partitions(pending, config.processes)
+        results = [
+            PartitionBackfill(partition=partition, start_offset=start, end_offset=end)
+            for partition, (start, end) in ranges.items() if start >= end
+        ]
+        group_ranges = [{partition: ranges[partition] for partition in group} for group in groups]
+
+        if len(group_ranges) == 1:
+            results.extend(backfill_partitions(hologres_config, topic_config, record, group_ranges[0], config))
+        elif group_ranges:
+            logger.info(f"启动 {len(group_ranges)} 个回填进程")
+            # spawn 启动的子进程不继承父进程的数据库连接与日志线程
+            with ProcessPoolExecutor(max_workers=len(group_ranges),
+                                     mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = [
+                    executor.submit(backfill_partitions, hologres_config, topic_config, record, group, config)
+                    for group in group_ranges
+                ]
+                for future in futures:
+                    try:
+                        results.extend(future.result())
+                    except Exception as e:
+                        raise RuntimeError(f"回填进程失败: {e}")
+        return sorted(results, key=lambda result: result.partition)
@@ -1,3 +1,7 @@
+import hashlib
+import json
+import re
+from typing import Any, Dict, List, Optional
 from .models import InferredSchema
 from .config import HologresConfig
 
@@ -12,33 +16,193 @@ class FlinkSQLGenerator:
         'TIMESTAMPTZ': 'TIMESTAMP(3)'
     }
 
+    # 允许通过 SET 语句配置的作业参数
+    SUPPORTED_SETTINGS = {
+        'table.exec.mini-batch.enabled',
+        'table.exec.mini-batch.allow-latency',
+        'table.exec.mini-batch.size',
+        'table.optimizer.agg-phase-strategy',
+        'pipeline.object-reuse',
+        'execution.checkpointing.interval',
+        'execution.checkpointing.min-pause',
+        'execution.checkpointing.timeout',
+        'execution.checkpointing.mode',
+        'table.exec.state.ttl',
+        'table.exec.sink.upsert-materialize',
+        'table.exec.sink.not-null-enforcer',
+        'table.exec.resource.default-parallelism',
+    }
+
+    # Hologres Sink 缓冲参数默认值，可被作业调优配置覆盖
+    DEFAULT_SINK_OPTIONS = {
+        'connectionSize': '3',
+        'jdbcWriteBatchSize': '256',
+        'jdbcWriteBatchByteSize': '2097152',
+        'jdbcWriteFlushInterval': '10000',
+    }
+
+    # Flink Duration 格式，如 30s、500 ms、5 min
+    DURATION_PATTERN = re.compile(r'^\d+\s*(ms|s|min|h|d)$')
+
+    def __init__(self, settings: Optional[dict] = None, sink_options: Optional[dict] = None,
+                 dedup_window: Optional[str] = None, startup_offsets: Optional[Dict[Any, int]] = None):
+        """
+        Args:
+            settings: 作业级 SET 参数，key 必须在 SUPPORTED_SETTINGS 中
+            sink_options: Sink 缓冲参数，key 必须在 DEFAULT_SINK_OPTIONS 中
+            dedup_window: 去重窗口（Flink Duration 格式），为空时不生成去重阶段
+            startup_offsets: 分区到起始 offset 的映射，为空时从 earliest-offset 开始消费；
+                回填历史数据后以回填的边界 offset 启动
+
+        Raises:
+            ValueError: 存在不支持的配置项或去重窗口格式错误
+        """
+        self.settings = self._validate_options(settings, self.SUPPORTED_SETTINGS, "Flink 作业参数")
+        self.sink_options = {
+            **self.DEFAULT_SINK_OPTIONS,
+            **self._validate_options(sink_options, self.DEFAULT_SINK_OPTIONS.keys(), "Sink 缓冲参数")
+        }
+
+        self.dedup_window = dedup_window
+        if dedup_window:
+            if not self.DURATION_PATTERN.match(dedup_window):
+                raise ValueError(f"去重窗口格式错误: {dedup_window}，示例: 30s、5 min")
+            # 去重状态按窗口过期；mini-batch 保证每个窗口内同一 key 只输出最新一行
+            self.settings.setdefault('table.exec.state.ttl', dedup_window)
+            self.settings.setdefault('table.exec.mini-batch.enabled', 'true')
+            self.settings.setdefault('table.exec.mini-batch.allow-latency', dedup_window)
+            self.settings.setdefault('table.exec.mini-batch.size', '5000')
+
+        # 保存为 JSON 后 key 变为字符串，统一按分区号排序
+        self.startup_offsets = {
+            int(partition): int(offset) for partition, offset in sorted(
+                (startup_offsets or {}).items(), key=lambda item: int(item[0])
+            )
+        }
+
+    @staticmethod
+    def _format_option_value(value: Any) -> str:
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        return str(value)
+
+    def _validate_options(self, options: Optional[dict], supported, label: str) -> dict:
+        options = options or {}
+        unknown = sorted(set(options) - set(supported))
+        if unknown:
+            raise ValueError(f"{label}不在支持列表中: {', '.join(unknown)}")
+        return {key: self._format_option_value(value) for key, value in options.items()}
+
+    def get_effective_settings(self) -> dict:
+        """返回实际生效的调优参数，用于随 SQL 记录一起保存"""
+        effective_settings = {
+            'settings': dict(self.settings),
+            'sink_options': dict(self.sink_options),
+            'dedup_window': self.dedup_window
+        }
+        # 只在指定时保存，未回填的记录哈希保持不变
+        if self.startup_offsets:
+            effective_settings['startup_offsets'] = {
+                str(partition): offset for partition, offset in self.startup_offsets.items()
+            }
+        return effective_settings
+
+    def sink_schema(self, schema: InferredSchema, dedup_keys: Optional[List[str]] = None) -> InferredSchema:
+        """Sink 使用的 Schema：启用去重但没有主键时，以去重键（默认 key_col）作为主键
+
+        去重视图按 key 保留最新一行，输出的是更新流。Sink 需要声明主键并以 insertOrReplace 写入，
+        否则 insertOrIgnore 会保留每个 key 的第一行，或因 Sink 不接受更新而失败。
+        """
+        if not self.dedup_window or schema.primary_key:
+            return schema
+        return schema.model_copy(update={'primary_key': list(dedup_keys or ['key_col'])})
+
+    @staticmethod
+    def compute_sql_hash(full_sql: str, effective_settings: dict) -> str:
+        """计算 SQL 内容哈希：忽略空白差异，调优参数按 key 排序，内容相同的 SQL 哈希相同"""
+        normalized_sql = " ".join(full_sql.split())
+        normalized_settings = json.dumps(effective_settings, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(f"{normalized_sql}\n{normalized_settings}".encode('utf-8')).hexdigest()
+
     def generate_full_sql(
         self,
         topic_name: str,
         sink_table: str,
         schema: InferredSchema,
         kafka_brokers: str,
-        hologres_config: HologresConfig
+        hologres_config: HologresConfig,
+        dedup_keys: Optional[List[str]] = None,
+        value_format: Optional[Dict[str, str]] = None
     ) -> tuple[str, str, str, str]:
+        """生成完整 Flink SQL
 
-        source_ddl = self._generate_source_ddl(topic_name, schema, kafka_brokers)
+        Args:
+            dedup_keys: 去重使用的 Sink 列名，默认使用主键，无主键时按 key_col 去重并作为 Sink 主键；
+                仅在配置了去重窗口时生效
+            value_format: Source 的 value format 参数（MessageFormat.flink_options），默认 JSON
+
+        Returns:
+            tuple: (source_ddl, sink_ddl, insert_sql, full_sql)，去重视图附在 source_ddl 之后
+        """
+        schema = self.sink_schema(schema, dedup_keys)
+        source_ddl = self._generate_source_ddl(topic_name, schema, kafka_brokers, value_format)
+        if self.dedup_window:
+            source_ddl = f"{source_ddl}\n\n{self._generate_dedup_view(topic_name, schema, dedup_keys or schema.primary_key)}"
         sink_ddl = self._generate_sink_ddl(sink_table, schema, hologres_config)
         insert_sql = self._generate_insert_sql(topic_name, sink_table, schema)
-        full_sql = f"{source_ddl}\n\n{sink_ddl}\n\n{insert_sql}"
+        statements = [source_ddl, sink_ddl, insert_sql]
+
+        set_block = self._generate_set_block()
+        if set_block:
+            statements.insert(0, set_block)
+        full_sql = "\n\n".join(statements)
 
         return source_ddl, sink_ddl, insert_sql, full_sql
 
-    def _generate_source_ddl(self, topic_name: str, schema: InferredSchema, brokers: str) -> str:
+    def _generate_set_block(self) -> str:
+        return "\n".join(
+            f"SET '{key}' = '{value}';" for key, value in self.settings.items()
+        )
+
+    @staticmethod
+    def _escape(value: str) -> str:
+        """WITH 参数值中的单引号需要写两次"""
+        return value.replace("'", "''")
+
+    @staticmethod
+    def consumer_group(topic_name: str) -> str:
+        """生成的 Source 使用的 Kafka 消费组"""
+        return f"flink_{topic_name}"
+
+    @staticmethod
+    def _safe_topic_name(topic_name: str) -> str:
         # 将 topic 名称中的连字符和点替换为下划线，生成合法的表名
-        safe_topic_name = topic_name.replace('-', '_').replace('.', '_')
-        source_table = f"kafka_source_{safe_topic_name}"
+        return topic_name.replace('-', '_').replace('.', '_')
+
+    def _generate_source_ddl(self, topic_name: str, schema: InferredSchema, brokers: str,
+                             value_format: Optional[Dict[str, str]] = None) -> str:
+        source_table = f"kafka_source_{self._safe_topic_name(topic_name)}"
 
         fields = ["    `key_col` STRING"]
         for field in schema.fields:
             flink_type = self.TYPE_MAPPING.get(field.type, 'STRING')
             fields.append(f"    `value_{field.name}` {flink_type}")
+        if self.dedup_window:
+            fields.append("    `proc_time` AS PROCTIME()")
 
         fields_str = ",\n".join(fields)
+        format_str = "\n".join(
+            f"    '{key}' = '{self._escape(value)}',"
+            for key, value in (value_format or {'value.format': 'json'}).items()
+        )
+        if self.startup_offsets:
+            specific_offsets = ";".join(
+                f"partition:{partition},offset:{offset}" for partition, offset in self.startup_offsets.items()
+            )
+            startup_str = (f"    'scan.startup.mode' = 'specific-offsets',\n"
+                           f"    'scan.startup.specific-offsets' = '{specific_offsets}'")
+        else:
+            startup_str = "    'scan.startup.mode' = 'earliest-offset'"
 
         return f"""CREATE TEMPORARY TABLE {source_table} (
 {fields_str}
@@ -46,16 +210,37 @@ class FlinkSQLGenerator:
     'connector' = 'kafka',
     'topic' = '{topic_name}',
     'properties.bootstrap.servers' = '{brokers}',
-    'properties.group.id' = 'flink_{topic_name}',
+    'properties.group.id' = '{self.consumer_group(topic_name)}',
     'key.fields' = 'key_col',
     'key.fields-prefix' = 'key_',
     'key.format' = 'raw',
     'value.fields-include' = 'EXCEPT_KEY',
-    'value.format' = 'json',
+{format_str}
     'value.fields-prefix' = 'value_',
-    'scan.startup.mode' = 'earliest-offset'
+{startup_str}
 );"""
 
+    def _generate_dedup_view(self, topic_name: str, schema: InferredSchema, dedup_keys: List[str]) -> str:
+        """生成去重视图：按去重键保留处理时间最新的一行"""
+        safe_topic_name = self._safe_topic_name(topic_name)
+        source_table = f"kafka_source_{safe_topic_name}"
+
+        columns = ["`key_col`"] + [f"`value_{field.name}`" for field in schema.fields]
+        partition_keys = [
+            "`key_col`" if key == 'key_col' else f"`value_{key}`"
+            for key in dedup_keys
+        ]
+        columns_str = ", ".join(columns)
+
+        return f"""CREATE TEMPORARY VIEW dedup_{safe_topic_name} AS
+SELECT {columns_str}
+FROM (
+    SELECT *,
+        ROW_NUMBER() OVER (PARTITION BY {', '.join(partition_keys)} ORDER BY `proc_time` DESC) AS row_num
+    FROM {source_table}
+)
+WHERE row_num = 1;"""
+
     def _generate_sink_ddl(self, sink_table: str, schema: InferredSchema, config: HologresConfig) -> str:
         sink_table_name = f"hologres_sink_{sink_table}"
 
@@ -63,8 +248,21 @@ class FlinkSQLGenerator:
         for field in schema.fields:
             flink_type = self.TYPE_MAPPING.get(field.type, 'STRING')
             fields.append(f"    `{field.name}` {flink_type}")
+        partition = schema.partition
+        if partition:
+            fields.append(f"    `{partition.column}` STRING")
+        if schema.primary_key:
+            pk_names = schema.primary_key + [partition.column] if partition else schema.primary_key
+            pk_columns = ", ".join(f"`{name}`" for name in pk_names)
+            fields.append(f"    PRIMARY KEY ({pk_columns}) NOT ENFORCED")
 
         fields_str = ",\n".join(fields)
+        # 没有安全主键时退化为 append-only 写入
+        mutate_type = 'insertOrReplace' if schema.primary_key else 'insertOrIgnore'
+        # 物理分区表需要路由到子表，缺失的子表由 connector 兜底创建
+        partition_options = ""
+        if partition and partition.mode == 'physical':
+            partition_options = "\n    'partitionrouter' = 'true',\n    'createparttable' = 'true',"
 
         return f"""CREATE TEMPORARY TABLE {sink_table_name} (
 {fields_str}
@@ -76,19 +274,30 @@ class FlinkSQLGenerator:
     'password' = '{config.password}',
     'endpoint' = '{config.vpc_host}:{config.port}',
     'ignoredelete' = 'true',
-    'mutatetype' = 'insertOrReplace',
+    'mutatetype' = '{mutate_type}',{partition_options}
     'sdkMode' = 'jdbc',
-    'connectionSize' = '3',
-    'jdbcWriteBatchSize' = '256',
-    'jdbcWriteBatchByteSize' = '2097152',
-    'jdbcWriteFlushInterval' = '10000',
+    'connectionSize' = '{self.sink_options['connectionSize']}',
+    'jdbcWriteBatchSize' = '{self.sink_options['jdbcWriteBatchSize']}',
+    'jdbcWriteBatchByteSize' = '{self.sink_options['jdbcWriteBatchByteSize']}',
+    'jdbcWriteFlushInterval' = '{self.sink_options['jdbcWriteFlushInterval']}',
     'connectionPoolName' = 'flink-{sink_table}'
 );"""
 
+    @staticmethod
+    def _partition_expression(schema: InferredSchema) -> str:
+        """分区列表达式：事件时间为空时退回到 etl_time"""
+        partition = schema.partition
+        etl_time = "cast(now() as timestamp)"
+        if partition.source_field:
+            time_expr = f"COALESCE(cast(`value_{partition.source_field}` as timestamp), {etl_time})"
+        else:
+            time_expr = etl_time
+        return f"DATE_FORMAT({time_expr}, 'yyyyMMdd') as `{partition.column}`"
+
     def _generate_insert_sql(self, topic_name: str, sink_table: str, schema: InferredSchema) -> str:
-        # 将 topic 名称中的连字符和点替换为下划线，生成合法的表名
-        safe_topic_name = topic_name.replace('-', '_').replace('.', '_')
-        source_table = f"kafka_source_{safe_topic_name}"
+        safe_topic_name = self._safe_topic_name(topic_name)
+        # 启用去重时从去重视图读取
+        source_table = f"dedup_{safe_topic_name}" if self.dedup_window else f"kafka_source_{safe_topic_name}"
         sink_table_name = f"hologres_sink_{sink_table}"
 
         select_fields = ["cast(now() as timestamp) as etl_time", "`key_col`"]
@@ -109,8 +318,16 @@ class FlinkSQLGenerator:
                 # TEXT, BOOLEAN 等直接映射
                 select_fields.append(f"{source_field} as `{target_field}`")
 
+        if schema.partition:
+            select_fields.append(self._partition_expression(schema))
+
         fields_str = "\n    ,".join(select_fields)
+        # 主键列为空的数据无法写入 Hologres，提前过滤
+        where_str = "\nWHERE " + " AND ".join(
+            "`key_col` IS NOT NULL" if name == 'key_col' else f"`value_{name}` IS NOT NULL"
+            for name in schema.primary_key
+        ) if schema.primary_key else ""
 
         return f"""INSERT INTO {sink_table_name}
 SELECT {fields_str}
-FROM {source_table};"""
+FROM {source_table}{where_str};"""
@@ -1,10 +1,21 @@
-from typing import List, Dict, Any
+import json
+from typing import List, Dict, Any, Optional
 from collections import defaultdict
 from datetime import datetime
 from .models import FieldSchema, InferredSchema
 
 
 class TypeInferencer:
+    # 可作为主键的字段类型
+    PRIMARY_KEY_TYPES = {'BIGINT', 'TEXT'}
+    # 推断 value 字段主键所需的最少（去重后）样本数，样本过少时唯一性没有意义
+    MIN_PRIMARY_KEY_SAMPLES = 10
+    # 常见的事件时间字段名，按优先级排列
+    EVENT_TIME_NAMES = [
+        'event_time', 'event_ts', 'ts', 'created', 'created_at', 'create_time',
+        'order_date', 'modified', 'modified_at', 'update_time', 'updated_at'
+    ]
+
     def infer_schema(self, messages: List[Dict[str, Any]]) -> InferredSchema:
         # 1. 收集所有字段的值
         field_values = defaultdict(list)
@@ -33,6 +44,65 @@ class TypeInferencer:
             sample_data_count=len(messages)
         )
 
+    def infer_primary_key(self, messages: List[Dict[str, Any]], schema: InferredSchema,
+                          keys: Optional[List[Optional[str]]] = None) -> List[str]:
+        """推断主键列
+
+        候选列需在样本中非空且唯一，并且类型稳定。优先使用 Kafka key（key_col），
+        其次按字段顺序选择第一个满足条件、且名称像 ID 的 value 字段（id、*_id、*_key），
+        status、name 等低基数字段即使在样本中恰好唯一也不会被选中。完全相同的重复消息视为重发，
+        不影响唯一性判断。
+
+        Returns:
+            List[str]: 主键列名，没有安全的主键时返回空列表
+        """
+        # 去掉完全相同的重发消息
+        records = []
+        seen = set()
+        for i, msg in enumerate(messages):
+            key = keys[i] if keys and i < len(keys) else None
+            fingerprint = (key, json.dumps(msg, sort_keys=True, default=str))
+            if fingerprint not in seen:
+                seen.add(fingerprint)
+                records.append((key, msg))
+
+        if keys and len(keys) == len(messages) and self._is_unique_key([k for k, _ in records]):
+            return ['key_col']
+
+        if len(records) < self.MIN_PRIMARY_KEY_SAMPLES:
+            return []
+
+        for field in schema.fields:
+            if field.type not in self.PRIMARY_KEY_TYPES or not self._is_id_like(field.name):
+                continue
+            values = [msg.get(field.name) for _, msg in records]
+            if self._is_unique_key(values):
+                return [field.name]
+        return []
+
+    @staticmethod
+    def _is_id_like(name: str) -> bool:
+        """字段名是否像 ID：id、*_id、*_key（不区分大小写）"""
+        name = name.lower()
+        return name == 'id' or name.endswith(('_id', '_key'))
+
+    @staticmethod
+    def _is_unique_key(values: List[Any]) -> bool:
+        """检查候选主键值：非空、类型一致且唯一"""
+        if not values or any(v is None or v == '' for v in values):
+            return False
+        if {type(v) for v in values} not in ({str}, {int}):
+            return False
+        return len(set(values)) == len(values)
+
+    def infer_event_time_field(self, schema: InferredSchema) -> Optional[str]:
+        """推断事件时间字段：优先匹配常见字段名，否则取第一个 TIMESTAMPTZ 字段"""
+        timestamp_fields = [f.name for f in schema.fields if f.type == 'TIMESTAMPTZ']
+        for name in self.EVENT_TIME_NAMES:
+            if name in timestamp_fields:
+                return name
+        return timestamp_fields[0] if timestamp_fields else None
+
     def _infer_field_type(self, values: List[Any]) -> str:
         """推断字段类型
 
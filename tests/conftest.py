@@ -0,0 +1,14 @@
+import pytest
+from unittest.mock import Mock
+
+
+@pytest.fixture
+def bare_service():
+    """不经过 __init__ 构建服务（不读取配置、不连接数据库），DAO 为 mock，工作线程使用给定的服务"""
+    def build(cls, worker):
+        service = cls.__new__(cls)
+        service.dao = Mock()
+        service._services = Mock()
+        service._services.get.return_value = worker
+        return service
+    return build
@@ -0,0 +1,104 @@
+import pytest
+from datetime import datetime, timedelta
+from kafka_flink_tool.autoscaler import Autoscaler
+from kafka_flink_tool.config import AutoscaleConfig
+from kafka_flink_tool.models import PartitionLag, TopicLag, TopicProfile
+
+
+class TestAutoscaler:
+    """自动扩缩容决策测试"""
+
+    @pytest.fixture
+    def autoscaler(self):
+        """测试策略"""
+        return Autoscaler(AutoscaleConfig(
+            min_parallelism=1,
+            max_parallelism=16,
+            target_drain_seconds=100,
+            target_utilization=1.0,
+            rate_per_parallelism=100,
+            scale_up_lag=1000,
+            scale_down_ratio=0.7,
+            cooldown_seconds=600
+        ))
+
+    @staticmethod
+    def make_lag(total_lag: int, input_rate: float, catch_up_rate: float, partitions: int = 8) -> TopicLag:
+        return TopicLag(
+            topic='orders',
+            group='flink_orders',
+            partitions=[PartitionLag(partition=i, end_offset=0) for i in range(partitions)],
+            total_lag=total_lag,
+            input_rate=input_rate,
+            catch_up_rate=catch_up_rate
+        )
+
+    def test_scale_up(self, autoscaler):
+        """测试积压时按所需吞吐扩容"""
+        # 每个并行度处理 100/s，需要 200/s 写入 + 20000/100s 积压 = 400/s
+        decision = autoscaler.decide(1, self.make_lag(20000, 200, -100), current_parallelism=1)
+
+        assert decision.action == 'scale_up'
+        assert decision.target_parallelism == 4
+
+    def test_bounded_by_partitions(self, autoscaler):
+        """测试目标并行度不超过分区数"""
+        decision = autoscaler.decide(1, self.make_lag(1000000, 200, -100, partitions=3), current_parallelism=1)
+
+        assert decision.target_parallelism == 3
+
+    def test_scale_down_hysteresis(self, autoscaler):
+        """测试目标并行度略低于当前时不缩容"""
+        # 未积压时单并行度按 100/s 估算：600/s -> 6，高于 8 * 0.7
+        hold = autoscaler.decide(1, self.make_lag(0, 600, 0), current_parallelism=8)
+        # 200/s -> 2
+        scale_down = autoscaler.decide(1, self.make_lag(0, 200, 0), current_parallelism=8)
+
+        assert hold.action == 'hold'
+        assert scale_down.action == 'scale_down'
+        assert scale_down.target_parallelism == 2
+
+    def test_cooldown(self, autoscaler):
+        """测试冷却时间内不重复扩缩容"""
+        now = datetime(2024, 1, 1, 12, 0)
+
+        decision = autoscaler.decide(
+            1, self.make_lag(20000, 200, -100), current_parallelism=1,
+            last_scaled_at=now - timedelta(minutes=5), now=now
+        )
+
+        assert decision.action == 'hold'
+        assert "冷却中" in decision.reason
+
+    def test_budget(self, autoscaler):
+        """测试扩容不超过剩余资源预算"""
+        decision = autoscaler.decide(1, self.make_lag(20000, 200, -100), current_parallelism=1, budget_remaining=1)
+        exhausted = autoscaler.decide(1, self.make_lag(20000, 200, -100), current_parallelism=1, budget_remaining=0)
+
+        assert decision.target_parallelism == 2
+        assert exhausted.action == 'hold'
+
+    def test_missing_rates(self, autoscaler):
+        """测试缺少速率数据时保持不变"""
+        lag = self.make_lag(20000, 200, -100)
+        lag.input_rate = None
+
+        decision = autoscaler.decide(1, lag, current_parallelism=1)
+
+        assert decision.action == 'hold'
+
+    def test_initial_parallelism_from_profile(self, autoscaler):
+        """测试按 Topic 画像估算初始并行度，并受分区数限制"""
+        assert autoscaler.initial_parallelism(
+            TopicProfile(topic_name='orders', partition_count=8, messages_per_second=350)
+        ) == 4
+        assert autoscaler.initial_parallelism(
+            TopicProfile(topic_name='orders', partition_count=2, messages_per_second=350)
+        ) == 2
+        assert Autoscaler(AutoscaleConfig()).initial_parallelism(
+            TopicProfile(topic_name='orders', messages_per_second=350)
+        ) is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
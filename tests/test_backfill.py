@@ -0,0 +1,220 @@
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import Mock, patch
+from kafka_flink_tool.backfill import BackfillRowBuilder, PartitionLoader, copy_text, split_partitions
+from kafka_flink_tool.config import BackfillConfig, FlinkSQLProfile, HologresConfig
+from kafka_flink_tool.formats import CsvFormat, JsonFormat
+from kafka_flink_tool.kafka_client import KafkaClient
+from kafka_flink_tool.models import (
+    AliyunFlinkJob, FieldSchema, FlinkSQLRecord, InferredSchema, KafkaTopicConfig, PartitionBackfill, PartitionSpec
+)
+from kafka_flink_tool.service import BackfillService, GeneratorService
+from kafka_flink_tool.sql_generator import FlinkSQLGenerator
+
+ETL_TIME = datetime(2024, 5, 1, 8, 0, 0)
+
+
+def _record(primary_key=None, partition=None) -> FlinkSQLRecord:
+    schema = InferredSchema(
+        fields=[
+            FieldSchema(name="id", type="BIGINT"),
+            FieldSchema(name="amount", type="DOUBLE PRECISION"),
+            FieldSchema(name="created", type="TIMESTAMPTZ"),
+            FieldSchema(name="tags", type="TEXT")
+        ],
+        sample_data_count=4,
+        primary_key=primary_key or [],
+        partition=partition
+    )
+    config = HologresConfig(host="h", vpc_host="h", port=80, database="db", user="u", password="p")
+    source_ddl, sink_ddl, insert_sql, full_sql = FlinkSQLGenerator().generate_full_sql(
+        "orders", "stg_orders", schema, "broker:9092", config
+    )
+    return FlinkSQLRecord(
+        id=1, topic_id=7, topic_name="orders", sink_table_name="stg_orders", source_ddl=source_ddl,
+        sink_ddl=sink_ddl, insert_sql=insert_sql, full_sql=full_sql,
+        inferred_schema=schema.model_dump(), flink_settings={'profile': None, 'dedup_window': None}
+    )
+
+
+class TestBackfill:
+    """历史数据回填测试"""
+
+    def test_build_row_applies_insert_casts(self):
+        """测试行转换与 INSERT 的投影、CAST 一致，主键为空或无法解码的消息被过滤"""
+        builder = BackfillRowBuilder(_record(primary_key=["id"]))
+
+        row = builder.build("k1", {
+            "id": "42", "amount": 3.14159, "created": "2024-05-01 12:30:45.123456", "tags": ["a", "b"]
+        }, ETL_TIME)
+
+        assert builder.columns == ['etl_time', 'key_col', 'id', 'amount', 'created', 'tags']
+        assert builder.upsert
+        assert row == (ETL_TIME, "k1", 42, Decimal("3.14"), datetime(2024, 5, 1, 12, 30, 45, 123000), '["a","b"]')
+        assert builder.build("k2", {"amount": 1.0}, ETL_TIME) is None
+        assert builder.build("k3", None, ETL_TIME) is None
+
+    def test_partition_column_uses_event_time(self):
+        """测试分区列按事件时间计算，为空时退回到 etl_time，物理分区写入子表"""
+        builder = BackfillRowBuilder(_record(partition=PartitionSpec(mode="physical", source_field="created")))
+
+        row = builder.build(None, {"id": 1, "created": "2024-04-30 23:59:59"}, ETL_TIME)
+        fallback = builder.build(None, {"id": 2}, ETL_TIME)
+
+        assert builder.columns[-1] == 'ds'
+        assert row[-1] == '20240430'
+        assert fallback[-1] == '20240501'
+        assert builder.target_table(row) == 'stg_orders_20240430'
+        assert not builder.upsert
+
+    def test_copy_text_escapes_values(self):
+        """测试 COPY text 格式的 NULL、布尔、时间与特殊字符"""
+        line = copy_text((ETL_TIME, None, True, Decimal("1.50"), "a\tb\nc\\d"))
+
+        assert line == "2024-05-01 08:00:00.000\t\\N\tt\t1.50\ta\\tb\\nc\\\\d\n"
+
+    def test_loader_flushes_by_buffer_size(self):
+        """测试缓冲达到 buffer_bytes 后写入一次，结束时写入剩余数据，并按分区统计"""
+        dao = Mock()
+        copied = []
+        dao.copy_rows.side_effect = lambda table, columns, data, upsert: copied.append((table, data.read(), upsert))
+        loader = PartitionLoader(dao, BackfillRowBuilder(_record(primary_key=["id"])), buffer_bytes=1)
+        batches = [
+            [(0, 10, "a", {"id": 1}), (1, 20, "b", {"id": None})],
+            [(0, 11, "c", {"id": 2}), (0, 12, "d", None)],
+        ]
+
+        results = loader.load(batches, {0: (10, 13), 1: (20, 21)})
+
+        assert len(copied) == 2
+        assert all(table == 'stg_orders' and upsert for table, _, upsert in copied)
+        assert [line.split("\t")[1:3] for _, data, _ in copied for line in data.splitlines()] == [
+            ["a", "1"], ["c", "2"]
+        ]
+        assert results == [
+            PartitionBackfill(partition=0, start_offset=10, end_offset=13, messages=3, rows=2, skipped=1),
+            PartitionBackfill(partition=1, start_offset=20, end_offset=21, messages=1, rows=0, skipped=1),
+        ]
+
+    def test_loader_cast_failure_reports_offset(self):
+        """测试 Flink 会抛出异常的消息中止回填，并指出分区与 offset"""
+        loader = PartitionLoader(Mock(), BackfillRowBuilder(_record()), buffer_bytes=1024)
+
+        with pytest.raises(RuntimeError, match="分区 3 offset 99: 列 id 转换失败"):
+            loader.load([[(3, 99, None, {"id": "abc"})]], {3: (99, 100)})
+
+    def test_split_partitions(self):
+        """测试分区按轮询分组，组数不超过分区数"""
+        assert split_partitions([3, 0, 2, 1, 4], 2) == [[0, 2, 4], [1, 3]]
+        assert split_partitions([0, 1], 8) == [[0], [1]]
+        assert split_partitions([], 4) == []
+
+    def test_read_partitions_fails_when_start_deleted(self):
+        """测试起始 offset 已被删除时报错，不跳到最新位置把分区当作已读完"""
+        from kafka.errors import OffsetOutOfRangeError
+
+        with patch('kafka.KafkaConsumer') as consumer_class:
+            consumer = consumer_class.return_value
+            consumer.poll.side_effect = OffsetOutOfRangeError({})
+
+            with pytest.raises(RuntimeError, match="保留策略删除"):
+                list(KafkaClient('kafka:9092', 'orders').read_partitions({0: (10, 100)}))
+
+        assert consumer_class.call_args.kwargs['auto_offset_reset'] == 'none'
+        consumer.close.assert_called_once()
+
+    def test_read_partitions_idle_timeout(self):
+        """测试 broker 长时间不返回消息时报错，不无限轮询"""
+        with patch('kafka.KafkaConsumer') as consumer_class:
+            consumer = consumer_class.return_value
+            consumer.poll.return_value = {}
+            consumer.position.return_value = 10
+
+            with pytest.raises(RuntimeError, match="未读完的分区: 0@10"):
+                list(KafkaClient('kafka:9092', 'orders').read_partitions({0: (10, 100)}, idle_timeout=0))
+
+    @pytest.fixture
+    def service(self):
+        """回填服务（DAO、生成与部署使用 mock）"""
+        service = BackfillService.__new__(BackfillService)
+        service.backfill_config = BackfillConfig(processes=1)
+        service.service = Mock()
+        service.service.generator._get_topic_config.return_value = KafkaTopicConfig(
+            id=7, topic_name='orders', kafka_brokers='kafka:9092', data_format='json', is_active=True
+        )
+        service.service.generator._message_format.return_value = JsonFormat()
+        service.service.dao.get_latest_flink_sql_record_by_topic.return_value = _record(primary_key=["id"])
+        service.service.dao.table_exists.return_value = True
+        service.service.dao.list_aliyun_flink_jobs.return_value = []
+        service.service.generator.start_from_offsets.return_value.id = 2
+        service.service.deploy_record.return_value = {'aliyun_job_id': 5, 'sql_record_id': 2}
+        return service
+
+    def test_run_starts_new_record_at_boundary(self, service):
+        """测试回填开始时的 end offset 作为新版本 SQL 的起始 offset，空分区不启动进程"""
+        with patch('kafka_flink_tool.service.KafkaClient') as kafka_client, \
+                patch('kafka_flink_tool.service.backfill_partitions') as backfill_partitions:
+            kafka_client.return_value.partition_ranges.return_value = {0: (0, 100), 1: (50, 50)}
+            backfill_partitions.return_value = [
+                PartitionBackfill(partition=0, start_offset=0, end_offset=100, messages=100, rows=98, skipped=2)
+            ]
+
+            result = service.run('orders', deploy=True)
+
+        assert backfill_partitions.call_args.args[3] == {0: (0, 100)}
+        service.service.generator.start_from_offsets.assert_called_once()
+        assert service.service.generator.start_from_offsets.call_args.args[1] == {0: 100, 1: 50}
+        service.service.deploy_record.assert_called_once()
+        assert (result.sql_record_id, result.aliyun_job_id) == (2, 5)
+        assert result.rows == 98
+        assert [p.partition for p in result.partitions] == [0, 1]
+
+    def test_startup_offsets_only_on_backfilled_record(self):
+        """测试起始 offset 只写入回填记录，之后重新生成的版本从 earliest-offset 开始"""
+        generator = GeneratorService.__new__(GeneratorService)
+        generator.config_manager = Mock()
+        generator.config_manager.get_flink_sql_profile.return_value = (None, FlinkSQLProfile())
+        generator.hologres_config = HologresConfig(host="h", vpc_host="h", port=80, database="db", user="u",
+                                                   password="p")
+        generator.dao = Mock()
+        generator._owns_dao = False
+        topic_config = KafkaTopicConfig(id=7, topic_name='orders', kafka_brokers='kafka:9092', data_format='json',
+                                        is_active=True)
+        generator.dao.get_topic_configs_by_ids.return_value = {7: topic_config}
+        generator.dao.get_max_versions.return_value = {'stg_orders': 1}
+        generator.dao.save_flink_sql_record.return_value = 2
+
+        backfilled = generator.start_from_offsets(_record(), {0: 100})
+        assert backfilled.flink_settings['startup_offsets'] == {'0': 100}
+        assert "'scan.startup.mode' = 'specific-offsets'" in backfilled.source_ddl
+
+        backfilled.id = 2
+        generator.dao.list_flink_sql_records.return_value = [backfilled]
+        generator.dao.get_max_versions.return_value = {'stg_orders': 2}
+        generator.dao.save_flink_sql_records.return_value = [3]
+        generator.regenerate([2])
+
+        regenerated = generator.dao.save_flink_sql_records.call_args.args[0][0]
+        assert 'startup_offsets' not in regenerated.flink_settings
+        assert "'scan.startup.mode' = 'earliest-offset'" in regenerated.source_ddl
+
+    def test_run_refuses_non_json_topic(self, service):
+        """测试回填只支持 JSON 格式的 Topic"""
+        service.service.generator._message_format.return_value = CsvFormat(['id', 'amount'])
+
+        with pytest.raises(ValueError, match="不支持 csv 格式"):
+            service.run('orders')
+
+    def test_run_refuses_when_job_running(self, service):
+        """测试 Sink 表已有运行中的作业时拒绝回填，避免与作业重复写入"""
+        service.service.dao.list_aliyun_flink_jobs.return_value = [
+            AliyunFlinkJob(sql_record_id=1, job_id='job-1', status='RUNNING', sink_table_name='stg_orders')
+        ]
+
+        with pytest.raises(ValueError, match="运行中的作业"):
+            service.run('orders')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
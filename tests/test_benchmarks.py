@@ -0,0 +1,41 @@
+import json
+import pytest
+from benchmarks.datagen import generate_messages, generate_payloads
+from benchmarks.run import CASES, compare, run_suite
+
+
+class TestBenchmarks:
+    """性能基准套件测试，只运行最小规模，保证基准代码可用"""
+
+    def test_datagen_is_deterministic(self):
+        """测试相同参数生成相同数据，dirty 形态包含无法解析的消息"""
+        assert generate_messages(20, 10, 'nested') == generate_messages(20, 10, 'nested')
+
+        payloads = generate_payloads(1000, 5, 'dirty')
+        invalid = 0
+        for payload in payloads:
+            try:
+                json.loads(payload.decode('utf-8'))
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                invalid += 1
+        assert 0 < invalid < 50
+
+    def test_run_smallest_suite(self):
+        """测试所有用例在最小规模下可运行"""
+        results = run_suite(message_counts=(10,), field_counts=(10,), min_time=0)
+
+        assert len(results) == len(CASES)
+        assert all(result['min_s'] > 0 for result in results.values())
+
+    def test_compare_flags_regressions(self):
+        """测试变慢超过阈值的用例被标记，噪声范围内的差异被忽略"""
+        baseline = {'a': {'min_s': 0.010}, 'b': {'min_s': 0.010}, 'c': {'min_s': 0.00001}}
+        current = {'a': {'min_s': 0.013}, 'b': {'min_s': 0.011}, 'c': {'min_s': 0.00005}, 'd': {'min_s': 1.0}}
+
+        regressions = compare(baseline, current, threshold=0.2)
+
+        assert [key for key, *_ in regressions] == ['a']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,78 @@
+import pytest
+from decimal import Decimal
+from kafka_flink_tool.cast_validator import CastError, CastValidator
+from kafka_flink_tool.config import HologresConfig
+from kafka_flink_tool.models import FieldSchema, InferredSchema
+from kafka_flink_tool.sql_generator import FlinkSQLGenerator
+
+
+class TestCastValidator:
+    """类型转换校验测试"""
+
+    @pytest.fixture
+    def validator(self):
+        """基于生成的 Source DDL 与 INSERT 的校验器"""
+        schema = InferredSchema(
+            fields=[
+                FieldSchema(name="id", type="BIGINT"),
+                FieldSchema(name="amount", type="DOUBLE PRECISION"),
+                FieldSchema(name="created", type="TIMESTAMPTZ"),
+                FieldSchema(name="tags", type="TEXT")
+            ],
+            sample_data_count=4,
+            primary_key=["id"]
+        )
+        config = HologresConfig(host="h", vpc_host="h", port=80, database="db", user="u", password="p")
+        source_ddl, _, insert_sql, _ = FlinkSQLGenerator().generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", config
+        )
+        return CastValidator(source_ddl, insert_sql)
+
+    def test_parse_generated_sql(self, validator):
+        """测试从生成的 SQL 中解析投影与主键过滤"""
+        assert [(f, t, c) for f, t, c, _ in validator.projections] == [
+            ("id", "bigint", "id"), ("amount", "decimal(20,2)", "amount"),
+            ("created", "timestamp", "created"), ("tags", None, "tags")
+        ]
+        assert validator.source_types["created"] == "TIMESTAMP(3)"
+        assert validator.primary_key == ["id"]
+
+    def test_report_failures_and_nulls(self, validator):
+        """测试统计每列的失败、NULL 与缺失，主键为空的行被过滤"""
+        records = [
+            ("k1", {"id": 1, "amount": 1.005, "created": "2024-01-01 10:00:00", "tags": ["a"]}),
+            ("k2", {"id": "2", "amount": "3", "created": "2024-01-01T10:00:00"}),
+            ("k3", {"id": "x3", "amount": 1e19, "created": "2024-01-01 10:00:00.123"}),
+            ("k4", {"amount": 1.0}),
+        ]
+
+        report = validator.validate(records)
+        columns = {c.column: c for c in report.columns}
+
+        assert report.filtered_rows == 1
+        assert columns["id"].failures == 1
+        assert columns["amount"].nulls == 1
+        assert columns["created"].failures == 1
+        assert columns["tags"].missing == 2
+        assert report.violations(0.0, 0.0) == [
+            "id 转换失败率 33.3%", "amount 转换为 NULL 比例 33.3%", "created 转换失败率 33.3%"
+        ]
+        assert report.violations(0.5, 0.5) == []
+
+    def test_flink_semantics(self):
+        """测试与 Flink JSON format 及 CAST 一致的转换结果"""
+        assert CastValidator.deserialize(" 42 ", "BIGINT") == 42
+        assert CastValidator.deserialize(3.9, "BIGINT") == 3
+        with pytest.raises(CastError):
+            CastValidator.deserialize(True, "BIGINT")
+        assert CastValidator.deserialize("1e3", "DOUBLE") == 1000.0
+        assert CastValidator.deserialize(1, "BOOLEAN") is False
+        assert CastValidator.deserialize({"a": 1}, "STRING") == '{"a":1}'
+        with pytest.raises(CastError):
+            CastValidator.deserialize("2024-01-01", "TIMESTAMP(3)")
+        assert CastValidator.cast(2.675, "decimal(20,2)") == Decimal("2.68")
+        assert CastValidator.cast(1e18, "decimal(20,2)") is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,80 @@
+import pytest
+from datetime import date
+from kafka_flink_tool.ddl_generator import DDLGenerator
+from kafka_flink_tool.models import FieldSchema, InferredSchema, PartitionSpec
+
+
+class TestDDLGenerator:
+    """Hologres DDL 生成器测试"""
+
+    @pytest.fixture
+    def schema(self):
+        """测试 Schema"""
+        return InferredSchema(
+            fields=[
+                FieldSchema(name="id", type="BIGINT"),
+                FieldSchema(name="name", type="TEXT")
+            ],
+            sample_data_count=2
+        )
+
+    def test_ddl_without_primary_key(self, schema):
+        """测试无主键时生成普通表"""
+        ddl = DDLGenerator().generate_hologres_ddl("stg_orders", schema)
+
+        assert "PRIMARY KEY" not in ddl
+        assert "distribution_key" not in ddl
+        assert '    "id" BIGINT,' in ddl
+
+    def test_ddl_with_primary_key(self, schema):
+        """测试有主键时声明主键并对齐 distribution_key"""
+        schema.primary_key = ['id']
+
+        ddl = DDLGenerator().generate_hologres_ddl("stg_orders", schema)
+
+        assert '    "id" BIGINT NOT NULL,' in ddl
+        assert '    PRIMARY KEY ("id")\n)\nWITH (' in ddl
+        assert "distribution_key = 'id'" in ddl
+
+    def test_ddl_with_kafka_key(self, schema):
+        """测试以 Kafka key 作为主键"""
+        schema.primary_key = ['key_col']
+
+        ddl = DDLGenerator().generate_hologres_ddl("stg_orders", schema)
+
+        assert '"key_col" TEXT NOT NULL' in ddl
+        assert 'PRIMARY KEY ("key_col")' in ddl
+
+    def test_ddl_logical_partition(self, schema):
+        """测试逻辑分区表：分区列加入主键并设置 TTL"""
+        schema.primary_key = ['id']
+        schema.partition = PartitionSpec(mode='logical', ttl_seconds=86400 * 7)
+
+        ddl = DDLGenerator().generate_hologres_ddl("stg_orders", schema)
+
+        assert '    "ds" TEXT NOT NULL,' in ddl
+        assert 'PRIMARY KEY ("id", "ds")' in ddl
+        assert 'LOGICAL PARTITION BY LIST ("ds")' in ddl
+        assert "distribution_key = 'id'" in ddl
+        assert "time_to_live_in_seconds = '604800'" in ddl
+
+    def test_partition_ddls(self, schema):
+        """测试物理分区表预创建子分区"""
+        schema.partition = PartitionSpec(mode='physical')
+
+        ddls = DDLGenerator().generate_partition_ddls("stg_orders", schema, date(2025, 12, 31), 2)
+
+        assert ddls == [
+            "CREATE TABLE IF NOT EXISTS stg_orders_20251231 PARTITION OF stg_orders FOR VALUES IN ('20251231');",
+            "CREATE TABLE IF NOT EXISTS stg_orders_20260101 PARTITION OF stg_orders FOR VALUES IN ('20260101');"
+        ]
+
+    def test_partition_ddls_logical(self, schema):
+        """测试逻辑分区表无需预创建子分区"""
+        schema.partition = PartitionSpec(mode='logical')
+
+        assert DDLGenerator().generate_partition_ddls("stg_orders", schema, date(2025, 1, 1), 3) == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,210 @@
+import pytest
+from unittest.mock import Mock
+from kafka_flink_tool.service import AliyunFlinkService
+from kafka_flink_tool.autoscaler import Autoscaler
+from kafka_flink_tool.config import AutoscaleConfig, DeploymentTargetConfig
+from kafka_flink_tool.models import AliyunFlinkJob, FlinkSQLRecord, GenerationPlan, InferredSchema, TopicProfile
+
+
+class TestDeploySteps:
+    """部署流程测试"""
+
+    @pytest.fixture
+    def service(self):
+        """测试服务（DAO 与 Flink 客户端使用 mock）"""
+        service = AliyunFlinkService.__new__(AliyunFlinkService)
+        service.dao = Mock()
+        service.flink_client = Mock()
+        service.flink_client.create_deployment_draft.return_value = 'draft-1'
+        service.flink_client.deploy_deployment_draft.return_value = 'deployment-1'
+        service.flink_client.start_job_with_params.return_value = 'job-1'
+        service.dao.list_flink_sql_records.return_value = [FlinkSQLRecord(
+            id=7, topic_id=1, topic_name='orders', sink_table_name='stg_orders',
+            source_ddl='', sink_ddl='', insert_sql='', full_sql='INSERT INTO t SELECT 1;'
+        )]
+        service.dao.get_latest_topic_profile.return_value = None
+        service.generator = Mock()
+        service.autoscaler = Autoscaler(AutoscaleConfig(rate_per_parallelism=100))
+        service.flink_config = Mock(workspace_id='ws', namespace='ns', deployment_target=DeploymentTargetConfig())
+        return service
+
+    @pytest.fixture
+    def plan(self):
+        """内存中的生成计划"""
+        return GenerationPlan(
+            record=FlinkSQLRecord(
+                topic_id=1, topic_name='orders', sink_table_name='stg_orders',
+                source_ddl='', sink_ddl='', insert_sql='', full_sql='INSERT INTO new SELECT 1;',
+                sql_hash='abc'
+            ),
+            table_schema=InferredSchema(fields=[], sample_data_count=1),
+            hologres_ddl=''
+        )
+
+    def test_deploy_uses_record_in_memory(self, service, plan):
+        """测试部署直接使用内存中的记录，不回查数据库"""
+        def create(p):
+            p.record.id = 8
+            return 8
+        service.generator.prepare.return_value = plan
+        service.generator.create.side_effect = create
+        service.dao.get_flink_sql_record_by_hash.return_value = None
+        service.dao.create_aliyun_flink_job.return_value = 2
+
+        result = service.generate_and_deploy('orders')
+
+        assert service.flink_client.create_deployment_draft.call_args.args[0] == 'INSERT INTO new SELECT 1;'
+        assert service.dao.create_aliyun_flink_job.call_args.args[0].sql_record_id == 8
+        service.dao.list_flink_sql_records.assert_not_called()
+        assert result['aliyun_job_id'] == 2
+
+    def test_run_all_steps(self, service):
+        """测试从头执行时每个步骤的 ID 都被保存"""
+        job = AliyunFlinkJob(id=1, sql_record_id=7)
+
+        result = service._run_deploy_steps(job, 'INSERT INTO t SELECT 1;')
+
+        assert result['job_id'] == 'job-1'
+        assert result['status'] == 'RUNNING'
+        steps = [c.args[1] for c in service.dao.update_aliyun_flink_job_step.call_args_list]
+        assert steps == ['draft_created', 'deployed', 'started']
+        service.dao.update_aliyun_flink_job_status.assert_called_once_with(1, 'RUNNING')
+
+    def test_resume_from_deployed(self, service):
+        """测试从 deployed 继续时不重复创建草稿和部署"""
+        service.dao.get_aliyun_flink_job.return_value = AliyunFlinkJob(
+            id=1, sql_record_id=7, draft_id='draft-1', deployment_id='deployment-1',
+            step='deployed', status='FAILED'
+        )
+
+        result = service.resume(1)
+
+        service.flink_client.create_deployment_draft.assert_not_called()
+        service.flink_client.deploy_deployment_draft.assert_not_called()
+        assert service.flink_client.start_job_with_params.call_args.args == ('deployment-1',)
+        assert result['deployment_id'] == 'deployment-1'
+        assert result['status'] == 'RUNNING'
+
+    def test_resume_restarts_failed_job(self, service):
+        """测试已启动的作业在线上失败时，resume 重新启动而不是等待已失败的作业"""
+        service.dao.get_aliyun_flink_job.return_value = AliyunFlinkJob(
+            id=1, sql_record_id=7, draft_id='draft-1', deployment_id='deployment-1', job_id='job-0',
+            step='started', status='FAILED'
+        )
+        service.flink_client.get_job_status.return_value = 'FAILED'
+
+        result = service.resume(1)
+
+        service.flink_client.deploy_deployment_draft.assert_not_called()
+        assert service.flink_client.start_job_with_params.call_args.args == ('deployment-1',)
+        service.flink_client.wait_for_job.assert_called_once_with('job-1')
+        assert (result['job_id'], result['status']) == ('job-1', 'RUNNING')
+
+    def test_resume_waits_for_starting_job(self, service):
+        """测试已启动的作业仍在启动中时只继续等待"""
+        service.dao.get_aliyun_flink_job.return_value = AliyunFlinkJob(
+            id=1, sql_record_id=7, deployment_id='deployment-1', job_id='job-0', step='started', status='FAILED'
+        )
+        service.flink_client.get_job_status.return_value = 'STARTING'
+
+        service.resume(1)
+
+        service.flink_client.start_job_with_params.assert_not_called()
+        service.flink_client.wait_for_job.assert_called_once_with('job-0')
+
+    def test_failure_keeps_completed_step(self, service):
+        """测试失败时保留已完成的步骤并提示 resume"""
+        service.flink_client.wait_for_deployment.return_value = False
+        job = AliyunFlinkJob(id=1, sql_record_id=7)
+
+        with pytest.raises(RuntimeError, match="resume --aliyun-job-id 1 从 deployed 步骤继续"):
+            service._run_deploy_steps(job, 'INSERT INTO t SELECT 1;')
+
+        assert job.deployment_id == 'deployment-1'
+        service.dao.update_aliyun_flink_job_status.assert_called_once_with(1, 'FAILED', '部署超时')
+
+    def test_resume_running_job(self, service):
+        """测试作业已在运行时不做任何操作"""
+        service.dao.get_aliyun_flink_job.return_value = AliyunFlinkJob(
+            id=1, sql_record_id=7, deployment_id='deployment-1', job_id='job-1',
+            step='started', status='RUNNING'
+        )
+
+        result = service.resume(1)
+
+        assert result['skipped']
+        service.flink_client.wait_for_job.assert_not_called()
+
+    def test_session_target_passed_through(self, service):
+        """测试 Session 集群部署目标传递到草稿创建和启动"""
+        job = AliyunFlinkJob(id=1, sql_record_id=7, deployment_target='session', session_cluster='shared')
+
+        service._run_deploy_steps(job, 'INSERT INTO t SELECT 1;')
+
+        target = DeploymentTargetConfig(mode='session', session_cluster='shared')
+        service.flink_client.create_deployment_draft.assert_called_once_with('INSERT INTO t SELECT 1;', target)
+        assert service.flink_client.start_job_with_params.call_args.kwargs['deployment_target'] == target
+
+    def test_session_target_requires_cluster(self):
+        """测试 Session 部署目标必须指定集群名称"""
+        with pytest.raises(ValueError, match="session_cluster"):
+            DeploymentTargetConfig(mode='session')
+
+    def test_unchanged_sql_on_running_job_skipped(self, service, plan):
+        """测试 SQL 未变化且作业在同一部署目标上运行时跳过部署"""
+        service.generator.prepare.return_value = plan
+        service.dao.get_flink_sql_record_by_hash.return_value = plan.record.model_copy(update={'id': 7})
+        service.dao.get_latest_aliyun_flink_job_by_record.return_value = AliyunFlinkJob(
+            id=1, sql_record_id=7, job_id='job-0', status='RUNNING'
+        )
+        service.flink_client.get_job_status.return_value = 'RUNNING'
+
+        result = service.generate_and_deploy('orders')
+
+        assert result['skipped']
+        service.dao.create_aliyun_flink_job.assert_not_called()
+
+    def test_unchanged_sql_redeployed_on_new_target(self, service, plan):
+        """测试 SQL 未变化但部署目标改变时新建作业记录重新部署"""
+        service.generator.prepare.return_value = plan
+        service.dao.get_flink_sql_record_by_hash.return_value = plan.record.model_copy(update={'id': 7})
+        service.dao.get_latest_aliyun_flink_job_by_record.return_value = AliyunFlinkJob(
+            id=1, sql_record_id=7, job_id='job-0', status='RUNNING'
+        )
+        service.flink_client.get_job_status.return_value = 'RUNNING'
+        service.dao.create_aliyun_flink_job.return_value = 2
+        target = DeploymentTargetConfig(mode='session', session_cluster='shared')
+
+        result = service.generate_and_deploy('orders', deployment_target=target)
+
+        assert not result['skipped']
+        job = service.dao.create_aliyun_flink_job.call_args.args[0]
+        assert (job.sql_record_id, job.deployment_target, job.session_cluster) == (7, 'session', 'shared')
+        service.flink_client.create_deployment_draft.assert_called_once_with('INSERT INTO new SELECT 1;', target)
+
+    def test_profile_sets_initial_parallelism(self, service, plan):
+        """测试按 Topic 画像确定初始并行度，并在启动前设置"""
+        plan.record.id = 8
+        service.generator.prepare.return_value = plan
+        service.dao.get_flink_sql_record_by_hash.return_value = None
+        service.dao.create_aliyun_flink_job.return_value = 2
+        service.dao.get_latest_topic_profile.return_value = TopicProfile(
+            id=5, topic_name='orders', partition_count=6, messages_per_second=250
+        )
+
+        service.generate_and_deploy('orders')
+
+        assert service.dao.create_aliyun_flink_job.call_args.args[0].flink_config == {
+            'parallelism': 4, 'topic_profile_id': 5
+        }
+        service.flink_client.update_deployment_parallelism.assert_called_once_with('deployment-1', 4)
+
+    def test_no_profile_keeps_default_parallelism(self, service):
+        """测试没有画像时不修改并行度"""
+        service._run_deploy_steps(AliyunFlinkJob(id=1, sql_record_id=7), 'INSERT INTO t SELECT 1;')
+
+        service.flink_client.update_deployment_parallelism.assert_not_called()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,74 @@
+import logging
+import pytest
+from dataclasses import replace
+from kafka_flink_tool.config import AliyunFlinkConfig
+from benchmarks.deploy_load import run_load_test
+from benchmarks.fake_flink import PROFILES, FakeFlinkServer, HttpFlinkClient
+
+
+@pytest.fixture
+def quiet_logs():
+    package_logger = logging.getLogger('kafka_flink_tool')
+    level = package_logger.level
+    package_logger.setLevel(logging.CRITICAL)
+    yield
+    package_logger.setLevel(level)
+
+
+def make_client(url: str) -> HttpFlinkClient:
+    client = HttpFlinkClient(AliyunFlinkConfig(
+        workspace_id='ws', namespace='ns', access_key_id='ak', access_key_secret='sk', endpoint=url
+    ))
+    client.DRAFT_POLL_INTERVAL = client.POLL_INTERVAL = 0.01
+    return client
+
+
+class TestFakeFlink:
+    """本地模拟 Flink OpenAPI 与部署压测测试"""
+
+    def test_state_transitions_over_http(self, quiet_logs):
+        """测试通过 HTTP 访问时草稿、部署、作业按配置的耗时流转到完成状态"""
+        profile = replace(PROFILES['fast'], draft_seconds=0.05, deploy_seconds=0.05, start_seconds=0.05)
+        with FakeFlinkServer(profile) as server:
+            client = make_client(server.url)
+            draft_id = client.create_deployment_draft('SELECT 1')
+            assert client.get_deployment_draft_result(draft_id)['status'] == 'RUNNING'
+            assert client.wait_for_deployment_draft(draft_id, timeout=5)
+
+            deployment_id = client.deploy_deployment_draft(draft_id)
+            assert client.wait_for_deployment(deployment_id, timeout=5)
+            client.update_deployment_parallelism(deployment_id, 4)
+            assert client.get_deployment_parallelism(deployment_id) == 4
+
+            job_id = client.start_job_with_params(deployment_id)
+            assert client.wait_for_job(job_id, timeout=5)
+            client.stop_job(job_id)
+            assert client.get_job_status(job_id) == 'STOPPED'
+
+        assert server.calls['CreateDeploymentDraft'] == 1
+        assert server.calls['GetDeploymentDraftResult'] >= 2
+
+    def test_throttling(self, quiet_logs):
+        """测试超过每秒请求数上限时返回 429，客户端抛出异常"""
+        with FakeFlinkServer(replace(PROFILES['fast'], rate_limit=2)) as server:
+            client = make_client(server.url)
+            with pytest.raises(RuntimeError, match='HTTP 429'):
+                for _ in range(5):
+                    client.create_deployment_draft('SELECT 1')
+
+        assert server.responses[429] >= 1
+
+    def test_concurrent_deploy_load(self, quiet_logs):
+        """测试并发执行 generate_and_deploy 并统计耗时与每次部署的 API 调用数"""
+        result = run_load_test(flows=4, concurrency=4, profile=PROFILES['fast'], poll_interval=0.01)
+
+        assert result.errors == []
+        assert len(result.latencies) == 4
+        assert result.calls['CreateDeploymentDraft'] == 4
+        assert result.calls['StartJob'] == 4
+        assert result.calls_per_deploy >= 6
+        assert result.percentile(0.99) == max(result.latencies)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -45,7 +45,8 @@ class TestAliyunFlinkClient:
             'CreateDeploymentDraft',
             {
                 'sql_content': 'SELECT * FROM test',
-                'kind': 'Deployment'
+                'kind': 'Deployment',
+                'deployment_target': {'mode': 'PER_JOB'}
             }
         )
 
@@ -0,0 +1,222 @@
+import io
+import json
+import struct
+import sys
+import types
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import Mock, patch
+from click.testing import CliRunner
+from kafka_flink_tool.cli import cli
+from kafka_flink_tool.formats import (
+    AvroFormat, CsvFormat, JsonFormat, MessageFormat, ProtobufFormat, get_message_format
+)
+from kafka_flink_tool.logger import shutdown_logging
+from kafka_flink_tool.models import FieldProjection, InferredSchema, KafkaTopicConfig
+from kafka_flink_tool.service import GeneratorService
+
+ORDER_SCHEMA = {
+    'type': 'record', 'name': 'Order',
+    'fields': [
+        {'name': 'o_id', 'type': ['null', 'long']},
+        {'name': 'amount', 'type': ['null', 'double']},
+        {'name': 'status', 'type': ['null', 'string']},
+        {'name': 'created', 'type': ['null', {'type': 'long', 'logicalType': 'timestamp-millis'}]},
+    ]
+}
+
+
+def _order_message_class():
+    """动态构建 Protobuf 消息类，字段覆盖可映射的标量、枚举、重复字段、嵌套消息与 int32"""
+    pytest.importorskip('google.protobuf')
+    from google.protobuf import descriptor_pb2, descriptor_pool, message_factory
+
+    F = descriptor_pb2.FieldDescriptorProto
+    file_proto = descriptor_pb2.FileDescriptorProto(name='orders_test.proto', package='test', syntax='proto3')
+    status = file_proto.enum_type.add(name='Status')
+    status.value.add(name='UNKNOWN', number=0)
+    status.value.add(name='PAID', number=1)
+    item = file_proto.message_type.add(name='Item')
+    item.field.add(name='sku', number=1, type=F.TYPE_STRING, label=F.LABEL_OPTIONAL)
+    order = file_proto.message_type.add(name='Order')
+    for number, (name, field_type) in enumerate([
+        ('o_id', F.TYPE_INT64), ('amount', F.TYPE_DOUBLE), ('paid', F.TYPE_BOOL), ('remark', F.TYPE_STRING),
+        ('status', F.TYPE_ENUM), ('tags', F.TYPE_STRING), ('item', F.TYPE_MESSAGE), ('qty', F.TYPE_INT32)
+    ], start=1):
+        field = order.field.add(name=name, number=number, type=field_type, label=F.LABEL_OPTIONAL)
+        if name == 'status':
+            field.type_name = '.test.Status'
+        elif name == 'item':
+            field.type_name = '.test.Item'
+        elif name == 'tags':
+            field.label = F.LABEL_REPEATED
+    pool = descriptor_pool.DescriptorPool()
+    pool.Add(file_proto)
+    return message_factory.GetMessageClass(pool.FindMessageTypeByName('test.Order'))
+
+
+class TestMessageFormats:
+    """消息格式测试"""
+
+    def test_message_format_is_abstract(self):
+        """测试未实现 deserialize 的格式不能实例化"""
+        class Incomplete(MessageFormat):
+            name = 'incomplete'
+
+        with pytest.raises(TypeError):
+            Incomplete()
+        assert JsonFormat().deserialize(b'{"id": 1}') == {'id': 1}
+
+    def test_get_message_format(self):
+        """测试按 data_format 构建格式，缺少必需参数时报错"""
+        assert isinstance(get_message_format('JSON'), JsonFormat)
+        assert isinstance(get_message_format('csv', {'columns': ['a', 'b'], 'delimiter': '|'}), CsvFormat)
+        with pytest.raises(ValueError, match="不支持的数据格式"):
+            get_message_format('xml')
+        with pytest.raises(ValueError, match="registry_url"):
+            get_message_format('avro', {'mode': 'registry'}, 'orders')
+        with pytest.raises(ValueError, match="message_class"):
+            get_message_format('protobuf', {'message_class': 'com.example.Order'})
+
+    def test_csv(self):
+        """测试 CSV 按配置的列名解析，文本转为推断使用的类型"""
+        csv_format = CsvFormat(['o_id', 'amount', 'paid', 'remark'], delimiter='|')
+
+        assert csv_format.deserialize(b'1001|12.5|true|"a|b"') == {
+            'o_id': 1001, 'amount': 12.5, 'paid': True, 'remark': 'a|b'
+        }
+        assert csv_format.deserialize(b'1002||false|') == {
+            'o_id': 1002, 'amount': None, 'paid': False, 'remark': None
+        }
+        assert csv_format.deserialize(b'1003|1.0') is None
+        assert csv_format.flink_options() == {
+            'value.format': 'csv', 'value.csv.field-delimiter': '|', 'value.csv.null-literal': ''
+        }
+
+    def test_positional_format_rejects_projection(self):
+        """测试按列顺序解析的格式不能剔除字段"""
+        schema = InferredSchema(fields=[], sample_data_count=1, projected_out=['remark'])
+
+        with pytest.raises(ValueError, match="不能剔除字段: remark"):
+            CsvFormat(['o_id', 'remark']).check_schema(schema)
+        JsonFormat().check_schema(schema)
+
+    def test_avro_registry_options(self):
+        """测试 Registry 模式使用 avro-confluent 格式并传递认证信息"""
+        avro_format = get_message_format(
+            'avro', {'registry_url': 'http://registry:8081/', 'registry_user_info': 'flink:secret'}, 'orders'
+        )
+
+        assert avro_format.positional is False
+        assert avro_format.flink_options() == {
+            'value.format': 'avro-confluent',
+            'value.avro-confluent.url': 'http://registry:8081',
+            'value.avro-confluent.basic-auth.credentials-source': 'USER_INFO',
+            'value.avro-confluent.basic-auth.user-info': 'flink:secret',
+        }
+
+    def test_avro_writer_schema(self):
+        """测试从 writer schema 映射字段类型"""
+        avro_format = AvroFormat('orders', mode='schema', schema=json.dumps(ORDER_SCHEMA))
+
+        fields = avro_format.writer_schema()
+
+        assert [(f.name, f.type) for f in fields] == [
+            ('o_id', 'BIGINT'), ('amount', 'DOUBLE PRECISION'), ('status', 'TEXT'), ('created', 'TIMESTAMPTZ')
+        ]
+        assert avro_format.flink_options() == {'value.format': 'avro'}
+
+    def test_avro_schema_mode_requires_flink_derivable_types(self):
+        """测试无 Registry 时 writer schema 必须与 Flink 按 DDL 推导的 schema 编码一致"""
+        schema = {**ORDER_SCHEMA, 'fields': ORDER_SCHEMA['fields'] + [{'name': 'weight', 'type': 'float'}]}
+
+        with pytest.raises(ValueError, match="字段 weight"):
+            AvroFormat('orders', mode='schema', schema=schema).writer_schema()
+
+    def test_avro_registry_deserialize(self):
+        """测试 Confluent 线格式：按 schema ID 获取 writer schema 并缓存，头部不正确时跳过"""
+        fastavro = pytest.importorskip('fastavro')
+        avro_format = get_message_format('avro', {'registry_url': 'http://registry:8081'}, 'orders')
+        avro_format._registry_get = Mock(return_value={'schema': json.dumps(ORDER_SCHEMA)})
+        body = io.BytesIO()
+        fastavro.schemaless_writer(body, fastavro.parse_schema(ORDER_SCHEMA), {
+            'o_id': 1, 'amount': 12.5, 'status': None, 'created': datetime(2024, 5, 1, 8, tzinfo=timezone.utc)
+        })
+        payload = b'\x00' + struct.pack('>I', 42) + body.getvalue()
+
+        for _ in range(2):
+            assert avro_format.deserialize(payload) == {
+                'o_id': 1, 'amount': 12.5, 'status': None, 'created': '2024-05-01 08:00:00.000'
+            }
+        avro_format._registry_get.assert_called_once_with('/schemas/ids/42')
+        assert avro_format.deserialize(b'\x01' + payload[1:]) is None
+        assert [f.name for f in avro_format.writer_schema()] == ['o_id', 'amount', 'status', 'created']
+
+    def test_protobuf(self, monkeypatch):
+        """测试 Protobuf 解码为字典（int64 保持整数、枚举取名称），writer schema 跳过不支持的字段"""
+        order_class = _order_message_class()
+        monkeypatch.setitem(sys.modules, 'orders_pb2', types.SimpleNamespace(Order=order_class))
+        protobuf_format = get_message_format(
+            'protobuf', {'message_class': 'com.example.Order', 'python_class': 'orders_pb2.Order'}
+        )
+        message = order_class(o_id=2 ** 40, amount=2.5, paid=True, status=1, tags=['a', 'b'], qty=3)
+        message.item.sku = 'x'
+
+        assert protobuf_format.deserialize(message.SerializeToString()) == {
+            'o_id': 2 ** 40, 'amount': 2.5, 'paid': True, 'status': 'PAID', 'tags': ['a', 'b'],
+            'item': {'sku': 'x'}, 'qty': 3
+        }
+        assert protobuf_format.deserialize(b'\xff\xff') is None
+        assert [(f.name, f.type) for f in protobuf_format.writer_schema()] == [
+            ('o_id', 'BIGINT'), ('amount', 'DOUBLE PRECISION'), ('paid', 'BOOLEAN'), ('remark', 'TEXT'),
+            ('status', 'TEXT')
+        ]
+        assert protobuf_format.flink_options()['value.protobuf.message-class-name'] == 'com.example.Order'
+
+    def test_writer_schema_takes_precedence_over_sampling(self):
+        """测试有 writer schema 时字段与类型以其为准，采样数据只用于推断主键"""
+        service = GeneratorService.__new__(GeneratorService)
+        topic_config = KafkaTopicConfig(
+            id=1, topic_name='orders', kafka_brokers='kafka:9092', data_format='avro', is_active=True,
+            field_projection=FieldProjection(exclude=['status'])
+        )
+        avro_format = get_message_format('avro', {'registry_url': 'http://registry:8081'}, 'orders')
+        avro_format._registry_get = Mock(return_value={'schema': json.dumps(ORDER_SCHEMA)})
+        records = [(None, {'o_id': i, 'amount': i, 'extra': 'x'}) for i in range(1, 11)]
+
+        schema = service._infer_schema(topic_config, records, avro_format)
+
+        assert [(f.name, f.type) for f in schema.fields] == [
+            ('o_id', 'BIGINT'), ('amount', 'DOUBLE PRECISION'), ('created', 'TIMESTAMPTZ')
+        ]
+        assert schema.projected_out == ['status']
+        assert schema.primary_key == ['o_id']
+        avro_format._registry_get.assert_called_once_with('/subjects/orders-value/versions/latest')
+
+    def test_fetch_decodes_with_topic_format(self, tmp_path):
+        """测试 fetch 按 Topic 的 data_format 与 format_options 解码消息"""
+        topic_config = KafkaTopicConfig(
+            id=1, topic_name='orders', kafka_brokers='kafka:9092', data_format='csv', is_active=True,
+            format_options={'columns': ['o_id', 'status']}
+        )
+        with patch('kafka_flink_tool.config.ConfigManager'), \
+                patch('kafka_flink_tool.database.HologresDAO') as dao_cls, \
+                patch('kafka_flink_tool.kafka_client.KafkaClient') as client_cls:
+            dao_cls.return_value.get_topic_config_by_name.return_value = topic_config
+            client_cls.return_value.sample_messages.return_value = [{'o_id': 1, 'status': 'PAID'}]
+            try:
+                result = CliRunner().invoke(cli, [
+                    '--log-file', str(tmp_path / 'app.log'), 'fetch', '--topic-name', 'orders'
+                ])
+            finally:
+                shutdown_logging()
+
+        assert result.exit_code == 0, result.output
+        message_format = client_cls.call_args.args[2]
+        assert isinstance(message_format, CsvFormat)
+        assert message_format.columns == ['o_id', 'status']
+        assert '"status": "PAID"' in result.output
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,130 @@
+import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+from kafka_flink_tool.config import GenerationQueueConfig
+from kafka_flink_tool.models import FlinkSQLRecord, GenerationTask, KafkaTopicConfig
+from kafka_flink_tool.service import GenerationWorker, _ThreadServices
+
+
+class TestGenerationWorker:
+    """分布式生成 worker 测试"""
+
+    @pytest.fixture
+    def worker(self):
+        """工作线程中的服务（DAO 与生成使用 mock）"""
+        worker = Mock()
+        worker.dao.requeue_expired_generation_tasks.return_value = (0, 0)
+        worker.dao.list_claimable_generation_tasks.return_value = []
+        worker.dao.claim_generation_task.return_value = True
+        worker.dao.renew_generation_task_lease.return_value = True
+        worker.dao.finish_generation_task.return_value = True
+        worker.dao.get_topic_config_by_name.side_effect = lambda name: KafkaTopicConfig(
+            id=1, topic_name=name, kafka_brokers='kafka:9092', data_format='json', is_active=True
+        )
+        worker.dao.get_latest_flink_sql_record_by_topic.return_value = None
+        worker.generator.prepare.return_value.record.id = 42
+        return worker
+
+    @pytest.fixture
+    def service(self, bare_service, worker):
+        service = bare_service(GenerationWorker, worker)
+        service.worker_id = 'host-1'
+        service.queue_config = GenerationQueueConfig(concurrency=2, heartbeat_interval=60, max_attempts=2)
+        service._leases = {}
+        service._lost_leases = set()
+        service._leases_lock = threading.Lock()
+        service._stop = threading.Event()
+        return service
+
+    def test_claim_skips_tasks_taken_by_other_workers(self, service, worker):
+        """测试条件更新未命中（已被其他 worker 领取）时尝试下一个候选任务"""
+        worker.dao.list_claimable_generation_tasks.return_value = [
+            GenerationTask(topic_name='orders'), GenerationTask(topic_name='users')
+        ]
+        worker.dao.claim_generation_task.side_effect = [False, True]
+
+        task = service._claim()
+
+        assert task.status == 'running'
+        assert task.attempts == 1
+        assert task.worker_id == 'host-1'
+        assert service._leases == {task.lease_token: task}
+        assert worker.dao.claim_generation_task.call_count == 2
+
+    def test_once_processes_queue_until_empty(self, service, worker):
+        """测试 --once 处理完所有任务后退出，每个任务按令牌记录结果"""
+        queue = [GenerationTask(topic_name=f"topic_{i}") for i in range(3)]
+        lock = threading.Lock()
+
+        def claimable(limit):
+            with lock:
+                return [queue.pop()] if queue else []
+        worker.dao.list_claimable_generation_tasks.side_effect = claimable
+
+        results = service.run(once=True)
+
+        assert results == {'done': 3}
+        assert worker.generator.create.call_count == 3
+        finished = {call.args[0]: call.args[2:] for call in worker.dao.finish_generation_task.call_args_list}
+        assert finished['topic_0'] == ('done', None, 42, None, 0)
+        assert service._leases == {}
+        service._services.close.assert_called_once()
+
+    def test_failure_requeues_until_max_attempts(self, service, worker):
+        """测试失败的任务未达到最大次数时重新排队，达到后标记为 failed"""
+        worker.generator.prepare.side_effect = ValueError("没有获取到任何数据")
+
+        first = GenerationTask(topic_name='orders', status='running', attempts=1, lease_token='a')
+        second = GenerationTask(topic_name='orders', status='running', attempts=2, lease_token='b')
+
+        assert service._run_task(first) == 'pending'
+        assert worker.dao.finish_generation_task.call_args.args[6] == 60
+        assert service._run_task(second) == 'failed'
+        assert worker.dao.finish_generation_task.call_args.args[3] == "没有获取到任何数据"
+
+    def test_retry_delay_doubles_up_to_max(self):
+        """测试重试等待随尝试次数翻倍，不超过上限"""
+        config = GenerationQueueConfig(retry_backoff=60, max_retry_backoff=300)
+
+        assert [config.retry_delay(attempts) for attempts in range(1, 6)] == [60, 120, 240, 300, 300]
+
+    def test_lost_lease_does_not_create_table(self, service, worker):
+        """测试采样期间租约被接管时不建表，也不覆盖新 worker 的任务状态"""
+        worker.dao.renew_generation_task_lease.return_value = False
+        task = GenerationTask(topic_name='orders', status='running', attempts=1, lease_token='a')
+        service._leases['a'] = task
+
+        assert service._run_task(task) == 'lost'
+        worker.generator.create.assert_not_called()
+        worker.dao.finish_generation_task.assert_not_called()
+
+    def test_existing_record_is_deployed_without_regenerating(self, service, worker):
+        """测试上次已保存 SQL 记录的部署任务只继续部署"""
+        worker.dao.get_latest_flink_sql_record_by_topic.return_value = FlinkSQLRecord(
+            id=7, topic_id=1, topic_name='orders', sink_table_name='stg_orders',
+            source_ddl='', sink_ddl='', insert_sql='', full_sql=''
+        )
+        worker.dao.get_latest_aliyun_flink_job_by_record.return_value = None
+        worker.deploy_record.return_value = {'sql_record_id': 7, 'aliyun_job_id': 3}
+        task = GenerationTask(topic_name='orders', deploy=True, status='running', attempts=2, lease_token='a')
+
+        assert service._run_task(task) == 'done'
+        worker.generator.prepare.assert_not_called()
+        assert worker.dao.finish_generation_task.call_args.args[4:] == (7, 3, 0)
+
+    def test_thread_services_reused_per_thread_and_closed(self):
+        """测试每个工作线程复用一个服务实例，close 时全部关闭"""
+        with patch('kafka_flink_tool.service.AliyunFlinkService', side_effect=lambda path: Mock()):
+            services = _ThreadServices('config.yaml')
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                created = set(executor.map(lambda _: services.get(), range(20)))
+            assert services.get() is services.get()
+
+        assert 1 <= len(created) <= 2
+        services.close()
+        assert all(service.close.call_count == 1 for service in created)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,213 @@
+import json
+import pytest
+from datetime import datetime
+from unittest.mock import Mock, patch
+from click.testing import CliRunner
+from kafka_flink_tool.cli import cli
+from kafka_flink_tool.config import HologresConfig
+from kafka_flink_tool.database import HologresDAO
+from kafka_flink_tool.logger import shutdown_logging
+from kafka_flink_tool.models import AliyunFlinkJob, FlinkSQLRecordSummary, HistoryFilter, TopicLatestDeployment
+
+
+class FakeNamedCursor:
+    """按 id 倒序返回 rows 中满足 id < before_id 的前 LIMIT 行，记录执行的 SQL 与参数"""
+
+    def __init__(self, connection, name):
+        self.connection = connection
+        self.name = name
+        self.itersize = None
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, sql, params):
+        self.connection.executed.append((self.name, sql, list(params)))
+        size = params[-1]
+        before_id = params[-2] if '< %s' in sql else None
+        rows = sorted(self.connection.rows, key=lambda row: row[0], reverse=True)
+        self._rows = [row for row in rows if before_id is None or row[0] < before_id][:size]
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.executed = []
+        self.commit = Mock()
+
+    def cursor(self, name=None):
+        assert name, "历史查询应使用服务端游标"
+        return FakeNamedCursor(self, name)
+
+
+def _record_row(record_id, topic_name='orders'):
+    return (record_id, 1, topic_name, f"ods_{topic_name}", 1, 'generated', 'hash', datetime(2024, 1, 1))
+
+
+@pytest.fixture
+def dao():
+    dao = HologresDAO(HologresConfig(host='localhost', vpc_host='localhost', database='db', user='u', password='p'))
+    dao.PAGE_SIZE = 3
+    return dao
+
+
+class TestHistoryQueries:
+    """history / jobs 查询的 keyset 分页测试"""
+
+    def test_pages_by_last_id(self, dao):
+        """测试按上一页最后的 id 翻页，读完不足一页时停止"""
+        connection = FakeConnection([_record_row(i) for i in range(1, 8)])
+        dao._get_connection = lambda: connection
+
+        records = list(dao.iter_flink_sql_records(HistoryFilter()))
+
+        assert [r.id for r in records] == [7, 6, 5, 4, 3, 2, 1]
+        params = [params for _, _, params in connection.executed]
+        assert params == [[3], [5, 3], [2, 3]]
+        assert all('ORDER BY id DESC LIMIT %s' in sql for _, sql, _ in connection.executed)
+        # 每页一个游标，读完即提交
+        assert len({name for name, _, _ in connection.executed}) == 3
+        assert connection.commit.call_count == 3
+
+    def test_limit_and_before_id(self, dao):
+        """测试 before_id 作为起点，limit 截断最后一页的大小"""
+        connection = FakeConnection([_record_row(i) for i in range(1, 11)])
+        dao._get_connection = lambda: connection
+
+        records = list(dao.iter_flink_sql_records(HistoryFilter(), before_id=9, limit=4))
+
+        assert [r.id for r in records] == [8, 7, 6, 5]
+        assert [params for _, _, params in connection.executed] == [[9, 3], [6, 1]]
+
+    def test_filters_are_parameterized(self, dao):
+        """测试 Topic、状态与时间范围转换为参数化的条件"""
+        connection = FakeConnection([])
+        dao._get_connection = lambda: connection
+        filters = HistoryFilter(topic_name='orders', status='FAILED',
+                                since=datetime(2024, 1, 1), until=datetime(2024, 2, 1))
+
+        assert list(dao.iter_aliyun_flink_jobs(filters, before_id=100)) == []
+
+        _, sql, params = connection.executed[0]
+        assert ("WHERE r.topic_name = %s AND j.status = %s AND j.create_time >= %s "
+                "AND j.create_time < %s AND j.id < %s ORDER BY j.id DESC") in sql
+        assert params == ['orders', 'FAILED', datetime(2024, 1, 1), datetime(2024, 2, 1), 100, 3]
+
+    def test_stop_early_commits(self, dao):
+        """测试调用方中途停止迭代时同样结束事务"""
+        connection = FakeConnection([_record_row(i) for i in range(1, 8)])
+        dao._get_connection = lambda: connection
+
+        records = dao.iter_flink_sql_records(HistoryFilter())
+        assert next(records).id == 7
+        records.close()
+
+        assert connection.commit.call_count == 1
+
+    def test_latest_rejects_time_range(self, dao):
+        """测试最新部署视图不支持时间范围"""
+        with pytest.raises(ValueError):
+            list(dao.iter_latest_topic_deployments(HistoryFilter(since=datetime(2024, 1, 1))))
+
+
+def _summary(record_id: int) -> FlinkSQLRecordSummary:
+    return FlinkSQLRecordSummary(id=record_id, topic_id=1, topic_name='orders', sink_table_name='ods_orders',
+                                 version=record_id, status='generated', created_at=datetime(2024, 1, 1))
+
+
+class TestHistoryCommands:
+    """history / jobs 命令输出测试（DAO 使用 mock）"""
+
+    @pytest.fixture
+    def mock_dao(self):
+        with patch('kafka_flink_tool.config.ConfigManager'), \
+                patch('kafka_flink_tool.database.HologresDAO') as dao_cls:
+            yield dao_cls.return_value
+
+    @pytest.fixture
+    def invoke(self, tmp_path):
+        def invoke(*args):
+            try:
+                return CliRunner().invoke(cli, ['--log-file', str(tmp_path / 'app.log'), *args])
+            finally:
+                shutdown_logging()
+        return invoke
+
+    def test_history_table_with_next_page_hint(self, mock_dao, invoke):
+        """测试表格输出，取满 limit 条时提示下一页的 --before-id"""
+        mock_dao.iter_flink_sql_records.return_value = iter([_summary(9), _summary(8)])
+
+        result = invoke('history', '--topic-name', 'orders', '--before-id', '10', '--limit', '2')
+
+        assert result.exit_code == 0, result.output
+        lines = result.output.splitlines()
+        assert lines[0].split() == ['ID', 'TOPIC', 'SINK_TABLE', 'VER', 'STATUS', 'CREATED']
+        assert lines[1].split()[:5] == ['9', 'orders', 'ods_orders', '9', 'generated']
+        assert "下一页: --before-id 8" in result.output
+        mock_dao.iter_flink_sql_records.assert_called_once_with(HistoryFilter(topic_name='orders'), 10, 2)
+        mock_dao.close.assert_called_once()
+
+    def test_history_json_without_hint(self, mock_dao, invoke):
+        """测试 JSON 输出每行一个对象，limit 为 0 时读取全部且不提示下一页"""
+        mock_dao.iter_flink_sql_records.return_value = iter([_summary(9), _summary(8)])
+
+        result = invoke('history', '--limit', '0', '--format', 'json')
+
+        assert result.exit_code == 0, result.output
+        rows = [json.loads(line) for line in result.output.splitlines() if line.startswith('{')]
+        assert [row['id'] for row in rows] == [9, 8]
+        assert "下一页" not in result.output
+        mock_dao.iter_flink_sql_records.assert_called_once_with(HistoryFilter(), None, None)
+
+    def test_history_latest_filters_job_status(self, mock_dao, invoke):
+        """测试 --latest 配合 --status 按作业状态过滤，下一页按 Topic ID 继续"""
+        mock_dao.iter_latest_topic_deployments.return_value = iter([
+            TopicLatestDeployment(topic_id=5, topic_name='orders', is_active=True, sql_record_id=9, version=2,
+                                  record_status='generated', aliyun_job_id=3, job_status='FAILED'),
+        ])
+
+        result = invoke('history', '--latest', '--status', 'FAILED', '--limit', '1')
+
+        assert result.exit_code == 0, result.output
+        assert result.output.splitlines()[1].split()[:7] == ['5', 'orders', '9', '2', 'generated', '3', 'FAILED']
+        assert "下一页: --before-id 5" in result.output
+        mock_dao.iter_latest_topic_deployments.assert_called_once_with(HistoryFilter(status='FAILED'), None, 1)
+        mock_dao.iter_flink_sql_records.assert_not_called()
+
+    def test_jobs_table_and_json(self, mock_dao, invoke):
+        """测试 jobs 的表格与 JSON 输出"""
+        job = AliyunFlinkJob(id=12, sql_record_id=9, step='started', status='RUNNING', job_id='job-1',
+                             topic_name='orders', sink_table_name='ods_orders', create_time=datetime(2024, 1, 1))
+        mock_dao.iter_aliyun_flink_jobs.side_effect = lambda *args: iter([job])
+
+        table = invoke('jobs', '--status', 'RUNNING', '--limit', '1')
+        output = invoke('jobs', '--format', 'json')
+
+        assert table.exit_code == 0, table.output
+        assert table.output.splitlines()[1].split()[:6] == ['12', 'orders', '9', 'started', 'RUNNING', 'job-1']
+        assert "下一页: --before-id 12" in table.output
+        assert json.loads(output.output.splitlines()[0])['job_id'] == 'job-1'
+        assert [c.args for c in mock_dao.iter_aliyun_flink_jobs.call_args_list] == [
+            (HistoryFilter(status='RUNNING'), None, 1), (HistoryFilter(), None, 50)
+        ]
+
+    def test_empty_result(self, mock_dao, invoke):
+        """测试没有记录时提示且不输出表头"""
+        mock_dao.iter_aliyun_flink_jobs.return_value = iter([])
+
+        result = invoke('jobs')
+
+        assert result.exit_code == 0, result.output
+        assert "ID" not in result.output
+        assert "没有符合条件的记录" in result.output
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
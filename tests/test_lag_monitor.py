@@ -0,0 +1,56 @@
+import pytest
+from kafka import TopicPartition
+from kafka_flink_tool.lag_monitor import LagMonitor, format_lag_prometheus
+
+
+class TestLagMonitor:
+    """消费延迟计算测试"""
+
+    @pytest.fixture
+    def end_offsets(self):
+        """两个 Topic 的 end offset"""
+        return {
+            TopicPartition('orders', 0): 100,
+            TopicPartition('orders', 1): 50,
+            TopicPartition('orders', 2): 10,
+            TopicPartition('users', 0): 7
+        }
+
+    def test_compute_lag(self, end_offsets):
+        """测试按分区计算延迟，未提交的分区不计入总延迟"""
+        committed = {
+            TopicPartition('orders', 0): 90,
+            TopicPartition('orders', 1): 50,
+            TopicPartition('orders', 2): -1
+        }
+
+        lag = LagMonitor.compute_lag('orders', 'flink_orders', end_offsets, committed)
+
+        assert [p.lag for p in lag.partitions] == [10, 0, None]
+        assert lag.partitions[2].committed_offset is None
+        assert lag.total_lag == 10
+
+    def test_catch_up_rate(self, end_offsets):
+        """测试两次快照之间的追赶速度"""
+        previous = [LagMonitor.compute_lag('orders', 'flink_orders', end_offsets,
+                                           {TopicPartition('orders', 0): 0})]
+        current = [LagMonitor.compute_lag('orders', 'flink_orders', end_offsets,
+                                          {TopicPartition('orders', 0): 50})]
+
+        LagMonitor.apply_rates(previous, current, 10)
+
+        assert current[0].catch_up_rate == 5.0
+
+    def test_prometheus_format(self, end_offsets):
+        """测试 Prometheus 文本格式"""
+        lag = LagMonitor.compute_lag('users', 'flink_users', end_offsets, {TopicPartition('users', 0): 2})
+
+        content = format_lag_prometheus([lag])
+
+        assert 'kafka_flink_consumer_lag{topic="users",group="flink_users",partition="0"} 5' in content
+        assert 'kafka_flink_consumer_lag_total{topic="users",group="flink_users"} 5' in content
+        assert 'catch_up_rate' not in content
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,80 @@
+import json
+import logging
+import pytest
+from kafka_flink_tool.logger import (
+    JsonFormatter, RateLimitFilter, log_context, setup_logging, shutdown_logging
+)
+
+
+def make_record(lineno: int = 10, level: int = logging.WARNING, msg: str = "JSON 解析失败") -> logging.LogRecord:
+    return logging.LogRecord('kafka_flink_tool.kafka_client', level, 'kafka_client.py', lineno, msg, None, None)
+
+
+class TestLogging:
+    """日志配置测试"""
+
+    def test_rate_limit_collapses_repeats(self, monkeypatch):
+        """测试同一位置的重复日志超过上限后只计数，下个窗口输出省略次数"""
+        now = [0.0]
+        monkeypatch.setattr('kafka_flink_tool.logger.time.monotonic', lambda: now[0])
+        rate_limit = RateLimitFilter(burst=2, interval=60)
+
+        passed = [rate_limit.filter(make_record()) for _ in range(5)]
+        assert passed == [True, True, False, False, False]
+        assert rate_limit.filter(make_record(lineno=11))
+        assert rate_limit.filter(make_record(level=logging.ERROR))
+
+        now[0] = 61
+        record = make_record()
+        assert rate_limit.filter(record)
+        assert "省略 3 条" in record.getMessage()
+
+    def test_rate_limit_keeps_distinct_messages(self):
+        """测试同一位置输出的不同消息互不限流，同一消息的不同级别分开计数"""
+        rate_limit = RateLimitFilter(burst=2, interval=60)
+
+        assert all(rate_limit.filter(make_record(level=logging.INFO, msg=f"分区 {i} 回填完成"))
+                   for i in range(10))
+        assert rate_limit.filter(make_record(level=logging.INFO))
+        assert rate_limit.filter(make_record(level=logging.WARNING))
+
+    def test_shutdown_flushes_suppressed_counts(self, tmp_path):
+        """测试之后没有再输出的日志，省略次数在关闭日志时写出"""
+        log_file = tmp_path / 'app.log'
+        setup_logging(str(log_file), rate_limit=RateLimitFilter(burst=1, interval=60), force=True)
+        try:
+            for _ in range(4):
+                logging.getLogger('kafka_flink_tool.test').warning("JSON 解析失败")
+        finally:
+            shutdown_logging()
+
+        lines = log_file.read_text(encoding='utf-8').splitlines()
+        assert len(lines) == 2
+        assert "省略 3 条" in lines[-1]
+
+    def test_json_lines_with_context(self, tmp_path):
+        """测试 JSON Lines 日志经后台线程写入文件，并带有 run_id 与 topic"""
+        log_file = tmp_path / 'app.log'
+        setup_logging(str(log_file), log_format='json', force=True)
+        try:
+            with log_context('orders'):
+                logging.getLogger('kafka_flink_tool.test').info("采样完成")
+        finally:
+            shutdown_logging()
+
+        entry = json.loads(log_file.read_text(encoding='utf-8').splitlines()[-1])
+        assert entry['message'] == "采样完成"
+        assert entry['topic'] == 'orders'
+        assert entry['logger'] == 'kafka_flink_tool.test'
+        assert entry['run_id']
+
+    def test_json_formatter_without_context(self):
+        """测试未经过上下文过滤器的日志也能格式化"""
+        entry = json.loads(JsonFormatter().format(make_record()))
+
+        assert entry['level'] == 'WARNING'
+        assert entry['topic'] is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
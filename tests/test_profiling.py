@@ -0,0 +1,93 @@
+import json
+import pytest
+from unittest.mock import patch
+from click.testing import CliRunner
+from kafka_flink_tool.cli import cli
+from kafka_flink_tool.logger import shutdown_logging
+from kafka_flink_tool.profiling import (
+    StageProfiler, current_profiler, format_timings, stage, start_profiling, stop_profiling
+)
+
+
+class TestProfiling:
+    """阶段耗时统计测试"""
+
+    def test_stage_disabled_without_profile(self):
+        """测试未开启 --profile 时 stage 不记录"""
+        assert current_profiler() is None
+        with stage('generate.sample'):
+            pass
+        assert current_profiler() is None
+
+    def test_repeated_and_nested_stages(self):
+        """测试同名阶段累加次数，内层的内存峰值计入外层"""
+        profiler = start_profiling()
+        try:
+            with stage('deploy.wait_job'):
+                for _ in range(3):
+                    with stage('api.GetJob'):
+                        buffer = bytearray(256 * 1024)
+                        del buffer
+        finally:
+            assert stop_profiling() is profiler
+
+        stages = {s['name']: s for s in profiler.timings()['stages']}
+        assert list(stages) == ['deploy.wait_job', 'api.GetJob']
+        assert stages['api.GetJob']['calls'] == 3
+        assert stages['deploy.wait_job']['calls'] == 1
+        assert stages['api.GetJob']['peak_kb'] >= 256
+        assert stages['deploy.wait_job']['peak_kb'] >= stages['api.GetJob']['peak_kb']
+        assert stages['deploy.wait_job']['wall_ms'] >= stages['api.GetJob']['wall_ms']
+
+    def test_format_timings(self):
+        """测试耗时表包含各阶段与合计"""
+        profiler = StageProfiler()
+        with profiler.stage('generate.infer'):
+            pass
+
+        table = format_timings(profiler.timings())
+        assert 'generate.infer' in table
+        assert table.splitlines()[-1].startswith('total')
+
+    def test_cli_profile_outputs(self, tmp_path):
+        """测试 --profile-stats / --profile-json 在命令结束后写出文件"""
+        demo_file = tmp_path / 'demo.txt'
+        demo_file.write_text('key:1,value:{"id": 1}\n', encoding='utf-8')
+        stats_file, json_file = tmp_path / 'run.pstats', tmp_path / 'run.json'
+
+        try:
+            result = CliRunner().invoke(cli, [
+                '--log-file', str(tmp_path / 'app.log'),
+                '--profile-stats', str(stats_file), '--profile-json', str(json_file),
+                'fetch', '--topic-name', 'demo', '--demo-file', str(demo_file)
+            ])
+        finally:
+            shutdown_logging()
+
+        assert result.exit_code == 0, result.output
+        assert stats_file.stat().st_size > 0
+        assert 'total_wall_ms' in json.loads(json_file.read_text(encoding='utf-8'))
+        assert current_profiler() is None
+
+    @pytest.mark.parametrize('skipped, saved', [(True, False), (False, True)])
+    def test_deploy_skip_keeps_stage_timings(self, tmp_path, skipped, saved):
+        """测试 deploy 因 SQL 未变化跳过部署时不覆盖记录上已有的耗时"""
+        with patch('kafka_flink_tool.service.AliyunFlinkService') as service_cls:
+            service = service_cls.return_value
+            service.generate_and_deploy.return_value = {
+                'sql_record_id': 7, 'skipped': skipped, 'deployment_id': 'd-1', 'job_id': 'j-1',
+                'status': 'RUNNING', 'aliyun_job_id': 3
+            }
+            try:
+                result = CliRunner().invoke(cli, [
+                    '--log-file', str(tmp_path / 'app.log'), '--profile', 'deploy', '--topic-name', 'orders'
+                ])
+            finally:
+                shutdown_logging()
+
+        assert result.exit_code == 0, result.output
+        assert service.dao.update_stage_timings.called is saved
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
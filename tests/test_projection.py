@@ -0,0 +1,67 @@
+import pytest
+from kafka_flink_tool.projection import FieldProjector
+from kafka_flink_tool.models import FieldProjection, FieldSchema, InferredSchema
+
+
+class TestFieldProjector:
+    """字段投影测试"""
+
+    @pytest.fixture
+    def schema(self):
+        """测试 Schema"""
+        return InferredSchema(
+            fields=[
+                FieldSchema(name="o_id", type="TEXT"),
+                FieldSchema(name="paid_amount", type="DOUBLE PRECISION"),
+                FieldSchema(name="pay_amount", type="DOUBLE PRECISION"),
+                FieldSchema(name="origin_data", type="TEXT"),
+                FieldSchema(name="created", type="TIMESTAMPTZ")
+            ],
+            sample_data_count=1
+        )
+
+    def test_no_projection(self, schema):
+        """测试未配置投影规则时保留全部字段"""
+        result = FieldProjector(None).apply(schema)
+
+        assert result is schema
+
+    def test_include(self, schema):
+        """测试 include 字段与正则"""
+        projection = FieldProjection(include=['o_id'], include_patterns=[r'.*_amount'])
+
+        result = FieldProjector(projection).apply(schema)
+
+        assert [f.name for f in result.fields] == ['o_id', 'paid_amount', 'pay_amount']
+        assert result.projected_out == ['origin_data', 'created']
+        assert result.projection == projection
+
+    def test_exclude(self, schema):
+        """测试 exclude 在 include 之后生效"""
+        projection = FieldProjection(
+            include_patterns=[r'.*'],
+            exclude=['origin_data'],
+            exclude_patterns=[r'pay_.*']
+        )
+
+        result = FieldProjector(projection).apply(schema)
+
+        assert [f.name for f in result.fields] == ['o_id', 'paid_amount', 'created']
+
+    def test_projection_recorded_in_schema(self, schema):
+        """测试投影规则随 inferred_schema 一起序列化"""
+        projection = FieldProjection(exclude=['origin_data'])
+
+        dumped = FieldProjector(projection).apply(schema).model_dump()
+
+        assert dumped['projection']['exclude'] == ['origin_data']
+        assert dumped['projected_out'] == ['origin_data']
+
+    def test_invalid_pattern(self):
+        """测试正则错误"""
+        with pytest.raises(ValueError, match="字段投影正则错误"):
+            FieldProjection(include_patterns=['(unclosed'])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,103 @@
+import pytest
+from unittest.mock import MagicMock, Mock, patch
+from kafka_flink_tool.config import FlinkSQLProfile, HologresConfig
+from kafka_flink_tool.database import HologresDAO
+from kafka_flink_tool.models import FieldSchema, FlinkSQLRecord, InferredSchema, KafkaTopicConfig
+from kafka_flink_tool.service import GeneratorService
+
+HOLOGRES_CONFIG = HologresConfig(host="h", vpc_host="h", port=80, database="db", user="u", password="p")
+SCHEMA = InferredSchema(fields=[FieldSchema(name="id", type="BIGINT")], sample_data_count=1)
+
+
+def _record(record_id: int, sink_table: str, version: int = 1, settings: dict = None) -> FlinkSQLRecord:
+    return FlinkSQLRecord(
+        id=record_id, topic_id=7, topic_name='orders', sink_table_name=sink_table, source_ddl='', sink_ddl='',
+        insert_sql='', full_sql='', inferred_schema=SCHEMA.model_dump(), version=version,
+        flink_settings=settings or {'profile': None, 'dedup_window': None}
+    )
+
+
+class TestRegenerate:
+    """离线重新生成测试"""
+
+    @pytest.fixture
+    def service(self):
+        """生成服务（DAO 使用 mock）"""
+        service = GeneratorService.__new__(GeneratorService)
+        service.config_manager = Mock()
+        service.config_manager.get_flink_sql_profile.return_value = (None, FlinkSQLProfile())
+        service.hologres_config = HOLOGRES_CONFIG
+        service.dao = Mock()
+        service._owns_dao = False
+        service.dao.get_topic_configs_by_ids.return_value = {7: KafkaTopicConfig(
+            id=7, topic_name='orders', kafka_brokers='kafka:9092', data_format='json', is_active=True
+        )}
+        service.dao.save_flink_sql_records.side_effect = lambda records: list(range(100, 100 + len(records)))
+        return service
+
+    def test_versions_bumped_per_sink_table(self, service):
+        """测试每张 Sink 表的版本号在当前最大版本上递增，同一张表的多条记录依次递增"""
+        service.dao.list_flink_sql_records.return_value = [
+            _record(1, 'stg_orders', 2), _record(2, 'stg_orders', 1), _record(3, 'stg_users', 1)
+        ]
+        service.dao.get_max_versions.return_value = {'stg_orders': 2, 'stg_users': 1}
+
+        assert service.regenerate([1, 2, 3]) == [100, 101, 102]
+
+        saved = service.dao.save_flink_sql_records.call_args.args[0]
+        assert [(r.sink_table_name, r.version, r.status) for r in saved] == [
+            ('stg_orders', 3, 'regenerated'), ('stg_orders', 4, 'regenerated'), ('stg_users', 2, 'regenerated')
+        ]
+        service.dao.get_max_versions.assert_called_once()
+
+    def test_missing_record_ids(self, service):
+        """测试指定的记录不存在时报错，不保存任何记录"""
+        service.dao.list_flink_sql_records.return_value = [_record(1, 'stg_orders')]
+
+        with pytest.raises(ValueError, match="SQL 记录不存在: 2, 5"):
+            service.regenerate([1, 2, 5])
+
+        service.dao.save_flink_sql_records.assert_not_called()
+
+    def test_generator_cached_per_settings(self, service):
+        """测试相同调优配置的记录复用同一个生成器"""
+        service.dao.list_flink_sql_records.return_value = [
+            _record(1, 'stg_a'), _record(2, 'stg_b'),
+            _record(3, 'stg_c', settings={'profile': None, 'dedup_window': '1 h'})
+        ]
+        service.dao.get_max_versions.return_value = {}
+
+        with patch.object(service, '_generator_for', wraps=service._generator_for) as generator_for:
+            service.regenerate([1, 2, 3])
+
+        assert generator_for.call_count == 2
+
+    def test_saved_in_single_batch(self, service):
+        """测试所有新版本记录通过一次批量保存写入，不逐条保存"""
+        service.dao.list_flink_sql_records.return_value = [_record(1, 'stg_a'), _record(2, 'stg_b')]
+        service.dao.get_max_versions.return_value = {}
+
+        service.regenerate()
+
+        service.dao.list_flink_sql_records.assert_called_once_with(None)
+        service.dao.save_flink_sql_records.assert_called_once()
+        assert len(service.dao.save_flink_sql_records.call_args.args[0]) == 2
+        service.dao.save_flink_sql_record.assert_not_called()
+
+    def test_batch_save_rolls_back_on_failure(self):
+        """测试批量保存失败时整批回滚"""
+        pytest.importorskip('psycopg2')
+        dao = HologresDAO(HOLOGRES_CONFIG)
+        connection = MagicMock()
+        dao._get_connection = lambda: connection
+
+        with patch('psycopg2.extras.execute_values', side_effect=RuntimeError("写入失败")):
+            with pytest.raises(RuntimeError, match="写入失败"):
+                dao.save_flink_sql_records([_record(None, 'stg_a'), _record(None, 'stg_b')])
+
+        connection.rollback.assert_called_once()
+        connection.commit.assert_not_called()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,104 @@
+import pytest
+from kafka_flink_tool.schema_evolution import SchemaEvolver
+from kafka_flink_tool.ddl_generator import DDLGenerator
+from kafka_flink_tool.models import FieldSchema, InferredSchema
+
+
+class TestSchemaEvolver:
+    """Schema 演进测试"""
+
+    @pytest.fixture
+    def stored(self):
+        """已存储的 Schema"""
+        return InferredSchema(
+            fields=[
+                FieldSchema(name="id", type="BIGINT"),
+                FieldSchema(name="amount", type="BIGINT"),
+                FieldSchema(name="status", type="TEXT"),
+                FieldSchema(name="legacy", type="TEXT")
+            ],
+            sample_data_count=10,
+            primary_key=['id']
+        )
+
+    @pytest.fixture
+    def live_columns(self):
+        """线上表结构"""
+        return {
+            'etl_time': 'timestamp with time zone',
+            'key_col': 'text',
+            'id': 'bigint',
+            'amount': 'bigint',
+            'status': 'text',
+            'legacy': 'text'
+        }
+
+    def test_no_changes(self, stored, live_columns):
+        """测试采样结构不变时没有变更"""
+        diff = SchemaEvolver().diff(stored, stored, live_columns)
+
+        assert not diff.has_changes
+        assert diff.merged.fields == stored.fields
+
+    def test_added_and_widened(self, stored, live_columns):
+        """测试新增字段与类型放宽，消失的字段保留"""
+        sampled = InferredSchema(
+            fields=[
+                FieldSchema(name="id", type="BIGINT"),
+                FieldSchema(name="amount", type="DOUBLE PRECISION"),
+                FieldSchema(name="status", type="BIGINT"),
+                FieldSchema(name="channel", type="TEXT")
+            ],
+            sample_data_count=10
+        )
+
+        diff = SchemaEvolver().diff(stored, sampled, live_columns)
+
+        assert [f.name for f in diff.added] == ['channel']
+        assert [(c.name, c.old_type, c.new_type) for c in diff.widened] == [
+            ('amount', 'BIGINT', 'DOUBLE PRECISION')
+        ]
+        assert [(c.name, c.new_type) for c in diff.incompatible] == [('status', 'BIGINT')]
+        assert [(f.name, f.type) for f in diff.merged.fields] == [
+            ('id', 'BIGINT'),
+            ('amount', 'DOUBLE PRECISION'),
+            ('status', 'TEXT'),
+            ('legacy', 'TEXT'),
+            ('channel', 'TEXT')
+        ]
+        assert diff.merged.primary_key == ['id']
+
+    def test_live_columns_take_precedence(self, stored, live_columns):
+        """测试线上已存在的列不会重复添加"""
+        live_columns['channel'] = 'text'
+        sampled = stored.model_copy(update={
+            'fields': stored.fields + [FieldSchema(name="channel", type="BIGINT")]
+        })
+
+        diff = SchemaEvolver().diff(stored, sampled, live_columns)
+
+        assert diff.added == []
+        assert diff.merged.fields[-1].type == 'TEXT'
+
+    def test_alter_ddls(self, stored, live_columns):
+        """测试生成 ALTER TABLE 语句"""
+        sampled = InferredSchema(
+            fields=[
+                FieldSchema(name="amount", type="DOUBLE PRECISION"),
+                FieldSchema(name="channel", type="TEXT")
+            ],
+            sample_data_count=10
+        )
+        diff = SchemaEvolver().diff(stored, sampled, live_columns)
+
+        ddls = DDLGenerator().generate_alter_ddls("stg_orders", diff)
+
+        assert ddls == [
+            'ALTER TABLE stg_orders ADD COLUMN "channel" TEXT;',
+            'COMMENT ON COLUMN stg_orders."channel" IS \'channel 字段\';',
+            'ALTER TABLE stg_orders ALTER COLUMN "amount" TYPE DOUBLE PRECISION;'
+        ]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,248 @@
+import json
+import pytest
+from kafka_flink_tool.sql_generator import FlinkSQLGenerator
+from kafka_flink_tool.config import HologresConfig
+from kafka_flink_tool.models import FieldSchema, InferredSchema, PartitionSpec
+
+
+class TestFlinkSQLGenerator:
+    """Flink SQL 生成器测试"""
+
+    @pytest.fixture
+    def hologres_config(self):
+        """测试配置"""
+        return HologresConfig(
+            host="holo-test",
+            vpc_host="holo-test-vpc",
+            port=80,
+            database="test_db",
+            user="test_user",
+            password="test_password"
+        )
+
+    @pytest.fixture
+    def schema(self):
+        """测试 Schema"""
+        return InferredSchema(
+            fields=[
+                FieldSchema(name="id", type="BIGINT"),
+                FieldSchema(name="name", type="TEXT"),
+                FieldSchema(name="created", type="TIMESTAMPTZ")
+            ],
+            sample_data_count=3
+        )
+
+    def test_full_sql_without_settings(self, schema, hologres_config):
+        """测试未配置调优参数时不生成 SET 语句"""
+        generator = FlinkSQLGenerator()
+
+        _, sink_ddl, _, full_sql = generator.generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", hologres_config
+        )
+
+        assert "SET " not in full_sql
+        assert full_sql.startswith("CREATE TEMPORARY TABLE kafka_source_orders")
+        assert "'jdbcWriteBatchSize' = '256'" in sink_ddl
+        assert "'mutatetype' = 'insertOrIgnore'" in sink_ddl
+
+    def test_full_sql_with_settings(self, schema, hologres_config):
+        """测试调优参数生成 SET 语句并覆盖 Sink 缓冲参数"""
+        generator = FlinkSQLGenerator(
+            settings={
+                'table.exec.mini-batch.enabled': True,
+                'table.exec.mini-batch.allow-latency': '5s',
+                'pipeline.object-reuse': True
+            },
+            sink_options={'jdbcWriteBatchSize': 1024}
+        )
+
+        _, sink_ddl, _, full_sql = generator.generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", hologres_config
+        )
+
+        assert full_sql.startswith(
+            "SET 'table.exec.mini-batch.enabled' = 'true';\n"
+            "SET 'table.exec.mini-batch.allow-latency' = '5s';\n"
+            "SET 'pipeline.object-reuse' = 'true';\n\n"
+        )
+        assert "'jdbcWriteBatchSize' = '1024'" in sink_ddl
+        assert "'jdbcWriteFlushInterval' = '10000'" in sink_ddl
+
+    def test_effective_settings(self):
+        """测试实际生效的调优参数"""
+        generator = FlinkSQLGenerator(
+            settings={'execution.checkpointing.interval': '60s'},
+            sink_options={'connectionSize': 5}
+        )
+
+        effective = generator.get_effective_settings()
+
+        assert effective['settings'] == {'execution.checkpointing.interval': '60s'}
+        assert effective['sink_options']['connectionSize'] == '5'
+        assert effective['sink_options']['jdbcWriteBatchSize'] == '256'
+
+    def test_unsupported_setting(self):
+        """测试不支持的 SET 参数"""
+        with pytest.raises(ValueError, match="Flink 作业参数不在支持列表中"):
+            FlinkSQLGenerator(settings={'table.exec.unknown': 'x'})
+
+    def test_unsupported_sink_option(self):
+        """测试不支持的 Sink 参数"""
+        with pytest.raises(ValueError, match="Sink 缓冲参数不在支持列表中"):
+            FlinkSQLGenerator(sink_options={'mutatetype': 'insertOrIgnore'})
+
+    def test_primary_key_sink(self, schema, hologres_config):
+        """测试有主键时 Sink 声明主键并使用 insertOrReplace"""
+        schema.primary_key = ['id']
+        generator = FlinkSQLGenerator()
+
+        _, sink_ddl, insert_sql, _ = generator.generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", hologres_config
+        )
+
+        assert "PRIMARY KEY (`id`) NOT ENFORCED" in sink_ddl
+        assert "'mutatetype' = 'insertOrReplace'" in sink_ddl
+        assert insert_sql.endswith("WHERE `value_id` IS NOT NULL;")
+
+    def test_partition_column(self, schema, hologres_config):
+        """测试分区表：INSERT 计算分区列，物理分区开启分区路由"""
+        schema.primary_key = ['id']
+        schema.partition = PartitionSpec(mode='physical', source_field='created')
+        generator = FlinkSQLGenerator()
+
+        _, sink_ddl, insert_sql, _ = generator.generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", hologres_config
+        )
+
+        assert "PRIMARY KEY (`id`, `ds`) NOT ENFORCED" in sink_ddl
+        assert "'partitionrouter' = 'true'" in sink_ddl
+        assert ("DATE_FORMAT(COALESCE(cast(`value_created` as timestamp), cast(now() as timestamp)), "
+                "'yyyyMMdd') as `ds`") in insert_sql
+
+    def test_dedup_defaults_to_primary_key(self, schema, hologres_config):
+        """测试去重键默认使用主键"""
+        schema.primary_key = ['id']
+        generator = FlinkSQLGenerator(dedup_window='30s')
+
+        source_ddl, _, _, _ = generator.generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", hologres_config
+        )
+
+        assert "PARTITION BY `value_id` ORDER BY `proc_time` DESC" in source_ddl
+
+    def test_dedup_stage(self, schema, hologres_config):
+        """测试启用去重窗口时 INSERT 从去重视图读取"""
+        generator = FlinkSQLGenerator(dedup_window='30s')
+
+        source_ddl, _, insert_sql, full_sql = generator.generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", hologres_config
+        )
+
+        assert "`proc_time` AS PROCTIME()" in source_ddl
+        assert "CREATE TEMPORARY VIEW dedup_orders AS" in source_ddl
+        assert "PARTITION BY `key_col` ORDER BY `proc_time` DESC" in source_ddl
+        assert "FROM dedup_orders\n" in insert_sql
+        assert "SET 'table.exec.state.ttl' = '30s';" in full_sql
+        assert "SET 'table.exec.mini-batch.enabled' = 'true';" in full_sql
+
+    def test_dedup_without_primary_key_uses_key_col(self, schema, hologres_config):
+        """测试没有主键时去重键作为 Sink 主键，以 insertOrReplace 保留每个 key 最新的一行"""
+        assert schema.primary_key == []
+        generator = FlinkSQLGenerator(dedup_window='30s')
+
+        _, sink_ddl, insert_sql, _ = generator.generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", hologres_config
+        )
+
+        assert "PRIMARY KEY (`key_col`) NOT ENFORCED" in sink_ddl
+        assert "'mutatetype' = 'insertOrReplace'" in sink_ddl
+        assert insert_sql.endswith("FROM dedup_orders\nWHERE `key_col` IS NOT NULL;")
+        assert generator.sink_schema(schema).primary_key == ['key_col']
+        assert FlinkSQLGenerator().sink_schema(schema) is schema
+
+    def test_dedup_custom_keys(self, schema, hologres_config):
+        """测试按指定列去重，且不覆盖显式配置的参数"""
+        generator = FlinkSQLGenerator(
+            settings={'table.exec.mini-batch.allow-latency': '2s'},
+            dedup_window='1 min'
+        )
+
+        source_ddl, _, _, _ = generator.generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", hologres_config,
+            dedup_keys=['id']
+        )
+
+        assert "PARTITION BY `value_id` ORDER BY `proc_time` DESC" in source_ddl
+        assert generator.settings['table.exec.mini-batch.allow-latency'] == '2s'
+        assert generator.settings['table.exec.state.ttl'] == '1 min'
+
+    def test_invalid_dedup_window(self):
+        """测试去重窗口格式错误"""
+        with pytest.raises(ValueError, match="去重窗口格式错误"):
+            FlinkSQLGenerator(dedup_window='thirty seconds')
+
+    def test_regenerate_from_stored_schema(self, schema, hologres_config):
+        """测试从存储的 JSON Schema 重新生成的 SQL 与原 SQL 一致"""
+        schema.primary_key = ['id']
+        schema.partition = PartitionSpec(mode='logical', source_field='created', ttl_seconds=86400)
+        generator = FlinkSQLGenerator(dedup_window='30s')
+
+        original = generator.generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", hologres_config
+        )
+        stored = InferredSchema.model_validate(json.loads(schema.model_dump_json()))
+        regenerated = generator.generate_full_sql(
+            "orders", "stg_orders", stored, "broker:9092", hologres_config
+        )
+
+        assert regenerated == original
+
+    def test_sql_hash_ignores_whitespace(self, schema, hologres_config):
+        """测试 SQL 哈希忽略空白差异、区分调优参数"""
+        generator = FlinkSQLGenerator()
+        _, _, _, full_sql = generator.generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", hologres_config
+        )
+        settings = generator.get_effective_settings()
+
+        sql_hash = FlinkSQLGenerator.compute_sql_hash(full_sql, settings)
+        reformatted = full_sql.replace("\n", "\n  ").replace(", ", ",   ")
+
+        assert FlinkSQLGenerator.compute_sql_hash(reformatted, dict(reversed(settings.items()))) == sql_hash
+        assert FlinkSQLGenerator.compute_sql_hash(full_sql, {**settings, 'dedup_window': '30s'}) != sql_hash
+
+    def test_value_format_options(self, schema, hologres_config):
+        """测试 Source 使用消息格式对应的 value format 参数，JSON 为默认值"""
+        generator = FlinkSQLGenerator()
+
+        json_ddl, _, _, _ = generator.generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", hologres_config
+        )
+        avro_ddl, _, _, _ = generator.generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", hologres_config,
+            value_format={'value.format': 'avro-confluent', 'value.avro-confluent.url': 'http://registry:8081',
+                          'value.avro-confluent.basic-auth.user-info': "flink:it's"}
+        )
+
+        assert "    'value.format' = 'json',\n    'value.fields-prefix'" in json_ddl
+        assert "'value.format' = 'json'" not in avro_ddl
+        assert "    'value.format' = 'avro-confluent',\n    'value.avro-confluent.url' = 'http://registry:8081'," in avro_ddl
+        assert "'value.avro-confluent.basic-auth.user-info' = 'flink:it''s'," in avro_ddl
+
+    def test_startup_offsets(self, schema, hologres_config):
+        """测试回填后从边界 offset 启动，起始 offset 随调优参数保存；未指定时哈希不变"""
+        generator = FlinkSQLGenerator(startup_offsets={'1': 300, '0': 42})
+
+        source_ddl, _, _, full_sql = generator.generate_full_sql(
+            "orders", "stg_orders", schema, "broker:9092", hologres_config
+        )
+
+        assert "'scan.startup.mode' = 'specific-offsets'," in source_ddl
+        assert "'scan.startup.specific-offsets' = 'partition:0,offset:42;partition:1,offset:300'" in source_ddl
+        assert "earliest-offset" not in source_ddl
+        assert generator.get_effective_settings()['startup_offsets'] == {'0': 42, '1': 300}
+        assert 'startup_offsets' not in FlinkSQLGenerator().get_effective_settings()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
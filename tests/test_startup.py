@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+SRC_DIR = Path(__file__).resolve().parent.parent / 'src'
+
+# 调度器每天调用 CLI 上千次，启动只应加载 click 和本包
+STARTUP_BUDGET_US = 200_000
+HEAVY_PACKAGES = {'Tea', 'kafka', 'psycopg2', 'pydantic', 'yaml'}
+
+
+def import_times(args, cwd):
+    """用 -X importtime 运行，返回 {模块名: 累计耗时（微秒）}"""
+    env = {**os.environ, 'PYTHONPATH': str(SRC_DIR)}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def heavy_modules(times):
+    return sorted(
+        name for name in times
+        if name.split('.')[0] in HEAVY_PACKAGES or name.startswith('alibabacloud_')
+    )
+
+
+class TestStartup:
+    """CLI 启动耗时测试"""
+
+    def test_cli_import_budget(self, tmp_path):
+        """测试导入 CLI 不加载 SDK、数据库驱动和 pydantic，且在预算内"""
+        times = import_times(['-c', 'import kafka_flink_tool.cli'], tmp_path)
+
+        assert heavy_modules(times) == []
+        assert times['kafka_flink_tool.cli'] < STARTUP_BUDGET_US
+
+    def test_fetch_demo_file_skips_backends(self, tmp_path):
+        """测试从文件拉取数据时不导入 kafka-python、psycopg2 和阿里云 SDK"""
+        demo_file = tmp_path / 'demo.txt'
+        demo_file.write_text('key:1,value:{"id": 1}\n', encoding='utf-8')
+
+        times = import_times(
+            ['-m', 'kafka_flink_tool', 'fetch', '--topic-name', 'demo', '--demo-file', str(demo_file)],
+            tmp_path
+        )
+
+        assert not [name for name in heavy_modules(times) if not name.startswith(('pydantic', 'yaml'))]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
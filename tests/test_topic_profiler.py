@@ -0,0 +1,58 @@
+import json
+import pytest
+from kafka_flink_tool.formats import CsvFormat
+from kafka_flink_tool.topic_profiler import TopicProfiler, format_bytes
+
+
+class TestTopicProfiler:
+    """Topic 画像测试"""
+
+    def test_summarize(self):
+        """测试消息大小、字段数与每日写入量估算"""
+        payloads = [json.dumps({'id': i, 'name': 'x' * i}).encode() for i in range(100)]
+
+        profile = TopicProfiler.summarize('orders', payloads, 10.0, 4, 60)
+
+        sizes = sorted(len(p) for p in payloads)
+        assert profile.sample_count == 100
+        assert profile.avg_message_bytes == round(sum(sizes) / 100, 1)
+        assert profile.p99_message_bytes == sizes[98]
+        assert profile.field_count == 2
+        assert profile.compression_ratio > 1
+        expected = int(10.0 * 86400 * (sum(sizes) / 100) / profile.compression_ratio)
+        assert abs(profile.estimated_bytes_per_day - expected) <= 86400 * 0.01 * sizes[-1]
+
+    def test_summarize_skips_invalid_json(self):
+        """测试非 JSON 消息计入大小但不计入字段数"""
+        profile = TopicProfiler.summarize('orders', [b'not json', b'{"a": 1}'], 0, 1, 60)
+
+        assert profile.sample_count == 2
+        assert profile.field_count == 1
+        assert profile.estimated_bytes_per_day == 0
+
+    def test_summarize_decodes_with_topic_format(self):
+        """测试非 JSON Topic 按其消息格式解码统计字段数"""
+        payloads = [f"{i},PAID,{i * 1.5}".encode() for i in range(10)]
+
+        assert TopicProfiler.summarize('orders', payloads, 0, 1, 60).field_count == 0
+        profile = TopicProfiler.summarize('orders', payloads, 0, 1, 60, CsvFormat(['o_id', 'status', 'amount']))
+
+        assert profile.sample_count == 10
+        assert profile.field_count == 3
+
+    def test_summarize_empty(self):
+        """测试没有采样数据时不报错"""
+        profile = TopicProfiler.summarize('orders', [], 5.0, 1, 60)
+
+        assert profile.avg_message_bytes == 0
+        assert profile.compression_ratio == 1.0
+
+    def test_format_bytes(self):
+        """测试字节数格式化"""
+        assert format_bytes(512) == "512 B"
+        assert format_bytes(1536) == "1.5 KB"
+        assert format_bytes(3 * 1024 ** 3) == "3.0 GB"
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
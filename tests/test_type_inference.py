@@ -0,0 +1,85 @@
+import pytest
+from kafka_flink_tool.type_inference import TypeInferencer
+
+
+class TestTypeInferencer:
+    """类型推断测试"""
+
+    @pytest.fixture
+    def inferencer(self):
+        return TypeInferencer()
+
+    def test_infer_schema(self, inferencer):
+        """测试字段类型推断"""
+        messages = [
+            {'id': 1, 'name': 'a', 'amount': 1.5, 'paid': True, 'created': '2025-01-01 10:00:00'},
+            {'id': 2, 'name': 'b', 'amount': 2, 'paid': False, 'created': '2025-01-02 10:00:00'}
+        ]
+
+        schema = inferencer.infer_schema(messages)
+
+        assert [(f.name, f.type) for f in schema.fields] == [
+            ('id', 'BIGINT'),
+            ('name', 'TEXT'),
+            ('amount', 'DOUBLE PRECISION'),
+            ('paid', 'BOOLEAN'),
+            ('created', 'TIMESTAMPTZ')
+        ]
+
+    def test_primary_key_prefers_kafka_key(self, inferencer):
+        """测试 Kafka key 非空且唯一时优先作为主键"""
+        messages = [{'id': 1}, {'id': 2}]
+        schema = inferencer.infer_schema(messages)
+
+        primary_key = inferencer.infer_primary_key(messages, schema, ['k1', 'k2'])
+
+        assert primary_key == ['key_col']
+
+    def test_primary_key_from_value_field(self, inferencer):
+        """测试 Kafka key 不可用时选择唯一非空、名称像 ID 的 value 字段"""
+        messages = [{'score': i * 1.5, 'shop': f"s{i % 2}", 'order_id': 100 + i} for i in range(10)]
+        schema = inferencer.infer_schema(messages)
+
+        primary_key = inferencer.infer_primary_key(messages, schema, [None] * 10)
+
+        assert primary_key == ['order_id']
+
+    def test_unique_non_id_field_not_chosen(self, inferencer):
+        """测试 status 等非 ID 字段即使在样本中恰好唯一也不作为主键"""
+        messages = [{'status': f"s{i}", 'name': f"n{i}", 'amount': i * 1.5} for i in range(10)]
+        schema = inferencer.infer_schema(messages)
+
+        assert inferencer.infer_primary_key(messages, schema, [None] * 10) == []
+
+    def test_value_field_needs_enough_samples(self, inferencer):
+        """测试样本不足时不从 value 字段推断主键"""
+        messages = [{'order_id': 100}, {'order_id': 101}, {'order_id': 102}]
+        schema = inferencer.infer_schema(messages)
+
+        assert inferencer.infer_primary_key(messages, schema, [None, None, None]) == []
+
+    def test_primary_key_ignores_exact_resends(self, inferencer):
+        """测试完全相同的重发消息不影响唯一性"""
+        messages = [{'id': 1, 'v': 'a'}, {'id': 1, 'v': 'a'}, {'id': 2, 'v': 'b'}]
+        schema = inferencer.infer_schema(messages)
+
+        primary_key = inferencer.infer_primary_key(messages, schema, ['1', '1', '2'])
+
+        assert primary_key == ['key_col']
+
+    def test_no_safe_primary_key(self, inferencer):
+        """测试没有安全主键时返回空列表"""
+        messages = [
+            {'id': 1, 'amount': 1.5},
+            {'id': None, 'amount': 2.5},
+            {'id': 3, 'amount': 1.5}
+        ]
+        schema = inferencer.infer_schema(messages)
+
+        primary_key = inferencer.infer_primary_key(messages, schema, ['k', 'k', None])
+
+        assert primary_key == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
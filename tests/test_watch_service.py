@@ -0,0 +1,125 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+from kafka_flink_tool.config import WatchConfig
+from kafka_flink_tool.models import AliyunFlinkJob, FlinkSQLRecord, KafkaTopicConfig, TopicChange, TopicOnboarding
+from kafka_flink_tool.service import WatchService
+
+BASE_TIME = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def make_change(topic_id: int, has_record: bool = False, is_active: bool = True) -> TopicChange:
+    return TopicChange(
+        topic=KafkaTopicConfig(id=topic_id, topic_name=f"topic_{topic_id}", kafka_brokers='kafka:9092',
+                               data_format='json', is_active=is_active),
+        updated_at=BASE_TIME + timedelta(seconds=topic_id),
+        has_record=has_record
+    )
+
+
+class TestWatchService:
+    """watch 模式测试"""
+
+    @pytest.fixture
+    def worker(self):
+        """工作线程中的服务（DAO 与生成/部署使用 mock）"""
+        worker = Mock()
+        worker.dao.get_latest_flink_sql_record_by_topic.return_value = None
+        worker.generator.generate.side_effect = lambda topic_name, job_profile=None: 100 + int(topic_name[6:])
+        return worker
+
+    @pytest.fixture
+    def service(self, bare_service, worker):
+        service = bare_service(WatchService, worker)
+        service.name = 'default'
+        service.watch_config = WatchConfig(batch_size=2, concurrency=2)
+        service.dao.list_retryable_topic_onboardings.return_value = []
+        service.dao.get_topic_onboardings.return_value = {}
+        service.dao.get_watch_checkpoint.return_value = None
+        service.dao.list_unonboarded_topics.return_value = []
+        service._executor = ThreadPoolExecutor(max_workers=2)
+        yield service
+        service._executor.shutdown()
+
+    def test_generates_new_topics_and_checkpoints_each_batch(self, service, worker):
+        """测试只处理启用且没有 SQL 记录的 Topic，每批处理完后推进水位"""
+        service.dao.list_topic_changes.side_effect = [
+            [make_change(1), make_change(2, has_record=True)],
+            [make_change(3, is_active=False)],
+        ]
+
+        results = service.run_once()
+
+        assert [(r.topic_name, r.status, r.sql_record_id) for r in results] == [('topic_1', 'generated', 101)]
+        checkpoints = [call.args[1] for call in service.dao.save_watch_checkpoint.call_args_list]
+        assert checkpoints == [(BASE_TIME + timedelta(seconds=2), 2), (BASE_TIME + timedelta(seconds=3), 3)]
+        # 第二批从第一批的水位之后读取
+        assert service.dao.list_topic_changes.call_args_list[1].args[0] == checkpoints[0]
+        worker.dao.save_topic_onboarding.assert_called_once()
+
+    def test_failure_is_recorded_and_watermark_advances(self, service, worker):
+        """测试失败的 Topic 记录错误与次数，不阻塞水位"""
+        service.dao.list_topic_changes.return_value = [make_change(1)]
+        worker.generator.generate.side_effect = ValueError("没有获取到任何数据")
+
+        results = service.run_once()
+
+        assert results[0].status == 'failed'
+        assert results[0].attempts == 1
+        assert "没有获取到任何数据" in results[0].last_error
+        service.dao.save_watch_checkpoint.assert_called_once()
+
+    def test_retry_resumes_existing_deployment(self, service, worker):
+        """测试重试时已有 SQL 记录与部署记录的 Topic 从部署记录继续，不重新生成"""
+        service.watch_config.deploy = True
+        service.dao.list_retryable_topic_onboardings.return_value = [
+            TopicOnboarding(topic_id=1, topic_name='topic_1', status='failed', attempts=1)
+        ]
+        service.dao.get_topic_configs_by_ids.return_value = {1: make_change(1).topic}
+        service.dao.get_topic_onboardings.return_value = {
+            1: TopicOnboarding(topic_id=1, topic_name='topic_1', status='failed', attempts=1)
+        }
+        # 水位之后仍能读到该 Topic，本轮不应重复处理
+        service.dao.list_topic_changes.return_value = [make_change(1)]
+        worker.dao.get_latest_flink_sql_record_by_topic.return_value = FlinkSQLRecord(
+            id=7, topic_id=1, topic_name='topic_1', sink_table_name='stg_topic_1',
+            source_ddl='', sink_ddl='', insert_sql='', full_sql=''
+        )
+        worker.dao.get_latest_aliyun_flink_job_by_record.return_value = AliyunFlinkJob(
+            id=3, sql_record_id=7, step='draft_created'
+        )
+        worker.resume.return_value = {'sql_record_id': 7, 'aliyun_job_id': 3}
+
+        results = service.run_once()
+
+        assert [(r.status, r.attempts, r.aliyun_job_id) for r in results] == [('deployed', 2, 3)]
+        worker.resume.assert_called_once_with(3)
+        worker.generate_and_deploy.assert_not_called()
+
+    def test_activated_without_updated_at_is_onboarded(self, service, worker):
+        """测试只修改 is_active、未更新 updated_at 的 Topic 由补扫接入，水位内已处理的 Topic 不重复处理"""
+        service.dao.list_topic_changes.return_value = [make_change(1)]
+        service.dao.list_unonboarded_topics.return_value = [make_change(1).topic, make_change(5).topic]
+
+        results = service.run_once()
+
+        assert [(r.topic_name, r.status, r.sql_record_id) for r in results] == [
+            ('topic_1', 'generated', 101), ('topic_5', 'generated', 105)
+        ]
+        service.dao.list_unonboarded_topics.assert_called_once_with(2)
+        assert worker.generator.generate.call_count == 2
+
+    def test_dry_run_does_not_checkpoint(self, service, worker):
+        """测试 dry-run 只列出待接入的 Topic"""
+        service.dao.list_topic_changes.return_value = [make_change(1)]
+
+        results = service.run_once(dry_run=True)
+
+        assert [r.status for r in results] == ['pending']
+        service.dao.save_watch_checkpoint.assert_not_called()
+        worker.generator.generate.assert_not_called()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])